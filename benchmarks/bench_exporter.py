@@ -0,0 +1,115 @@
+"""
+Benchmark de los exportadores
+==============================
+Mide filas/segundo de export() y export_chunks() sobre un DataFrame con
+la forma de supplier site, para cada formato de salida.
+
+Uso:
+    python -m benchmarks.bench_exporter --rows 1000000
+    python -m benchmarks.bench_exporter --rows 1000000 --formats xlsx parquet csv
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.frames import supplier_site_frame, iter_chunks
+from config.settings import EXPORT_CONFIG
+from utils.excel_exporter import create_exporter, generate_output_filename
+
+
+def run(
+    rows: int,
+    chunk_size: int = None,
+    paths=("export", "export_chunks"),
+    auto_width: bool = False,
+    formats=("xlsx",)
+) -> dict:
+    """
+    Ejecuta el benchmark y retorna filas/segundo por exportador.
+    
+    Args:
+        rows: Número de filas del DataFrame sintético
+        chunk_size: Filas por chunk para export_chunks
+        paths: Exportadores a medir
+        auto_width: Si incluir el ajuste de anchos en la medición
+        formats: Formatos de salida a medir
+        
+    Returns:
+        Dict {"formato/exportador": {"seconds": ..., "rows_per_sec": ...}}
+    """
+    df = supplier_site_frame(rows)
+    return time_exporters(df, "Supplier Site", chunk_size, paths, auto_width, formats)
+
+
+def time_exporters(
+    df,
+    sheet_name: str,
+    chunk_size: int = None,
+    paths=("export", "export_chunks"),
+    auto_width: bool = False,
+    formats=("xlsx",),
+    column_widths: dict = None,
+    layout=None
+) -> dict:
+    """
+    Mide cada exportador sobre un DataFrame, escribiendo en una carpeta
+    temporal. Con layout, df trae solo las columnas leídas del reporte.
+    
+    Returns:
+        Dict {"formato/exportador": {"seconds": ..., "rows_per_sec": ...}}
+    """
+    chunk_size = chunk_size or EXPORT_CONFIG.chunk_size
+    rows = len(df)
+    results = {}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for output_format in formats:
+            for path in paths:
+                filename = generate_output_filename(path, output_format=output_format)
+                exporter = create_exporter(
+                    output_format, str(Path(tmp) / filename), sheet_name,
+                    column_widths=column_widths, layout=layout
+                )
+                start = time.perf_counter()
+                if path == "export":
+                    exporter.export(df, auto_width=auto_width)
+                else:
+                    exporter.export_chunks(iter_chunks(df, chunk_size), auto_width=auto_width)
+                seconds = time.perf_counter() - start
+                results[f"{output_format}/{path}"] = {
+                    "seconds": round(seconds, 3),
+                    "rows_per_sec": round(rows / seconds, 1),
+                }
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de exportadores")
+    parser.add_argument("--rows", type=int, default=100_000, help="Filas del DataFrame")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Filas por chunk")
+    parser.add_argument(
+        "--paths", nargs="+", default=["export", "export_chunks"],
+        help="Exportadores a medir"
+    )
+    parser.add_argument(
+        "--auto-width", action="store_true",
+        help="Incluir el ajuste de anchos de columna"
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=["xlsx"],
+        help="Formatos de salida a medir (xlsx, parquet, arrow, csv)"
+    )
+    args = parser.parse_args()
+    
+    results = run(args.rows, args.chunk_size, args.paths, args.auto_width, args.formats)
+    print(f"\nFilas: {args.rows:,}")
+    for path, result in results.items():
+        print(f"  {path:22} {result['seconds']:>9.2f} s  {result['rows_per_sec']:>12,.0f} filas/s")
+
+
+if __name__ == "__main__":
+    main()
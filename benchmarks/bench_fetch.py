@@ -0,0 +1,178 @@
+"""
+Benchmark de lectura de resultados
+===================================
+Compara pd.read_sql con el lector columnar (utils/columnar.py) sobre un
+resultado con la forma de supplier site.
+
+Fuentes:
+- records: cursor en memoria con los tipos que entrega pyodbc para SQL
+  Server (Decimal, datetime, int, CHAR de códigos), sin costo de red.
+- sqlite: la misma tabla cargada en SQLite en memoria (sin tipos en
+  cursor.description, el lector los infiere).
+
+Uso:
+    python -m benchmarks.bench_fetch --rows 200000
+    python -m benchmarks.bench_fetch --rows 200000 --sources records
+"""
+import argparse
+import datetime
+import decimal
+import sqlite3
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.frames import (
+    supplier_site_frame, SITE_AMOUNT_COLUMNS, SITE_DATE_COLUMNS
+)
+from utils.columnar import fetch_columnar
+
+
+# Columnas de texto corto que SQL Server declara como CHAR(n) de códigos
+CODE_COLUMNS = {"COUNTRY (M)": 10, "PO_Usage": 3, "DEFAULT_REP_COUNTRY_CODE": 3}
+
+
+class RecordCursor:
+    """Cursor DB-API mínimo sobre una lista de tuplas."""
+    
+    def __init__(self, rows, description):
+        self._rows = rows
+        self._position = 0
+        self.description = description
+    
+    def execute(self, *args, **kwargs):
+        self._position = 0
+        return self
+    
+    def fetchmany(self, size):
+        batch = self._rows[self._position:self._position + size]
+        self._position += len(batch)
+        return batch
+    
+    def fetchall(self):
+        return self.fetchmany(len(self._rows) - self._position)
+    
+    def nextset(self):
+        return False
+    
+    def close(self):
+        pass
+
+
+class RecordConnection:
+    """Conexión DB-API mínima que entrega RecordCursor (para pd.read_sql)."""
+    
+    def __init__(self, rows, description):
+        self._rows = rows
+        self._description = description
+    
+    def cursor(self):
+        return RecordCursor(self._rows, self._description)
+    
+    def commit(self):
+        pass
+
+
+def site_records(df: pd.DataFrame):
+    """
+    Convierte el DataFrame a filas con los tipos de pyodbc y arma
+    cursor.description (name, type_code, display, internal_size, precision, scale, null_ok).
+    """
+    columns = {}
+    description = []
+    for name in df.columns:
+        series = df[name]
+        if name in SITE_AMOUNT_COLUMNS:
+            values = [
+                None if pd.isna(v) else decimal.Decimal(f"{v:.9f}")
+                for v in series
+            ]
+            description.append((name, decimal.Decimal, 38, 38, 38, 9, True))
+        elif name in SITE_DATE_COLUMNS:
+            values = [None if pd.isna(v) else v.to_pydatetime() for v in series]
+            description.append((name, datetime.datetime, 23, 23, 23, 3, True))
+        elif pd.api.types.is_integer_dtype(series):
+            values = series.tolist()
+            description.append((name, int, 10, 10, 10, 0, True))
+        elif pd.api.types.is_float_dtype(series):
+            values = [None if np.isnan(v) else int(v) for v in series]
+            description.append((name, int, 10, 10, 10, 0, True))
+        else:
+            values = [None if v is None or v is np.nan else v for v in series.astype(object)]
+            size = CODE_COLUMNS.get(name, 200)
+            description.append((name, str, size, size, size, 0, True))
+        columns[name] = values
+    
+    rows = list(zip(*columns.values()))
+    return rows, description
+
+
+def run(rows: int, batch_size: int = None, sources=("records", "sqlite")) -> dict:
+    """
+    Ejecuta el benchmark.
+    
+    Returns:
+        Dict {"fuente/lector": {"seconds": ..., "rows_per_sec": ..., "memory_mb": ...}}
+    """
+    df = supplier_site_frame(rows)
+    results = {}
+    
+    def measure(label, read):
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # read_sql sin SQLAlchemy
+            result = read()
+        seconds = time.perf_counter() - start
+        results[label] = {
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1),
+            "memory_mb": round(result.memory_usage(deep=True).sum() / 2 ** 20, 1),
+        }
+    
+    if "records" in sources:
+        records, description = site_records(df)
+        connection = RecordConnection(records, description)
+        measure("records/read_sql", lambda: pd.read_sql("SELECT", connection))
+        measure("records/columnar", lambda: fetch_columnar(
+            connection.cursor().execute(), batch_size=batch_size
+        ))
+    
+    if "sqlite" in sources:
+        connection = sqlite3.connect(":memory:")
+        table = df.copy()
+        for column in SITE_DATE_COLUMNS:
+            table[column] = table[column].dt.strftime("%Y-%m-%d")
+        table.to_sql("site", connection, index=False)
+        measure("sqlite/read_sql", lambda: pd.read_sql("SELECT * FROM site", connection))
+        measure("sqlite/columnar", lambda: fetch_columnar(
+            connection.execute("SELECT * FROM site"), batch_size=batch_size
+        ))
+        connection.close()
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lectura de resultados")
+    parser.add_argument("--rows", type=int, default=100_000, help="Filas del resultado")
+    parser.add_argument("--batch-size", type=int, default=None, help="Filas por fetchmany()")
+    parser.add_argument(
+        "--sources", nargs="+", default=["records", "sqlite"],
+        help="Fuentes a medir (records, sqlite)"
+    )
+    args = parser.parse_args()
+    
+    results = run(args.rows, args.batch_size, args.sources)
+    print(f"\nFilas: {args.rows:,}")
+    for label, result in results.items():
+        print(f"  {label:24} {result['seconds']:>8.2f} s  "
+              f"{result['rows_per_sec']:>12,.0f} filas/s  {result['memory_mb']:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Benchmark de reportes sobre un ERP sintético
+=============================================
+Ejecuta supplier_header y supplier_site (motor pandas) contra una BD local
+con el ERP sintético de benchmarks/erp.py y mide cada etapa del reporte:
+
+- fetch/<lector>/read: lecturas de CiaTab+atributos, DocCab y LocTab
+  (read_sql o lector columnar, ver FETCH_CONFIG.backend)
+- fetch/<lector>/compute: VALID_LOCS, agregación de métricas y filtro de
+  prioridad en pandas (reports/suppliers/engine.py)
+- dtypes: optimización de tipos tras el fetch (utils/dtypes.py), con la
+  memoria antes y después
+- transform: transform() y mapeo de columnas del reporte
+- <formato>/<exportador>: cada exportador (export y export_chunks)
+
+Las queries de SQL Server (T-SQL con tablas temporales, OUTER APPLY,
+variables de tabla) no corren en SQLite/DuckDB, así que cada reporte
+sobrescribe solo las tres lecturas del motor pandas con el dialecto
+local; el resto es el código real del reporte. Los reportes de clientes
+solo tienen el motor 'sql' y no se miden aquí.
+
+Cada corrida se agrega a benchmarks/results/history.json y se compara con
+la anterior de los mismos parámetros (ver benchmarks/history.py).
+
+Uso:
+    python -m benchmarks.bench_reports --scale 1 10
+    python -m benchmarks.bench_reports --scale 100 --formats xlsx parquet csv
+    python -m benchmarks.bench_reports --backend duckdb --repeat 3
+    python -m benchmarks.bench_reports --reports supplier_site
+"""
+import argparse
+import time
+import warnings
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks import erp
+from benchmarks.bench_exporter import time_exporters
+from benchmarks.history import DEFAULT_HISTORY, REGRESSION_THRESHOLD, print_comparison, record_run
+from config.settings import EXCLUDED_VENDOR_CODES, VALID_ORIGIN_CODES
+from reports.contacts import CONTACT_TYPES, contact_column
+from reports.query import SqlQuery
+from reports.suppliers import engine
+from reports.suppliers import header, site
+from reports.suppliers.header import METRIC_COLUMNS, SupplierHeaderReport
+from reports.suppliers.site import SupplierSiteReport
+from utils.columnar import fetch_columnar
+from utils.dtypes import frame_memory
+
+
+FETCH_BACKENDS: tuple = ("read_sql", "columnar")
+
+
+# ============================================
+# BD LOCAL Y REPORTE
+# ============================================
+class LocalDatabase:
+    """
+    Reemplazo de DatabaseConnection sobre la BD local: misma interfaz que
+    usan los reportes (execute_query, server_time) y acumula el tiempo de
+    lectura.
+    """
+    
+    is_connected = True
+    
+    def __init__(self, connection, fetch_backend: str = "read_sql"):
+        self.connection = connection
+        self.fetch_backend = fetch_backend
+        self.read_seconds = 0.0
+    
+    def execute_query(self, query: str, params: tuple = None) -> pd.DataFrame:
+        start = time.perf_counter()
+        if self.fetch_backend == "columnar":
+            cursor = self.connection.cursor()
+            cursor.execute(query, params or ())
+            df = fetch_columnar(cursor)
+        else:
+            with warnings.catch_warnings():
+                # pandas advierte con conexiones DB-API distintas de sqlite3
+                warnings.simplefilter("ignore", UserWarning)
+                df = pd.read_sql(query, self.connection, params=params)
+        self.read_seconds += time.perf_counter() - start
+        return df
+    
+    def server_time(self) -> pd.Timestamp:
+        """GETDATE() de los datos sintéticos."""
+        return erp.REFERENCE_DATE
+
+
+def _placeholders(values) -> str:
+    return f"({', '.join('?' for _ in values)})"
+
+
+def _contact(kind: int) -> str:
+    """Primer contacto activo de la locación (#CONTACTS en SQL Server)."""
+    return f"""(SELECT t.TelNum FROM TelTab t
+        WHERE t.CiaCod = ct.CiaCod AND t.OriCod = ot.OriCod AND t.TelEst = '1'
+          AND t.LocCod = lt.LocCod AND t.TelTipCod = {kind}
+        ORDER BY t.TelCod LIMIT 1)"""
+
+
+# Expresiones de LAYOUT que cambian en el dialecto local
+LOCAL_EXPRESSIONS: Dict[str, str] = {
+    "CONCAT(ctt.CttNom, ctt.CttApePat)": "''",
+    "CONCAT(RTRIM(lt.CiaCod), lt.LocCod)": "RTRIM(lt.CiaCod) || lt.LocCod",
+    contact_column("PHONE"): _contact(CONTACT_TYPES["PHONE"]),
+    contact_column("EMAIL"): _contact(CONTACT_TYPES["EMAIL"]),
+    contact_column("URL"): _contact(CONTACT_TYPES["URL"]),
+}
+
+# El ERP sintético no tiene LID ni IndTip: código y uso del sitio quedan nulos
+LOCAL_EXPRESSIONS.update({
+    column.expression: "NULL"
+    for column in site.LAYOUT.fetched
+    if column.name in ("VENDOR_SITE_CODE (M)", "PO_Usage")
+})
+
+
+def _select_list(layout) -> str:
+    """Columnas leídas del layout (sin métricas) en el dialecto local."""
+    return ",\n".join(
+        f'    {LOCAL_EXPRESSIONS.get(column.expression, column.expression)} AS "{column.name}"'
+        for column in layout.fetched
+        if column.name not in METRIC_COLUMNS
+    )
+
+
+class _LocalReads:
+    """Lecturas de proveedores, DocCab y LocTab del motor pandas en SQL estándar."""
+    
+    # La query de atributos local une las dimensiones y los contactos en el
+    # servidor: no hay etapas ni tablas temporales
+    DIMENSION_JOINS = ()
+    TEMP_TABLES = ()
+    
+    def get_setup_statements(self, as_of=None) -> list:
+        return []
+    
+    def _vendor_filter(self) -> SqlQuery:
+        """WHERE de proveedores candidatos (mismas reglas que _get_vendor_filter)."""
+        return SqlQuery(
+            f"""WHERE ct.OriCod IN {_placeholders(VALID_ORIGIN_CODES)}
+  AND ct.CiaEst = '1'
+  AND b.IndGrp = '6'
+  AND b.IndCod = '2'
+  AND ct.CiaCod NOT IN {_placeholders(EXCLUDED_VENDOR_CODES)}
+  AND ct.CiaIdeNum NOT LIKE 'F%'""",
+            tuple(VALID_ORIGIN_CODES) + tuple(EXCLUDED_VENDOR_CODES)
+        )
+    
+    def _vendor_keys(self) -> SqlQuery:
+        where = self._vendor_filter()
+        return SqlQuery(f"""SELECT DISTINCT ct.OriCod, ct.CiaCod
+FROM CiaTab ct
+LEFT JOIN Cid b ON b.OriCod = ct.OriCod AND b.CiaCod = ct.CiaCod
+{where.text}""", where.params)
+    
+    def get_documents_query(self) -> SqlQuery:
+        keys = self._vendor_keys()
+        return SqlQuery(f"""
+SELECT
+    dc.OriCod, dc.CiaCod, dc.LocCod,
+    dc.DocTipCod, dc.DocFecCre, dc.DocMto, dc.DocSld
+FROM DocCab dc
+INNER JOIN (
+{keys.text}
+) v ON v.OriCod = dc.OriCod AND v.CiaCod = dc.CiaCod
+WHERE dc.DocEst <> '0'
+  AND dc.DocTipCod IN {_placeholders(engine.REQUIRED_DOC_TYPES)}
+""", keys.params + tuple(engine.REQUIRED_DOC_TYPES))
+    
+    def get_locations_query(self) -> SqlQuery:
+        keys = self._vendor_keys()
+        return SqlQuery(f"""
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod, lt.LocEst
+FROM LocTab lt
+INNER JOIN (
+{keys.text}
+) v ON v.OriCod = lt.OriCod AND v.CiaCod = lt.CiaCod
+""", keys.params)
+
+
+class LocalSupplierHeader(_LocalReads, SupplierHeaderReport):
+    """supplier_header con las lecturas del motor pandas en SQL estándar."""
+    
+    def get_attributes_query(self) -> SqlQuery:
+        where = self._vendor_filter()
+        return SqlQuery(f"""
+SELECT
+    ct.OriCod AS "OriCod",
+    ct.CiaCod AS "CiaCod",
+{_select_list(header.LAYOUT)}
+FROM CiaTab ct
+LEFT JOIN Cid b ON b.OriCod = ct.OriCod AND b.CiaCod = ct.CiaCod
+LEFT JOIN OriTab ot ON ot.OriCod = ct.OriCod
+LEFT JOIN CiaPar cp ON cp.CiaCod = ct.CiaCod AND cp.ParCod = '7941'
+INNER JOIN LocTab lt ON lt.OriCod = ct.OriCod AND lt.CiaCod = ct.CiaCod
+   AND lt.LocCod = (
+       SELECT MIN(l.LocCod) FROM LocTab l
+       WHERE l.OriCod = ct.OriCod AND l.CiaCod = ct.CiaCod AND l.LocEst = '1'
+   )
+LEFT JOIN CiaPar rt ON rt.CiaCod = ct.CiaCod AND rt.OriCod = '011' AND rt.ParCod = '140'
+LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod
+LEFT JOIN DstTab dt ON dt.DstCod = lt.DstCod AND dt.PaiCod = pt.PaiCod
+   AND dt.DptCod = lt.DptCod AND dt.PvnCod = lt.PvnCod AND dt.OriCod = ot.OriCod
+LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod AND dpt.OriCod = ot.OriCod
+   AND dpt.PaiCod = lt.PaiCod AND dpt.DptEst = '1'
+LEFT JOIN PvnTab pvt ON pvt.PvnCod = lt.PvnCod AND pvt.OriCod = ot.OriCod
+   AND pvt.PaiCod = lt.PaiCod AND pvt.DptCod = dpt.DptCod
+LEFT JOIN IdeTip it ON it.IdeTipCod = ct.IdeTipCod AND it.OriCod = '011'
+{where.text}
+""", where.params)
+
+
+class LocalSupplierSite(_LocalReads, SupplierSiteReport):
+    """supplier_site con las lecturas del motor pandas en SQL estándar."""
+    
+    def get_attributes_query(self) -> SqlQuery:
+        where = self._vendor_filter()
+        return SqlQuery(f"""
+SELECT
+    ct.OriCod AS "OriCod",
+    ct.CiaCod AS "CiaCod",
+    lt.LocCod AS "LocCod",
+    lt.LocEst AS "LocEst",
+{_select_list(site.LAYOUT)}
+FROM CiaTab ct
+LEFT JOIN Cid b ON b.OriCod = ct.OriCod AND b.CiaCod = ct.CiaCod
+INNER JOIN LocTab lt ON lt.OriCod = ct.OriCod AND lt.CiaCod = ct.CiaCod
+LEFT JOIN OriTab ot ON ot.OriCod = lt.OriCod
+LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod
+LEFT JOIN DstTab dt ON dt.DstCod = lt.DstCod AND dt.PaiCod = lt.PaiCod
+   AND dt.DptCod = lt.DptCod AND dt.PvnCod = lt.PvnCod AND dt.OriCod = lt.OriCod
+LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod AND dpt.OriCod = lt.OriCod
+   AND dpt.PaiCod = lt.PaiCod AND dpt.DptEst = '1'
+LEFT JOIN PvnTab pvt ON pvt.PvnCod = lt.PvnCod AND pvt.OriCod = lt.OriCod
+   AND pvt.PaiCod = lt.PaiCod AND pvt.DptCod = dpt.DptCod
+{where.text}
+""", where.params)
+
+
+LOCAL_REPORTS = {
+    "supplier_header": LocalSupplierHeader,
+    "supplier_site": LocalSupplierSite,
+}
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+def _best_of(repeat: int, function: Callable) -> Tuple[float, object]:
+    """Ejecuta function repeat veces; retorna el menor tiempo y el último resultado."""
+    best, value = float("inf"), None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        value = function()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+def run(
+    report_name: str = "supplier_header",
+    scale: int = 1,
+    seed: int = 42,
+    backend: str = "sqlite",
+    fetch_backends=FETCH_BACKENDS,
+    formats=("xlsx",),
+    chunk_size: int = None,
+    repeat: int = 1,
+    data_dir: str = None,
+    rebuild: bool = False
+) -> Dict[str, dict]:
+    """
+    Ejecuta el benchmark de un reporte (ver LOCAL_REPORTS) para una escala.
+    
+    Returns:
+        Dict {"etapa": {"seconds": ..., "rows": ...}}
+    """
+    path = erp.build_database(scale, seed, backend, data_dir, rebuild)
+    connection = erp.connect(path, backend)
+    report = LOCAL_REPORTS[report_name](engine="pandas", cache="off")
+    results = {}
+    df = None
+    
+    try:
+        for fetch_backend in fetch_backends:
+            best = None
+            for _ in range(max(1, repeat)):
+                db = LocalDatabase(connection, fetch_backend)
+                start = time.perf_counter()
+                fetched = report.fetch(db)
+                total = time.perf_counter() - start
+                if best is None or total < best[0]:
+                    best = (total, db.read_seconds)
+            total, read = best
+            results[f"fetch/{fetch_backend}/read"] = {"seconds": round(read, 3), "rows": len(fetched)}
+            results[f"fetch/{fetch_backend}/compute"] = {"seconds": round(total - read, 3), "rows": len(fetched)}
+            if df is None:
+                df = fetched
+    finally:
+        connection.close()
+    
+    if report._dtype_optimizer() is not None:
+        raw = df
+        seconds, df = _best_of(repeat, lambda: report._dtype_optimizer().optimize(raw))
+        results["dtypes"] = {
+            "seconds": round(seconds, 3),
+            "rows": len(df),
+            "memory_before_mb": round(frame_memory(raw) / 2 ** 20, 1),
+            "memory_after_mb": round(frame_memory(df) / 2 ** 20, 1),
+        }
+    
+    seconds, df = _best_of(repeat, lambda: report._apply_column_mapping(report.transform(df)))
+    results["transform"] = {"seconds": round(seconds, 3), "rows": len(df)}
+    
+    exports = time_exporters(
+        df,
+        report.get_sheet_name(),
+        chunk_size,
+        formats=formats,
+        column_widths=report.get_column_widths(),
+        layout=report.get_layout()
+    )
+    for stage, result in exports.items():
+        results[stage] = dict(result, rows=len(df))
+    
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reportes sobre un ERP sintético")
+    parser.add_argument(
+        "--scale", type=int, nargs="+", default=[1],
+        help="Factores de escala del ERP (ej: 1 10 100)"
+    )
+    parser.add_argument(
+        "--reports", nargs="+", choices=list(LOCAL_REPORTS), default=list(LOCAL_REPORTS),
+        help="Reportes a medir (default: todos)"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos")
+    parser.add_argument(
+        "--backend", choices=erp.BACKENDS, default="sqlite",
+        help="BD local (default: sqlite; duckdb requiere pip install duckdb)"
+    )
+    parser.add_argument(
+        "--fetch-backends", nargs="+", choices=FETCH_BACKENDS, default=list(FETCH_BACKENDS),
+        help="Lectores a medir"
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=["xlsx"],
+        help="Formatos de salida a medir (xlsx, parquet, arrow, csv)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=None, help="Filas por chunk")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones (se toma la mejor)")
+    parser.add_argument("--data-dir", type=str, default=None, help="Carpeta de las BD sintéticas")
+    parser.add_argument("--rebuild", action="store_true", help="Regenera las BD sintéticas")
+    parser.add_argument(
+        "--history", type=str, default=str(DEFAULT_HISTORY),
+        help="Archivo JSON del historial de resultados"
+    )
+    parser.add_argument("--no-history", action="store_true", help="No guarda ni compara resultados")
+    parser.add_argument(
+        "--threshold", type=float, default=REGRESSION_THRESHOLD,
+        help="Fracción de aumento que cuenta como regresión (default: 0.2)"
+    )
+    args = parser.parse_args()
+    
+    for scale in args.scale:
+        for report_name in args.reports:
+            results = run(
+                report_name=report_name,
+                scale=scale,
+                seed=args.seed,
+                backend=args.backend,
+                fetch_backends=args.fetch_backends,
+                formats=args.formats,
+                chunk_size=args.chunk_size,
+                repeat=args.repeat,
+                data_dir=args.data_dir,
+                rebuild=args.rebuild and report_name == args.reports[0]
+            )
+            
+            print(f"\n{report_name} {scale}x ({args.backend}):")
+            for stage, result in results.items():
+                print(f"  {stage:28} {result['seconds']:>9.2f} s  {result['rows']:>12,} filas")
+            
+            if not args.no_history:
+                params = {
+                    "report": report_name,
+                    "scale": scale,
+                    "seed": args.seed,
+                    "backend": args.backend,
+                    "chunk_size": args.chunk_size,
+                }
+                baseline = record_run(results, params, args.history)
+                print_comparison(results, baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark de arranque del CLI
+==============================
+Mide el tiempo de comandos de main.py que no ejecutan reportes
+(--list, --help) en procesos nuevos, y qué dependencias pesadas
+(pandas, numpy, pyodbc, xlsxwriter, pyarrow) quedan importadas al
+terminar. Esos comandos no deberían cargar ninguna.
+
+Cada corrida se agrega a benchmarks/results/history.json y se compara con
+la anterior de los mismos parámetros (ver benchmarks/history.py), así que
+correrlo antes y después de un cambio muestra la diferencia.
+
+Uso:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 20 --commands --list
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.history import DEFAULT_HISTORY, REGRESSION_THRESHOLD, print_comparison, record_run
+
+
+ROOT = Path(__file__).parent.parent
+
+# Comandos medidos por defecto
+COMMANDS = ("--list", "--help")
+
+# Dependencias que un comando sin reporte no debería importar
+HEAVY_MODULES = ("pandas", "numpy", "pyodbc", "xlsxwriter", "pyarrow")
+
+# Ejecuta main.py con los argumentos dados y reporta los módulos pesados
+# cargados (en stderr, para no mezclarse con la salida del comando)
+_PROBE = """
+import json, runpy, sys
+sys.argv = ["main.py"] + {args!r}
+try:
+    runpy.run_path("main.py", run_name="__main__")
+except SystemExit:
+    pass
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps(heavy), file=sys.stderr)
+"""
+
+
+def time_command(args: List[str], repeat: int = 10) -> Dict[str, object]:
+    """
+    Ejecuta `python main.py <args>` repeat veces en procesos nuevos.
+    
+    Returns:
+        Dict con seconds (mediana), best y los módulos pesados importados
+    """
+    times = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(ROOT / "main.py"), *args],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
+        times.append(time.perf_counter() - start)
+    
+    probe = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(args=list(args), heavy=HEAVY_MODULES)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True
+    )
+    heavy = json.loads(probe.stderr.strip().splitlines()[-1])
+    
+    return {
+        "seconds": round(statistics.median(times), 3),
+        "best": round(min(times), 3),
+        "heavy_modules": heavy,
+    }
+
+
+def interpreter_seconds(repeat: int = 10) -> float:
+    """Mediana del arranque de un intérprete vacío (piso de cualquier comando)."""
+    times = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del CLI")
+    parser.add_argument(
+        "--commands", nargs="+", default=list(COMMANDS),
+        help="Argumentos de main.py a medir, uno por comando (default: --list --help)"
+    )
+    parser.add_argument("--repeat", type=int, default=10, help="Ejecuciones por comando (se toma la mediana)")
+    parser.add_argument(
+        "--history", type=str, default=str(DEFAULT_HISTORY),
+        help="Archivo JSON del historial de resultados"
+    )
+    parser.add_argument("--no-history", action="store_true", help="No guarda ni compara resultados")
+    parser.add_argument(
+        "--threshold", type=float, default=REGRESSION_THRESHOLD,
+        help="Fracción de aumento que cuenta como regresión (default: 0.2)"
+    )
+    args = parser.parse_args()
+    
+    results = {"python": {"seconds": interpreter_seconds(args.repeat)}}
+    for command in args.commands:
+        results[f"main.py {command}"] = time_command(command.split(), args.repeat)
+    
+    print(f"\nArranque del CLI (mediana de {args.repeat}):")
+    for name, result in results.items():
+        heavy = result.get("heavy_modules")
+        note = f"  importa: {', '.join(heavy) if heavy else 'ninguna dependencia pesada'}" \
+            if heavy is not None else ""
+        print(f"  {name:22} {result['seconds']:>7.3f} s{note}")
+    
+    if not args.no_history:
+        params = {"benchmark": "startup", "commands": args.commands, "repeat": args.repeat}
+        baseline = record_run(results, params, args.history)
+        print_comparison(results, baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
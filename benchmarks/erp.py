@@ -0,0 +1,400 @@
+"""
+ERP sintético para benchmarks
+==============================
+Genera las tablas que leen los reportes (CiaTab, Cid, CiaPar, LocTab,
+TelTab, DocCab, IdeTip, OriTab y geografía) con una distribución
+realista y las carga en una BD local (SQLite o DuckDB) que reemplaza a
+SQL Server en los benchmarks.
+
+Distribución por factor de escala (1x, 10x, 100x):
+- VENDORS_PER_SCALE proveedores, repartidos entre los orígenes válidos
+  (más un origen fuera de VALID_ORIGIN_CODES para ejercitar los filtros).
+- HEAVY_VENDORS_PER_SCALE proveedores pesados con HEAVY_VENDOR_DOCS
+  documentos y decenas de locaciones.
+- Un tramo medio (~5%) con cientos de documentos (log-normal).
+- Cola larga con unos pocos documentos (geométrica).
+
+Los datos dependen solo de (scale, seed): la misma semilla genera la
+misma BD en cualquier máquina.
+
+Uso:
+    db_path = build_database(scale=10, backend="sqlite")
+"""
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from config.settings import VALID_ORIGIN_CODES
+
+
+# ============================================
+# PARÁMETROS DE LA DISTRIBUCIÓN
+# ============================================
+VENDORS_PER_SCALE = 2_000
+HEAVY_VENDORS_PER_SCALE = 3
+HEAVY_VENDOR_DOCS = 100_000
+HEAVY_VENDOR_LOCATIONS = 40
+MID_TIER_RATIO = 0.05  # Fracción de proveedores del tramo medio
+MID_TIER_MEDIAN_DOCS = 300
+TAIL_MEAN_DOCS = 4
+
+# Fecha de referencia (GETDATE()) de los datos: los documentos cubren
+# los HISTORY_YEARS años anteriores
+REFERENCE_DATE = pd.Timestamp("2026-01-15 08:00:00")
+HISTORY_YEARS = 8
+
+# Origen que no está en VALID_ORIGIN_CODES (lo descartan los filtros)
+OTHER_ORIGIN = "F499999"
+
+# Filas de DocCab por lote al generar y cargar (memoria acotada)
+DOC_BATCH_ROWS = 500_000
+
+DEFAULT_DIRECTORY = "./.cache/benchmarks"
+BACKENDS: tuple = ("sqlite", "duckdb")
+
+# Tipos de documento de proveedor y su peso relativo
+DOC_TYPE_WEIGHTS: Dict[str, float] = {
+    "FE": 30, "FD": 5, "DE": 3, "NP": 4, "NA": 2, "C2": 3, "FP": 4,
+    "LG": 1, "NO": 2, "RG": 2, "M2": 1, "N2": 1, "OC": 12, "OS": 4,
+    "CX": 1, "AP": 6, "EC": 0.2, "ER": 0.2, "SB": 0.1, "SD": 0.1,
+}
+
+# Índices que tendría la BD real sobre las llaves de join
+INDEXES: Dict[str, Tuple[str, ...]] = {
+    "CiaTab": ("OriCod", "CiaCod"),
+    "Cid": ("OriCod", "CiaCod"),
+    "CiaPar": ("CiaCod", "ParCod"),
+    "LocTab": ("OriCod", "CiaCod", "LocCod"),
+    "TelTab": ("OriCod", "CiaCod", "LocCod"),
+    "DocCab": ("OriCod", "CiaCod", "LocCod"),
+}
+
+
+# ============================================
+# GENERACIÓN
+# ============================================
+def generate_dimensions(scale: int = 1, seed: int = 42) -> Dict[str, pd.DataFrame]:
+    """
+    Genera todas las tablas salvo DocCab.
+    
+    Args:
+        scale: Factor de escala (1, 10, 100)
+        seed: Semilla
+    
+    Returns:
+        Dict {tabla: DataFrame}. Incluye además '_doc_counts' (documentos
+        por proveedor) para generar DocCab con iter_documents().
+    """
+    rng = np.random.default_rng(seed)
+    tables = _geography()
+    
+    origins = np.array(list(VALID_ORIGIN_CODES) + [OTHER_ORIGIN])
+    tables["OriTab"] = pd.DataFrame({
+        "OriCod": origins,
+        "PaiCod": ["CO"] * (len(origins) - 1) + ["EC"],
+    })
+    tables["IdeTip"] = pd.DataFrame([
+        (origin, code, description)
+        for origin in origins
+        for code, description in enumerate(
+            ["NIT", "RUT", "CEDULA", "CEDULA EXTRANJERIA", "PASAPORTE",
+             "TARJETA IDENTIDAD", "REGISTRO CIVIL", "DOCUMENTO EXTRANJERO"], 1
+        )
+    ], columns=["OriCod", "IdeTipCod", "IdeTipDes"])
+    
+    n = VENDORS_PER_SCALE * scale
+    origin_weights = np.array([30, 10, 10, 10, 15, 15, 10], dtype=float)
+    vendor_origin = origins[rng.choice(len(origins), n, p=origin_weights / origin_weights.sum())]
+    codes = np.char.zfill(np.arange(1, n + 1).astype(str), 10)
+    ide_num = rng.integers(10 ** 8, 10 ** 10, n).astype(str)
+    ide_num = np.where(rng.random(n) < 0.02, np.char.add("F", ide_num), ide_num)
+    created = REFERENCE_DATE - pd.to_timedelta(rng.integers(0, 25 * 365, n), unit="D")
+    
+    tables["CiaTab"] = pd.DataFrame({
+        "OriCod": vendor_origin,
+        "CiaCod": codes,
+        "CiaDes": np.char.add("PROVEEDOR ", codes),
+        "CiaSig": np.char.add("PRV", codes),
+        "CiaIdeNum": ide_num,
+        "IdeTipCod": rng.choice([1, 1, 1, 3, 4, 7, 8], n),
+        "CiaEst": np.where(rng.random(n) < 0.9, "1", "0"),
+        "CiaFehCre": created.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    # 85% proveedores (IndCod 2), el resto clientes (IndCod 4)
+    tables["Cid"] = pd.DataFrame({
+        "OriCod": vendor_origin,
+        "CiaCod": codes,
+        "IndGrp": "6",
+        "IndCod": np.where(rng.random(n) < 0.85, "2", "4"),
+    })
+    # Parámetros: código SIC (7941) y tipo de registro tributario (140)
+    has_sic = rng.random(n) < 0.7
+    has_tax_type = rng.random(n) < 0.5
+    tables["CiaPar"] = pd.concat([
+        pd.DataFrame({
+            "OriCod": vendor_origin[has_sic],
+            "CiaCod": codes[has_sic],
+            "ParCod": "7941",
+            "CiaParVal": rng.integers(1000, 9999, has_sic.sum()).astype(str),
+        }),
+        pd.DataFrame({
+            "OriCod": "011",
+            "CiaCod": codes[has_tax_type],
+            "ParCod": "140",
+            "CiaParVal": rng.choice(["NIT", "RUT"], has_tax_type.sum()),
+        }),
+    ], ignore_index=True)
+    
+    doc_counts = _doc_counts(rng, n, scale)
+    locations_per_vendor = rng.geometric(0.6, n)
+    locations_per_vendor[doc_counts >= HEAVY_VENDOR_DOCS] = HEAVY_VENDOR_LOCATIONS
+    tables["LocTab"] = _locations(rng, tables["CiaTab"], locations_per_vendor, tables["DstTab"])
+    tables["TelTab"] = _contacts(rng, tables["LocTab"])
+    tables["_doc_counts"] = pd.DataFrame({
+        "OriCod": vendor_origin,
+        "CiaCod": codes,
+        "Locations": locations_per_vendor,
+        "Docs": doc_counts,
+    })
+    return tables
+
+
+def iter_documents(doc_counts: pd.DataFrame, seed: int = 42) -> Iterator[pd.DataFrame]:
+    """
+    Genera DocCab por lotes de hasta DOC_BATCH_ROWS filas.
+    
+    Args:
+        doc_counts: Tabla '_doc_counts' de generate_dimensions()
+        seed: Semilla (la misma que generate_dimensions)
+    
+    Yields:
+        DataFrames con las columnas de DocCab
+    """
+    rng = np.random.default_rng(seed + 1)
+    types = np.array(list(DOC_TYPE_WEIGHTS))
+    weights = np.array(list(DOC_TYPE_WEIGHTS.values()))
+    weights = weights / weights.sum()
+    history_seconds = HISTORY_YEARS * 365 * 86400
+    doc_number = 0
+    
+    cumulative = np.cumsum(doc_counts["Docs"].to_numpy())
+    start = 0
+    while start < len(doc_counts):
+        # Proveedores completos hasta llenar el lote (al menos uno)
+        offset = cumulative[start - 1] if start else 0
+        end = max(start + 1, int(np.searchsorted(cumulative, offset + DOC_BATCH_ROWS, side="right")))
+        batch = doc_counts.iloc[start:end]
+        start = end
+        rows = int(batch["Docs"].sum())
+        
+        owner = np.repeat(np.arange(len(batch)), batch["Docs"].to_numpy())
+        location = (rng.random(rows) * batch["Locations"].to_numpy()[owner]).astype(np.int64)
+        amount = np.round(rng.lognormal(13, 1.5, rows), 2)
+        has_balance = rng.random(rows) < 0.15
+        created = REFERENCE_DATE - pd.to_timedelta(rng.integers(0, history_seconds, rows), unit="s")
+        
+        yield pd.DataFrame({
+            "OriCod": batch["OriCod"].to_numpy()[owner],
+            "CiaCod": batch["CiaCod"].to_numpy()[owner],
+            "LocCod": np.char.zfill((location + 1).astype(str), 3),
+            "DocNum": np.arange(doc_number, doc_number + rows),
+            "DocTipCod": types[rng.choice(len(types), rows, p=weights)],
+            "DocFecCre": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "DocMto": amount,
+            "DocSld": np.where(has_balance, amount, 0.0),
+            "DocEst": np.where(rng.random(rows) < 0.97, "1", "0"),
+        })
+        doc_number += rows
+
+
+def _doc_counts(rng: np.random.Generator, n: int, scale: int) -> np.ndarray:
+    """Documentos por proveedor: pesados, tramo medio y cola larga."""
+    counts = rng.geometric(1 / TAIL_MEAN_DOCS, n)
+    mid = rng.random(n) < MID_TIER_RATIO
+    counts[mid] = np.rint(rng.lognormal(np.log(MID_TIER_MEDIAN_DOCS), 0.8, mid.sum())).astype(int)
+    heavy = rng.choice(n, min(n, HEAVY_VENDORS_PER_SCALE * scale), replace=False)
+    counts[heavy] = HEAVY_VENDOR_DOCS
+    return counts
+
+
+def _geography() -> Dict[str, pd.DataFrame]:
+    """PaiTab, DptTab, PvnTab y DstTab (tamaño fijo, no escala)."""
+    countries = {"CO": "COLOMBIA", "EC": "ECUADOR", "PE": "PERU", "PA": "PANAMA", "CH": "SUIZA"}
+    origins = list(VALID_ORIGIN_CODES) + [OTHER_ORIGIN]
+    departments, provinces, districts = [], [], []
+    for origin in origins:
+        for country in countries:
+            for d in range(1, 11):
+                dpt = f"{d:02d}"
+                departments.append((origin, country, dpt, f"DEPARTAMENTO {country}{dpt}", "1"))
+                for p in range(1, 4):
+                    pvn = f"{p:02d}"
+                    provinces.append((origin, country, dpt, pvn, f"PROVINCIA {country}{dpt}{pvn}"))
+                    for s in range(1, 6):
+                        dst = f"{s:03d}"
+                        districts.append((
+                            origin, country, dpt, pvn, dst,
+                            f"CIUDAD {country}{dpt}{pvn}{dst}", f"{d:02d}{p:02d}{s:02d}"
+                        ))
+    return {
+        "PaiTab": pd.DataFrame(list(countries.items()), columns=["PaiCod", "PaiDes"]),
+        "DptTab": pd.DataFrame(departments, columns=["OriCod", "PaiCod", "DptCod", "DptDes", "DptEst"]),
+        "PvnTab": pd.DataFrame(provinces, columns=["OriCod", "PaiCod", "DptCod", "PvnCod", "PvnDes"]),
+        "DstTab": pd.DataFrame(
+            districts,
+            columns=["OriCod", "PaiCod", "DptCod", "PvnCod", "DstCod", "DstDes", "DstPstCod"]
+        ),
+    }
+
+
+def _locations(
+    rng: np.random.Generator,
+    vendors: pd.DataFrame,
+    per_vendor: np.ndarray,
+    districts: pd.DataFrame
+) -> pd.DataFrame:
+    """LocTab: locaciones 001..N por proveedor, 85% activas."""
+    owner = np.repeat(np.arange(len(vendors)), per_vendor)
+    number = np.arange(len(owner)) - np.repeat(np.cumsum(per_vendor) - per_vendor, per_vendor)
+    district = districts[districts["PaiCod"] == "CO"].drop_duplicates(
+        ["PaiCod", "DptCod", "PvnCod", "DstCod"]
+    )
+    place = district.iloc[rng.integers(0, len(district), len(owner))]
+    return pd.DataFrame({
+        "OriCod": vendors["OriCod"].to_numpy()[owner],
+        "CiaCod": vendors["CiaCod"].to_numpy()[owner],
+        "LocCod": np.char.zfill((number + 1).astype(str), 3),
+        "LocDes": np.char.add("SEDE ", (number + 1).astype(str)),
+        "LocDir": np.char.add("CALLE ", rng.integers(1, 200, len(owner)).astype(str)),
+        "LocEst": np.where(rng.random(len(owner)) < 0.85, "1", "0"),
+        "PaiCod": place["PaiCod"].to_numpy(),
+        "DptCod": place["DptCod"].to_numpy(),
+        "PvnCod": place["PvnCod"].to_numpy(),
+        "DstCod": place["DstCod"].to_numpy(),
+    })
+
+
+def _contacts(rng: np.random.Generator, locations: pd.DataFrame) -> pd.DataFrame:
+    """TelTab: teléfono (1), email (3) y URL (4) por locación, con huecos."""
+    frames = []
+    for kind, share in ((1, 0.9), (3, 0.7), (4, 0.2)):
+        has = rng.random(len(locations)) < share
+        subset = locations.loc[has, ["OriCod", "CiaCod", "LocCod"]]
+        values = rng.integers(10 ** 6, 10 ** 7, len(subset)).astype(str)
+        if kind == 3:
+            values = np.char.add(np.char.add("contacto", values), "@proveedor.com")
+        elif kind == 4:
+            values = np.char.add("www.proveedor", values)
+        frames.append(subset.assign(
+            TelTipCod=kind,
+            TelNum=values,
+            TelEst=np.where(rng.random(len(subset)) < 0.95, "1", "0"),
+        ))
+    contacts = pd.concat(frames, ignore_index=True)
+    contacts.insert(3, "TelCod", np.arange(1, len(contacts) + 1))
+    return contacts
+
+
+# ============================================
+# CARGA EN LA BD LOCAL
+# ============================================
+def database_path(scale: int, seed: int, backend: str, directory: str = None) -> Path:
+    """Ruta del archivo de la BD sintética para (escala, semilla, motor)."""
+    suffix = "sqlite" if backend == "sqlite" else "duckdb"
+    return Path(directory or DEFAULT_DIRECTORY) / f"erp_{scale}x_seed{seed}.{suffix}"
+
+
+def build_database(
+    scale: int = 1,
+    seed: int = 42,
+    backend: str = "sqlite",
+    directory: str = None,
+    rebuild: bool = False
+) -> Path:
+    """
+    Genera el ERP sintético y lo carga en un archivo de BD local. Si el
+    archivo ya existe se reutiliza (la generación a 100x toma minutos).
+    
+    Args:
+        scale: Factor de escala
+        seed: Semilla
+        backend: 'sqlite' o 'duckdb'
+        directory: Carpeta de las BD (default: DEFAULT_DIRECTORY)
+        rebuild: Si regenerar aunque el archivo exista
+    
+    Returns:
+        Ruta del archivo de BD
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Motor '{backend}' no soportado. Opciones: {', '.join(BACKENDS)}")
+    path = database_path(scale, seed, backend, directory)
+    if path.exists() and not rebuild:
+        return path
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    # Se escribe en un temporal para no dejar una BD a medias si se interrumpe
+    partial = path.with_suffix(path.suffix + ".partial")
+    if partial.exists():
+        partial.unlink()
+    
+    tables = generate_dimensions(scale, seed)
+    doc_counts = tables.pop("_doc_counts")
+    connection = connect(partial, backend)
+    try:
+        for name, df in tables.items():
+            _append(connection, backend, name, df)
+        documents = 0
+        for batch in iter_documents(doc_counts, seed):
+            _append(connection, backend, "DocCab", batch)
+            documents += len(batch)
+        for table, columns in INDEXES.items():
+            connection.execute(f"CREATE INDEX IX_{table} ON {table} ({', '.join(columns)})")
+        connection.commit()
+    finally:
+        connection.close()
+    partial.rename(path)
+    
+    print(f"[OK] ERP sintético {scale}x: {len(tables['CiaTab']):,} proveedores, "
+          f"{documents:,} documentos -> {path}")
+    return path
+
+
+def connect(path, backend: str = "sqlite"):
+    """Abre una conexión DB-API a la BD local."""
+    if backend == "duckdb":
+        return _import_duckdb().connect(str(path))
+    return sqlite3.connect(str(path), check_same_thread=False)
+
+
+def _append(connection, backend: str, table: str, df: pd.DataFrame) -> None:
+    """Inserta un DataFrame, creando la tabla si no existe."""
+    if backend == "duckdb":
+        connection.register("_frame", df)
+        exists = connection.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table]
+        ).fetchone()[0]
+        if exists:
+            connection.execute(f"INSERT INTO {table} SELECT * FROM _frame")
+        else:
+            connection.execute(f"CREATE TABLE {table} AS SELECT * FROM _frame")
+        connection.unregister("_frame")
+    else:
+        df.to_sql(table, connection, index=False, if_exists="append", chunksize=50_000)
+
+
+def _import_duckdb():
+    """Importa duckdb (dependencia opcional, solo para --backend duckdb)."""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError(
+            "El motor duckdb de los benchmarks requiere duckdb: pip install duckdb"
+        ) from e
+    return duckdb
@@ -0,0 +1,95 @@
+"""
+DataFrames sintéticos con la forma de los reportes
+===================================================
+Generan datos con los mismos tipos y columnas que los reportes reales
+para medir el rendimiento de la exportación sin acceso a la BD.
+"""
+import numpy as np
+import pandas as pd
+
+
+# Columnas de supplier site agrupadas por tipo de dato
+SITE_TEXT_COLUMNS = [
+    "ORG_NAME (M)", "VENDOR_NAME (M)", "VENDOR_NUM (M)", "VENDOR_SITE_CODE (M)",
+    "PROVINCE", "COUNTRY (M)", "PHONE", "EMAIL_ADDRESS", "ADDRESS_LINE1 (M)",
+    "CITY", "STATE", "ZIP", "DEFAULT_REP_COUNTRY_CODE", "DEFAULT_REP_REG_NUMBER",
+    "VENDOR_ID (M)", "VENDOR_SITE_ID (M)", "LOCATION_ID (M)", "VENDOR_SITE_ID_2 (M)",
+    "SUPPLIER_TRX_SOURCE_LIST (M)", "PO_Usage",
+]
+SITE_EMPTY_COLUMNS = [
+    "ORGANIZATION_ID (M)", "BUSINESS_GROUP_ID (M)", "VENDOR_SITE_CREATION_DATE (M)",
+    "ADDRESS_STYLE (M)", "LANGUAGE", "AREA_CODE", "CUSTOMER_NUM",
+    "VENDOR_SITE_CODE_ALT", "ADDRESS_LINE2", "ADDRESS_LINE3", "ADDRESS_LINES_ALT",
+    "ADDRESS_LINE4", "VAT_REGISTRATION_NUM", "VAT_CODE", "DEFAULT_REP_TAX_REG_TYPE",
+    "PARTY_SITE_ID (M)", "PARTY_ID (M)", "ADDRESS_NAME (M)", "ADDRESSEE",
+]
+SITE_AMOUNT_COLUMNS = [
+    "TRX_1Y_AMOUNT_CHF (M)", "TRX_2Y_AMOUNT_CHF (M)", "TRX_OP_BAL_CHF (M)",
+]
+SITE_COUNT_COLUMNS = [
+    "TRX_1Y_COUNT (M)", "TRX_2Y_COUNT (M)", "TRX_OP_COUNT (M)",
+    "PO_2Y_OP_COUNT (M)", "PO_1Y_OP_COUNT (M)", "PO_OP_COUNT (M)",
+    "PO_Agreement_COUNT (M)",
+]
+SITE_DATE_COLUMNS = [
+    "VENDOR_CREATION_DATE (M)", "MIN_TRX_DATE (M)", "MAX_TRX_DATE (M)",
+    "MIN_PO_DATE (M)", "MAX_PO_DATE (M)",
+]
+SITE_YEAR_COLUMNS = ["MIN_TRX_YEAR (M)", "MAX_TRX_YEAR (M)"]
+
+
+def supplier_site_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Genera un DataFrame con la forma de supplier site.
+    
+    Args:
+        n_rows: Número de filas
+        seed: Semilla para reproducibilidad
+        
+    Returns:
+        DataFrame con ~60 columnas de texto, números, fechas y nulos
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    
+    countries = np.array(["COLOMBIA", "ECUADOR", "PERU", "PANAMA", "SUIZA"])
+    cities = np.array([f"CIUDAD {i}" for i in range(400)])
+    for column in SITE_TEXT_COLUMNS:
+        if column in ("COUNTRY (M)",):
+            values = countries[rng.integers(0, len(countries), n_rows)]
+        elif column in ("CITY", "STATE", "PROVINCE"):
+            values = cities[rng.integers(0, len(cities), n_rows)]
+        else:
+            values = np.char.add(
+                column[:3], rng.integers(0, 10 ** 8, n_rows).astype(str)
+            )
+        values = values.astype(object)
+        # ~10% de nulos en columnas opcionales
+        values[rng.random(n_rows) < 0.1] = None
+        data[column] = values
+    
+    for column in SITE_EMPTY_COLUMNS:
+        data[column] = np.full(n_rows, "", dtype=object)
+    for column in SITE_AMOUNT_COLUMNS:
+        data[column] = np.round(rng.normal(0, 5000, n_rows), 6)
+    for column in SITE_COUNT_COLUMNS:
+        data[column] = rng.poisson(3, n_rows).astype(np.int64)
+    
+    base = np.datetime64("2010-01-01")
+    for column in SITE_DATE_COLUMNS:
+        days = rng.integers(0, 5800, n_rows).astype("timedelta64[D]")
+        dates = pd.Series(base + days).astype("datetime64[ns]")
+        dates[rng.random(n_rows) < 0.2] = pd.NaT
+        data[column] = dates
+    for column in SITE_YEAR_COLUMNS:
+        years = rng.integers(2010, 2027, n_rows).astype("float64")
+        years[rng.random(n_rows) < 0.2] = np.nan
+        data[column] = years
+    
+    return pd.DataFrame(data)
+
+
+def iter_chunks(df: pd.DataFrame, chunk_size: int):
+    """Entrega el DataFrame en chunks, como lo haría el cursor."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
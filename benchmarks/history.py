@@ -0,0 +1,146 @@
+"""
+Historial de resultados de benchmarks
+======================================
+Guarda cada corrida en un archivo JSON (lista de corridas) con sus
+parámetros, el commit y las versiones de las librerías, y la compara con
+la última corrida de los mismos parámetros para detectar regresiones.
+
+Formato de cada corrida:
+    {
+        "timestamp": "2026-01-15T08:00:00",
+        "commit": "abc1234",
+        "params": {"scale": 10, "seed": 42, "backend": "sqlite", ...},
+        "environment": {"python": "3.11.7", "pandas": "...", "numpy": "..."},
+        "results": {"fetch/read_sql/read": {"seconds": 1.2, ...}, ...}
+    }
+"""
+import json
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_HISTORY = Path(__file__).parent / "results" / "history.json"
+
+# Una etapa es regresión si tarda más de (1 + umbral) veces la anterior
+REGRESSION_THRESHOLD = 0.2
+
+# Etapas más rápidas que esto se ignoran al comparar (ruido de medición)
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def load_history(path: Path = None) -> List[dict]:
+    """Lee el historial; lista vacía si no existe."""
+    path = Path(path or DEFAULT_HISTORY)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_baseline(history: List[dict], params: dict) -> Optional[dict]:
+    """Última corrida con los mismos parámetros, o None."""
+    for run in reversed(history):
+        if run.get("params") == params:
+            return run
+    return None
+
+
+def record_run(results: Dict[str, dict], params: dict, path: Path = None) -> Optional[dict]:
+    """
+    Agrega una corrida al historial.
+    
+    Args:
+        results: Dict {etapa: {"seconds": ..., ...}}
+        params: Parámetros que identifican corridas comparables
+        path: Archivo de historial (default: DEFAULT_HISTORY)
+    
+    Returns:
+        La corrida anterior con los mismos parámetros (baseline), o None
+    """
+    path = Path(path or DEFAULT_HISTORY)
+    history = load_history(path)
+    baseline = find_baseline(history, params)
+    
+    history.append({
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "params": params,
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    })
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(history, f, indent=2)
+    return baseline
+
+
+def find_regressions(
+    results: Dict[str, dict],
+    baseline: dict,
+    threshold: float = REGRESSION_THRESHOLD
+) -> List[Tuple[str, float, float]]:
+    """
+    Etapas que empeoraron respecto al baseline.
+    
+    Returns:
+        Lista de (etapa, segundos anteriores, segundos actuales)
+    """
+    regressions = []
+    for stage, result in results.items():
+        previous = baseline["results"].get(stage)
+        if not previous:
+            continue
+        before, now = previous["seconds"], result["seconds"]
+        if max(before, now) < MIN_COMPARABLE_SECONDS:
+            continue
+        if now > before * (1 + threshold):
+            regressions.append((stage, before, now))
+    return regressions
+
+
+def print_comparison(
+    results: Dict[str, dict],
+    baseline: Optional[dict],
+    threshold: float = REGRESSION_THRESHOLD
+) -> None:
+    """Imprime las regresiones respecto al baseline, si lo hay."""
+    if baseline is None:
+        print("  Sin corrida anterior con estos parámetros (se guarda como baseline)")
+        return
+    
+    regressions = find_regressions(results, baseline, threshold)
+    reference = f"{baseline['timestamp']} ({baseline.get('commit') or 'sin commit'})"
+    if not regressions:
+        print(f"[OK] Sin regresiones > {threshold:.0%} respecto a {reference}")
+        return
+    
+    print(f"[WARN] {len(regressions)} etapas más lentas que {reference}:")
+    for stage, before, now in regressions:
+        print(f"   • {stage}: {before:.2f}s -> {now:.2f}s (+{now / before - 1:.0%})")
+
+
+def _git_commit() -> Optional[str]:
+    """Commit actual del repositorio, si git está disponible."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
@@ -39,10 +39,45 @@ class DatabaseConfig:
 DB_CONFIG = DatabaseConfig()
 
 
+@dataclass
+class PoolConfig:
+    """Configuración del pool de conexiones"""
+    enabled: bool = True  # Los reportes toman conexiones del pool
+    size: int = 4  # Máximo de conexiones abiertas
+    checkout_timeout: float = 60.0  # Segundos de espera por una conexión libre
+    idle_timeout: float = 300.0  # Cerrar conexiones sin uso por más de N segundos
+    max_lifetime: float = 1800.0  # Reciclar conexiones con más de N segundos
+    validation_query: str = "SELECT 1"  # Consulta de validación al entregar
+
+
+POOL_CONFIG = PoolConfig()
+
+
+@dataclass
+class FetchConfig:
+    """Configuración de lectura de resultados"""
+    backend: str = "read_sql"  # read_sql | columnar (opt-in, ver utils/columnar.py)
+    batch_size: int = 10000  # Filas por fetchmany() en el lector columnar
+
+
+FETCH_CONFIG = FetchConfig()
+
+
+@dataclass
+class PartitionConfig:
+    """Configuración de la ejecución particionada (ver reports/partition.py)"""
+    partitions: int = 1  # Queries concurrentes por reporte; 1 = sin particionar
+    strategy: str = "range"  # range (histograma de CiaCod) | origin (VALID_ORIGIN_CODES)
+
+
+PARTITION_CONFIG = PartitionConfig()
+
+
 # ============================================
 # CONSTANTES DE CONVERSIÓN
 # ============================================
 CHF_RATE: float = 0.000210699  # Tasa de conversión a CHF
+DOC_AMOUNT_SCALE: int = 2  # Escala de DocMto/DocSld; el motor pandas rechaza montos con más decimales
 
 
 # ============================================
@@ -67,6 +102,9 @@ class DocumentTypes:
     # Contratos/Acuerdos
     agreements: tuple = ('CX',)
     
+    # Actividad reciente (PRIORIDAD 3 del filtro de proveedores)
+    recent_activity: tuple = ('AP', 'C2', 'FE', 'FP', 'NP', 'NA', 'DE', 'NO')
+    
     # Documentos a excluir (intercompany)
     excluded: tuple = ('EC', 'ER', 'SB', 'SD')
     
@@ -97,6 +135,44 @@ EXCLUDED_VENDOR_CODES: tuple = (
 )
 
 
+# ============================================
+# CÓDIGOS DE DOCUMENTO DE CLIENTES
+# ============================================
+@dataclass
+class CustomerDocumentTypes:
+    """Clasificación de tipos de documento de clientes (cuentas por cobrar)"""
+    # Facturas y notas de débito
+    invoice_debit: tuple = ('FA', 'ND')
+    
+    # Notas de crédito
+    credit_notes: tuple = ('NC',)
+    
+    # Documentos con saldo (open balance)
+    balance_positive: tuple = ('FA', 'FV')
+    balance_negative: tuple = ('AB', 'AG', 'AN', 'NC')
+    
+    # Documentos con saldo abierto (locaciones válidas y conteo OP)
+    open_items: tuple = ('AB', 'AG', 'AN', 'FA', 'FV', 'NC')
+    
+    # Transacciones de las ventanas 2Y / 5Y
+    transactions: tuple = ('FA', 'NC', 'ND')
+    
+    # Todos los documentos transaccionales
+    all_transactional: tuple = ('AB', 'AG', 'AN', 'FA', 'FV', 'NC', 'ND')
+
+
+CUSTOMER_DOC_TYPES = CustomerDocumentTypes()
+
+
+# ============================================
+# CÓDIGOS DE CLIENTE A EXCLUIR
+# ============================================
+EXCLUDED_CUSTOMER_CODES: tuple = (
+    '0000000012', '0000000011', 'F491201', 'F490411',
+    'F490411', 'F490401', 'F490421'
+)
+
+
 # ============================================
 # CONFIGURACIÓN DE EXPORTACIÓN
 # ============================================
@@ -107,6 +183,120 @@ class ExportConfig:
     max_rows_per_sheet: int = 1000000  # Límite de Excel
     default_output_dir: str = "./exports"
     datetime_format: str = "%Y-%m-%d"
+    width_sample_rows: int = 1000  # Filas muestreadas por chunk para anchos
+    max_column_width: int = 50  # Ancho máximo de columna
+    default_format: str = "xlsx"  # xlsx, parquet, arrow, csv
+    parquet_compression: str = "snappy"
+    schema_hold_rows: int = 100000  # Filas retenidas para tipar columnas nulas (Parquet/Arrow)
 
 
 EXPORT_CONFIG = ExportConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DE CACHÉ DE RESULTADOS
+# ============================================
+@dataclass
+class CacheConfig:
+    """Configuración de la caché en disco de resultados"""
+    enabled: bool = True
+    directory: str = "./.cache/results"
+    ttl_hours: float = 12.0  # Validez de una entrada (además del cambio de día)
+    max_size_mb: float = 2048.0  # Tamaño máximo; se desalojan las menos usadas
+
+
+CACHE_CONFIG = CacheConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DE REFRESCO INCREMENTAL
+# ============================================
+@dataclass
+class IncrementalConfig:
+    """Configuración del refresco incremental por proveedor"""
+    directory: str = "./.cache/snapshots"
+    max_age_days: int = 7  # Reconstrucción completa si el snapshot es más viejo
+    full_refresh_ratio: float = 0.3  # Reconstrucción completa si cambia más de esta fracción
+    key_batch_size: int = 500  # Proveedores por query de recálculo
+
+
+INCREMENTAL_CONFIG = IncrementalConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DE MÉTRICAS
+# ============================================
+@dataclass
+class MetricsConfig:
+    """Configuración de las métricas por etapa (ver utils/metrics.py)"""
+    file: Optional[str] = None  # Archivo JSON Lines de métricas (--metrics-file); None = sin archivo
+    print_summary: bool = True  # Imprimir el detalle por etapa al terminar cada reporte
+
+
+METRICS_CONFIG = MetricsConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DE TIPOS DE DATOS
+# ============================================
+@dataclass
+class DtypeConfig:
+    """Optimización de tipos de los DataFrames tras el fetch (ver utils/dtypes.py)"""
+    enabled: bool = True
+    category_max_ratio: float = 0.1  # Texto a categórico si valores distintos <= ratio * filas
+    category_max_unique: int = 5000  # y además no más de estos valores distintos
+    # Enteros por sufijo de columna (sin " (M)"): tipo al que se reducen
+    integer_suffixes: tuple = (("_COUNT", "int32"), ("_YEAR", "int16"))
+
+
+DTYPE_CONFIG = DtypeConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DEL DAEMON DE REPORTES
+# ============================================
+@dataclass
+class DaemonConfig:
+    """Proceso residente que atiende pedidos de reportes (ver daemon.py)"""
+    host: str = "127.0.0.1"  # Solo local
+    port: int = 8765
+    socket_path: Optional[str] = None  # Socket Unix en lugar de HTTP por TCP
+    workers: int = 2  # Reportes ejecutándose a la vez
+    max_queued: int = 20  # Pedidos en espera; más allá se rechazan (503)
+    warm_connections: int = 2  # Conexiones del pool abiertas al iniciar
+    keepalive_seconds: float = 120.0  # Cada cuánto se validan/reabren (0 = nunca)
+    preload: bool = True  # Importar los reportes (y pandas) al iniciar
+    job_history: int = 200  # Trabajos terminados que se conservan para consulta
+    output_dir: str = "./exports"
+
+
+DAEMON_CONFIG = DaemonConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DE BÚSQUEDA DE PROVEEDORES
+# ============================================
+@dataclass
+class LookupConfig:
+    """Búsqueda puntual de proveedores (ver reports/lookup.py)"""
+    ttl_seconds: float = 600.0  # Validez de un perfil en la caché en memoria
+    max_entries: int = 5000  # Perfiles en caché; se desalojan los de uso menos reciente
+    batch_window_ms: float = 20.0  # Espera para juntar búsquedas concurrentes en una query
+    max_batch: int = 500  # Proveedores por query
+
+
+LOOKUP_CONFIG = LookupConfig()
+
+
+# ============================================
+# CONFIGURACIÓN DE CACHÉ DE DIMENSIONES
+# ============================================
+@dataclass
+class DimensionConfig:
+    """Tablas de descripción resueltas en el cliente (ver reports/dimensions.py)"""
+    enabled: bool = True  # False: las queries unen las dimensiones en el servidor
+    directory: str = "./.cache/dimensions"
+    check_seconds: float = 300.0  # Validación contra la BD (conteo y checksum) en procesos largos
+
+
+DIMENSION_CONFIG = DimensionConfig()
@@ -0,0 +1,606 @@
+"""
+Daemon de reportes
+==================
+Proceso residente que evita pagar en cada reporte el arranque del
+intérprete, la importación de pandas y el login ODBC: mantiene las clases
+de los reportes importadas y conexiones del pool abiertas, y atiende
+pedidos por HTTP local (127.0.0.1) o por un socket Unix.
+
+Los pedidos se encolan y se ejecutan en un pool de DAEMON_CONFIG.workers
+threads; con más de DAEMON_CONFIG.max_queued en espera se rechazan con
+503. Los POST deben ser application/json y se rechazan los pedidos con
+cabecera Origin (hechos desde un navegador), de modo que una página web
+no puede encolar reportes en el puerto local. Los archivos se escriben
+siempre dentro de DAEMON_CONFIG.output_dir. Cada trabajo retorna la ruta generada y su registro de métricas
+(ver utils/metrics.py), que además se entrega a los hooks registrados
+(--metrics-file).
+
+API (JSON):
+    GET  /health          Estado, cola y pool de conexiones
+    GET  /reports         Reportes disponibles
+    POST /jobs            Encola un reporte; con "wait": true responde al terminar
+    GET  /jobs/<id>       Estado de un trabajo (queued, running, ok, error)
+    GET  /vendors?codes=100234,100871[&by=num]
+                          Perfil de proveedores (ver reports/lookup.py), con
+                          caché en memoria entre pedidos
+
+Pedido:
+    {"report": "supplier_site", "format": "parquet", "limit": 1000,
+     "filters": {"vendors": ["100234", "100871"]}, "wait": true}
+    {"report": "supplier_header", "filters": {"sample": "1%"}}
+
+Uso:
+    python main.py --serve
+    python main.py --serve --socket /tmp/master-data.sock
+    curl -s localhost:8765/jobs -H 'Content-Type: application/json' \
+         -d '{"report": "supplier_header", "wait": true}'
+    curl -s --unix-socket /tmp/master-data.sock http://localhost/health
+"""
+import errno
+import itertools
+import json
+import os
+import socket
+import stat
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent))
+from main import generate_report
+from reports.registry import REPORTS, load_report
+from reports.sample import parse_fraction
+from utils import metrics
+from utils.excel_exporter import EXPORT_FORMATS, generate_output_filename
+from config.settings import DAEMON_CONFIG, EXPORT_CONFIG, POOL_CONFIG
+
+
+# Campos aceptados en el pedido y filtros soportados
+REQUEST_FIELDS = (
+    "report", "format", "filters", "limit", "stream", "output_path", "output_dir",
+    "engine", "cache", "incremental", "partitions", "partition_strategy", "wait",
+)
+FILTERS = ("vendors", "sample")
+
+JOB_STATES = ("queued", "running", "ok", "error")
+
+
+class RequestError(ValueError):
+    """Pedido inválido (responde 400) o cola llena (503)."""
+    
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================
+# TRABAJOS
+# ============================================
+class Job:
+    """Pedido de reporte encolado y su resultado."""
+    
+    def __init__(self, job_id: str, options: Dict[str, Any]):
+        self.id = job_id
+        self.options = options
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.output_path: Optional[str] = None
+        self.metrics: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        def seconds(start, end):
+            return round(end - start, 3) if start is not None and end is not None else None
+        
+        return {
+            "job": self.id,
+            "status": self.status,
+            "report": self.options["report"],
+            "options": self.options,
+            "output_path": self.output_path,
+            "error": self.error,
+            "submitted_at": datetime.fromtimestamp(self.submitted_at).isoformat(timespec="seconds"),
+            "queued_seconds": seconds(self.submitted_at, self.started_at or self.finished_at),
+            "run_seconds": seconds(self.started_at, self.finished_at),
+            "metrics": self.metrics,
+        }
+
+
+class ReportDaemon:
+    """
+    Cola de pedidos de reportes con concurrencia acotada.
+    
+    Se puede usar sin servidor (submit() / get()), por ejemplo desde otro
+    proceso Python que ya tenga su propio ciclo de atención.
+    """
+    
+    def __init__(self, config=None):
+        self.config = config or DAEMON_CONFIG
+        self.started_at = time.time()
+        self.report_classes: Dict[str, type] = {}
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.workers),
+            thread_name_prefix="report"
+        )
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = 0  # Trabajos encolados o en ejecución
+        self._stop = threading.Event()
+        self._keepalive: Optional[threading.Thread] = None
+    
+    # --------------------------------------------
+    # Ciclo de vida
+    # --------------------------------------------
+    def start(self) -> "ReportDaemon":
+        """Importa los reportes y abre las conexiones iniciales."""
+        if self.config.preload:
+            start = time.perf_counter()
+            for name in REPORTS:
+                self.report_classes[name] = load_report(name)
+            print(f"[OK] {len(self.report_classes)} reportes cargados "
+                  f"({time.perf_counter() - start:.1f}s)")
+        
+        if POOL_CONFIG.enabled and self.config.warm_connections > 0:
+            self._warm()
+            if self.config.keepalive_seconds > 0:
+                self._keepalive = threading.Thread(
+                    target=self._keepalive_loop, name="keepalive", daemon=True
+                )
+                self._keepalive.start()
+        return self
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Deja de aceptar pedidos y espera (o cancela) los encolados."""
+        self._stop.set()
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        if POOL_CONFIG.enabled:
+            from utils.database import close_pool
+            close_pool()
+    
+    def _warm(self, verbose: bool = True) -> None:
+        from utils.database import get_pool
+        
+        try:
+            open_count = get_pool().warm(self.config.warm_connections)
+            if verbose:
+                print(f"[OK] Pool de conexiones listo ({open_count} abiertas)")
+        except Exception as e:
+            # El daemon sigue: los reportes reintentan al tomar conexión
+            print(f"[WARN] No se pudieron abrir conexiones: {e}")
+    
+    def _keepalive_loop(self) -> None:
+        """Valida las conexiones libres antes de que venzan por inactividad."""
+        while not self._stop.wait(self.config.keepalive_seconds):
+            if self._pending == 0:
+                self._warm(verbose=False)
+    
+    # --------------------------------------------
+    # Pedidos
+    # --------------------------------------------
+    def submit(self, request: Dict[str, Any]) -> Job:
+        """
+        Valida y encola un pedido.
+        
+        Raises:
+            RequestError: Si el pedido es inválido o la cola está llena
+        """
+        options = self._validate(request)
+        with self._lock:
+            if self._stop.is_set():
+                raise RequestError("El daemon se está deteniendo", status=503)
+            if self._pending >= self.config.workers + self.config.max_queued:
+                raise RequestError(
+                    f"Cola llena ({self.config.max_queued} pedidos en espera)", status=503
+                )
+            self._pending += 1
+            job = Job(f"{next(self._ids):06d}", options)
+            self._jobs[job.id] = job
+            self._trim_history()
+        
+        self._executor.submit(self._run, job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def status(self) -> Dict[str, Any]:
+        """Estado del daemon para /health."""
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        
+        status = {
+            "status": "stopping" if self._stop.is_set() else "ok",
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "workers": self.config.workers,
+            "max_queued": self.config.max_queued,
+            "jobs": counts,
+            "preloaded": list(self.report_classes),
+        }
+        if POOL_CONFIG.enabled and "utils.database" in sys.modules:
+            status["pool"] = sys.modules["utils.database"].get_pool().stats()
+        if "reports.lookup" in sys.modules:
+            status["lookup"] = sys.modules["reports.lookup"].get_lookup().stats()
+        return status
+    
+    def lookup(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Perfiles de proveedor para GET /vendors (se ejecutan en el thread
+        del pedido, fuera de la cola de reportes).
+        
+        Raises:
+            RequestError: Si faltan los códigos o el tipo no es válido
+        """
+        from reports.lookup import LOOKUP_KEYS, get_lookup
+        
+        codes = [code for value in query.get("codes", []) for code in value.split(",")]
+        by = (query.get("by") or ["id"])[-1]
+        if by not in LOOKUP_KEYS:
+            raise RequestError(f"Tipo de código '{by}' no soportado. Opciones: {', '.join(LOOKUP_KEYS)}")
+        try:
+            profiles = get_lookup().lookup(codes, by)
+        except ValueError as e:
+            raise RequestError(str(e))
+        return {
+            "profiles": [profile.to_dict() for profile in profiles.values()],
+            "cache": get_lookup().stats(),
+        }
+    
+    def _validate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Pedido normalizado con los campos de REQUEST_FIELDS."""
+        if not isinstance(request, dict):
+            raise RequestError("El pedido debe ser un objeto JSON")
+        unknown = set(request) - set(REQUEST_FIELDS)
+        if unknown:
+            raise RequestError(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+        
+        report = request.get("report")
+        if report not in REPORTS:
+            raise RequestError(
+                f"Reporte '{report}' no encontrado. Opciones: {', '.join(REPORTS)}"
+            )
+        output_format = request.get("format") or EXPORT_CONFIG.default_format
+        if output_format not in EXPORT_FORMATS:
+            raise RequestError(
+                f"Formato '{output_format}' no soportado. Opciones: {', '.join(EXPORT_FORMATS)}"
+            )
+        limit = request.get("limit")
+        if limit is not None and (not isinstance(limit, int) or limit <= 0):
+            raise RequestError("limit debe ser un entero positivo")
+        
+        filters = request.get("filters") or {}
+        if not isinstance(filters, dict) or set(filters) - set(FILTERS):
+            raise RequestError(f"filters solo acepta: {', '.join(FILTERS)}")
+        vendors = filters.get("vendors")
+        if vendors is not None:
+            if isinstance(vendors, str):
+                vendors = [vendors]
+            if not vendors or not all(isinstance(code, (str, int)) for code in vendors):
+                raise RequestError("filters.vendors debe ser una lista de códigos")
+            vendors = [str(code) for code in vendors]
+        sample = filters.get("sample")
+        if sample is not None:
+            try:
+                sample = parse_fraction(sample)
+            except ValueError as e:
+                raise RequestError(str(e)) from None
+        if (vendors or sample) and not load_report(report).supports_subsets():
+            raise RequestError(f"{report} no soporta filtro ni muestra de proveedores")
+        
+        options = {field: request.get(field) for field in REQUEST_FIELDS if field != "wait"}
+        filters = {"vendors": vendors, "sample": sample}
+        options.update(format=output_format, filters={k: v for k, v in filters.items() if v})
+        for field in ("output_dir", "output_path"):
+            if options[field] is not None:
+                options[field] = self._confine(field, options[field])
+        return options
+    
+    def _confine(self, field: str, value: Any) -> str:
+        """
+        Ruta de salida del pedido dentro de output_dir (las relativas se
+        toman desde ahí).
+        
+        Raises:
+            RequestError: Si la ruta queda fuera de output_dir
+        """
+        if not isinstance(value, str) or not value:
+            raise RequestError(f"{field} debe ser una ruta")
+        base = Path(self.config.output_dir).resolve()
+        path = (base / value).resolve()
+        if path != base and base not in path.parents:
+            raise RequestError(f"{field} debe quedar dentro de {base}")
+        if field == "output_path" and path == base:
+            raise RequestError("output_path debe ser un archivo")
+        return str(path)
+    
+    def _trim_history(self) -> None:
+        """Descarta los trabajos terminados más viejos. Requiere el lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(finished) - self.config.job_history)]:
+            del self._jobs[job_id]
+    
+    def _output_path(self, job: Job) -> str:
+        """
+        Ruta con timestamp y el id del trabajo: dos pedidos del mismo
+        reporte en el mismo segundo no escriben el mismo archivo.
+        """
+        filename = Path(generate_output_filename(job.options["report"], output_format=job.options["format"]))
+        output_dir = job.options["output_dir"] or self.config.output_dir
+        return str(Path(output_dir) / f"{filename.stem}_{job.id}{filename.suffix}")
+    
+    def _run(self, job: Job) -> None:
+        """Ejecuta un trabajo en un thread del pool."""
+        job.status = "running"
+        job.started_at = time.time()
+        options = job.options
+        try:
+            with metrics.collect() as records:
+                try:
+                    job.output_path = generate_report(
+                        report_name=options["report"],
+                        output_path=options["output_path"] or self._output_path(job),
+                        limit=options["limit"],
+                        engine=options["engine"],
+                        stream=bool(options["stream"]),
+                        output_format=options["format"],
+                        cache=options["cache"],
+                        incremental=bool(options["incremental"]),
+                        partitions=options["partitions"],
+                        partition_strategy=options["partition_strategy"],
+                        vendors=options["filters"].get("vendors"),
+                        sample=options["filters"].get("sample")
+                    )
+                    job.status = "ok"
+                except Exception as e:
+                    job.status = "error"
+                    job.error = f"{type(e).__name__}: {e}"
+                    traceback.print_exc()
+            
+            # Los registros se retuvieron para adjuntarlos al trabajo; ahora
+            # se entregan a los hooks del proceso
+            for record in records:
+                metrics.emit(record)
+            if records:
+                job.metrics = records[-1]
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+            job.done.set()
+
+
+
+# ============================================
+# SERVIDOR HTTP (TCP LOCAL O SOCKET UNIX)
+# ============================================
+class _Handler(BaseHTTPRequestHandler):
+    """Traduce la API JSON a llamadas de ReportDaemon (server.daemon)."""
+    
+    server_version = "MasterDataReports"
+    
+    def do_GET(self):
+        if not self._allowed():
+            return
+        daemon = self.server.daemon
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/")
+        if path == "/health":
+            self._send(200, daemon.status())
+        elif path == "/reports":
+            self._send(200, {
+                name: {"title": spec.title, "description": spec.description}
+                for name, spec in REPORTS.items()
+            })
+        elif path.startswith("/jobs/"):
+            job = daemon.get(path[len("/jobs/"):])
+            if job is None:
+                self._send(404, {"error": "Trabajo no encontrado"})
+            else:
+                self._send(200, job.to_dict())
+        elif path == "/vendors":
+            try:
+                self._send(200, daemon.lookup(parse_qs(url.query)))
+            except RequestError as e:
+                self._send(e.status, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._send(404, {"error": f"Ruta no encontrada: {self.path}"})
+    
+    def do_POST(self):
+        if not self._allowed():
+            return
+        if self.path.rstrip("/") != "/jobs":
+            self._send(404, {"error": f"Ruta no encontrada: {self.path}"})
+            return
+        # Un formulario HTML no puede enviar application/json sin preflight
+        if self.headers.get_content_type() != "application/json":
+            self._send(415, {"error": "Content-Type debe ser application/json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = self.server.daemon.submit(request)
+        except json.JSONDecodeError as e:
+            self._send(400, {"error": f"JSON inválido: {e}"})
+            return
+        except RequestError as e:
+            self._send(e.status, {"error": str(e)})
+            return
+        
+        if isinstance(request, dict) and request.get("wait"):
+            job.done.wait()
+            self._send(200 if job.status == "ok" else 500, job.to_dict())
+        else:
+            self._send(202, job.to_dict())
+    
+    def _allowed(self) -> bool:
+        """Rechaza (403) los pedidos hechos desde un navegador (cabecera Origin)."""
+        if self.headers.get("Origin") is not None:
+            self._send(403, {"error": "No se aceptan pedidos desde navegadores (cabecera Origin)"})
+            return False
+        return True
+    
+    def _send(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def address_string(self) -> str:
+        # En un socket Unix client_address es '' (sin host)
+        return self.client_address[0] if self.client_address else "unix"
+    
+    def log_message(self, format, *args):
+        print(f"  [{self.log_date_time_string()}] {format % args}")
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer sobre un socket Unix (solo accesible localmente)."""
+    
+    address_family = socket.AF_UNIX
+    
+    # Inodo del socket creado por este servidor (None si no llegó a crearlo)
+    _inode: Optional[int] = None
+    
+    def server_bind(self):
+        # Un socket que quedó de una ejecución anterior impide el bind; solo
+        # se elimina si es un socket y nadie atiende en él
+        path = self.server_address
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None:
+            if not stat.S_ISSOCK(mode):
+                raise OSError(errno.EEXIST, f"{path} existe y no es un socket")
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)
+            else:
+                raise OSError(errno.EADDRINUSE, f"Otro daemon ya escucha en {path}")
+            finally:
+                probe.close()
+        # HTTPServer.server_bind espera (host, port)
+        super(HTTPServer, self).server_bind()
+        self._inode = os.stat(path).st_ino
+        self.server_name = "localhost"
+        self.server_port = 0
+    
+    def server_close(self):
+        super().server_close()
+        # Solo el socket propio: si el bind falló, el archivo es de otro daemon
+        try:
+            if self._inode is not None and os.stat(self.server_address).st_ino == self._inode:
+                os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def create_server(
+    daemon: ReportDaemon,
+    host: str = None,
+    port: int = None,
+    socket_path: str = None
+) -> HTTPServer:
+    """
+    Servidor HTTP del daemon: socket Unix si se indica socket_path (o
+    DAEMON_CONFIG.socket_path), si no TCP en host:port.
+    """
+    config = daemon.config
+    socket_path = socket_path or config.socket_path
+    if socket_path:
+        server = _UnixHTTPServer(socket_path, _Handler)
+    else:
+        server = ThreadingHTTPServer((host or config.host, config.port if port is None else port), _Handler)
+    server.daemon = daemon
+    server.daemon_threads = True
+    return server
+
+
+def describe_address(server: HTTPServer) -> str:
+    if isinstance(server, _UnixHTTPServer):
+        return f"unix:{server.server_address}"
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def serve(host: str = None, port: int = None, socket_path: str = None) -> None:
+    """Inicia el daemon y atiende pedidos hasta Ctrl+C."""
+    daemon = ReportDaemon().start()
+    server = create_server(daemon, host, port, socket_path)
+    print(f"[OK] Daemon de reportes escuchando en {describe_address(server)} "
+          f"({daemon.config.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nDeteniendo daemon...")
+    finally:
+        server.server_close()
+        daemon.shutdown(wait=True)
+
+
+# ============================================
+# CLIENTE
+# ============================================
+def request_report(
+    report: str,
+    host: str = None,
+    port: int = None,
+    socket_path: str = None,
+    timeout: float = None,
+    **options
+) -> Dict[str, Any]:
+    """
+    Pide un reporte a un daemon en ejecución y espera el resultado.
+    
+    Args:
+        report: Nombre del reporte
+        options: Campos del pedido (format, limit, filters, ...)
+    
+    Returns:
+        El trabajo terminado (status, output_path, metrics, error)
+    """
+    import http.client
+    
+    config = DAEMON_CONFIG
+    socket_path = socket_path or config.socket_path
+    if socket_path:
+        connection = http.client.HTTPConnection("localhost", timeout=timeout)
+        connection.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.sock.settimeout(timeout)
+        connection.sock.connect(socket_path)
+    else:
+        connection = http.client.HTTPConnection(
+            host or config.host, config.port if port is None else port, timeout=timeout
+        )
+    try:
+        body = json.dumps(dict(options, report=report, wait=True))
+        connection.request("POST", "/jobs", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        result = json.loads(response.read() or b"{}")
+    finally:
+        connection.close()
+    if response.status in (400, 503):
+        raise RequestError(result.get("error", response.reason), status=response.status)
+    return result
@@ -1,48 +1,56 @@
 """
 Master Data Reports - CLI Entry Point
 ======================================
-Genera reportes de Master Data (Suppliers, Customers, etc.) y exporta a Excel.
+Genera reportes de Master Data (Suppliers, Customers, etc.) y exporta a Excel
+(o Parquet, Arrow IPC y CSV).
 
 Uso:
     python main.py --report supplier_header --output suppliers.xlsx
     python main.py --report supplier_site --output sites.xlsx
+    python main.py --report customer_header --output customers.xlsx
+    python main.py --report supplier_header --engine pandas
+    python main.py --report supplier_header --limit 100
+    python main.py --report supplier_site --vendors 100234,100871
+    python main.py --report supplier_header --sample 1%
+    python main.py --report supplier_site --stream
+    python main.py --report supplier_site --stream --format parquet
     python main.py --report all --output-dir ./exports/
+    python main.py --report all --jobs 2
+    python main.py --report supplier_site --stream --partitions 3
+    python main.py --report all --metrics-file ./metrics.jsonl
     python main.py --list
     python main.py --test-connection
+    python main.py --serve
+    python main.py lookup --vendor 100234 100871
 """
 import argparse
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Type
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 # Agregar el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from reports.base import BaseReport
-from reports.suppliers import SupplierHeaderReport, SupplierSiteReport
-from utils.database import test_connection
-from utils.excel_exporter import generate_output_filename
+# Solo módulos livianos: los reportes, pandas y pyodbc se importan al
+# ejecutar un reporte (--list y --help no los cargan)
+from reports.registry import REPORTS, load_report
+from utils import metrics
+from config.settings import EXPORT_CONFIG
 
-
-# ============================================
-# REGISTRO DE REPORTES DISPONIBLES
-# ============================================
-AVAILABLE_REPORTS: Dict[str, Type[BaseReport]] = {
-    "supplier_header": SupplierHeaderReport,
-    "supplier_site": SupplierSiteReport,
-    # Futuros reportes - agregar aquí:
-    # "customer_header": CustomerHeaderReport,
-    # "customer_site": CustomerSiteReport,
-}
+if TYPE_CHECKING:
+    from reports.base import BaseReport
 
 
 def list_reports() -> None:
-    """Muestra lista de reportes disponibles."""
+    """Muestra lista de reportes disponibles (sin importar sus módulos)."""
     print("\nReportes disponibles:")
     print("-" * 40)
-    for name, report_class in AVAILABLE_REPORTS.items():
-        report = report_class()
-        print(f"  • {name:20} - {report.get_sheet_name()}")
+    for name, spec in REPORTS.items():
+        print(f"  • {name:20} - {spec.title}")
+        if spec.description:
+            print(f"    {'':20}   {spec.description}")
     print()
 
 
@@ -50,7 +58,17 @@ def generate_report(
     report_name: str,
     output_path: str = None,
     output_dir: str = None,
-    limit: int = None
+    limit: int = None,
+    engine: str = None,
+    stream: bool = False,
+    auto_width: bool = True,
+    output_format: str = None,
+    cache: str = None,
+    incremental: bool = False,
+    partitions: int = None,
+    partition_strategy: str = None,
+    vendors: List[str] = None,
+    sample: float = None
 ) -> str:
     """
     Genera un reporte específico.
@@ -59,52 +77,419 @@ def generate_report(
         report_name: Nombre del reporte (ej: 'supplier_header')
         output_path: Ruta completa del archivo de salida
         output_dir: Directorio de salida (genera nombre automático)
-        limit: Límite de filas (para pruebas)
+        limit: Límite de filas (para pruebas). En los reportes de
+               proveedores toma los primeros N proveedores antes de
+               calcular las métricas (ver reports/sample.py).
+        engine: Motor de cálculo ('sql' o 'pandas'). Si el reporte no lo
+                soporta se usa su motor por defecto.
+        stream: Si leer y escribir por chunks (memoria acotada)
+        auto_width: Si estimar el ancho de columnas desde los datos
+        output_format: Formato de salida (xlsx, parquet, arrow, csv)
+        cache: Modo de caché de resultados ('use', 'refresh' u 'off')
+        incremental: Si recalcular solo los proveedores con cambios
+        partitions: Queries concurrentes por reporte (reportes con PARTITION_KEY)
+        partition_strategy: 'range' u 'origin'
+        vendors: Códigos de proveedor (CiaCod) a los que se restringe
+        sample: Fracción de proveedores a muestrear por hash (0.01 = 1%)
         
     Returns:
         Ruta del archivo generado
     """
-    if report_name not in AVAILABLE_REPORTS:
+    if report_name not in REPORTS:
         print(f"[ERROR] Reporte '{report_name}' no encontrado.")
         list_reports()
         sys.exit(1)
     
-    report_class = AVAILABLE_REPORTS[report_name]
-    report = report_class()
+    report = _create_report(
+        report_name, engine, cache, incremental, partitions, partition_strategy, vendors, sample
+    )
     
     return report.generate(
         output_path=output_path,
         output_dir=output_dir,
-        limit=limit
+        limit=limit,
+        stream=stream,
+        auto_width=auto_width,
+        output_format=output_format
+    )
+
+
+def _create_report(
+    report_name: str,
+    engine: str = None,
+    cache: str = None,
+    incremental: bool = False,
+    partitions: int = None,
+    partition_strategy: str = None,
+    vendors: List[str] = None,
+    sample: float = None
+) -> "BaseReport":
+    """
+    Instancia un reporte, usando su motor por defecto si no soporta `engine`
+    y ejecución completa si no soporta refresco incremental ni filtro o
+    muestra de proveedores.
+    """
+    report_class = load_report(report_name)
+    if engine and engine not in report_class.SUPPORTED_ENGINES:
+        print(f"[WARN] {report_name} no soporta el motor '{engine}', "
+              f"se usa '{report_class.SUPPORTED_ENGINES[0]}'")
+        engine = None
+    if incremental and not report_class.INCREMENTAL_KEY:
+        print(f"[WARN] {report_name} no soporta refresco incremental, se ejecuta completo")
+        incremental = False
+    if (vendors or sample) and not report_class.supports_subsets():
+        print(f"[WARN] {report_name} no soporta filtro ni muestra de proveedores, se ejecuta completo")
+        vendors, sample = None, None
+    return report_class(
+        engine=engine,
+        cache=cache,
+        incremental=incremental,
+        partitions=partitions,
+        partition_strategy=partition_strategy,
+        vendors=vendors,
+        sample=sample
     )
 
 
-def generate_all_reports(output_dir: str = None, limit: int = None) -> None:
-    """Genera todos los reportes disponibles."""
+def generate_all_reports(
+    output_dir: str = None,
+    limit: int = None,
+    engine: str = None,
+    stream: bool = False,
+    auto_width: bool = True,
+    output_format: str = None,
+    jobs: int = 1,
+    cache: str = None,
+    incremental: bool = False,
+    partitions: int = None,
+    partition_strategy: str = None,
+    vendors: List[str] = None,
+    sample: float = None
+) -> None:
+    """
+    Genera todos los reportes disponibles.
+    
+    Con jobs > 1 los reportes se generan en paralelo (ver
+    _generate_parallel) y el tiempo total tiende al del reporte más lento.
+    Con --engine pandas supplier_header y supplier_site comparten la
+    lectura y agregación de DocCab por locación (reports/suppliers/locations.py).
+    """
+    from reports.suppliers.locations import shared_run
+    
     output_dir = output_dir or "./exports"
     print(f"\nGenerando todos los reportes en: {output_dir}")
     print("=" * 50)
     
-    generated = []
-    for report_name in AVAILABLE_REPORTS.keys():
+    options = dict(
+        output_dir=output_dir,
+        limit=limit,
+        engine=engine,
+        stream=stream,
+        auto_width=auto_width,
+        output_format=output_format,
+        cache=cache,
+        incremental=incremental,
+        partitions=partitions,
+        partition_strategy=partition_strategy,
+        vendors=vendors,
+        sample=sample
+    )
+    
+    start = time.perf_counter()
+    with shared_run():
+        if jobs > 1:
+            results = _generate_parallel(list(REPORTS), jobs, **options)
+        else:
+            results = {}
+            for report_name in REPORTS.keys():
+                report_start = time.perf_counter()
+                try:
+                    path = generate_report(report_name=report_name, **options)
+                    results[report_name] = (path, None, time.perf_counter() - report_start)
+                except Exception as e:
+                    print(f"[ERROR] Error generando {report_name}: {e}")
+                    results[report_name] = (None, e, time.perf_counter() - report_start)
+    
+    _print_summary(results, time.perf_counter() - start)
+
+
+def _generate_parallel(
+    report_names: List[str],
+    jobs: int,
+    output_dir: str,
+    limit: int,
+    engine: str,
+    stream: bool,
+    auto_width: bool,
+    output_format: str,
+    cache: str,
+    incremental: bool,
+    partitions: int,
+    partition_strategy: str,
+    vendors: List[str],
+    sample: float
+) -> Dict[str, Tuple[Optional[str], Optional[Exception], float]]:
+    """
+    Genera reportes concurrentemente.
+    
+    - Fase BD: un pool de threads ejecuta las queries; cada reporte abre
+      su propia DatabaseConnection (pyodbc libera el GIL mientras espera).
+    - Fase export: a medida que llega cada DataFrame se envía a un pool de
+      procesos, porque escribir el archivo es CPU-bound.
+    - En modo streaming query y escritura van intercaladas, así que cada
+      reporte completo se ejecuta en un proceso con su propia conexión.
+    - Métricas: los procesos hijos devuelven lo medido y los registros se
+      emiten aquí, donde están registrados los hooks. El CPU de la fase BD
+      es el del proceso completo (incluye los otros threads).
+    
+    Returns:
+        Dict {reporte: (ruta o None, error o None, segundos)}
+    """
+    results = {}
+    started = {name: time.perf_counter() for name in report_names}
+    
+    def record(name, path=None, error=None):
+        if error is not None:
+            print(f"[ERROR] Error generando {name}: {error}")
+        results[name] = (path, error, time.perf_counter() - started[name])
+    
+    with ThreadPoolExecutor(max_workers=jobs) as threads, \
+            ProcessPoolExecutor(max_workers=jobs) as processes:
+        exports = {}
+        recorders: Dict[str, metrics.MetricsRecorder] = {}
+        
+        if stream:
+            for name in report_names:
+                future = processes.submit(
+                    _generate_isolated,
+                    report_name=name,
+                    output_dir=output_dir,
+                    limit=limit,
+                    engine=engine,
+                    stream=True,
+                    auto_width=auto_width,
+                    output_format=output_format,
+                    cache=cache,
+                    incremental=incremental,
+                    partitions=partitions,
+                    partition_strategy=partition_strategy,
+                    vendors=vendors,
+                    sample=sample
+                )
+                exports[future] = name
+        else:
+            reports = {
+                name: _create_report(
+                    name, engine, cache, incremental, partitions, partition_strategy, vendors, sample
+                )
+                for name in report_names
+            }
+            recorders.update({
+                name: reports[name].metrics_recorder(limit=limit, output_format=output_format)
+                for name in report_names
+            })
+            fetches = {
+                threads.submit(_execute_measured, reports[name], recorders[name], limit): name
+                for name in report_names
+            }
+            
+            for future in as_completed(fetches):
+                name = fetches[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    metrics.emit(recorders[name].finish("error", e))
+                    record(name, error=e)
+                    continue
+                
+                report = reports[name]
+                print(f"  {name}: {len(df):,} registros, exportando...")
+                future = processes.submit(
+                    _export_measured,
+                    df,
+                    report.get_output_path(output_dir=output_dir, output_format=output_format),
+                    report.get_sheet_name(),
+                    output_format or EXPORT_CONFIG.default_format,
+                    report.get_column_widths(),
+                    auto_width,
+                    report.get_layout()
+                )
+                exports[future] = name
+        
+        for future in as_completed(exports):
+            name = exports[future]
+            try:
+                path, outcome = future.result()
+            except Exception as e:
+                # En streaming el hijo devuelve sus errores; aquí solo
+                # llegan los del export o la caída del proceso
+                if name in recorders:
+                    metrics.emit(recorders[name].finish("error", e))
+                record(name, error=e)
+                continue
+            
+            if stream:
+                error, records = outcome
+                for run in records:
+                    metrics.emit(run)
+            else:
+                error = None
+                recorders[name].merge(outcome)
+                metrics.emit(recorders[name].finish(output_path=path))
+            record(name, path=path, error=error)
+    
+    # Mantener el orden de registro en el resumen
+    return {name: results[name] for name in report_names}
+
+
+def _generate_isolated(report_name: str, **options) -> Tuple[Optional[str], Tuple]:
+    """
+    generate_report() para un proceso hijo. Los registros de métricas se
+    devuelven al proceso principal (donde están los hooks) junto con el
+    error, en vez de emitirse en el hijo.
+    
+    Returns:
+        Tupla (ruta o None, (error o None, registros de métricas))
+    """
+    with metrics.collect() as records:
         try:
-            path = generate_report(
-                report_name=report_name,
-                output_dir=output_dir,
-                limit=limit
-            )
-            generated.append(path)
+            return generate_report(report_name, **options), (None, records)
         except Exception as e:
-            print(f"[ERROR] Error generando {report_name}: {e}")
+            return None, (e, records)
+
+
+def _execute_measured(
+    report: "BaseReport",
+    recorder: metrics.MetricsRecorder,
+    limit: int = None
+):
+    """report.execute() midiendo sus etapas en el recorder del reporte."""
+    with recorder.activate():
+        # Solo columnas leídas: el exportador completa el layout
+        return report.execute(limit=limit, expand=False)
+
+
+def _export_measured(*args) -> Tuple[str, Dict[str, Dict]]:
+    """
+    export_dataframe() en un proceso hijo.
+    
+    Returns:
+        Tupla (ruta, etapas medidas) para sumar al recorder del reporte
+    """
+    from utils.excel_exporter import export_dataframe
+    
+    with metrics.MetricsRecorder("export").activate():
+        path = export_dataframe(*args)
+        return path, metrics.stage_snapshot()
+
+
+def _print_summary(
+    results: Dict[str, Tuple[Optional[str], Optional[Exception], float]],
+    elapsed: float
+) -> None:
+    """Imprime el resumen consolidado de éxitos y fallos."""
+    generated = [(name, r) for name, r in results.items() if r[1] is None]
+    failed = [(name, r) for name, r in results.items() if r[1] is not None]
     
     print("\n" + "=" * 50)
-    print(f"[OK] Generados {len(generated)} reportes:")
-    for path in generated:
-        print(f"   • {path}")
+    print(f"[OK] Generados {len(generated)} de {len(results)} reportes "
+          f"en {elapsed:.1f}s:")
+    for name, (path, _, seconds) in generated:
+        print(f"   • {path} ({seconds:.1f}s)")
+    
+    if failed:
+        print(f"[ERROR] Fallidos {len(failed)}:")
+        for name, (_, error, seconds) in failed:
+            print(f"   • {name}: {error} ({seconds:.1f}s)")
+
+
+def print_pool_stats() -> None:
+    """Muestra las estadísticas del pool de conexiones del proceso."""
+    from utils.database import get_pool
+    
+    stats = get_pool().stats()
+    print("\nPool de conexiones:")
+    print("-" * 40)
+    for key, value in stats.items():
+        print(f"  {key:20} {value}")
+
+
+def lookup_vendors(argv: List[str]) -> None:
+    """
+    Subcomando `lookup`: perfil de cabecera y sitios de pocos proveedores
+    (ver reports/lookup.py).
+    """
+    import json
+    
+    parser = argparse.ArgumentParser(
+        prog="main.py lookup",
+        description="Perfil de proveedores (métricas de supplier_header y supplier_site)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos:
+  python main.py lookup --vendor 100234
+  python main.py lookup --vendor 100234,100871 --json
+  python main.py lookup --vendor 900123456 --by num
+  python main.py lookup --vendor ./vendors.txt
+        """
+    )
+    parser.add_argument(
+        "--vendor", "-v",
+        nargs="+",
+        required=True,
+        metavar="CODIGO",
+        help="Códigos de proveedor (códigos, listas separadas por coma o archivos)"
+    )
+    parser.add_argument(
+        "--by",
+        choices=["id", "num"],
+        default="id",
+        help="Tipo de código: id (CiaCod) o num (CiaIdeNum) (default: id)"
+    )
+    parser.add_argument("--json", action="store_true", help="Imprime los perfiles como JSON")
+    args = parser.parse_args(argv)
+    
+    from reports.sample import read_vendor_codes
+    
+    try:
+        codes = read_vendor_codes(args.vendor)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    from reports.lookup import lookup_vendors as lookup
+    
+    start = time.perf_counter()
+    try:
+        profiles = lookup(codes, by=args.by)
+    except Exception as e:
+        print(f"[ERROR] Búsqueda fallida: {e}")
+        sys.exit(1)
+    
+    if args.json:
+        print(json.dumps([p.to_dict() for p in profiles.values()], ensure_ascii=False, indent=2, default=str))
+        return
+    
+    for code, profile in profiles.items():
+        print(f"\n{'=' * 60}\nProveedor {code}\n{'=' * 60}")
+        if not profile.found:
+            print("[WARN] Sin filas en los reportes de proveedores")
+            continue
+        print(f"\nCabecera ({len(profile.header)}):")
+        print(profile.header.T.to_string(header=False))
+        print(f"\nSitios ({len(profile.sites)}):")
+        print(profile.sites.T.to_string(header=False))
+    
+    found = sum(profile.found for profile in profiles.values())
+    print(f"\n[OK] {found}/{len(profiles)} proveedores en {time.perf_counter() - start:.2f}s")
 
 
 def main():
     """Punto de entrada principal."""
+    # Subcomandos (el resto de las acciones son flags de este parser)
+    if sys.argv[1:2] == ["lookup"]:
+        lookup_vendors(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="Master Data Reports - Generador de Excel",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -114,15 +499,33 @@ Ejemplos:
   python main.py --test-connection
   python main.py --report supplier_header
   python main.py --report supplier_site --output sites.xlsx
+  python main.py --report customer_header --output customers.xlsx
   python main.py --report all --output-dir ./exports
   python main.py --report supplier_header --limit 10
+  python main.py --report supplier_site --vendors 100234 100871
+  python main.py --report supplier_site --vendors ./vendors.txt
+  python main.py --report all --sample 1%
+  python main.py --report supplier_header --engine pandas
+  python main.py --report supplier_site --stream
+  python main.py --report supplier_site --stream --no-auto-width
+  python main.py --report supplier_site --stream --format parquet
+  python main.py --report all --jobs 2
+  python main.py --report all --engine pandas
+  python main.py --report supplier_header --refresh
+  python main.py --report all --incremental
+  python main.py --report supplier_site --stream --partitions 3
+  python main.py --report all --metrics-file ./metrics.jsonl
+  python main.py --serve --port 8765
+  python main.py --serve --socket /tmp/master-data.sock
+  python main.py lookup --vendor 100234 100871
         """
     )
     
     parser.add_argument(
         "--report", "-r",
         type=str,
-        help="Nombre del reporte a generar (o 'all' para todos)"
+        help="Nombre del reporte a generar (o 'all' para todos; con 'all' y "
+             "--engine pandas supplier_header y supplier_site leen DocCab una sola vez)"
     )
     
     parser.add_argument(
@@ -141,7 +544,121 @@ Ejemplos:
     parser.add_argument(
         "--limit", "-l",
         type=int,
-        help="Límite de filas (para pruebas)"
+        help="Límite de filas (para pruebas). En los reportes de proveedores "
+             "toma los primeros N proveedores antes de calcular métricas"
+    )
+    
+    parser.add_argument(
+        "--vendors",
+        nargs="+",
+        metavar="CODIGO",
+        help="Restringe los reportes de proveedores a estos CiaCod (códigos, "
+             "listas separadas por coma o archivos con un código por línea)"
+    )
+    
+    parser.add_argument(
+        "--sample",
+        type=str,
+        metavar="PORCENTAJE",
+        help="Muestra determinística de proveedores por hash del CiaCod (ej: 1%%)"
+    )
+    
+    parser.add_argument(
+        "--engine", "-e",
+        type=str,
+        choices=["sql", "pandas"],
+        help="Motor de cálculo de métricas (default: sql)"
+    )
+    
+    parser.add_argument(
+        "--stream", "-s",
+        action="store_true",
+        help="Lee y escribe por chunks (memoria acotada por EXPORT_CONFIG.chunk_size)"
+    )
+    
+    parser.add_argument(
+        "--format", "-f",
+        type=str,
+        choices=["xlsx", "parquet", "arrow", "csv"],
+        help="Formato de salida (default: xlsx)"
+    )
+    
+    parser.add_argument(
+        "--no-auto-width",
+        action="store_true",
+        help="No estima el ancho de columnas (solo aplica anchos fijos)"
+    )
+    
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Reportes en paralelo con --report all (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="No lee ni guarda resultados en la caché en disco"
+    )
+    
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-ejecuta las queries y actualiza la caché"
+    )
+    
+    parser.add_argument(
+        "--incremental", "-i",
+        action="store_true",
+        help="Recalcula solo proveedores con cambios sobre el snapshot anterior "
+             "(con --refresh reconstruye el snapshot)"
+    )
+    
+    parser.add_argument(
+        "--partitions", "-p",
+        type=int,
+        help="Divide el reporte en N queries concurrentes mezcladas en orden "
+             "(default: PARTITION_CONFIG.partitions; solo supplier_site)"
+    )
+    
+    parser.add_argument(
+        "--partition-strategy",
+        type=str,
+        choices=["range", "origin"],
+        help="Particiones por rangos de CiaCod u orígenes (default: range)"
+    )
+    
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        help="Agrega las métricas por etapa de cada reporte (una línea JSON "
+             "por corrida) a este archivo"
+    )
+    
+    parser.add_argument(
+        "--pool-stats",
+        action="store_true",
+        help="Muestra estadísticas del pool de conexiones al terminar"
+    )
+    
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Inicia el daemon de reportes (conexiones y reportes precargados, "
+             "pedidos por HTTP local o socket Unix; ver daemon.py)"
+    )
+    
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Puerto HTTP local del daemon (default: DAEMON_CONFIG.port)"
+    )
+    
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="Atiende el daemon en este socket Unix en lugar de HTTP por TCP"
     )
     
     parser.add_argument(
@@ -164,6 +681,8 @@ Ejemplos:
         return
     
     if args.test_connection:
+        from utils.database import test_connection
+        
         print("\nProbando conexion a SQL Server...")
         if test_connection():
             print("[OK] Conexion exitosa!")
@@ -172,23 +691,71 @@ Ejemplos:
             sys.exit(1)
         return
     
+    # Métricas por etapa (ver utils/metrics.py)
+    if args.metrics_file:
+        metrics.add_metrics_file(args.metrics_file)
+    
+    if args.serve:
+        from daemon import serve
+        
+        serve(port=args.port, socket_path=args.socket)
+        return
+    
     if not args.report:
         parser.print_help()
         return
     
+    # Modo de caché de resultados
+    cache = "off" if args.no_cache else ("refresh" if args.refresh else None)
+    
+    # Subconjunto de proveedores (ver reports/sample.py)
+    vendors, sample = None, None
+    if args.vendors or args.sample:
+        from reports.sample import parse_fraction, read_vendor_codes
+        
+        try:
+            vendors = read_vendor_codes(args.vendors) if args.vendors else None
+            sample = parse_fraction(args.sample) if args.sample else None
+        except ValueError as e:
+            parser.error(str(e))
+    
     # Generar reportes
     if args.report.lower() == "all":
         generate_all_reports(
             output_dir=args.output_dir,
-            limit=args.limit
+            limit=args.limit,
+            engine=args.engine,
+            stream=args.stream,
+            auto_width=not args.no_auto_width,
+            output_format=args.format,
+            jobs=args.jobs,
+            cache=cache,
+            incremental=args.incremental,
+            partitions=args.partitions,
+            partition_strategy=args.partition_strategy,
+            vendors=vendors,
+            sample=sample
         )
     else:
         generate_report(
             report_name=args.report,
             output_path=args.output,
             output_dir=args.output_dir,
-            limit=args.limit
+            limit=args.limit,
+            engine=args.engine,
+            stream=args.stream,
+            auto_width=not args.no_auto_width,
+            output_format=args.format,
+            cache=cache,
+            incremental=args.incremental,
+            partitions=args.partitions,
+            partition_strategy=args.partition_strategy,
+            vendors=vendors,
+            sample=sample
         )
+    
+    if args.pool_stats:
+        print_pool_stats()
 
 
 if __name__ == "__main__":
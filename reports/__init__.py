@@ -1,2 +1,14 @@
 # Reports module
-from .base import BaseReport
+import importlib
+
+# Clases exportadas: {clase: submódulo}, importadas al usarse. Listar
+# reportes (reports/registry.py) no carga pandas ni la BD.
+_LAZY = {
+    "BaseReport": ".base",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
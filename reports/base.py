@@ -3,15 +3,38 @@ Clase base para todos los reportes de Master Data
 ==================================================
 Define la interfaz común para reportes de suppliers, customers, etc.
 """
+import copy
+import time
+from dataclasses import replace
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Union
 import pandas as pd
 
 import sys
 sys.path.insert(0, '..')
-from utils.database import DatabaseConnection
-from utils.excel_exporter import ExcelExporter, generate_output_filename
+from utils.database import DatabaseConnection, open_connection, reserve_connections
+from utils.excel_exporter import EXPORT_FORMATS, create_exporter, generate_output_filename
+from utils.cache import get_cache
+from utils import metrics
+from utils.dtypes import DtypeOptimizer
+from reports.columns import ColumnLayout
+from reports.incremental import IncrementalRefresh
+from reports.query import QueryBuilder, SqlQuery
+from reports.sample import VendorSubset
+from reports.dimensions import (
+    get_dimension_cache, join_sql, key_select_list, resolve_dimensions, resolved_columns
+)
+from reports.partition import (
+    PARTITION_STRATEGIES, Partition, PartitionReader, merge_sorted_chunks,
+    origin_partitions, range_boundaries_query, range_partitions
+)
+from config.settings import (
+    EXPORT_CONFIG, CACHE_CONFIG, DIMENSION_CONFIG, DTYPE_CONFIG, INCREMENTAL_CONFIG,
+    METRICS_CONFIG, PARTITION_CONFIG, POOL_CONFIG
+)
 
 
 class BaseReport(ABC):
@@ -25,26 +48,134 @@ class BaseReport(ABC):
     Opcionalmente pueden sobrescribir:
     - transform(): Transformaciones post-query
     - get_column_mapping(): Renombrar columnas
+    - get_layout(): Columnas del template (constantes, copias, dtypes)
+    - get_setup_statements(): Tablas temporales a preparar antes de la query
+    - get_driving_set(): Conjunto base de proveedores (--limit sobre proveedores)
+    - fetch(): Obtención de datos para motores distintos a 'sql'
     """
     
-    def __init__(self, db_connection: DatabaseConnection = None):
+    # Motores de cálculo soportados. El primero es el default.
+    SUPPORTED_ENGINES: tuple = ("sql",)
+    
+    # Modos de caché de resultados: usar, re-ejecutar y guardar, o no usar
+    CACHE_MODES: tuple = ("use", "refresh", "off")
+    
+    # Columna de salida con el código de proveedor (ct.CiaCod). Si se
+    # define, el reporte soporta refresco incremental por proveedor y debe
+    # incluir _key_filter(q) en el WHERE de su query.
+    INCREMENTAL_KEY: Optional[str] = None
+    
+    # Tablas temporales (#tabla) que crea get_setup_statements(). Se
+    # eliminan al terminar la query, ya que las conexiones del pool
+    # conservan la sesión.
+    TEMP_TABLES: tuple = ()
+    
+    # Columna de salida (ordenada, ct.CiaCod) por la que se mezclan las
+    # particiones. Si se define, el reporte soporta ejecución particionada
+    # (ver reports/partition.py) y debe incluir _key_filter(q) en su WHERE.
+    PARTITION_KEY: Optional[str] = None
+    
+    # Joins de tablas de descripción (ver reports/dimensions.py). Con
+    # DIMENSION_CONFIG.enabled la query trae solo los códigos y las
+    # descripciones se resuelven en el cliente; el reporte arma su SELECT
+    # con _select_list() y sus joins con _dimension_joins().
+    DIMENSION_JOINS: tuple = ()
+    
+    def __init__(
+        self,
+        db_connection: DatabaseConnection = None,
+        engine: str = None,
+        cache: str = None,
+        incremental: bool = False,
+        partitions: int = None,
+        partition_strategy: str = None,
+        vendors: List[str] = None,
+        sample: float = None
+    ):
         """
         Inicializa el reporte.
         
         Args:
             db_connection: Conexión a la BD opcional. Si no se provee,
-                          se crea una nueva al ejecutar.
+                          se toma una del pool al ejecutar.
+            engine: Motor de cálculo (ver SUPPORTED_ENGINES). Por defecto
+                    el primero soportado por el reporte.
+            cache: Modo de caché (ver CACHE_MODES). Por defecto 'use' si
+                   CACHE_CONFIG.enabled, si no 'off'.
+            incremental: Si recalcular solo los proveedores con cambios sobre
+                         el snapshot de la corrida anterior (ver
+                         reports/incremental.py). Requiere INCREMENTAL_KEY.
+            partitions: Queries concurrentes en que se divide el reporte.
+                        Usa PARTITION_CONFIG.partitions. Requiere PARTITION_KEY.
+            partition_strategy: 'range' u 'origin' (ver PARTITION_STRATEGIES).
+                                Usa PARTITION_CONFIG.strategy.
+            vendors: Códigos de proveedor (ct.CiaCod) a los que se restringe
+                     el reporte (ver reports/sample.py).
+            sample: Fracción de proveedores a muestrear por hash (0.01 = 1%).
+            
+            vendors y sample requieren INCREMENTAL_KEY o PARTITION_KEY
+            (reportes que incluyen _key_filter en su WHERE).
         """
         self._db = db_connection
         self._owns_connection = db_connection is None
+        
+        self.engine = engine or self.SUPPORTED_ENGINES[0]
+        if self.engine not in self.SUPPORTED_ENGINES:
+            raise ValueError(
+                f"Motor '{self.engine}' no soportado por {self.get_report_name()}. "
+                f"Opciones: {', '.join(self.SUPPORTED_ENGINES)}"
+            )
+        
+        self.cache = cache or ("use" if CACHE_CONFIG.enabled else "off")
+        if self.cache not in self.CACHE_MODES:
+            raise ValueError(
+                f"Modo de caché '{self.cache}' no soportado. "
+                f"Opciones: {', '.join(self.CACHE_MODES)}"
+            )
+        
+        if incremental and not self.INCREMENTAL_KEY:
+            raise ValueError(f"{self.get_report_name()} no soporta refresco incremental")
+        self.incremental = incremental
+        
+        self.partitions = partitions or PARTITION_CONFIG.partitions
+        self.partition_strategy = partition_strategy or PARTITION_CONFIG.strategy
+        if self.partition_strategy not in PARTITION_STRATEGIES:
+            raise ValueError(
+                f"Estrategia de partición '{self.partition_strategy}' no soportada. "
+                f"Opciones: {', '.join(PARTITION_STRATEGIES)}"
+            )
+        
+        # Partición que ejecuta esta instancia (copias creadas por _fetch_partitions)
+        self._partition: Optional[Partition] = None
+        
+        if (vendors or sample) and not self.supports_subsets():
+            raise ValueError(f"{self.get_report_name()} no soporta filtro ni muestra de proveedores")
+        self.subset: Optional[VendorSubset] = None
+        if vendors or sample:
+            self.subset = VendorSubset(tuple(vendors) if vendors else None, sample)
+        
+        # Límite de filas de la ejecución en curso (ver _limited)
+        self._limit: Optional[int] = None
+        
+        # Códigos de proveedor a los que se restringe la query (incremental)
+        self._key_restriction: Optional[List[str]] = None
+        
+        # Fecha de referencia fija para varias queries de una misma corrida
+        self._as_of: Optional[datetime] = None
     
     @abstractmethod
-    def get_query(self) -> str:
+    def get_query(self, as_of: datetime = None) -> Union[str, SqlQuery]:
         """
         Retorna el SQL query para el reporte.
         
+        Args:
+            as_of: Fecha del servidor (GETDATE()) para las ventanas de
+                   fechas. None usa la hora local (solo para mostrar el
+                   texto o armar la llave de caché).
+        
         Returns:
-            String con el query SQL
+            String con el query SQL, o SqlQuery con sus parámetros
+            (ver reports/query.py)
         """
         pass
     
@@ -58,6 +189,37 @@ class BaseReport(ABC):
         """
         pass
     
+    def get_setup_statements(self, as_of: datetime = None) -> List[Union[str, SqlQuery]]:
+        """
+        Sentencias que preparan tablas temporales indexadas en la misma
+        sesión, en orden, antes de ejecutar get_query(). Por defecto
+        ninguna.
+        
+        Args:
+            as_of: Fecha del servidor, la misma que recibe get_query()
+        
+        Returns:
+            Lista de sentencias (str o SqlQuery)
+        """
+        return []
+    
+    def get_driving_set(self, q: QueryBuilder) -> Optional[str]:
+        """
+        FROM y WHERE del conjunto base de proveedores del reporte (alias
+        ct, sin _key_filter). Si se define, --limit toma los primeros N
+        proveedores de ese conjunto antes de las agregaciones en lugar de
+        solo recortar el resultado final (ver reports/sample.py).
+        
+        Returns:
+            Texto 'FROM CiaTab ct ... WHERE ...', o None
+        """
+        return None
+    
+    @classmethod
+    def supports_subsets(cls) -> bool:
+        """Si el reporte admite filtro y muestra de proveedores (_key_filter)."""
+        return bool(cls.INCREMENTAL_KEY or cls.PARTITION_KEY)
+    
     def get_sheet_name(self) -> str:
         """
         Retorna el nombre de la hoja en Excel.
@@ -75,6 +237,27 @@ class BaseReport(ABC):
         """
         return None
     
+    def get_layout(self) -> Optional[ColumnLayout]:
+        """
+        Retorna el layout declarativo de columnas del template (ver
+        reports/columns.py). Con layout, la query trae solo las columnas
+        leídas de la BD y constantes y copias se completan al exportar.
+        
+        Returns:
+            ColumnLayout o None (el resultado de la query es el template)
+        """
+        return None
+    
+    def get_column_widths(self) -> Optional[Dict[str, float]]:
+        """
+        Retorna anchos fijos para columnas del Excel (nombres finales,
+        después del mapeo). Esas columnas no se estiman desde los datos.
+        
+        Returns:
+            Dict {columna: ancho} o None
+        """
+        return None
+    
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Aplica transformaciones al DataFrame después de la query.
@@ -96,80 +279,671 @@ class BaseReport(ABC):
             df = df.rename(columns=mapping)
         return df
     
-    def execute(self, limit: int = None) -> pd.DataFrame:
+    @contextmanager
+    def _connection(self) -> Iterator[DatabaseConnection]:
         """
-        Ejecuta el reporte y retorna un DataFrame.
+        Usa la conexión inyectada si está activa, o toma una del pool
+        (conexión dedicada si POOL_CONFIG.enabled es False).
+        """
+        if self._db and self._db.is_connected:
+            yield self._db
+        else:
+            with open_connection() as db:
+                yield db
+    
+    def _build_query(self, limit: int = None, as_of: datetime = None) -> SqlQuery:
+        """
+        Retorna get_query() con el límite de filas aplicado: sobre el
+        conjunto base de proveedores (si el reporte define get_driving_set)
+        y como TOP en la query final.
+        """
+        with self._limited(limit):
+            query = SqlQuery.of(self.get_query(as_of))
+        
+        # Agregar TOP si se especifica un límite (para pruebas)
+        return query.with_limit(limit)
+    
+    @contextmanager
+    def _limited(self, limit: int = None) -> Iterator[None]:
+        """Límite visible para _key_filter() mientras se arman las queries."""
+        previous, self._limit = self._limit, limit
+        try:
+            yield
+        finally:
+            self._limit = previous
+    
+    def _query_time(self, db: DatabaseConnection) -> datetime:
+        """Fecha de referencia de la corrida, o GETDATE() del servidor."""
+        return self._as_of if self._as_of is not None else db.server_time()
+    
+    @staticmethod
+    def _run(db: DatabaseConnection, query: SqlQuery) -> pd.DataFrame:
+        """Ejecuta una SqlQuery con sus parámetros."""
+        return db.execute_query(query.text, params=query.params or None)
+    
+    # ============================================
+    # DIMENSIONES
+    # ============================================
+    def _client_dimensions(self) -> bool:
+        """Si las descripciones de DIMENSION_JOINS se resuelven en el cliente."""
+        return bool(self.DIMENSION_JOINS) and DIMENSION_CONFIG.enabled
+    
+    def _select_list(self, exclude=()) -> str:
+        """
+        SELECT del layout. Con dimensiones en el cliente, las columnas de
+        descripción se reemplazan por las llaves que las resuelven.
+        """
+        layout = self.get_layout()
+        if not self._client_dimensions():
+            return layout.select_list(exclude=exclude)
+        exclude = set(exclude) | set(resolved_columns(self.DIMENSION_JOINS))
+        return f"{layout.select_list(exclude=exclude)},\n{key_select_list(self.DIMENSION_JOINS)}"
+    
+    def _dimension_joins(self, *aliases: str) -> str:
+        """
+        SQL de los joins de dimensión indicados (todos si no se indican),
+        precedido de un salto de línea; vacío si se resuelven en el cliente.
+        """
+        if self._client_dimensions():
+            return ""
+        return "\n" + join_sql(self.DIMENSION_JOINS, aliases)
+    
+    def _load_dimensions(self, db: DatabaseConnection) -> Optional[Dict[str, Any]]:
+        """
+        Dimensiones vigentes de DIMENSION_JOINS (None si se unen en el
+        servidor). Se cargan antes de abrir la query principal: la conexión
+        no admite otra consulta mientras entrega chunks.
+        """
+        if not self._client_dimensions():
+            return None
+        with metrics.stage("dimensions"):
+            names = {join.dimension for join in self.DIMENSION_JOINS}
+            return get_dimension_cache().tables(db, names)
+    
+    def _resolve_dimensions(self, df: pd.DataFrame, tables: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        """Agrega las descripciones a un resultado leído con _select_list()."""
+        if tables is None:
+            return df
+        with metrics.stage("dimensions") as s:
+            df = resolve_dimensions(df, self.DIMENSION_JOINS, tables)
+            s.rows = len(df)
+        
+        # Columnas en el orden del template (las resueltas quedaron al final)
+        layout = self.get_layout()
+        if layout:
+            ordered = [name for name in layout.fetched_names if name in df.columns]
+            df = df[ordered + [name for name in df.columns if name not in ordered]]
+        return df
+    
+    @contextmanager
+    def _staged(self, db: DatabaseConnection, as_of: datetime, limit: int = None) -> Iterator[None]:
+        """
+        Ejecuta get_setup_statements() en la sesión de db y elimina
+        TEMP_TABLES al salir (aunque la query final falle).
+        """
+        with self._limited(limit):
+            statements = [SqlQuery.of(s) for s in self.get_setup_statements(as_of)]
+        try:
+            for number, statement in enumerate(statements, 1):
+                start = time.perf_counter()
+                with metrics.stage("setup"):
+                    db.execute_statement(statement.text, params=statement.params or None)
+                print(f"  Etapa {number}/{len(statements)} preparada "
+                      f"({time.perf_counter() - start:.1f}s)")
+            yield
+        finally:
+            if self.TEMP_TABLES and db.is_connected:
+                cleanup = "\n".join(f"DROP TABLE IF EXISTS {table};" for table in self.TEMP_TABLES)
+                try:
+                    db.execute_statement(cleanup)
+                except Exception as e:
+                    print(f"[WARN] No se pudieron eliminar las tablas temporales: {e}")
+    
+    def fetch(self, db: DatabaseConnection, limit: int = None) -> pd.DataFrame:
+        """
+        Obtiene los datos crudos del reporte.
+        Por defecto ejecuta get_query(). Los reportes con motores
+        alternativos sobrescriben este método.
         
         Args:
+            db: Conexión activa
             limit: Límite opcional de filas (para pruebas)
             
         Returns:
-            DataFrame con los datos del reporte
+            DataFrame con los datos crudos
+        """
+        if self._use_partitions(limit):
+            return pd.concat(list(self._fetch_partitions(db)), ignore_index=True)
+        
+        as_of = self._query_time(db)
+        tables = self._load_dimensions(db)
+        with self._staged(db, as_of, limit):
+            df = self._run(db, self._build_query(limit, as_of))
+        return self._resolve_dimensions(df, tables)
+    
+    def fetch_for_keys(
+        self,
+        db: DatabaseConnection,
+        codes: List[str],
+        batch_size: int = None,
+        as_of: datetime = None
+    ) -> pd.DataFrame:
+        """
+        Obtiene los datos crudos solo para los proveedores indicados.
+        Los códigos se envían en lotes para acotar el número de parámetros.
+        
+        Args:
+            db: Conexión activa
+            codes: Códigos de proveedor (ct.CiaCod)
+            batch_size: Códigos por query. Usa INCREMENTAL_CONFIG.key_batch_size.
+            as_of: Fecha de referencia de las ventanas. Por defecto
+                   GETDATE() del servidor, la misma para todos los lotes.
+            
+        Returns:
+            DataFrame con los datos crudos de esos proveedores
         """
-        query = self.get_query()
+        batch_size = batch_size or INCREMENTAL_CONFIG.key_batch_size
+        frames = []
+        try:
+            self._as_of = as_of if as_of is not None else db.server_time()
+            for start in range(0, len(codes), batch_size):
+                self._key_restriction = list(codes[start:start + batch_size])
+                frames.append(self.fetch(db))
+        finally:
+            self._key_restriction = None
+            self._as_of = None
         
-        # Agregar LIMIT si se especifica (para pruebas)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+    
+    def _key_filter(self, q: QueryBuilder, column: str = "ct.CiaCod") -> str:
+        """
+        Condiciones adicionales del WHERE para el subconjunto de proveedores
+        (--vendors, --sample y --limit), la restricción por proveedor activa
+        y la partición en ejecución (vacía si no hay ninguna).
+        """
+        condition = ""
+        subset = self.subset
+        if self._limit:
+            subset = replace(subset or VendorSubset(), limit=self._limit)
+        if subset is not None:
+            driving = self.get_driving_set(q) if subset.limit else None
+            condition += subset.condition(q, column, driving)
+        if self._key_restriction is not None:
+            condition += f"\n  AND {column} IN {q.codes('VENDOR_KEYS', self._key_restriction)}"
+        if self._partition is not None:
+            condition += self._partition.condition(q, column)
+        return condition
+    
+    def fetch_chunks(
+        self,
+        db: DatabaseConnection,
+        limit: int = None,
+        chunk_size: int = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Obtiene los datos crudos por chunks leyendo del cursor.
+        
+        Los motores distintos a 'sql' calculan en memoria, así que se
+        obtiene el resultado completo con fetch() y se entrega por partes.
+        
+        Args:
+            db: Conexión activa
+            limit: Límite opcional de filas (para pruebas)
+            chunk_size: Filas por chunk. Usa EXPORT_CONFIG.chunk_size por defecto.
+            
+        Yields:
+            DataFrames con los datos crudos
+        """
+        chunk_size = chunk_size or EXPORT_CONFIG.chunk_size
+        
+        if self.engine != "sql":
+            df = self.fetch(db, limit=limit)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
+            return
+        
+        if self._use_partitions(limit):
+            yield from self._fetch_partitions(db, chunk_size)
+            return
+        
+        yield from self._fetch_query_chunks(db, chunk_size, limit)
+    
+    def _fetch_query_chunks(
+        self,
+        db: DatabaseConnection,
+        chunk_size: int = None,
+        limit: int = None
+    ) -> Iterator[pd.DataFrame]:
+        """Chunks de get_query() ejecutada en una sola consulta sobre db."""
+        as_of = self._query_time(db)
+        tables = self._load_dimensions(db)
+        with self._staged(db, as_of, limit):
+            query = self._build_query(limit, as_of)
+            for chunk in db.execute_query_chunks(query.text, chunk_size, params=query.params or None):
+                yield self._resolve_dimensions(chunk, tables)
+    
+    def _use_partitions(self, limit: int = None) -> bool:
+        """Si esta ejecución se divide en particiones concurrentes."""
+        if self.partitions <= 1 or not self.PARTITION_KEY or self.engine != "sql":
+            return False
+        if self._partition is not None or self._key_restriction is not None:
+            return False
+        if self.subset is not None:
+            return False
         if limit:
-            # Modificar query para agregar TOP
-            if 'SELECT' in query.upper():
-                query = query.replace('SELECT', f'SELECT TOP {limit}', 1)
+            print("[WARN] --limit desactiva la ejecución particionada")
+            return False
+        return True
+    
+    def _plan_partitions(self, db: DatabaseConnection, count: int) -> List[Partition]:
+        """Hasta `count` particiones según la estrategia."""
+        if self.partition_strategy == "origin":
+            return origin_partitions(count)
         
-        # Usar conexión existente o crear nueva
-        if self._db and self._db.is_connected:
-            df = self._db.execute_query(query)
+        query = range_boundaries_query(count)
+        boundaries = self._run(db, query)["BOUNDARY"].tolist()
+        return range_partitions(boundaries)
+    
+    def _fetch_partitions(
+        self,
+        db: DatabaseConnection,
+        chunk_size: int = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Ejecuta la query por particiones, cada una en un thread con su
+        propia conexión, y mezcla los chunks en el orden de PARTITION_KEY.
+        Todas usan la misma fecha de referencia.
+        
+        Las conexiones se reservan todas antes de empezar: la mezcla
+        necesita todas las particiones abiertas a la vez, y tomarlas de a
+        una bloquea a dos reportes particionados que comparten el pool.
+        Con menos conexiones libres se usan menos particiones, y sin
+        ninguna se ejecuta la query sin particionar sobre db.
+        """
+        connections = reserve_connections(self.partitions)
+        readers = []
+        try:
+            if len(connections) < self.partitions:
+                print(f"[WARN] {len(connections)} de {self.partitions} conexiones libres en el pool "
+                      f"(POOL_CONFIG.size = {POOL_CONFIG.size})")
+            if len(connections) < 2:
+                print("[WARN] Se ejecuta sin particionar")
+                for connection in connections:
+                    connection.close()
+                yield from self._fetch_query_chunks(db, chunk_size)
+                return
+            
+            as_of = self._query_time(db)
+            partitions = self._plan_partitions(db, len(connections))
+            print(f"  Ejecución particionada: {len(partitions)} particiones "
+                  f"(estrategia '{self.partition_strategy}')")
+            for connection in connections[len(partitions):]:
+                connection.close()
+            
+            for partition, connection in zip(partitions, connections):
+                report = copy.copy(self)
+                report._db = None
+                report._partition = partition
+                report._as_of = as_of
+                readers.append(PartitionReader(
+                    lambda report=report, connection=connection:
+                        report._read_partition(connection, chunk_size)
+                ).start())
+            
+            yield from merge_sorted_chunks([iter(r) for r in readers], self.PARTITION_KEY)
+        finally:
+            for reader in readers:
+                reader.stop()
+            # Las de particiones que no llegaron a abrirla (close es idempotente)
+            for connection in connections:
+                connection.close()
+    
+    def _read_partition(
+        self,
+        connection: DatabaseConnection,
+        chunk_size: int = None
+    ) -> Iterator[pd.DataFrame]:
+        """Chunks de la partición de esta copia, con su tiempo al terminar."""
+        start = time.perf_counter()
+        rows = 0
+        with connection as db:
+            for chunk in self.fetch_chunks(db, chunk_size=chunk_size):
+                rows += len(chunk)
+                yield chunk
+        print(f"  Partición {self._partition.number} ({self._partition.describe()}): "
+              f"{rows:,} filas en {time.perf_counter() - start:.1f}s")
+    
+    def execute(self, limit: int = None, expand: bool = True) -> pd.DataFrame:
+        """
+        Ejecuta el reporte y retorna un DataFrame.
+        
+        Args:
+            limit: Límite opcional de filas (para pruebas)
+            expand: Si completar las columnas constantes y copias del
+                    layout. Con False se retornan solo las leídas y el
+                    exportador completa el template (ver get_layout()).
+            
+        Returns:
+            DataFrame con los datos del reporte
+        """
+        if self._use_incremental(limit):
+            with metrics.stage("incremental") as s, self._connection() as db:
+                df = IncrementalRefresh(self).run(db, full=self.cache == "refresh")
+                s.rows = len(df)
         else:
-            with DatabaseConnection() as db:
-                df = db.execute_query(query)
+            key = self._cache_key(limit)
+            df = self._cache_get(key)
+            if df is None:
+                with metrics.stage("fetch") as s, self._connection() as db:
+                    df = self.fetch(db, limit=limit)
+                    s.rows = len(df)
+                if key:
+                    with metrics.stage("cache_write") as s:
+                        get_cache().put(key, df)
+                        s.rows = len(df)
+        
+        # Tipos compactos (la caché y el snapshot guardan los tipos originales)
+        optimizer = self._dtype_optimizer()
+        if optimizer:
+            df = optimizer.optimize(df)
+            print(f"  {optimizer.describe()}")
         
         # Aplicar transformaciones
-        df = self.transform(df)
-        df = self._apply_column_mapping(df)
+        with metrics.stage("transform") as s:
+            df = self.transform(df)
+            s.rows = len(df)
+        with metrics.stage("column_mapping") as s:
+            df = self._apply_column_mapping(df)
+            s.rows = len(df)
         
+        return self._expand_layout(df) if expand else df
+    
+    def execute_chunks(
+        self,
+        limit: int = None,
+        chunk_size: int = None,
+        expand: bool = True
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Ejecuta el reporte en modo streaming.
+        
+        Aplica transform() y el mapeo de columnas a cada chunk, de modo que
+        la memoria queda acotada por chunk_size y no por el tamaño del
+        resultado. transform() debe operar fila a fila para usar este modo.
+        
+        Args:
+            limit: Límite opcional de filas (para pruebas)
+            chunk_size: Filas por chunk. Usa EXPORT_CONFIG.chunk_size por defecto.
+            expand: Si completar las columnas del layout (ver execute())
+            
+        Yields:
+            DataFrames transformados
+        """
+        if self._use_incremental(limit):
+            # El merge con el snapshot necesita el resultado completo
+            with metrics.stage("incremental") as s, self._connection() as db:
+                cached = IncrementalRefresh(self).run(db, full=self.cache == "refresh")
+                s.rows = len(cached)
+            key = None
+        else:
+            key = self._cache_key(limit)
+            cached = self._cache_get(key)
+        
+        # Un optimizador para todos los chunks: categorías consistentes
+        optimizer = self._dtype_optimizer()
+        
+        if cached is not None:
+            chunk_size = chunk_size or EXPORT_CONFIG.chunk_size
+            chunks = (
+                self._finish_chunk(cached.iloc[start:start + chunk_size], optimizer)
+                for start in range(0, len(cached), chunk_size)
+            )
+        else:
+            chunks = self._fetch_finished_chunks(key, optimizer, limit, chunk_size)
+        
+        for chunk in chunks:
+            yield self._expand_layout(chunk) if expand else chunk
+        
+        if optimizer:
+            print(f"  {optimizer.describe()}")
+    
+    def _fetch_finished_chunks(
+        self,
+        key: Optional[str],
+        optimizer: Optional[DtypeOptimizer],
+        limit: int = None,
+        chunk_size: int = None
+    ) -> Iterator[pd.DataFrame]:
+        """Chunks de fetch_chunks() terminados, guardándolos en caché si hay llave."""
+        with self._connection() as db:
+            # Solo se mide la espera de cada chunk, no su consumo
+            chunks = metrics.timed_iter(
+                "fetch", self.fetch_chunks(db, limit=limit, chunk_size=chunk_size)
+            )
+            if not key:
+                for chunk in chunks:
+                    yield self._finish_chunk(chunk, optimizer)
+                return
+            
+            # Guardar en caché a medida que llegan los chunks (se descarta
+            # si el streaming no termina)
+            with get_cache().writer(key) as writer:
+                for chunk in chunks:
+                    with metrics.stage("cache_write") as s:
+                        writer.write(chunk)
+                        s.rows = len(chunk)
+                    yield self._finish_chunk(chunk, optimizer)
+    
+    def _dtype_optimizer(self) -> Optional[DtypeOptimizer]:
+        """
+        Optimizador de tipos de la corrida: heurísticas si DTYPE_CONFIG
+        está activo más los dtypes declarados en el layout. None si no
+        hay ninguno de los dos.
+        """
+        layout = self.get_layout()
+        declared = layout.dtypes() if layout else {}
+        if not DTYPE_CONFIG.enabled and not declared:
+            return None
+        return DtypeOptimizer(declared=declared, heuristics=DTYPE_CONFIG.enabled)
+    
+    def _expand_layout(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Completa constantes y copias del layout, si el reporte lo declara."""
+        layout = self.get_layout()
+        if layout is None:
+            return df
+        with metrics.stage("layout") as s:
+            df = layout.expand(df)
+            s.rows = len(df)
+        return df
+    
+    def _finish_chunk(
+        self,
+        chunk: pd.DataFrame,
+        optimizer: Optional[DtypeOptimizer] = None
+    ) -> pd.DataFrame:
+        """Tipos, transform() y mapeo de columnas de un chunk, con sus métricas."""
+        if optimizer:
+            chunk = optimizer.optimize(chunk)
+        with metrics.stage("transform") as s:
+            chunk = self.transform(chunk)
+            s.rows = len(chunk)
+        with metrics.stage("column_mapping") as s:
+            chunk = self._apply_column_mapping(chunk)
+            s.rows = len(chunk)
+        return chunk
+    
+    def _use_incremental(self, limit: int = None) -> bool:
+        """Si esta ejecución usa refresco incremental."""
+        if self.incremental and limit:
+            print("[WARN] --limit desactiva el refresco incremental")
+            return False
+        if self.incremental and self.subset is not None:
+            print("[WARN] El filtro o muestra de proveedores desactiva el refresco incremental")
+            return False
+        return self.incremental
+    
+    def get_cache_text(self, limit: int = None) -> str:
+        """
+        Texto que identifica el resultado crudo para la caché: motor,
+        sentencias de preparación, query y parámetros (sin las fechas de
+        referencia, la caché ya distingue por día). Los reportes cuyo
+        resultado dependa de algo más deben sobrescribirlo.
+        """
+        parts = [self.get_report_name(), self.engine]
+        with self._limited(limit):
+            parts += [SqlQuery.of(s).signature() for s in self.get_setup_statements()]
+        parts.append(self._build_query(limit).signature())
+        return "\n".join(parts)
+    
+    def _cache_key(self, limit: int = None) -> Optional[str]:
+        """
+        Llave de caché del reporte, o None si la caché está desactivada.
+        El día es el de la fecha de referencia de las queries (GETDATE()
+        del servidor), no el del cliente.
+        """
+        if self.cache == "off":
+            return None
+        with self._connection() as db:
+            as_of = pd.Timestamp(self._query_time(db)).date()
+            config = db.config
+        return get_cache().make_key(self.get_cache_text(limit), config, as_of)
+    
+    def _cache_get(self, key: Optional[str]) -> Optional[pd.DataFrame]:
+        """Lee el resultado crudo de la caché si el modo lo permite."""
+        if not key or self.cache != "use":
+            return None
+        with metrics.stage("cache_read") as s:
+            df = get_cache().get(key)
+            s.rows = 0 if df is None else len(df)
+        if df is not None:
+            print(f"  Resultado leído de caché ({len(df):,} filas)")
         return df
     
+    def get_output_path(
+        self,
+        output_path: str = None,
+        output_dir: str = None,
+        output_format: str = None
+    ) -> str:
+        """
+        Retorna la ruta de salida: output_path si se indica, o un nombre
+        con timestamp dentro de output_dir.
+        """
+        if output_path:
+            return output_path
+        
+        if output_dir is None:
+            output_dir = "./exports"
+        filename = generate_output_filename(
+            self.get_report_name(),
+            output_format=output_format or EXPORT_CONFIG.default_format
+        )
+        return str(Path(output_dir) / filename)
+    
     def generate(
         self, 
         output_path: str = None,
         output_dir: str = None,
-        limit: int = None
+        limit: int = None,
+        stream: bool = False,
+        auto_width: bool = True,
+        output_format: str = None
     ) -> str:
         """
-        Genera el reporte completo y lo exporta a Excel.
+        Genera el reporte completo y lo exporta (Excel por defecto).
         
         Args:
             output_path: Ruta completa del archivo (opcional)
             output_dir: Directorio de salida (opcional, genera nombre automático)
             limit: Límite de filas (opcional, para pruebas)
+            stream: Si procesar y escribir por chunks a medida que llegan
+            auto_width: Si estimar el ancho de columnas desde los datos (Excel)
+            output_format: Formato de salida (ver EXPORT_FORMATS). Por
+                           defecto EXPORT_CONFIG.default_format.
             
         Returns:
-            Ruta del archivo Excel generado
+            Ruta del archivo generado
         """
         print(f"\n{'='*50}")
         print(f"Generando reporte: {self.get_report_name()}")
         print(f"{'='*50}")
+        output_format = output_format or EXPORT_CONFIG.default_format
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(
+                f"Formato '{output_format}' no soportado. "
+                f"Opciones: {', '.join(EXPORT_FORMATS)}"
+            )
+        if len(self.SUPPORTED_ENGINES) > 1:
+            print(f"Motor: {self.engine}")
+        if self.subset is not None:
+            print(f"Proveedores: {self.subset.describe()}")
         
         # Determinar ruta de salida
-        if output_path:
-            final_path = output_path
-        else:
-            if output_dir is None:
-                output_dir = "./exports"
-            filename = generate_output_filename(self.get_report_name())
-            final_path = str(Path(output_dir) / filename)
+        final_path = self.get_output_path(output_path, output_dir, output_format)
         
-        # Ejecutar query
-        print("Ejecutando query...")
-        df = self.execute(limit=limit)
-        print(f"  Registros obtenidos: {len(df):,}")
+        # El exportador completa constantes y copias al escribir
+        exporter = create_exporter(
+            output_format,
+            final_path,
+            self.get_sheet_name(),
+            column_widths=self.get_column_widths(),
+            layout=self.get_layout()
+        )
         
-        # Exportar
-        print("Exportando a Excel...")
-        exporter = ExcelExporter(final_path, self.get_sheet_name())
-        result_path = exporter.export(df)
+        recorder = self.metrics_recorder(limit=limit, stream=stream, output_format=output_format)
+        status, error, result_path = "error", None, None
+        try:
+            with recorder.activate():
+                if stream:
+                    # Query y exportación intercaladas, chunk por chunk
+                    print("Ejecutando query en modo streaming...")
+                    result_path = exporter.export_chunks(
+                        self.execute_chunks(limit=limit, expand=False),
+                        auto_width=auto_width
+                    )
+                else:
+                    # Ejecutar query
+                    print("Ejecutando query...")
+                    df = self.execute(limit=limit, expand=False)
+                    print(f"  Registros obtenidos: {len(df):,}")
+                    
+                    # Exportar
+                    print(f"Exportando a {output_format}...")
+                    result_path = exporter.export(df, auto_width=auto_width)
+            status = "ok"
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            record = recorder.finish(status, error, output_path=result_path)
+            metrics.emit(record)
+            if METRICS_CONFIG.print_summary and status == "ok":
+                metrics.print_summary(record)
         
         print(f"\n✓ Reporte generado exitosamente!")
         return result_path
     
+    def metrics_recorder(
+        self,
+        limit: int = None,
+        stream: bool = False,
+        output_format: str = None
+    ) -> metrics.MetricsRecorder:
+        """Recorder de métricas de una corrida, con las opciones que la identifican."""
+        return metrics.MetricsRecorder(self.get_report_name(), options={
+            "engine": self.engine,
+            "format": output_format or EXPORT_CONFIG.default_format,
+            "stream": stream,
+            "limit": limit,
+            "cache": self.cache,
+            "incremental": self.incremental,
+            "partitions": self.partitions,
+            "partition_strategy": self.partition_strategy,
+            "subset": self.subset.describe() if self.subset else None,
+        })
+    
     def preview(self, n: int = 10) -> pd.DataFrame:
         """
         Obtiene una vista previa del reporte (primeras N filas).
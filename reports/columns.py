@@ -0,0 +1,205 @@
+"""
+Esquema declarativo de columnas de los reportes
+================================================
+Cada reporte declara las columnas de su template, en orden, y de dónde
+sale cada una:
+
+- source(): expresión SQL que se trae de la BD
+- constant(): literal ('' en casi todas), se completa en el cliente
+- same_as(): copia de otra columna del template
+
+y opcionalmente el dtype de pandas y el formato de número de Excel.
+
+La query trae solo las expresiones únicas: si dos columnas usan la misma
+expresión, la segunda se trata como same_as() de la primera. Las
+constantes y copias no viajan por la red ni ocupan memoria en caché,
+snapshot o chunks; el exportador reconstruye el layout completo al
+escribir (ver expand() y los exportadores de utils/excel_exporter.py).
+
+Los nombres son los finales del template (después de get_column_mapping).
+
+Uso:
+    LAYOUT = ColumnLayout([
+        source("VENDOR_NUM (M)", "ct.CiaIdeNum"),
+        constant("EMPLOYEE_ID"),
+        same_as("TAXPAYER_ID (M)", "VENDOR_NUM (M)"),
+    ])
+    query = f"SELECT\\n{LAYOUT.select_list()}\\nFROM ..."
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Formato de Excel de los montos (separador de miles, 2 decimales)
+AMOUNT_FORMAT = "#,##0.00"
+
+
+# ============================================
+# DEFINICIÓN DE COLUMNAS
+# ============================================
+@dataclass(frozen=True)
+class Column:
+    """
+    Columna del template. Exactamente una de expression / same_as se
+    define; si ninguna, la columna es la constante `value`.
+    """
+    name: str
+    expression: Optional[str] = None
+    value: Any = ""
+    same_as: Optional[str] = None
+    dtype: Optional[str] = None
+    excel_format: Optional[str] = None
+    
+    @property
+    def is_source(self) -> bool:
+        return self.expression is not None
+    
+    @property
+    def is_constant(self) -> bool:
+        return self.expression is None and self.same_as is None
+
+
+def source(name: str, expression: str, dtype: str = None, excel_format: str = None) -> Column:
+    """Columna leída de la BD con la expresión SQL dada."""
+    return Column(name, expression=expression.strip(), dtype=dtype, excel_format=excel_format)
+
+
+def constant(name: str, value: Any = "", excel_format: str = None) -> Column:
+    """Columna con el mismo valor en todas las filas (no se lee de la BD)."""
+    return Column(name, value=value, excel_format=excel_format)
+
+
+def same_as(name: str, other: str, excel_format: str = None) -> Column:
+    """Columna con los mismos valores que otra del template."""
+    return Column(name, same_as=other, excel_format=excel_format)
+
+
+# ============================================
+# LAYOUT
+# ============================================
+class ColumnLayout:
+    """
+    Columnas de un reporte en el orden del template.
+    
+    Resuelve cada columna a su origen: una columna leída (fetched) o una
+    constante. Las expresiones repetidas y las cadenas de same_as se
+    resuelven a la primera columna leída con esa expresión.
+    """
+    
+    def __init__(self, columns: Sequence[Column]):
+        self.columns = tuple(columns)
+        self.names = [column.name for column in self.columns]
+        duplicated = {name for name in self.names if self.names.count(name) > 1}
+        if duplicated:
+            raise ValueError(f"Columnas duplicadas en el layout: {', '.join(sorted(duplicated))}")
+        
+        by_name = {column.name: column for column in self.columns}
+        first_by_expression: Dict[str, str] = {}
+        self.fetched: List[Column] = []
+        
+        # {columna: columna leída de la que sale}; {columna: valor constante}
+        self.origins: Dict[str, str] = {}
+        self.constants: Dict[str, Any] = {}
+        
+        for column in self.columns:
+            if column.is_source:
+                # Se comparan sin diferencias de espacios ni saltos de línea
+                expression = " ".join(column.expression.split())
+                first = first_by_expression.setdefault(expression, column.name)
+                self.origins[column.name] = first
+                if first == column.name:
+                    self.fetched.append(column)
+            elif column.is_constant:
+                self.constants[column.name] = column.value
+        
+        for column in self.columns:
+            if column.same_as is not None:
+                target = self._resolve(column, by_name)
+                if target.is_constant:
+                    self.constants[column.name] = target.value
+                else:
+                    self.origins[column.name] = self.origins[target.name]
+    
+    @staticmethod
+    def _resolve(column: Column, by_name: Dict[str, Column]) -> Column:
+        """Sigue una cadena de same_as hasta una columna leída o constante."""
+        seen = {column.name}
+        while column.same_as is not None:
+            if column.same_as not in by_name:
+                raise ValueError(f"{column.name}: same_as de una columna inexistente ({column.same_as})")
+            column = by_name[column.same_as]
+            if column.name in seen:
+                raise ValueError(f"Ciclo de same_as en {column.name}")
+            seen.add(column.name)
+        return column
+    
+    @property
+    def fetched_names(self) -> List[str]:
+        """Columnas que trae la query, en orden del template."""
+        return [column.name for column in self.fetched]
+    
+    def select_list(self, exclude: Iterable[str] = (), indent: str = "    ", quote: str = "[]") -> str:
+        """
+        Lista del SELECT con las expresiones únicas.
+        
+        Args:
+            exclude: Columnas a omitir (ej: métricas calculadas en pandas)
+            indent: Sangría de cada línea
+            quote: Delimitadores del alias ('[]' T-SQL, '""' SQL estándar)
+        """
+        exclude = set(exclude)
+        return ",\n".join(
+            f"{indent}{column.expression} AS {quote[0]}{column.name}{quote[-1]}"
+            for column in self.fetched
+            if column.name not in exclude
+        )
+    
+    def dtypes(self) -> Dict[str, str]:
+        """{columna leída: dtype declarado}."""
+        return {column.name: column.dtype for column in self.fetched if column.dtype}
+    
+    def excel_formats(self) -> Dict[str, str]:
+        """
+        {columna: formato de número de Excel}. Las copias heredan el
+        formato de su origen salvo que declaren uno propio.
+        """
+        declared = {column.name: column.excel_format for column in self.columns if column.excel_format}
+        formats = {}
+        for name in self.names:
+            fmt = declared.get(name) or declared.get(self.origins.get(name))
+            if fmt:
+                formats[name] = fmt
+        return formats
+    
+    def expand(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        DataFrame con todas las columnas del template a partir del
+        resultado angosto. Las columnas que df ya trae se conservan y las
+        que no están en el layout (agregadas por transform) van al final.
+        """
+        columns = {}
+        for name in self.names:
+            if name in df.columns:
+                columns[name] = df[name]
+            elif name in self.constants:
+                columns[name] = constant_series(self.constants[name], df.index)
+            else:
+                columns[name] = df[self.origins[name]]
+        for name in df.columns:
+            if name not in columns:
+                columns[name] = df[name]
+        return pd.DataFrame(columns, index=df.index)
+
+
+def constant_series(value: Any, index: pd.Index) -> pd.Series:
+    """
+    Columna constante como categórico de una categoría: el valor se guarda
+    una vez más un código int8 por fila.
+    """
+    if value is None:
+        return pd.Series(None, index=index, dtype=object)
+    codes = np.zeros(len(index), dtype=np.int8)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=[value]), index=index)
@@ -0,0 +1,121 @@
+"""
+Contactos por locación (TelTab)
+================================
+Primer contacto activo (menor TelCod) de cada locación por tipo
+(TelTipCod), pivoteado a una columna por tipo. Reemplaza los OUTER APPLY
+TOP (1) de la query final, que buscaban en TelTab una vez por fila y por
+tipo, con una sola lectura de TelTab para las compañías del reporte:
+
+- ROW_NUMBER() por (CiaCod, OriCod, LocCod, TelTipCod) en orden de TelCod
+- MAX(CASE ...) sobre la fila 1 de cada tipo: PHONE, EMAIL, URL
+
+La etapa materializa #CONTACTS en la sesión (get_setup_statements del
+reporte, con "#CONTACTS" en TEMP_TABLES) y la query final la une por
+locación. Sirve a los reportes de proveedores y de clientes:
+
+    q = QueryBuilder()
+    stage = contacts_stage(q, "SELECT bc.OriCod, bc.CiaCod FROM #BASE_CUSTOMERS bc",
+                           kinds=("PHONE", "EMAIL"))
+    ...
+    source("PHONE", contact_column("PHONE"))
+    ...
+    FROM ... {contacts_join("ct.CiaCod", "ot.OriCod", "lt.LocCod")}
+"""
+import textwrap
+from typing import Dict, Sequence
+
+import sys
+sys.path.insert(0, '..')
+from reports.query import QueryBuilder, SqlQuery
+
+
+CONTACTS_TABLE = "#CONTACTS"
+
+# Alias de #CONTACTS en la query final
+CONTACTS_ALIAS = "tel"
+
+# Columna de #CONTACTS -> TelTipCod
+CONTACT_TYPES: Dict[str, int] = {
+    "PHONE": 1,
+    "EMAIL": 3,
+    "URL": 4,
+}
+
+
+def contact_column(kind: str) -> str:
+    """Expresión de la query final para un tipo de contacto (ej: 'tel.EMAIL')."""
+    if kind not in CONTACT_TYPES:
+        raise ValueError(f"Tipo de contacto '{kind}' no soportado. Opciones: {', '.join(CONTACT_TYPES)}")
+    return f"{CONTACTS_ALIAS}.{kind}"
+
+
+def contacts_stage(
+    q: QueryBuilder,
+    targets: str,
+    kinds: Sequence[str] = tuple(CONTACT_TYPES)
+) -> SqlQuery:
+    """
+    #CONTACTS: primer contacto activo por locación, una columna por tipo.
+    
+    Args:
+        q: QueryBuilder de la etapa (con los parámetros usados en targets)
+        targets: SELECT de las llaves (OriCod, CiaCod) de las compañías del
+                 reporte; TelTab se lee solo para ellas
+        kinds: Tipos a pivotear (claves de CONTACT_TYPES), solo los que
+               usa el reporte
+    
+    Raises:
+        ValueError: Si un tipo no está en CONTACT_TYPES
+    """
+    unknown = [kind for kind in kinds if kind not in CONTACT_TYPES]
+    if unknown:
+        raise ValueError(f"Tipos de contacto no soportados: {', '.join(unknown)}")
+    type_codes = ", ".join(str(CONTACT_TYPES[kind]) for kind in kinds)
+    pivot = ",\n    ".join(
+        f"MAX(CASE WHEN c.TelTipCod = {CONTACT_TYPES[kind]} THEN c.TelNum END) AS {kind}"
+        for kind in kinds
+    )
+    
+    return q.build(f"""
+IF OBJECT_ID('tempdb..{CONTACTS_TABLE}') IS NOT NULL DROP TABLE {CONTACTS_TABLE};
+
+SELECT
+    c.OriCod,
+    c.CiaCod,
+    c.LocCod,
+    {pivot}
+INTO {CONTACTS_TABLE}
+FROM (
+    SELECT
+        t.OriCod, t.CiaCod, t.LocCod, t.TelTipCod, t.TelNum,
+        ROW_NUMBER() OVER (
+            PARTITION BY t.CiaCod, t.OriCod, t.LocCod, t.TelTipCod
+            ORDER BY t.TelCod ASC
+        ) AS rn
+    FROM TelTab t WITH (NOLOCK)
+    INNER JOIN (
+{textwrap.indent(targets.strip(), '        ')}
+    ) k ON k.OriCod = t.OriCod
+       AND k.CiaCod = t.CiaCod
+    WHERE t.TelEst = '1'
+      AND t.TelTipCod IN ({type_codes})
+) c
+WHERE c.rn = 1
+GROUP BY c.OriCod, c.CiaCod, c.LocCod;
+
+CREATE CLUSTERED INDEX IX_CONTACTS ON {CONTACTS_TABLE}(OriCod, CiaCod, LocCod);
+""")
+
+
+def contacts_join(company: str, origin: str, location: str) -> str:
+    """
+    LEFT JOIN de #CONTACTS para la query final.
+    
+    Args:
+        company, origin, location: Expresiones de CiaCod, OriCod y LocCod
+                                   de la fila (ej: 'ct.CiaCod', 'ot.OriCod')
+    """
+    alias = CONTACTS_ALIAS
+    return f"""LEFT JOIN {CONTACTS_TABLE} {alias} ON {alias}.OriCod = {origin}
+   AND {alias}.CiaCod = {company}
+   AND {alias}.LocCod = {location}"""
@@ -0,0 +1,14 @@
+# Customers reports module
+import importlib
+
+# Clases exportadas: {clase: submódulo}, importadas al usarse
+_LAZY = {
+    "CustomerHeaderReport": ".header",
+    "CustomerSiteReport": ".site",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
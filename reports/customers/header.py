@@ -0,0 +1,204 @@
+"""
+Reporte Customer Header
+========================
+Extrae datos a nivel de cliente (cabecera), uno por CiaIdeNum.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+import sys
+sys.path.insert(0, '../..')
+from reports.base import BaseReport
+from reports.columns import ColumnLayout, constant, same_as, source
+from reports.contacts import CONTACTS_TABLE, contact_column, contacts_join
+from reports.query import QueryBuilder, SqlQuery
+from reports.customers import staging
+from config.settings import CUSTOMER_DOC_TYPES
+
+
+# Patrones de CiaDes que identifican entidades de gobierno (B2G)
+GOVERNMENT_PATTERNS: List[str] = [
+    '%ALCALD%', '%MUNICIP%', '%GOBERN%', '%MINISTER%', '%PRESIDEN%',
+    '%SECRETAR%', '%SUPERINTEND%', '%CONTRALOR%', '%PROCURAD%', '%PERSONER%',
+    '%DEFENSOR%', '%REGISTRADUR%', '%DEPARTAMENTO%', '%E.S.E%', '% ESE %',
+    '%E.S.P%', '% ESP %', '%SERVICIOS PUBLICOS%', '%BANCO DE LA REPUBLICA%',
+    '%AUDITORIA GENERAL DE LA REPUBLICA%', '%CORPORACION AUTONOMA%',
+    '%CORPORACION PARA%', '%AGENCIA LOGÍSTICA%', '%AGENCIA NACIONAL%',
+    '%AGENCIA DE RENOVACION%', '%TERRITORIAL%', '%ATENEA%',
+    '%UNTA CENTRAL DE CONTADORES%', '%SANIDAD%', '%ECOPETROL%', '%CENIT%',
+    '%EMPRESA SOCIAL DEL ESTADO%', '%POLICIA%', '%EJERCITO%', '%ARMADA%',
+    '%FUERZA AEREA%', '%FISCALIA%', '%RAM A JUDICIAL%', '%JUZGAD%', '%TRIBUNAL%',
+]
+
+# Modelo de negocio: gobierno por patrón de CiaDes, si no por tipo de identificación
+_GOVERNMENT = " OR\n            ".join(
+    f"UPPER(ct.CiaDes) LIKE '{pattern}'" for pattern in GOVERNMENT_PATTERNS
+)
+BUSINESS_MODEL = f"""CASE
+        WHEN
+            {_GOVERNMENT}
+        THEN 'B2G - Business To Government'
+        WHEN ct.IdeTipCod = 1 THEN 'B2B - Business To Business'
+        WHEN ct.IdeTipCod IN (3, 4, 7, 8) THEN 'B2C - Business To Customers'
+        ELSE 'B2B - Business To Business'
+    END"""
+
+# Columnas del template en orden. La query trae solo las expresiones
+# únicas; constantes y copias se completan al exportar (reports/columns.py)
+LAYOUT = ColumnLayout([
+    source("Business Model (B2X)", BUSINESS_MODEL),
+    source("PARTY_NAME (M)", "ct.CiaDes"),
+    source("PARTY_STATUS", "CASE WHEN ct.CiaEst = '1' THEN 'ACTIVO' WHEN ct.CiaEst = '0' THEN 'INACTIVO' END"),
+    source("PARTY_ID (M)", "cct.CiaCtaNum"),
+    source("REGISTRY_ID", "ct.CiaIdeNum"),
+    source("KNOWN_AS", "ct.CiaSig"),
+    same_as("NAME_PRONUNCIATION", "PARTY_NAME (M)"),
+    same_as("TRANSLATED_CUSTOMER_NAME", "PARTY_NAME (M)"),
+    source("SIC_CODE", "cp.CiaParVal"),
+    source("DEFAULT_REP_COUNTRY_CODE (M)", "ot.PaiCod"),
+    same_as("DEFAULT_REP_REG_NUMBER (M)", "REGISTRY_ID"),
+    source("DEFAULT_REP_TAX_REG_TYPE (M)", "c.ideTipDes"),
+    constant("PARENT_COMPANY"),
+    same_as("TAXPAYER_ID (M)", "REGISTRY_ID"),
+    constant("PARTY_SITE_STATUS", "1"),
+    same_as("TAX_REGISTRATION_NUMBER (M)", "REGISTRY_ID"),
+    same_as("ACCOUNT_NUMBER (M)", "PARTY_ID (M)"),
+    source("PARTY_SITE_NAME", "lt.LocDes"),
+    source("ACCOUNT_DESCRIPTION", "cct.CiaCtaTip"),
+    same_as("CUST_ACCOUNT_ID", "PARTY_ID (M)"),
+    source("ACCOUNT_STATUS (M)", "cct.CiaCtaEst"),
+    source("PARTY_SITE_NUMBER", "lt.LocCod"),
+    source("PARTY_SITE_ID", "CONCAT(RTRIM(lt.CiaCod), lt.LocCod)"),
+    constant("CUST_ACCT_SITE_ID (M)"),
+    source("COUNTRY (M)", "pt.PaiDes"),
+    source("ADDRESS1 (M)", "lt.LocDir"),
+    constant("ADDRESS2"),
+    constant("ADDRESS3"),
+    constant("ADDRESS4"),
+    source("CITY (M)", "dt.DstDes"),
+    source("POSTAL_CODE (M)", "dt.DstPstCod"),
+    source("STATE (M)", "dpt.DptDes"),
+    source("PROVINCE (M)", "pvt.PvnDes"),
+    same_as("COUNTY (M)", "CITY (M)"),
+    same_as("ADDRESSEE", "ADDRESS1 (M)"),
+    source("STATUS (M)", "lt.LocEst"),
+    source("ACCOUNT_SITE_PHONE_NUMBER", contact_column("PHONE")),
+    source("ACCOUNT_SITE_EMAIL", contact_column("EMAIL")),
+    *staging.METRIC_COLUMNS,
+])
+
+
+class CustomerHeaderReport(BaseReport):
+    """
+    Reporte de clientes a nivel de cabecera.
+    
+    Incluye:
+    - Modelo de negocio (B2B / B2C / B2G)
+    - Datos de la cuenta y dirección principal
+    - Métricas de transacciones (montos CHF, conteos 0-2Y / 2-5Y / OP)
+    
+    Se ejecuta en etapas (queries/Customers/Customer.sql): las tablas
+    temporales #VALID_LOCS, #BASE_CUSTOMERS, #CONTACTS, #DOC_METRICS y
+    #OCM_EXISTS se preparan en la misma sesión antes de la query final.
+    """
+    
+    TEMP_TABLES = (
+        "#VALID_LOCS", "#BASE_CUSTOMERS", CONTACTS_TABLE, "#DOC_METRICS", "#OCM_EXISTS",
+    )
+    
+    def get_report_name(self) -> str:
+        return "customer_header"
+    
+    def get_sheet_name(self) -> str:
+        return "Customer Header"
+    
+    def get_layout(self) -> ColumnLayout:
+        return LAYOUT
+    
+    def get_column_widths(self) -> Dict[str, float]:
+        return dict(staging.AMOUNT_COLUMN_WIDTHS)
+    
+    def get_setup_statements(self, as_of: datetime = None) -> List[SqlQuery]:
+        """Etapas 1-4 de Customer.sql, más #CONTACTS (reports/contacts.py)."""
+        return [
+            staging.valid_locations_stage(),
+            staging.base_customers_stage(ranked=True),
+            staging.contacts_stage(ranked=True),
+            self._doc_metrics_stage(as_of),
+            staging.quotes_stage(as_of),
+        ]
+    
+    def _doc_metrics_stage(self, as_of: datetime = None) -> SqlQuery:
+        """#DOC_METRICS: métricas por CiaIdeNum en una sola pasada de DocCab."""
+        q = QueryBuilder()
+        staging.declare_constants(q, as_of)
+        all_transactional = q.codes("ALL_TRANSACTIONAL", CUSTOMER_DOC_TYPES.all_transactional)
+        
+        return q.build(f"""
+IF OBJECT_ID('tempdb..#DOC_METRICS') IS NOT NULL DROP TABLE #DOC_METRICS;
+
+SELECT
+    bc.CiaIdeNum,
+{staging.doc_metrics_select(q)},
+    -- Open Balance
+    {staging.open_balance_expr(q)} AS OPEN_BALANCE
+INTO #DOC_METRICS
+FROM #BASE_CUSTOMERS bc
+INNER JOIN DocCab dc WITH (NOLOCK) ON dc.CiaCod = bc.CiaCod AND dc.OriCod = bc.OriCod
+INNER JOIN #VALID_LOCS v ON v.OriCod = dc.OriCod AND v.CiaCod = dc.CiaCod AND v.LocCod = dc.LocCod
+WHERE dc.DocTipCod IN {all_transactional}
+  AND dc.DocEst <> '0'
+GROUP BY bc.CiaIdeNum;
+
+CREATE INDEX IX_DOC_METRICS ON #DOC_METRICS(CiaIdeNum);
+""")
+    
+    def get_query(self, as_of: datetime = None) -> str:
+        """Query final de customer header - basado en queries/Customers/Customer.sql"""
+        return f"""
+SELECT
+{LAYOUT.select_list()}
+FROM #BASE_CUSTOMERS bc
+-- Tomar datos del cliente con menor OriCod (rn = 1)
+INNER JOIN CiaTab ct WITH (NOLOCK) ON ct.CiaIdeNum = bc.CiaIdeNum
+    AND ct.OriCod = bc.OriCod
+    AND ct.CiaCod = bc.CiaCod
+INNER JOIN IdeTip c WITH (NOLOCK) ON ct.OriCod = c.OriCod AND ct.IdeTipCod = c.IdeTipCod
+INNER JOIN OriTab ot WITH (NOLOCK) ON ot.OriCod = ct.OriCod
+LEFT JOIN CiaPar cp WITH (NOLOCK) ON cp.CiaCod = ct.CiaCod AND cp.ParCod = '7941'
+CROSS APPLY (
+    SELECT TOP (1) lt2.*
+    FROM LocTab lt2 WITH (NOLOCK)
+    WHERE lt2.CiaCod = ct.CiaCod
+      AND lt2.OriCod = ct.OriCod
+      AND lt2.LocEst = '1'
+    ORDER BY lt2.LocCod ASC
+) lt
+LEFT JOIN PaiTab pt WITH (NOLOCK) ON pt.PaiCod = lt.PaiCod
+LEFT JOIN DstTab dt WITH (NOLOCK) ON dt.DstCod = lt.DstCod
+    AND dt.PaiCod = pt.PaiCod
+    AND dt.DptCod = lt.DptCod
+    AND dt.PvnCod = lt.PvnCod
+    AND dt.OriCod = lt.OriCod
+LEFT JOIN DptTab dpt WITH (NOLOCK) ON dpt.DptCod = lt.DptCod
+    AND dpt.OriCod = ot.OriCod
+    AND dpt.PaiCod = lt.PaiCod
+    AND dpt.DptEst = '1'
+LEFT JOIN PvnTab pvt WITH (NOLOCK) ON pvt.PvnCod = lt.PvnCod
+    AND pvt.OriCod = lt.OriCod
+    AND pvt.PaiCod = lt.PaiCod
+    AND pvt.DptCod = dpt.DptCod
+{contacts_join("ct.CiaCod", "ot.OriCod", "lt.LocCod")}
+LEFT JOIN CiaCtaTab cct WITH (NOLOCK) ON cct.CiaCod = ct.CiaCod AND cct.Oricod = ct.OriCod
+-- Métricas pre-calculadas
+LEFT JOIN #DOC_METRICS m ON m.CiaIdeNum = bc.CiaIdeNum
+WHERE bc.rn = 1  -- Solo tomar uno por CiaIdeNum (el de menor OriCod)
+  AND (
+        /* PRIORIDAD 1: Open Balance > 0 */
+        COALESCE(m.OPEN_BALANCE, 0) > 0
+        /* PRIORIDAD 2: Tiene transacciones en 5Y */
+        OR m.HAS_TRX_5Y = 1
+        /* PRIORIDAD 3: Tiene cotizaciones en 5Y */
+        OR EXISTS (SELECT 1 FROM #OCM_EXISTS o WHERE o.CiaIdeNum = bc.CiaIdeNum)
+      );
+"""
@@ -0,0 +1,212 @@
+"""
+Reporte Customer Site
+======================
+Extrae datos a nivel de sitio/ubicación del cliente.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+import sys
+sys.path.insert(0, '../..')
+from reports.base import BaseReport
+from reports.columns import ColumnLayout, same_as, source
+from reports.contacts import CONTACTS_TABLE, contact_column, contacts_join
+from reports.query import QueryBuilder, SqlQuery
+from reports.customers import staging
+from config.settings import CUSTOMER_DOC_TYPES
+
+
+# Columnas del template en orden. La query trae solo las expresiones
+# únicas; las copias se completan al exportar (reports/columns.py)
+LAYOUT = ColumnLayout([
+    source("ORG_NAME (M)", "CASE WHEN ot.oricod = '011' then 'F490101' ELSE ot.oricod END"),
+    source("PARTY_NAME (M)", "ct.CiaDes"),
+    source("PARTY_STATUS", "CASE WHEN ct.CiaEst = '1' THEN 'ACTIVO' WHEN ct.CiaEst = '0' THEN 'INACTIVO' END"),
+    source("PARTY_ID (M)", "cct.CiaCtaNum"),
+    source("REGISTRY_ID", "ct.CiaIdeNum"),
+    source("SIC_CODE", "cp.CiaParVal"),
+    source("DEFAULT_REP_COUNTRY_CODE (M)", "ot.PaiCod"),
+    same_as("DEFAULT_REP_REG_NUMBER (M)", "REGISTRY_ID"),
+    source("DEFAULT_REP_TAX_REG_TYPE (M)", "c.ideTipDes"),
+    same_as("TAXPAYER_ID (M)", "REGISTRY_ID"),
+    same_as("TAX_REGISTRATION_NUMBER (M)", "REGISTRY_ID"),
+    same_as("ACCOUNT_NUMBER (M)", "PARTY_ID (M)"),
+    source("PARTY_SITE_NAME", "lt.LocDes"),
+    source("ACCOUNT_DESCRIPTION", "cct.CiaCtaTip"),
+    same_as("CUST_ACCOUNT_ID", "PARTY_ID (M)"),
+    source("ACCOUNT_STATUS (M)", "cct.CiaCtaEst"),
+    source("PARTY_SITE_NUMBER", "lt.LocCod"),
+    source("PARTY_SITE_ID", "CONCAT(RTRIM(lt.CiaCod), lt.LocCod)"),
+    source("COUNTRY (M)", "pt.PaiDes"),
+    source("ADDRESS1 (M)", "lt.LocDir"),
+    source("CITY (M)", "dt.DstDes"),
+    source("POSTAL_CODE (M)", "dt.DstPstCod"),
+    source("STATE (M)", "dpt.DptDes"),
+    source("PROVINCE (M)", "pvt.PvnDes"),
+    same_as("COUNTY (M)", "CITY (M)"),
+    source("STATUS (M)", "lt.LocEst"),
+    source("ACCOUNT_SITE_PHONE_NUMBER", contact_column("PHONE")),
+    source("ACCOUNT_SITE_EMAIL", contact_column("EMAIL")),
+    *staging.METRIC_COLUMNS,
+])
+
+class CustomerSiteReport(BaseReport):
+    """
+    Reporte de clientes a nivel de sitio/ubicación.
+    
+    Incluye solo los sites de clientes válidos en customer header que
+    aportan al menos una métrica, con sus métricas de DocCab por locación.
+    
+    Se ejecuta en etapas (queries/Customers/Customer-Site.sql): las
+    tablas temporales se preparan en la misma sesión antes de la query
+    final.
+    """
+    
+    TEMP_TABLES = (
+        "#VALID_LOCS", "#BASE_CUSTOMERS", CONTACTS_TABLE, "#AGGREGATED_OB",
+        "#OCM_EXISTS", "#VALID_HEADER", "#SITE_METRICS",
+    )
+    
+    def get_report_name(self) -> str:
+        return "customer_site"
+    
+    def get_sheet_name(self) -> str:
+        return "Customer Site"
+    
+    def get_layout(self) -> ColumnLayout:
+        return LAYOUT
+    
+    def get_column_widths(self) -> Dict[str, float]:
+        return dict(staging.AMOUNT_COLUMN_WIDTHS)
+    
+    def get_setup_statements(self, as_of: datetime = None) -> List[SqlQuery]:
+        """Etapas 1-6 de Customer-Site.sql, más #CONTACTS (reports/contacts.py)."""
+        return [
+            staging.valid_locations_stage(),
+            staging.base_customers_stage(),
+            staging.contacts_stage(),
+            self._aggregated_balance_stage(as_of),
+            staging.quotes_stage(as_of),
+            self._valid_header_stage(),
+            self._site_metrics_stage(as_of),
+        ]
+    
+    def _aggregated_balance_stage(self, as_of: datetime = None) -> SqlQuery:
+        """#AGGREGATED_OB: open balance y actividad 5Y por CiaIdeNum (criterio header)."""
+        q = QueryBuilder()
+        staging.declare_constants(q, as_of)
+        transactions = q.codes("TRANSACTIONS", CUSTOMER_DOC_TYPES.transactions)
+        all_transactional = q.codes("ALL_TRANSACTIONAL", CUSTOMER_DOC_TYPES.all_transactional)
+        
+        return q.build(f"""
+IF OBJECT_ID('tempdb..#AGGREGATED_OB') IS NOT NULL DROP TABLE #AGGREGATED_OB;
+
+SELECT
+    bc.CiaIdeNum,
+    {staging.open_balance_expr(q)} AS OPEN_BALANCE,
+    MAX(CASE WHEN dc.DocTipCod IN {transactions} AND dc.DocFecCre >= @DATE_5Y THEN 1 ELSE 0 END) AS HAS_TRX_5Y
+INTO #AGGREGATED_OB
+FROM #BASE_CUSTOMERS bc
+INNER JOIN DocCab dc WITH (NOLOCK) ON dc.CiaCod = bc.CiaCod AND dc.OriCod = bc.OriCod
+INNER JOIN #VALID_LOCS v ON v.OriCod = dc.OriCod AND v.CiaCod = dc.CiaCod AND v.LocCod = dc.LocCod
+WHERE dc.DocTipCod IN {all_transactional}
+  AND dc.DocEst <> '0'
+GROUP BY bc.CiaIdeNum;
+
+CREATE INDEX IX_AGG_OB ON #AGGREGATED_OB(CiaIdeNum);
+""")
+    
+    def _valid_header_stage(self) -> SqlQuery:
+        """#VALID_HEADER: CiaIdeNum que cumplen el criterio de customer header."""
+        return QueryBuilder().build("""
+IF OBJECT_ID('tempdb..#VALID_HEADER') IS NOT NULL DROP TABLE #VALID_HEADER;
+
+SELECT DISTINCT bc.CiaIdeNum
+INTO #VALID_HEADER
+FROM #BASE_CUSTOMERS bc
+LEFT JOIN #AGGREGATED_OB ob ON ob.CiaIdeNum = bc.CiaIdeNum
+WHERE (
+        COALESCE(ob.OPEN_BALANCE, 0) > 0
+        OR ob.HAS_TRX_5Y = 1
+        OR EXISTS (SELECT 1 FROM #OCM_EXISTS o WHERE o.CiaIdeNum = bc.CiaIdeNum)
+      );
+
+CREATE INDEX IX_VALID_HEADER ON #VALID_HEADER(CiaIdeNum);
+""")
+    
+    def _site_metrics_stage(self, as_of: datetime = None) -> SqlQuery:
+        """#SITE_METRICS: métricas por site en una sola pasada de DocCab."""
+        q = QueryBuilder()
+        staging.declare_constants(q, as_of)
+        all_transactional = q.codes("ALL_TRANSACTIONAL", CUSTOMER_DOC_TYPES.all_transactional)
+        
+        return q.build(f"""
+IF OBJECT_ID('tempdb..#SITE_METRICS') IS NOT NULL DROP TABLE #SITE_METRICS;
+
+SELECT
+    dc.CiaCod,
+    dc.OriCod,
+    dc.LocCod,
+{staging.doc_metrics_select(q)},
+    -- Open Balance del site
+    COALESCE({staging.open_balance_expr(q)}, 0) AS SITE_OPEN_BALANCE
+INTO #SITE_METRICS
+FROM DocCab dc WITH (NOLOCK)
+INNER JOIN #VALID_LOCS v ON v.OriCod = dc.OriCod AND v.CiaCod = dc.CiaCod AND v.LocCod = dc.LocCod
+WHERE dc.DocTipCod IN {all_transactional}
+  AND dc.DocEst <> '0'
+GROUP BY dc.CiaCod, dc.OriCod, dc.LocCod;
+
+CREATE INDEX IX_SITE_METRICS ON #SITE_METRICS(CiaCod, OriCod, LocCod);
+""")
+    
+    def get_query(self, as_of: datetime = None) -> SqlQuery:
+        """Query final de customer site - basado en queries/Customers/Customer-Site.sql"""
+        q = QueryBuilder()
+        
+        return q.build(f"""
+SELECT
+{LAYOUT.select_list()}
+FROM CiaTab ct WITH (NOLOCK)
+-- Solo clientes válidos del header
+INNER JOIN #VALID_HEADER vh ON vh.CiaIdeNum = ct.CiaIdeNum
+INNER JOIN Cid b WITH (NOLOCK) ON b.OriCod = ct.OriCod AND ct.CiaCod = b.CiaCod
+INNER JOIN IdeTip c WITH (NOLOCK) ON ct.OriCod = c.OriCod AND ct.IdeTipCod = c.IdeTipCod
+INNER JOIN OriTab ot WITH (NOLOCK) ON ot.OriCod = ct.OriCod
+INNER JOIN LocTab lt WITH (NOLOCK) ON lt.CiaCod = ct.CiaCod AND lt.OriCod = ct.OriCod
+LEFT JOIN CiaPar cp WITH (NOLOCK) ON cp.CiaCod = ct.CiaCod AND cp.ParCod = '7941'
+LEFT JOIN PaiTab pt WITH (NOLOCK) ON pt.PaiCod = lt.PaiCod
+LEFT JOIN DstTab dt WITH (NOLOCK) ON dt.DstCod = lt.DstCod
+    AND dt.PaiCod = lt.PaiCod
+    AND dt.DptCod = lt.DptCod
+    AND dt.PvnCod = lt.PvnCod
+    AND dt.OriCod = lt.OriCod
+LEFT JOIN DptTab dpt WITH (NOLOCK) ON dpt.DptCod = lt.DptCod
+    AND dpt.OriCod = lt.OriCod
+    AND dpt.PaiCod = lt.PaiCod
+    AND dpt.DptEst = '1'
+LEFT JOIN PvnTab pvt WITH (NOLOCK) ON pvt.PvnCod = lt.PvnCod
+    AND pvt.OriCod = lt.OriCod
+    AND pvt.PaiCod = lt.PaiCod
+    AND pvt.DptCod = dpt.DptCod
+{contacts_join("ct.CiaCod", "ot.OriCod", "lt.LocCod")}
+LEFT JOIN CiaCtaTab cct WITH (NOLOCK) ON cct.CiaCod = ct.CiaCod AND cct.Oricod = ct.OriCod
+-- Métricas pre-calculadas del site
+LEFT JOIN #SITE_METRICS m ON m.CiaCod = lt.CiaCod AND m.OriCod = lt.OriCod AND m.LocCod = lt.LocCod
+WHERE {staging.customer_filter(q)}
+  -- Locación válida (activa o con balance abierto)
+  AND (
+      lt.LocEst = '1'
+      OR (lt.LocEst <> '1' AND COALESCE(m.SITE_OPEN_BALANCE, 0) > 0)
+  )
+  -- FILTRO CLAVE: Solo sites que aportaron al menos una métrica
+  AND (
+      COALESCE(m.TOT_TRX_0Y2_AMOUNT_CHF, 0) <> 0
+      OR COALESCE(m.TOT_TRX_2Y5_AMOUNT_CHF, 0) <> 0
+      OR COALESCE(m.TOT_TRX_OP_AMOUNT_CHF, 0) <> 0
+      OR COALESCE(m.DOC_TRX_0Y2_COUNT, 0) > 0
+      OR COALESCE(m.DOC_TRX_2Y5_COUNT, 0) > 0
+      OR COALESCE(m.DOC_TRX_OP_COUNT, 0) > 0
+  )
+ORDER BY ct.CiaIdeNum ASC, ct.CiaCod ASC, lt.LocCod ASC;
+""")
@@ -0,0 +1,249 @@
+"""
+Etapas comunes de los reportes de clientes
+===========================================
+Tablas temporales indexadas que comparten customer header y customer
+site (basadas en queries/Customers/*.sql). Cada etapa es un batch
+independiente con sus propios parámetros.
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, '../..')
+from reports.columns import AMOUNT_FORMAT, Column, source
+from reports import contacts
+from reports.query import QueryBuilder, SqlQuery
+from config.settings import (
+    CHF_RATE, CUSTOMER_DOC_TYPES, VALID_ORIGIN_CODES, EXCLUDED_CUSTOMER_CODES
+)
+
+
+def declare_constants(q: QueryBuilder, as_of: datetime = None) -> None:
+    """
+    Declara @CHF_RATE y los límites de las ventanas @DATE_2Y y @DATE_5Y
+    (equivalentes a DATEADD(YEAR, -n, GETDATE()) del servidor).
+    """
+    now = pd.Timestamp(as_of or datetime.now())
+    q.scalar("CHF_RATE", "DECIMAL(18,9)", Decimal(str(CHF_RATE)))
+    q.scalar("DATE_2Y", "DATETIME", (now - pd.DateOffset(years=2)).to_pydatetime())
+    q.scalar("DATE_5Y", "DATETIME", (now - pd.DateOffset(years=5)).to_pydatetime())
+
+
+def customer_filter(q: QueryBuilder) -> str:
+    """Condiciones base de cliente sobre CiaTab ct y Cid b."""
+    valid_origins = q.codes("VALID_ORIGINS", VALID_ORIGIN_CODES)
+    excluded_customers = q.codes("EXCLUDED_CUSTOMERS", EXCLUDED_CUSTOMER_CODES)
+    
+    return f"""ct.OriCod IN {valid_origins}
+  AND ct.CiaEst = '1'
+  AND b.IndGrp = '6'
+  AND b.IndCod = '4'
+  AND ct.CiaCod NOT IN {excluded_customers}
+  AND ct.CiaIdeNum NOT LIKE 'F%'"""
+
+
+def valid_locations_stage() -> SqlQuery:
+    """#VALID_LOCS: locaciones activas, o inactivas con saldo abierto."""
+    q = QueryBuilder()
+    open_items = q.codes("OPEN_ITEMS", CUSTOMER_DOC_TYPES.open_items)
+    
+    return q.build(f"""
+IF OBJECT_ID('tempdb..#VALID_LOCS') IS NOT NULL DROP TABLE #VALID_LOCS;
+
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod
+INTO #VALID_LOCS
+FROM LocTab lt WITH (NOLOCK)
+WHERE lt.LocEst = '1'
+UNION
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod
+FROM LocTab lt WITH (NOLOCK)
+WHERE lt.LocEst = '0'
+  AND EXISTS (
+      SELECT 1
+      FROM DocCab dc WITH (NOLOCK)
+      WHERE dc.OriCod = lt.OriCod
+        AND dc.CiaCod = lt.CiaCod
+        AND dc.LocCod = lt.LocCod
+        AND dc.DocSld > 0
+        AND dc.DocTipCod IN {open_items}
+        AND dc.DocEst <> '0'
+  );
+
+CREATE INDEX IX_VALID_LOCS ON #VALID_LOCS(OriCod, CiaCod, LocCod);
+""")
+
+
+def base_customers_stage(ranked: bool = False) -> SqlQuery:
+    """
+    #BASE_CUSTOMERS: clientes candidatos.
+    
+    Args:
+        ranked: Si incluir los datos del cliente y rn (1 = menor OriCod
+                por CiaIdeNum), usados por customer header
+    """
+    q = QueryBuilder()
+    columns = "ct.CiaIdeNum,\n    ct.OriCod,\n    ct.CiaCod"
+    if ranked:
+        columns += """,
+    ct.CiaDes,
+    ct.CiaSig,
+    ct.CiaFehCre,
+    ct.IdeTipCod,
+    ct.CiaEst,
+    ROW_NUMBER() OVER (PARTITION BY ct.CiaIdeNum ORDER BY ct.OriCod ASC) AS rn"""
+    
+    return q.build(f"""
+IF OBJECT_ID('tempdb..#BASE_CUSTOMERS') IS NOT NULL DROP TABLE #BASE_CUSTOMERS;
+
+SELECT
+    {columns}
+INTO #BASE_CUSTOMERS
+FROM CiaTab ct WITH (NOLOCK)
+INNER JOIN Cid b WITH (NOLOCK) ON b.OriCod = ct.OriCod AND b.CiaCod = ct.CiaCod
+WHERE {customer_filter(q)};
+
+CREATE INDEX IX_BASE_CUST ON #BASE_CUSTOMERS(CiaIdeNum);
+CREATE INDEX IX_BASE_CUST2 ON #BASE_CUSTOMERS(OriCod, CiaCod);
+""")
+
+
+def contacts_stage(ranked: bool = False) -> SqlQuery:
+    """
+    #CONTACTS: teléfono y email de las locaciones de #BASE_CUSTOMERS
+    (ver reports/contacts.py).
+    
+    Args:
+        ranked: Si leer solo los clientes con rn = 1 (customer header)
+    """
+    q = QueryBuilder()
+    customers = "SELECT bc.OriCod, bc.CiaCod FROM #BASE_CUSTOMERS bc"
+    if ranked:
+        customers += " WHERE bc.rn = 1"
+    return contacts.contacts_stage(q, customers, kinds=("PHONE", "EMAIL"))
+
+
+def quotes_stage(as_of: datetime = None) -> SqlQuery:
+    """#OCM_EXISTS: clientes con cotizaciones (OcmCab) en los últimos 5 años."""
+    q = QueryBuilder()
+    declare_constants(q, as_of)
+    
+    return q.build("""
+IF OBJECT_ID('tempdb..#OCM_EXISTS') IS NOT NULL DROP TABLE #OCM_EXISTS;
+
+SELECT DISTINCT bc.CiaIdeNum
+INTO #OCM_EXISTS
+FROM #BASE_CUSTOMERS bc
+INNER JOIN OcmCab oc WITH (NOLOCK) ON oc.CiaCod = bc.CiaCod AND oc.OriCod = bc.OriCod
+WHERE oc.OcmFehCre >= @DATE_5Y
+  AND oc.OcmEst NOT IN (0, 6);
+
+CREATE INDEX IX_OCM_EXISTS ON #OCM_EXISTS(CiaIdeNum);
+""")
+
+
+def doc_metrics_select(q: QueryBuilder) -> str:
+    """
+    Columnas de métricas de DocCab (montos CHF, conteos, fechas y
+    banderas) comunes a #DOC_METRICS y #SITE_METRICS.
+    """
+    invoice_debit = q.codes("INVOICE_DEBIT", CUSTOMER_DOC_TYPES.invoice_debit)
+    credit_notes = q.codes("CREDIT_NOTES", CUSTOMER_DOC_TYPES.credit_notes)
+    open_items = q.codes("OPEN_ITEMS", CUSTOMER_DOC_TYPES.open_items)
+    transactions = q.codes("TRANSACTIONS", CUSTOMER_DOC_TYPES.transactions)
+    
+    return f"""    -- Métricas de montos
+    ROUND(SUM(CASE
+            WHEN dc.DocFecCre >= @DATE_2Y THEN
+                CASE
+                    WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocMto * @CHF_RATE
+                    WHEN dc.DocTipCod IN {credit_notes}  THEN -dc.DocMto * @CHF_RATE
+                    ELSE 0
+                END
+            ELSE 0
+        END) * CAST(@CHF_RATE AS DECIMAL(38,18)), 6) AS TOT_TRX_0Y2_AMOUNT_CHF,
+    ROUND(SUM(CASE
+            WHEN dc.DocFecCre <= @DATE_2Y
+            AND  dc.DocFecCre >= @DATE_5Y THEN
+                CASE
+                    WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocMto * @CHF_RATE
+                    WHEN dc.DocTipCod IN {credit_notes}  THEN -dc.DocMto * @CHF_RATE
+                    ELSE 0
+                END
+            ELSE 0
+        END) * CAST(@CHF_RATE AS DECIMAL(38,18)), 6) AS TOT_TRX_2Y5_AMOUNT_CHF,
+    ROUND(SUM(CASE
+            WHEN dc.DocSld > 0 THEN
+                CASE
+                    WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocSld * @CHF_RATE
+                    WHEN dc.DocTipCod IN {credit_notes}  THEN -dc.DocSld * @CHF_RATE
+                    ELSE 0
+                END
+            ELSE 0
+        END) * CAST(@CHF_RATE AS DECIMAL(38,18)), 6) AS TOT_TRX_OP_AMOUNT_CHF,
+    -- Conteos
+    SUM(CASE WHEN dc.DocFecCre >= @DATE_2Y THEN 1 ELSE 0 END) AS DOC_TRX_0Y2_COUNT,
+    SUM(CASE
+            WHEN dc.DocFecCre <= @DATE_2Y
+            AND  dc.DocFecCre >= @DATE_5Y
+        THEN 1 ELSE 0 END) AS DOC_TRX_2Y5_COUNT,
+    SUM(CASE
+        WHEN dc.DocSld > 0
+        AND dc.DocFecVct >= @DATE_2Y
+        AND dc.DocTipCod IN {open_items}
+        THEN 1 ELSE 0
+    END) AS DOC_TRX_OP_COUNT,
+    -- Fechas
+    MIN(dc.DocFecCre) AS MIN_TRX_DATE,
+    MAX(dc.DocFecCre) AS MAX_TRX_DATE,
+    MIN(YEAR(dc.DocFecCre)) AS MIN_TRX_YEAR,
+    MAX(YEAR(dc.DocFecCre)) AS MAX_TRX_YEAR,
+    -- Flags (calculados en la misma pasada)
+    MAX(CASE WHEN dc.DocTipCod IN {invoice_debit} AND dc.DocSld > 0 THEN 1 ELSE 0 END) AS HAS_OP_TRX,
+    MAX(CASE WHEN dc.DocTipCod IN {transactions} AND dc.DocFecCre >= @DATE_2Y THEN 1 ELSE 0 END) AS HAS_TRX_02Y,
+    MAX(CASE WHEN dc.DocTipCod IN {transactions} AND dc.DocFecCre >= @DATE_5Y THEN 1 ELSE 0 END) AS HAS_TRX_5Y"""
+
+
+def open_balance_expr(q: QueryBuilder) -> str:
+    """SUM del saldo abierto en CHF (sin COALESCE)."""
+    balance_positive = q.codes("BALANCE_POSITIVE", CUSTOMER_DOC_TYPES.balance_positive)
+    balance_negative = q.codes("BALANCE_NEGATIVE", CUSTOMER_DOC_TYPES.balance_negative)
+    
+    return f"""SUM(CASE
+            WHEN dc.DocSld > 0 THEN
+                CASE
+                    WHEN dc.DocTipCod IN {balance_positive} THEN  dc.DocSld * @CHF_RATE
+                    WHEN dc.DocTipCod IN {balance_negative} THEN -dc.DocSld * @CHF_RATE
+                    ELSE 0
+                END
+            ELSE 0
+        END)"""
+
+
+# Columnas de métricas del resultado final (alias m = #DOC_METRICS / #SITE_METRICS)
+METRIC_COLUMNS: List[Column] = [
+    source("TOT_TRX_0Y2_AMOUNT_CHF (M)", "COALESCE(m.TOT_TRX_0Y2_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TOT_TRX_2Y5_AMOUNT_CHF (M)", "COALESCE(m.TOT_TRX_2Y5_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TOT_TRX_OP_AMOUNT_CHF (M)", "COALESCE(m.TOT_TRX_OP_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TOT_TRX_0Y5_OP_AMOUNT_CHF (M)", "COALESCE(m.TOT_TRX_0Y2_AMOUNT_CHF, 0) + COALESCE(m.TOT_TRX_2Y5_AMOUNT_CHF, 0) + COALESCE(m.TOT_TRX_OP_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("DOC_TRX_0Y2_COUNT (M)", "COALESCE(m.DOC_TRX_0Y2_COUNT, 0)", dtype="int32"),
+    source("DOC_TRX_2Y5_COUNT (M)", "COALESCE(m.DOC_TRX_2Y5_COUNT, 0)", dtype="int32"),
+    source("DOC_TRX_OP_COUNT (M)", "COALESCE(m.DOC_TRX_OP_COUNT, 0)", dtype="int32"),
+    source("DOC_TRX_0Y5_OP_COUNT (M)", "COALESCE(m.DOC_TRX_0Y2_COUNT, 0) + COALESCE(m.DOC_TRX_2Y5_COUNT, 0) + COALESCE(m.DOC_TRX_OP_COUNT, 0)", dtype="int32"),
+    source("MIN_TRX_DATE (M)", "m.MIN_TRX_DATE"),
+    source("MAX_TRX_DATE (M)", "m.MAX_TRX_DATE"),
+    source("MIN_TRX_YEAR (M)", "m.MIN_TRX_YEAR", dtype="int16"),
+    source("MAX_TRX_YEAR (M)", "m.MAX_TRX_YEAR", dtype="int16"),
+    source("CUSTOMER_TRX_SOURCE_LIST (M)", "CASE WHEN m.HAS_OP_TRX = 1 THEN 'OP_TRX' WHEN m.HAS_TRX_02Y = 1 THEN 'TRX_02Y' WHEN m.HAS_TRX_5Y = 1 THEN 'TRX_2Y5' ELSE 'PAY_SCHE_NO_TRX' END"),
+]
+
+
+# Montos CHF: ancho fijo en Excel, no se estiman desde los datos
+AMOUNT_COLUMN_WIDTHS = {
+    "TOT_TRX_0Y2_AMOUNT_CHF (M)": 18,
+    "TOT_TRX_2Y5_AMOUNT_CHF (M)": 18,
+    "TOT_TRX_OP_AMOUNT_CHF (M)": 18,
+    "TOT_TRX_0Y5_OP_AMOUNT_CHF (M)": 18,
+}
@@ -0,0 +1,403 @@
+"""
+Caché de tablas de dimensión
+=============================
+Las tablas de descripción (PaiTab, DstTab, DptTab, PvnTab, IdeTip,
+IndTip) son chicas, pero unidas en la query repiten la misma descripción
+(país, ciudad, estado, ...) en cada fila del resultado. Con la caché, la
+query trae solo los códigos y las descripciones se resuelven en el
+cliente con búsquedas vectorizadas sobre las dimensiones cargadas.
+
+- Cada dimensión se lee una vez por día y se guarda en disco (Arrow IPC,
+  DIMENSION_CONFIG.directory) con el conteo de filas y el CHECKSUM_AGG de
+  la tabla. Un cambio de día, de conteo o de checksum la recarga.
+- La validación (una query para todas las tablas) se repite cada
+  DIMENSION_CONFIG.check_seconds dentro de un mismo proceso.
+- En memoria cada dimensión queda indexada por sus llaves, con las
+  descripciones como categóricos.
+
+Los reportes declaran sus joins de dimensión (DIMENSION_JOINS, ver
+BaseReport): el SQL del join (usado si la caché está desactivada), las
+llaves que lo vinculan y las columnas del template que aporta. Las
+llaves se comparan como en SQL Server con la collation del ERP (sin
+distinción de mayúsculas): sin espacios finales, sin mayúsculas y sin
+coincidencia para NULL. Una dimensión con llaves repetidas conserva la
+primera fila de cada llave.
+
+Uso:
+    PAIS = dimension_join(
+        "pt", "PaiTab",
+        keys={"PaiCod": "lt.PaiCod"},
+        columns={"COUNTRY (M)": "PaiDes"},
+        sql="LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod",
+    )
+"""
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import DIMENSION_CONFIG
+
+
+# Prefijo de las columnas de llave que la query trae para resolver
+KEY_PREFIX = "_KEY_"
+
+
+# ============================================
+# DIMENSIONES
+# ============================================
+@dataclass(frozen=True)
+class Dimension:
+    """Tabla de descripción que se carga completa en el cliente."""
+    name: str
+    table: str
+    keys: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    where: str = ""
+    
+    def load_query(self) -> str:
+        where = f"\nWHERE {self.where}" if self.where else ""
+        return f"SELECT {', '.join(self.keys + self.columns)}\nFROM {self.table} WITH (NOLOCK){where};"
+
+
+DIMENSIONS: Dict[str, Dimension] = {
+    dimension.name: dimension
+    for dimension in (
+        Dimension("PaiTab", "PaiTab", ("PaiCod",), ("PaiDes",)),
+        Dimension("DstTab", "DstTab", ("OriCod", "PaiCod", "DptCod", "PvnCod", "DstCod"), ("DstDes", "DstPstCod")),
+        Dimension("DptTab", "DptTab", ("OriCod", "PaiCod", "DptCod"), ("DptDes",), where="DptEst = '1'"),
+        Dimension("PvnTab", "PvnTab", ("OriCod", "PaiCod", "DptCod", "PvnCod"), ("PvnDes",)),
+        Dimension("IdeTip", "IdeTip", ("OriCod", "IdeTipCod"), ("IdeTipDes",)),
+        # Tipos de sitio (grupo 9 de IndTip)
+        Dimension("IndTip", "IndTip", ("OriCod", "IndGrp", "IndCod"), ("IndDes",), where="IndGrp = 9"),
+    )
+}
+
+
+@dataclass(frozen=True)
+class DimensionJoin:
+    """
+    LEFT JOIN de una dimensión en la query de un reporte.
+    
+    keys: (llave de la dimensión, expresión SQL del reporte o literal
+          entre comillas). requires: alias de otros joins que deben
+          encontrar fila para que este encuentre (joins encadenados, ej:
+          dt.PaiCod = pt.PaiCod).
+    """
+    alias: str
+    dimension: str
+    keys: Tuple[Tuple[str, str], ...]
+    columns: Tuple[Tuple[str, str], ...]
+    sql: str
+    requires: Tuple[str, ...] = ()
+
+
+def dimension_join(
+    alias: str,
+    dimension: str,
+    keys: Dict[str, str],
+    columns: Dict[str, str],
+    sql: str,
+    requires: Sequence[str] = ()
+) -> DimensionJoin:
+    """Declara un join de dimensión (ver DimensionJoin)."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Dimensión no registrada: {dimension}")
+    missing = set(DIMENSIONS[dimension].keys) - set(keys)
+    if missing:
+        raise ValueError(f"{alias}: faltan llaves de {dimension}: {', '.join(sorted(missing))}")
+    return DimensionJoin(
+        alias, dimension, tuple(keys.items()), tuple(columns.items()), sql.strip(), tuple(requires)
+    )
+
+
+def _is_literal(expression: str) -> bool:
+    return len(expression) >= 2 and expression[0] == expression[-1] == "'"
+
+
+def key_column(expression: str) -> str:
+    """Alias de la columna de llave que trae la query para una expresión."""
+    return KEY_PREFIX + re.sub(r"\W+", "_", expression).strip("_")
+
+
+def key_select_list(joins: Iterable[DimensionJoin], indent: str = "    ") -> str:
+    """Columnas de llave (sin repetir) para el SELECT de la query."""
+    expressions = dict.fromkeys(
+        expression
+        for join in joins
+        for _, expression in join.keys
+        if not _is_literal(expression)
+    )
+    return ",\n".join(f"{indent}{expression} AS [{key_column(expression)}]" for expression in expressions)
+
+
+def resolved_columns(joins: Iterable[DimensionJoin]) -> List[str]:
+    """Columnas del template que se resuelven en el cliente."""
+    return [name for join in joins for name, _ in join.columns]
+
+
+def join_sql(joins: Iterable[DimensionJoin], aliases: Sequence[str] = None) -> str:
+    """SQL de los joins (todos, o los de `aliases` en ese orden)."""
+    by_alias = {join.alias: join for join in joins}
+    selected = [by_alias[alias] for alias in aliases] if aliases else list(by_alias.values())
+    return "\n".join(join.sql for join in selected)
+
+
+def normalize_codes(values) -> pd.Series:
+    """
+    Códigos como texto sin espacios finales (SQL Server los ignora al
+    comparar CHAR) ni mayúsculas (collation CI del ERP), y NULL como NA.
+    Los enteros leídos como float por tener NULL se comparan sin decimales.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_float_dtype(series):
+        non_null = series.dropna()
+        if (non_null == np.floor(non_null)).all():
+            series = series.astype("Int64")
+    return series.astype("string").str.rstrip().str.casefold()
+
+
+# ============================================
+# DIMENSIÓN CARGADA
+# ============================================
+class _LoadedDimension:
+    """Dimensión indexada por sus llaves, con las descripciones categóricas."""
+    
+    def __init__(self, dimension: Dimension, df: pd.DataFrame):
+        self.dimension = dimension
+        df = df.dropna(subset=list(dimension.keys))
+        arrays = [normalize_codes(df[key]).to_numpy() for key in dimension.keys]
+        index = pd.Index(arrays[0]) if len(arrays) == 1 else pd.MultiIndex.from_arrays(arrays)
+        # Llaves iguales salvo espacios finales o mayúsculas cuentan como repetidas
+        unique = ~index.duplicated()
+        self.index = index[unique]
+        df = df[unique]
+        self.values = {
+            column: pd.Categorical(df[column].to_numpy(dtype=object))
+            for column in dimension.columns
+        }
+        self.rows = len(df)
+    
+    def positions(self, arrays: List[np.ndarray]) -> np.ndarray:
+        """Fila de la dimensión para cada fila del reporte (-1 sin coincidencia)."""
+        if len(arrays) == 1:
+            target = pd.Index(arrays[0])
+        else:
+            target = pd.MultiIndex.from_arrays(arrays)
+        positions = self.index.get_indexer(target)
+        # NULL en cualquier llave no coincide con nada
+        for array in arrays:
+            positions[pd.isna(array)] = -1
+        return positions
+    
+    def take(self, column: str, positions: np.ndarray) -> pd.Categorical:
+        values = self.values[column]
+        codes = np.where(positions >= 0, values.codes[positions], -1)
+        return pd.Categorical.from_codes(codes, dtype=values.dtype)
+
+
+def resolve_dimensions(
+    df: pd.DataFrame,
+    joins: Sequence[DimensionJoin],
+    tables: Dict[str, _LoadedDimension]
+) -> pd.DataFrame:
+    """
+    Agrega las columnas de descripción de los joins a partir de las
+    columnas de llave del resultado, y elimina esas llaves.
+    """
+    columns = {}
+    codes: Dict[str, np.ndarray] = {}
+    matched: Dict[str, np.ndarray] = {}
+    
+    for join in joins:
+        table = tables[join.dimension]
+        expressions = dict(join.keys)
+        arrays = []
+        for key in table.dimension.keys:
+            expression = expressions[key]
+            if _is_literal(expression):
+                literal = normalize_codes([expression[1:-1]]).iloc[0]
+                arrays.append(np.full(len(df), literal, dtype=object))
+                continue
+            if expression not in codes:
+                codes[expression] = normalize_codes(df[key_column(expression)]).to_numpy()
+            arrays.append(codes[expression])
+        
+        positions = table.positions(arrays)
+        for alias in join.requires:
+            positions[~matched[alias]] = -1
+        matched[join.alias] = positions >= 0
+        
+        for name, column in join.columns:
+            columns[name] = pd.Series(table.take(column, positions), index=df.index)
+    
+    df = df.drop(columns=[column for column in df.columns if str(column).startswith(KEY_PREFIX)])
+    return df.assign(**columns)
+
+
+# ============================================
+# CACHÉ
+# ============================================
+class DimensionCache:
+    """
+    Dimensiones cargadas en memoria y en disco, validadas contra la BD.
+    Thread-safe (las particiones de un reporte resuelven en paralelo).
+    """
+    
+    MANIFEST = "manifest.json"
+    
+    def __init__(self, directory: str = None, check_seconds: float = None):
+        """
+        Args:
+            directory: Carpeta de la caché. Usa DIMENSION_CONFIG.directory.
+            check_seconds: Segundos entre validaciones contra la BD
+        """
+        self.directory = Path(directory or DIMENSION_CONFIG.directory)
+        self.check_seconds = DIMENSION_CONFIG.check_seconds if check_seconds is None else check_seconds
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, _LoadedDimension] = {}
+        self._checked: Dict[str, float] = {}
+    
+    def resolve(self, db, df: pd.DataFrame, joins: Sequence[DimensionJoin]) -> pd.DataFrame:
+        """Resuelve las descripciones de df (ver resolve_dimensions)."""
+        tables = self.tables(db, {join.dimension for join in joins})
+        return resolve_dimensions(df, joins, tables)
+    
+    def tables(self, db, names: Iterable[str]) -> Dict[str, _LoadedDimension]:
+        """
+        Dimensiones vigentes. Valida las que no se validaron en los
+        últimos check_seconds y recarga las que cambiaron.
+        """
+        names = sorted(set(names))
+        with self._lock:
+            now = time.monotonic()
+            stale = [
+                name for name in names
+                if name not in self._loaded or now - self._checked.get(name, 0) > self.check_seconds
+            ]
+            if stale:
+                self._refresh(db, stale)
+                for name in stale:
+                    self._checked[name] = now
+            return {name: self._loaded[name] for name in names}
+    
+    def clear(self) -> None:
+        """Descarta las dimensiones en memoria y en disco."""
+        with self._lock:
+            self._loaded.clear()
+            self._checked.clear()
+            for path in self.directory.glob("*.arrow"):
+                path.unlink(missing_ok=True)
+            (self.directory / self.MANIFEST).unlink(missing_ok=True)
+    
+    def _refresh(self, db, names: List[str]) -> None:
+        dimensions = [DIMENSIONS[name] for name in names]
+        signatures = self._signatures(db, {dimension.table for dimension in dimensions})
+        manifest = self._read_manifest()
+        today = date.today().isoformat()
+        
+        for dimension in dimensions:
+            # BD de la conexión (no necesariamente DB_CONFIG)
+            expected = {
+                "server": db.config.server,
+                "database": db.config.database,
+                "day": today,
+                **signatures[dimension.table],
+            }
+            entry = manifest.get(dimension.name, {})
+            current = {key: entry.get(key) for key in expected} == expected
+            if current and dimension.name in self._loaded:
+                continue
+            
+            df = self._read_file(dimension) if current else None
+            if df is None:
+                start = time.perf_counter()
+                df = db.execute_query(dimension.load_query())
+                self._write_file(dimension, df)
+                manifest[dimension.name] = expected
+                print(f"  Dimensión {dimension.name}: {len(df):,} filas cargadas "
+                      f"({time.perf_counter() - start:.2f}s)")
+            self._loaded[dimension.name] = _LoadedDimension(dimension, df)
+        
+        self._write_manifest(manifest)
+    
+    @staticmethod
+    def _signatures(db, tables: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Conteo de filas y CHECKSUM_AGG de cada tabla, en una sola query."""
+        query = "\nUNION ALL\n".join(
+            f"SELECT '{table}' AS TableName, COUNT_BIG(*) AS TableRows, "
+            f"CHECKSUM_AGG(BINARY_CHECKSUM(*)) AS TableChecksum FROM {table} WITH (NOLOCK)"
+            for table in sorted(tables)
+        )
+        df = db.execute_query(query + ";")
+        return {
+            str(row.TableName): {
+                "rows": int(row.TableRows),
+                "checksum": None if pd.isna(row.TableChecksum) else int(row.TableChecksum),
+            }
+            for row in df.itertuples(index=False)
+        }
+    
+    def _path(self, dimension: Dimension) -> Path:
+        return self.directory / f"{dimension.name}.arrow"
+    
+    def _read_file(self, dimension: Dimension) -> Optional[pd.DataFrame]:
+        try:
+            return pd.read_feather(self._path(dimension))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Dimensión {dimension.name} ilegible en disco, se recarga: {e}")
+            return None
+    
+    def _write_file(self, dimension: Dimension, df: pd.DataFrame) -> None:
+        """Guarda la dimensión; los errores de escritura solo se reportan."""
+        path = self._path(dimension)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[WARN] No se pudo guardar la dimensión {dimension.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _read_manifest(self) -> Dict[str, Dict]:
+        try:
+            return json.loads((self.directory / self.MANIFEST).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _write_manifest(self, manifest: Dict[str, Dict]) -> None:
+        path = self.directory / self.MANIFEST
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[WARN] No se pudo guardar el manifiesto de dimensiones: {e}")
+
+
+# Instancia compartida del proceso
+_CACHE: Optional[DimensionCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_dimension_cache() -> DimensionCache:
+    """Retorna la instancia compartida de DimensionCache."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = DimensionCache()
+        return _CACHE
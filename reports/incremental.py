@@ -0,0 +1,299 @@
+"""
+Refresco incremental de reportes por proveedor
+===============================================
+Guarda el resultado de la corrida anterior (snapshot) junto con una huella
+por proveedor y, en la corrida siguiente, recalcula solo los proveedores
+afectados y los mezcla en el snapshot antes de exportar.
+
+Un proveedor (CiaCod) se recalcula si:
+- Tiene documentos nuevos: MAX(DocFecCre) supera la marca de agua.
+- Cambió algún documento: conteo o CHECKSUM_AGG de (DocTipCod, LocCod,
+  DocSld, DocMto, DocEst, DocFecCre) distinto (cambios de saldo/estado).
+- Cambiaron sus datos maestros: CHECKSUM_AGG distinto en alguna de las
+  tablas por compañía que leen los reportes (MASTER_TABLES): CiaTab,
+  LocTab, Cid (define si la compañía es proveedor), CiaPar (SIC, tipo de
+  registro), CttTab (representante), CiaCtaTab, LID (uso de PO del sitio)
+  y TelTab (contactos). Incluye proveedores nuevos y eliminados.
+- Tiene documentos que salieron de las ventanas móviles de 1 y 2 años
+  desde la corrida anterior: DocFecCre entre DATEADD(YEAR, -n, anterior)
+  y DATEADD(YEAR, -n, ahora). Las ventanas se mueven cada día aunque no
+  cambie ningún documento.
+
+Se reconstruye completo si no hay snapshot, si cambió la query o la BD,
+si el snapshot tiene más de max_age_days, o si los afectados superan
+full_refresh_ratio (en ese caso es más barato recalcular todo).
+
+Cambios en tablas de descripción (PaiTab, DstTab, IdeTip, OriTab, etc.,
+compartidas por todos los proveedores) no se detectan; la reconstrucción
+periódica por max_age_days los recoge.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Set
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import INCREMENTAL_CONFIG, VALID_ORIGIN_CODES
+from reports.query import QueryBuilder, SqlQuery
+
+
+# Tablas maestras por compañía: (columna de la huella, tabla, alias, si
+# filtrar por orígenes válidos). CiaPar se une solo por CiaCod en los reportes
+MASTER_TABLES = [
+    ("LOC_CHECKSUM", "LocTab", "lt", True),
+    ("CID_CHECKSUM", "Cid", "b", True),
+    ("PAR_CHECKSUM", "CiaPar", "cp", False),
+    ("CTT_CHECKSUM", "CttTab", "ctt", False),
+    ("CTA_CHECKSUM", "CiaCtaTab", "cct", True),
+    ("LID_CHECKSUM", "LID", "lid", True),
+    ("TEL_CHECKSUM", "TelTab", "t", True),
+]
+
+FINGERPRINT_COLUMNS = ["DOC_COUNT", "DOC_CHECKSUM", "VENDOR_CHECKSUM"] + [
+    column for column, _, _, _ in MASTER_TABLES
+]
+
+
+def _master_checksums(valid_origins: str) -> tuple:
+    """Columnas y LEFT JOIN con el CHECKSUM_AGG por CiaCod de cada tabla maestra."""
+    columns, joins = [], []
+    for column, table, alias, by_origin in MASTER_TABLES:
+        where = f"\n    WHERE {alias}.OriCod IN {valid_origins}" if by_origin else ""
+        columns.append(f"COALESCE({alias}.{column}, 0) AS {column}")
+        joins.append(f"""LEFT JOIN (
+    SELECT {alias}.CiaCod, CHECKSUM_AGG(CHECKSUM(*)) AS {column}
+    FROM {table} {alias} WITH (NOLOCK){where}
+    GROUP BY {alias}.CiaCod
+) {alias} ON {alias}.CiaCod = v.CiaCod""")
+    return ",\n    ".join(columns), "\n".join(joins)
+
+
+def fingerprint_query() -> SqlQuery:
+    """Huella por proveedor: documentos, CiaTab y las tablas de MASTER_TABLES."""
+    q = QueryBuilder()
+    valid_origins = q.codes("VALID_ORIGINS", VALID_ORIGIN_CODES)
+    master_columns, master_joins = _master_checksums(valid_origins)
+    return q.build(f"""
+SELECT
+    v.CiaCod,
+    COALESCE(d.DOC_COUNT, 0) AS DOC_COUNT,
+    COALESCE(d.DOC_CHECKSUM, 0) AS DOC_CHECKSUM,
+    d.MAX_DOC_FEC_CRE,
+    v.VENDOR_CHECKSUM,
+    {master_columns}
+FROM (
+    SELECT ct.CiaCod, CHECKSUM_AGG(CHECKSUM(*)) AS VENDOR_CHECKSUM
+    FROM CiaTab ct WITH (NOLOCK)
+    WHERE ct.OriCod IN {valid_origins}
+    GROUP BY ct.CiaCod
+) v
+LEFT JOIN (
+    SELECT
+        dc.CiaCod,
+        COUNT_BIG(*) AS DOC_COUNT,
+        CHECKSUM_AGG(CHECKSUM(dc.DocTipCod, dc.LocCod, dc.DocSld, dc.DocMto, dc.DocEst, dc.DocFecCre)) AS DOC_CHECKSUM,
+        MAX(dc.DocFecCre) AS MAX_DOC_FEC_CRE
+    FROM DocCab dc WITH (NOLOCK)
+    WHERE dc.OriCod IN {valid_origins}
+    GROUP BY dc.CiaCod
+) d ON d.CiaCod = v.CiaCod
+{master_joins}
+""")
+
+
+def window_crossing_query(previous: datetime, now: datetime) -> SqlQuery:
+    """
+    Proveedores con documentos que salieron de las ventanas de 1 y 2 años
+    entre la corrida anterior (previous) y ahora (now).
+    """
+    q = QueryBuilder()
+    q.scalar("PREVIOUS", "DATETIME", previous)
+    q.scalar("NOW", "DATETIME", now)
+    valid_origins = q.codes("VALID_ORIGINS", VALID_ORIGIN_CODES)
+    return q.build(f"""
+SELECT DISTINCT dc.CiaCod
+FROM DocCab dc WITH (NOLOCK)
+WHERE dc.OriCod IN {valid_origins}
+  AND dc.DocEst <> '0'
+  AND (
+      (dc.DocFecCre >= DATEADD(YEAR, -1, @PREVIOUS) AND dc.DocFecCre < DATEADD(YEAR, -1, @NOW))
+      OR (dc.DocFecCre >= DATEADD(YEAR, -2, @PREVIOUS) AND dc.DocFecCre < DATEADD(YEAR, -2, @NOW))
+  )
+""")
+
+
+class IncrementalRefresh:
+    """
+    Ejecuta un reporte en modo incremental sobre su snapshot en disco.
+    
+    Archivos por reporte en INCREMENTAL_CONFIG.directory:
+    - <reporte>.arrow: resultado crudo de la última corrida
+    - <reporte>.keys.arrow: huella por proveedor
+    - <reporte>.json: estado (marca de agua, fecha del servidor, firma)
+    
+    Uso:
+        with DatabaseConnection() as db:
+            df = IncrementalRefresh(report).run(db)
+    """
+    
+    def __init__(self, report, directory: str = None):
+        """
+        Args:
+            report: Reporte con INCREMENTAL_KEY definido
+            directory: Carpeta de snapshots. Usa INCREMENTAL_CONFIG.directory.
+        """
+        self.report = report
+        self.key_column = report.INCREMENTAL_KEY
+        self.directory = Path(directory or INCREMENTAL_CONFIG.directory)
+        
+        name = report.get_report_name()
+        self._snapshot_path = self.directory / f"{name}.arrow"
+        self._keys_path = self.directory / f"{name}.keys.arrow"
+        self._state_path = self.directory / f"{name}.json"
+    
+    def run(self, db, full: bool = False) -> pd.DataFrame:
+        """
+        Retorna el resultado crudo actualizado y guarda el nuevo snapshot.
+        
+        Args:
+            db: Conexión activa
+            full: Si forzar la reconstrucción completa
+        
+        Returns:
+            DataFrame con el mismo contenido que report.fetch()
+        """
+        now = db.server_time()
+        fingerprints = self._fetch_fingerprints(db)
+        
+        state = None if full else self._load_state(db, now)
+        if state is None:
+            return self._rebuild(db, now, fingerprints)
+        
+        snapshot = pd.read_feather(self._snapshot_path)
+        affected = self._affected_codes(db, state, now, fingerprints)
+        
+        total = max(len(fingerprints), 1)
+        if len(affected) / total > INCREMENTAL_CONFIG.full_refresh_ratio:
+            print(f"  Incremental: {len(affected):,} proveedores afectados "
+                  f"({len(affected) / total:.0%}), se reconstruye completo")
+            return self._rebuild(db, now, fingerprints)
+        
+        print(f"  Incremental: {len(affected):,} de {total:,} proveedores a recalcular")
+        if affected:
+            recomputed = self.report.fetch_for_keys(db, sorted(affected), as_of=now)
+            codes = snapshot[self.key_column].astype(str).str.rstrip()
+            snapshot = pd.concat(
+                [snapshot[~codes.isin(affected)], recomputed],
+                ignore_index=True
+            )
+            snapshot = snapshot.sort_values(self.key_column, kind="stable", ignore_index=True)
+        
+        self._save(db, snapshot, fingerprints, now)
+        return snapshot
+    
+    def _rebuild(self, db, now, fingerprints: pd.DataFrame) -> pd.DataFrame:
+        """Ejecuta el reporte completo y guarda el snapshot."""
+        print("  Incremental: reconstrucción completa del snapshot")
+        df = self.report.fetch(db)
+        df = df.sort_values(self.key_column, kind="stable", ignore_index=True)
+        self._save(db, df, fingerprints, now)
+        return df
+    
+    def _fetch_fingerprints(self, db) -> pd.DataFrame:
+        query = fingerprint_query()
+        df = db.execute_query(query.text, params=query.params)
+        df["CiaCod"] = df["CiaCod"].astype(str).str.rstrip()
+        return df
+    
+    def _affected_codes(self, db, state: dict, now, fingerprints: pd.DataFrame) -> Set[str]:
+        """Proveedores a recalcular respecto al snapshot anterior."""
+        previous = pd.read_feather(self._keys_path)
+        merged = fingerprints.merge(
+            previous, on="CiaCod", how="outer", suffixes=("", "_PREV"), indicator=True
+        )
+        
+        # Altas y bajas de proveedores
+        affected = set(merged.loc[merged["_merge"] != "both", "CiaCod"])
+        
+        # Documentos o datos maestros distintos
+        both = merged[merged["_merge"] == "both"]
+        changed = pd.Series(False, index=both.index)
+        for column in FINGERPRINT_COLUMNS:
+            changed |= both[column].fillna(0) != both[f"{column}_PREV"].fillna(0)
+        
+        # Documentos nuevos desde la marca de agua
+        watermark = pd.Timestamp(state["watermark"]) if state.get("watermark") else None
+        if watermark is not None:
+            changed |= pd.to_datetime(both["MAX_DOC_FEC_CRE"]) > watermark
+        affected |= set(both.loc[changed, "CiaCod"])
+        
+        # Documentos que salieron de las ventanas de 1 y 2 años
+        previous_now = pd.Timestamp(state["run_at"]).to_pydatetime()
+        current_now = pd.Timestamp(now).to_pydatetime()
+        query = window_crossing_query(previous_now, current_now)
+        crossed = db.execute_query(query.text, params=query.params)
+        affected |= set(crossed["CiaCod"].astype(str).str.rstrip())
+        
+        return affected
+    
+    def _signature(self) -> str:
+        """Firma de la query: si cambia, el snapshot no es reutilizable."""
+        text = self.report.get_cache_text()
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def _load_state(self, db, now) -> Optional[dict]:
+        """Estado de la corrida anterior, o None si no sirve para incremental."""
+        if not (self._state_path.exists() and self._snapshot_path.exists()
+                and self._keys_path.exists()):
+            return None
+        
+        state = json.loads(self._state_path.read_text(encoding="utf-8"))
+        config = db.config
+        if (state.get("server"), state.get("database")) != (config.server, config.database):
+            return None
+        if state.get("signature") != self._signature():
+            print("  Incremental: la query cambió desde el último snapshot")
+            return None
+        if state.get("fingerprint") != FINGERPRINT_COLUMNS:
+            print("  Incremental: la huella por proveedor cambió desde el último snapshot")
+            return None
+        
+        age = pd.Timestamp(now) - pd.Timestamp(state["run_at"])
+        if age.days >= INCREMENTAL_CONFIG.max_age_days:
+            print(f"  Incremental: snapshot de hace {age.days} días")
+            return None
+        return state
+    
+    def _save(self, db, df: pd.DataFrame, fingerprints: pd.DataFrame, now) -> None:
+        """Guarda snapshot, huellas y estado (cada archivo con rename atómico)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        watermark = pd.to_datetime(fingerprints["MAX_DOC_FEC_CRE"]).max()
+        state = {
+            "report": self.report.get_report_name(),
+            "server": db.config.server,
+            "database": db.config.database,
+            "signature": self._signature(),
+            "fingerprint": FINGERPRINT_COLUMNS,
+            "run_at": pd.Timestamp(now).isoformat(),
+            "watermark": None if pd.isna(watermark) else watermark.isoformat(),
+            "rows": len(df),
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        
+        _write_feather(df, self._snapshot_path)
+        _write_feather(fingerprints, self._keys_path)
+        tmp = self._state_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp, self._state_path)
+
+
+def _write_feather(df: pd.DataFrame, path: Path) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    df.reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, path)
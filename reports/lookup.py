@@ -0,0 +1,316 @@
+"""
+Búsqueda puntual de proveedores
+================================
+Perfil de uno o pocos proveedores (filas de cabecera y de sitios) sin
+generar los reportes completos: ejecuta SupplierHeaderReport y
+SupplierSiteReport restringidos a los códigos pedidos (mismo SQL y mismas
+métricas, con el filtro de reports/sample.py en el conjunto base), así
+que los números coinciden con los del Excel.
+
+- Caché en memoria (LRU con TTL, LOOKUP_CONFIG): un perfil se reutiliza
+  durante ttl_seconds; los proveedores sin filas también se guardan.
+- Agrupación: las búsquedas concurrentes que llegan dentro de
+  batch_window_ms se resuelven juntas, con una query por reporte para
+  todos los códigos faltantes (hasta max_batch por query).
+
+La caché vive en el proceso: en el daemon (GET /vendors) se aprovecha
+entre pedidos; en el CLI (main.py lookup) cada corrida parte vacía.
+
+Uso:
+    lookup = VendorLookup()
+    profiles = lookup.lookup(["100234", "100871"])
+    profiles["100234"].header     # DataFrame (una fila por origen)
+    profiles["100234"].sites      # DataFrame (una fila por sitio)
+    lookup.lookup(["900123456"], by="num")   # por CiaIdeNum
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import LOOKUP_CONFIG
+from reports.sample import VendorSubset
+from reports.suppliers.header import SupplierHeaderReport
+from reports.suppliers.site import SupplierSiteReport
+
+
+# Tipo de código -> columna del reporte que lo contiene
+LOOKUP_KEYS = {
+    "id": "VENDOR_ID (M)",  # ct.CiaCod
+    "num": "VENDOR_NUM (M)",  # ct.CiaIdeNum
+}
+
+
+@dataclass
+class VendorProfile:
+    """Filas de cabecera y sitios de un proveedor."""
+    key: str
+    by: str
+    header: pd.DataFrame
+    sites: pd.DataFrame
+    fetched_at: float = field(default_factory=time.time)
+    
+    @property
+    def found(self) -> bool:
+        return not self.header.empty or not self.sites.empty
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Perfil serializable a JSON (fechas en ISO, nulos como None)."""
+        def records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+            return [
+                {column: _json_value(value) for column, value in row.items()}
+                for row in df.to_dict(orient="records")
+            ]
+        
+        return {
+            "key": self.key,
+            "by": self.by,
+            "found": self.found,
+            "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.fetched_at)),
+            "header": records(self.header),
+            "sites": records(self.sites),
+        }
+
+
+def _json_value(value: Any) -> Any:
+    if value is None or (not isinstance(value, (list, tuple)) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):  # Escalares numpy
+        return value.item()
+    return value
+
+
+class _Batch:
+    """Códigos pendientes que se resuelven en una misma query."""
+    
+    def __init__(self, by: str):
+        self.by = by
+        self.keys: List[str] = []
+        self.done = threading.Event()
+        self.profiles: Dict[str, VendorProfile] = {}
+        self.error: Optional[BaseException] = None
+
+
+class VendorLookup:
+    """
+    Perfiles de proveedor con caché LRU/TTL en memoria.
+    
+    Thread-safe: pensada para compartirse entre los threads del daemon.
+    """
+    
+    def __init__(
+        self,
+        config=None,
+        header_class=SupplierHeaderReport,
+        site_class=SupplierSiteReport
+    ):
+        """
+        Args:
+            config: LookupConfig (default: LOOKUP_CONFIG)
+            header_class, site_class: Reportes que calculan el perfil
+        """
+        self.config = config or LOOKUP_CONFIG
+        self.header_class = header_class
+        self.site_class = site_class
+        
+        self._cache: "OrderedDict[Tuple[str, str], VendorProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Lote abierto por tipo de código (recibe búsquedas hasta que se ejecuta)
+        self._open: Dict[str, _Batch] = {}
+        # Lote de cada código pendiente, abierto o en ejecución
+        self._pending: Dict[Tuple[str, str], _Batch] = {}
+        self._stats = {"hits": 0, "misses": 0, "batches": 0, "evictions": 0}
+    
+    def get(self, key: str, by: str = "id") -> VendorProfile:
+        """Perfil de un proveedor."""
+        return self.lookup([key], by)[str(key).strip()]
+    
+    def lookup(self, keys: Iterable[str], by: str = "id") -> Dict[str, VendorProfile]:
+        """
+        Perfiles de varios proveedores en el orden pedido.
+        
+        Args:
+            keys: Códigos de proveedor
+            by: 'id' (CiaCod) o 'num' (CiaIdeNum)
+        
+        Returns:
+            Dict código -> VendorProfile (found=False si no tiene filas)
+        
+        Raises:
+            ValueError: Si `by` no es válido o no hay códigos
+        """
+        if by not in LOOKUP_KEYS:
+            raise ValueError(f"Tipo de código '{by}' no soportado. Opciones: {', '.join(LOOKUP_KEYS)}")
+        keys = list(dict.fromkeys(str(key).strip() for key in keys if str(key).strip()))
+        if not keys:
+            raise ValueError("No se indicó ningún código de proveedor")
+        
+        profiles, missing = {}, []
+        with self._lock:
+            for key in keys:
+                profile = self._cache_get((by, key))
+                if profile is None:
+                    missing.append(key)
+                else:
+                    profiles[key] = profile
+        
+        for batch in self._join_batches(missing, by):
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            profiles.update({key: batch.profiles[key] for key in missing if key in batch.profiles})
+        
+        return {key: profiles[key] for key in keys}
+    
+    def invalidate(self, keys: Iterable[str] = None, by: str = "id") -> int:
+        """Descarta perfiles de la caché (todos si keys es None). Retorna cuántos."""
+        with self._lock:
+            if keys is None:
+                count = len(self._cache)
+                self._cache.clear()
+                return count
+            count = 0
+            for key in keys:
+                if self._cache.pop((by, str(key).strip()), None) is not None:
+                    count += 1
+            return count
+    
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos, lotes ejecutados y tamaño de la caché."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._cache), "max_entries": self.config.max_entries}
+    
+    # ============================================
+    # CACHÉ
+    # ============================================
+    def _cache_get(self, cache_key: Tuple[str, str]) -> Optional[VendorProfile]:
+        """Perfil vigente de la caché (llamar con el lock tomado)."""
+        profile = self._cache.get(cache_key)
+        if profile is not None and time.time() - profile.fetched_at > self.config.ttl_seconds:
+            del self._cache[cache_key]
+            profile = None
+        if profile is None:
+            self._stats["misses"] += 1
+            return None
+        self._cache.move_to_end(cache_key)
+        self._stats["hits"] += 1
+        return profile
+    
+    def _cache_put(self, profiles: Iterable[VendorProfile]) -> None:
+        with self._lock:
+            for profile in profiles:
+                self._cache[(profile.by, profile.key)] = profile
+                self._cache.move_to_end((profile.by, profile.key))
+            while len(self._cache) > self.config.max_entries:
+                self._cache.popitem(last=False)
+                self._stats["evictions"] += 1
+    
+    # ============================================
+    # AGRUPACIÓN DE BÚSQUEDAS
+    # ============================================
+    def _join_batches(self, keys: List[str], by: str) -> List[_Batch]:
+        """
+        Agrega los códigos al lote abierto (o abre uno). El thread que abre
+        un lote espera batch_window_ms a que se sumen otras búsquedas y lo
+        ejecuta; los demás esperan su resultado. Un código que ya está en
+        un lote (abierto o en ejecución) no se vuelve a consultar.
+        """
+        batches, leading = [], []
+        with self._lock:
+            for key in keys:
+                batch = self._pending.get((by, key))
+                if batch is None:
+                    batch = self._open.get(by)
+                    if batch is None or len(batch.keys) >= self.config.max_batch:
+                        batch = _Batch(by)
+                        self._open[by] = batch
+                        leading.append(batch)
+                    batch.keys.append(key)
+                    self._pending[(by, key)] = batch
+                if batch not in batches:
+                    batches.append(batch)
+        
+        if leading and self.config.batch_window_ms > 0:
+            time.sleep(self.config.batch_window_ms / 1000)
+        for batch in leading:
+            with self._lock:
+                if self._open.get(by) is batch:
+                    del self._open[by]
+            self._execute(batch)
+        return batches
+    
+    def _execute(self, batch: _Batch) -> None:
+        try:
+            profiles = self._fetch(batch.keys, batch.by)
+            self._cache_put(profiles.values())
+            batch.profiles = profiles
+            with self._lock:
+                self._stats["batches"] += 1
+        except BaseException as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                for key in batch.keys:
+                    self._pending.pop((batch.by, key), None)
+            batch.done.set()
+    
+    # ============================================
+    # CONSULTA
+    # ============================================
+    def _fetch(self, keys: List[str], by: str) -> Dict[str, VendorProfile]:
+        """Ejecuta ambos reportes (en paralelo) restringidos a los códigos."""
+        subset = VendorSubset(vendors=tuple(keys)) if by == "id" else VendorSubset(tax_ids=tuple(keys))
+        reports = []
+        for report_class in (self.header_class, self.site_class):
+            report = report_class(cache="off")
+            report.subset = subset
+            reports.append(report)
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(reports)) as executor:
+            futures = [executor.submit(report.execute, expand=False) for report in reports]
+            header, sites = (future.result() for future in futures)
+        print(f"  Búsqueda de {len(keys):,} proveedores: {len(header):,} cabeceras, "
+              f"{len(sites):,} sitios en {time.perf_counter() - start:.2f}s")
+        
+        column = LOOKUP_KEYS[by]
+        header_keys = header[column].astype(str).str.strip()
+        site_keys = sites[column].astype(str).str.strip()
+        fetched_at = time.time()
+        return {
+            key: VendorProfile(
+                key=key,
+                by=by,
+                header=header[header_keys == key].reset_index(drop=True),
+                sites=sites[site_keys == key].reset_index(drop=True),
+                fetched_at=fetched_at
+            )
+            for key in keys
+        }
+
+
+# Instancia compartida del proceso (daemon y CLI)
+_LOOKUP: Optional[VendorLookup] = None
+_LOOKUP_LOCK = threading.Lock()
+
+
+def get_lookup() -> VendorLookup:
+    """Retorna la instancia compartida de VendorLookup."""
+    global _LOOKUP
+    with _LOOKUP_LOCK:
+        if _LOOKUP is None:
+            _LOOKUP = VendorLookup()
+        return _LOOKUP
+
+
+def lookup_vendors(keys: Iterable[str], by: str = "id") -> Dict[str, VendorProfile]:
+    """Atajo: perfiles de proveedores con la instancia compartida."""
+    return get_lookup().lookup(keys, by)
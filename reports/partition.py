@@ -0,0 +1,231 @@
+"""
+Ejecución particionada por rangos de proveedor
+===============================================
+Divide el conjunto de proveedores (CiaTab) de un reporte en N particiones,
+ejecuta la query de cada una en paralelo con su propia conexión y mezcla
+los resultados (k-way merge) en el orden de la columna clave, de modo que
+el resultado es el mismo que el de la query sin particionar.
+
+Estrategias (PARTITION_CONFIG.strategy):
+- range: rangos de ct.CiaCod con límites tomados de un histograma
+  (NTILE sobre CiaTab de los orígenes válidos). Las particiones no se
+  solapan y quedan balanceadas por número de proveedores.
+- origin: los códigos de VALID_ORIGIN_CODES repartidos entre las
+  particiones. Las particiones se solapan en CiaCod y la mezcla las
+  intercala.
+
+La mezcla compara con el orden de Python; coincide con el ORDER BY del
+servidor para códigos alfanuméricos en mayúsculas como los de CiaCod.
+"""
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import VALID_ORIGIN_CODES
+from reports.query import QueryBuilder, SqlQuery
+
+
+PARTITION_STRATEGIES: tuple = ("range", "origin")
+
+
+# ============================================
+# DEFINICIÓN DE PARTICIONES
+# ============================================
+@dataclass(frozen=True)
+class Partition:
+    """Subconjunto de proveedores: orígenes y/o rango [low, high) de CiaCod."""
+    number: int
+    origins: Tuple[str, ...] = ()
+    low: Optional[str] = None
+    high: Optional[str] = None
+    
+    def condition(self, q: QueryBuilder, key_column: str = "ct.CiaCod") -> str:
+        """
+        Condiciones adicionales del WHERE para la partición. El origen se
+        filtra en la columna OriCod del mismo alias que key_column.
+        """
+        alias = key_column.rsplit(".", 1)[0]
+        conditions = []
+        if self.origins:
+            conditions.append(f"{alias}.OriCod IN {q.codes('PARTITION_ORIGINS', self.origins)}")
+        if self.low is not None:
+            conditions.append(f"{key_column} >= {q.scalar('PARTITION_LOW', 'VARCHAR(50)', self.low)}")
+        if self.high is not None:
+            conditions.append(f"{key_column} < {q.scalar('PARTITION_HIGH', 'VARCHAR(50)', self.high)}")
+        return "".join(f"\n  AND {condition}" for condition in conditions)
+    
+    def describe(self) -> str:
+        """Descripción corta para los mensajes de avance."""
+        if self.origins:
+            return f"orígenes {', '.join(self.origins)}"
+        return f"CiaCod [{self.low or '-'}, {self.high or '-'})"
+
+
+def range_boundaries_query(partitions: int) -> SqlQuery:
+    """Primer CiaCod de cada tramo de un NTILE sobre CiaTab (orígenes válidos)."""
+    q = QueryBuilder()
+    tiles = q.scalar("PARTITIONS", "INT", partitions)
+    valid_origins = q.codes("VALID_ORIGINS", VALID_ORIGIN_CODES)
+    return q.build(f"""
+SELECT MIN(t.CiaCod) AS BOUNDARY
+FROM (
+    SELECT ct.CiaCod, NTILE({tiles}) OVER (ORDER BY ct.CiaCod) AS TILE
+    FROM CiaTab ct WITH (NOLOCK)
+    WHERE ct.OriCod IN {valid_origins}
+      AND ct.CiaEst = '1'
+) t
+GROUP BY t.TILE
+ORDER BY t.TILE;
+""")
+
+
+def range_partitions(boundaries: Sequence[str]) -> List[Partition]:
+    """
+    Particiones [None, b1), [b1, b2), ..., [bk, None) a partir del primer
+    código de cada tramo. El primer tramo no necesita límite inferior.
+    """
+    bounds = sorted(set(boundaries[1:]))
+    lows = [None] + bounds
+    highs = bounds + [None]
+    return [
+        Partition(number, low=low, high=high)
+        for number, (low, high) in enumerate(zip(lows, highs), 1)
+    ]
+
+
+def origin_partitions(partitions: int, origins: Sequence[str] = VALID_ORIGIN_CODES) -> List[Partition]:
+    """Reparte los orígenes entre las particiones (round-robin)."""
+    count = max(1, min(partitions, len(origins)))
+    groups = [tuple(origins[start::count]) for start in range(count)]
+    return [Partition(number, origins=group) for number, group in enumerate(groups, 1)]
+
+
+# ============================================
+# MEZCLA ORDENADA
+# ============================================
+def merge_sorted_chunks(
+    streams: List[Iterator[pd.DataFrame]],
+    key: str
+) -> Iterator[pd.DataFrame]:
+    """
+    K-way merge de flujos de chunks ordenados por `key`.
+    
+    En cada paso se emiten todas las filas con clave <= la menor de las
+    últimas claves en buffer de los flujos no terminados: ninguna fila
+    posterior de esos flujos puede ser menor. La memoria queda acotada por
+    un chunk por flujo.
+    
+    Args:
+        streams: Iteradores de DataFrames, cada uno ordenado por key
+        key: Columna de orden
+    
+    Yields:
+        DataFrames ordenados por key
+    """
+    buffers: List[Optional[pd.DataFrame]] = [None] * len(streams)
+    finished = [False] * len(streams)
+    
+    while True:
+        # Rellenar los buffers vacíos de los flujos no terminados
+        for i, stream in enumerate(streams):
+            while not finished[i] and (buffers[i] is None or buffers[i].empty):
+                try:
+                    buffers[i] = next(stream)
+                except StopIteration:
+                    finished[i] = True
+        
+        pending = [i for i, buffer in enumerate(buffers) if buffer is not None and not buffer.empty]
+        if not pending:
+            return
+        
+        open_streams = [i for i in pending if not finished[i]]
+        bound = min(buffers[i][key].iloc[-1] for i in open_streams) if open_streams else None
+        
+        parts = []
+        for i in pending:
+            buffer = buffers[i]
+            cut = len(buffer) if bound is None else int(buffer[key].searchsorted(bound, side="right"))
+            if cut:
+                parts.append(buffer.iloc[:cut])
+                buffers[i] = buffer.iloc[cut:]
+        
+        if len(parts) == 1:
+            yield parts[0].reset_index(drop=True)
+        else:
+            merged = pd.concat(parts, ignore_index=True)
+            yield merged.sort_values(key, kind="stable", ignore_index=True)
+
+
+# ============================================
+# LECTURA CONCURRENTE
+# ============================================
+# Marca de fin de una partición en su cola
+_END = object()
+
+
+class PartitionReader:
+    """
+    Lee una partición en un thread y entrega sus chunks por una cola
+    acotada (el thread espera si la mezcla va más lenta).
+    """
+    
+    def __init__(self, target, max_chunks: int = 2):
+        """
+        Args:
+            target: Función sin argumentos que retorna un iterador de
+                    DataFrames (se ejecuta en el thread)
+            max_chunks: Chunks en espera por partición
+        """
+        self._target = target
+        self._queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+    
+    def start(self) -> "PartitionReader":
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Pide al thread que deje de leer y espera a que termine."""
+        self._stop.set()
+        self._thread.join()
+    
+    def _read(self) -> None:
+        chunks = None
+        try:
+            chunks = self._target()
+            for chunk in chunks:
+                if not self._put(chunk):
+                    return
+            self._put(_END)
+        except BaseException as e:
+            self._put(e)
+        finally:
+            # Cerrar el generador libera su cursor y su conexión
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+    
+    def _put(self, item) -> bool:
+        """Encola item salvo que se haya pedido detener la lectura."""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
@@ -0,0 +1,142 @@
+"""
+Queries parametrizadas
+=======================
+Arma queries cuyo texto no cambia entre corridas para que SQL Server
+reutilice el plan en caché: las constantes (tasa CHF, límites de las
+ventanas de 1 y 2 años, listas de códigos) se envían como parámetros ?
+en vez de insertarse en el texto.
+
+Cada valor se declara una sola vez al inicio del batch:
+- Escalares: DECLARE @NOMBRE TIPO = ?;
+- Listas de códigos: variable de tabla cargada con INSERT ... VALUES (?),
+  usada como IN (SELECT Cod FROM @NOMBRE). La conversión a VARCHAR se hace
+  al insertar, no en cada comparación contra la columna.
+
+Uso:
+    q = QueryBuilder()
+    body = f"SELECT ... WHERE dc.DocTipCod IN {q.codes('INVOICE_DEBIT', codes)}"
+    query = q.build(body)
+    df = db.execute_query(query.text, params=query.params)
+"""
+import datetime
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+
+# SQL Server acepta hasta 1000 filas por INSERT ... VALUES
+MAX_VALUES_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class SqlQuery:
+    """Texto de la query y sus parámetros en orden de aparición."""
+    text: str
+    params: Tuple[Any, ...] = ()
+    
+    @classmethod
+    def of(cls, query: Union[str, "SqlQuery"]) -> "SqlQuery":
+        """Convierte un string sin parámetros a SqlQuery."""
+        return cls(query) if isinstance(query, str) else query
+    
+    def with_limit(self, limit: int = None) -> "SqlQuery":
+        """
+        Retorna la query con TOP n en el primer SELECT fuera de paréntesis
+        (el de la query final, no el de una CTE o subquery).
+        """
+        if not limit:
+            return self
+        position = _outer_select_end(self.text)
+        if position is None:
+            return self
+        return SqlQuery(f"{self.text[:position]} TOP {limit}{self.text[position:]}", self.params)
+    
+    def signature(self) -> str:
+        """
+        Texto que identifica el resultado: query y parámetros, sin las
+        fechas (cambian en cada corrida; la caché ya distingue por día).
+        """
+        params = [p for p in self.params if not isinstance(p, datetime.datetime)]
+        return f"{self.text}\n-- params: {params!r}"
+
+
+# SELECT (y DISTINCT, que debe ir antes de TOP)
+_SELECT = re.compile(r"\bSELECT(\s+DISTINCT)?\b", re.IGNORECASE)
+
+
+def _outer_select_end(text: str) -> Optional[int]:
+    """Posición tras el primer SELECT [DISTINCT] de nivel 0, o None."""
+    depth = 0
+    scanned = 0
+    for match in _SELECT.finditer(text):
+        segment = text[scanned:match.start()]
+        depth += segment.count("(") - segment.count(")")
+        scanned = match.start()
+        if depth == 0:
+            return match.end()
+    return None
+
+
+class QueryBuilder:
+    """
+    Acumula las declaraciones de parámetros de una query.
+    
+    Los métodos retornan el texto a usar en el cuerpo (@NOMBRE o la
+    subquery de la variable de tabla); build() antepone las declaraciones.
+    Declarar dos veces el mismo nombre reutiliza la primera declaración.
+    """
+    
+    def __init__(self):
+        self._declarations: List[str] = []
+        self._params: List[Any] = []
+        self._references: Dict[str, str] = {}
+    
+    def scalar(self, name: str, sql_type: str, value: Any) -> str:
+        """
+        Declara un parámetro escalar.
+        
+        Args:
+            name: Nombre de la variable (sin @)
+            sql_type: Tipo SQL (ej: 'DECIMAL(18,9)', 'DATETIME')
+            value: Valor a enviar
+        
+        Returns:
+            '@NOMBRE'
+        """
+        if name not in self._references:
+            self._declarations.append(f"DECLARE @{name} {sql_type} = ?;")
+            self._params.append(value)
+            self._references[name] = f"@{name}"
+        return self._references[name]
+    
+    def codes(self, name: str, values: Sequence[str], sql_type: str = "VARCHAR(50)") -> str:
+        """
+        Declara una lista de códigos como variable de tabla.
+        
+        Args:
+            name: Nombre de la variable (sin @)
+            values: Códigos (los duplicados se descartan)
+            sql_type: Tipo de la columna Cod
+        
+        Returns:
+            '(SELECT Cod FROM @NOMBRE)', para usar con IN / NOT IN
+        """
+        if name not in self._references:
+            unique = list(dict.fromkeys(values))
+            self._declarations.append(f"DECLARE @{name} TABLE (Cod {sql_type} PRIMARY KEY);")
+            for start in range(0, len(unique), MAX_VALUES_ROWS):
+                batch = unique[start:start + MAX_VALUES_ROWS]
+                rows = ", ".join("(?)" for _ in batch)
+                self._declarations.append(f"INSERT INTO @{name} (Cod) VALUES {rows};")
+                self._params.extend(batch)
+            self._references[name] = f"(SELECT Cod FROM @{name})"
+        return self._references[name]
+    
+    def build(self, body: str) -> SqlQuery:
+        """
+        Retorna la query completa. El cuerpo no debe contener parámetros ?
+        propios (todos los valores pasan por las declaraciones).
+        """
+        # NOCOUNT: los INSERT no generan result sets de conteo
+        preamble = "\n".join(["SET NOCOUNT ON;"] + self._declarations)
+        return SqlQuery(f"{preamble}\n{body}", tuple(self._params))
@@ -0,0 +1,83 @@
+"""
+Registro de reportes disponibles
+=================================
+Metadatos de cada reporte (nombre, módulo y clase que lo implementa, hoja
+y descripción) declarados sin importar la implementación: listar los
+reportes o mostrar la ayuda del CLI no carga pandas, pyodbc ni xlsxwriter.
+El módulo del reporte se importa al usarlo (load()).
+
+Para agregar un reporte:
+    register("supplier_contact", "reports.suppliers.contact",
+             "SupplierContactReport", "Contactos por proveedor")
+"""
+import importlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+
+if TYPE_CHECKING:
+    from reports.base import BaseReport
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """Metadatos de un reporte; la clase se importa con load()."""
+    name: str
+    module: str
+    class_name: str
+    description: str = ""
+    sheet_name: Optional[str] = None  # Default: el nombre en formato título
+    
+    @property
+    def title(self) -> str:
+        """Nombre de la hoja del reporte (el de get_sheet_name() por defecto)."""
+        return self.sheet_name or self.name.replace("_", " ").title()
+    
+    def load(self) -> Type["BaseReport"]:
+        """Importa el módulo del reporte y retorna su clase."""
+        module = importlib.import_module(self.module)
+        return getattr(module, self.class_name)
+
+
+REPORTS: Dict[str, ReportSpec] = {}
+
+
+def register(
+    name: str,
+    module: str,
+    class_name: str,
+    description: str = "",
+    sheet_name: str = None
+) -> ReportSpec:
+    """Registra un reporte (reemplaza uno anterior con el mismo nombre)."""
+    spec = ReportSpec(name, module, class_name, description, sheet_name)
+    REPORTS[name] = spec
+    return spec
+
+
+def report_names() -> List[str]:
+    """Nombres de los reportes en orden de registro."""
+    return list(REPORTS)
+
+
+def load_report(name: str) -> Type["BaseReport"]:
+    """
+    Clase del reporte `name`, importando su módulo.
+    
+    Raises:
+        KeyError: Si el reporte no está registrado
+    """
+    return REPORTS[name].load()
+
+
+# ============================================
+# REPORTES DISPONIBLES
+# ============================================
+register("supplier_header", "reports.suppliers.header", "SupplierHeaderReport",
+         "Proveedores a nivel de cabecera con métricas de transacciones y OC")
+register("supplier_site", "reports.suppliers.site", "SupplierSiteReport",
+         "Sitios de proveedor con contacto y métricas por ubicación")
+register("customer_header", "reports.customers.header", "CustomerHeaderReport",
+         "Clientes por CiaIdeNum con modelo de negocio y métricas")
+register("customer_site", "reports.customers.site", "CustomerSiteReport",
+         "Sitios de cliente con métricas por ubicación")
+# Futuros reportes - agregar aquí
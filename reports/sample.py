@@ -0,0 +1,162 @@
+"""
+Muestreo de proveedores para iteraciones de desarrollo
+=======================================================
+Restringe el conjunto de proveedores (CiaTab) que recorre un reporte
+antes de las agregaciones sobre DocCab, de modo que una corrida de prueba
+lee solo los documentos de esos proveedores:
+
+- vendors: lista explícita de CiaCod (--vendors, códigos o archivo)
+- tax_ids: lista de CiaIdeNum (NIT), para búsquedas por número fiscal
+- fraction: muestra determinística por hash del CiaCod (--sample 1%): la
+  misma fracción elige siempre los mismos proveedores, y una fracción
+  mayor incluye a los de una menor
+- limit: los primeros N proveedores del conjunto base en orden de
+  CiaCod (--limit). El reporte retorna a lo sumo N filas, todas
+  correctas: son las de esos proveedores, con sus métricas completas.
+
+Las condiciones se agregan en el WHERE del conjunto base (y de las tablas
+de preparación que lo filtran) a través de BaseReport._key_filter().
+"""
+import textwrap
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import sys
+sys.path.insert(0, '..')
+from reports.query import QueryBuilder
+
+
+# Resolución de la muestra por hash: buckets de 1/10000 (0.01%)
+SAMPLE_BUCKETS = 10000
+
+
+@dataclass(frozen=True)
+class VendorSubset:
+    """Subconjunto de proveedores: códigos, fracción por hash y/o primeros N."""
+    vendors: Optional[Tuple[str, ...]] = None
+    fraction: Optional[float] = None
+    limit: Optional[int] = None
+    tax_ids: Optional[Tuple[str, ...]] = None
+    
+    def __post_init__(self):
+        if self.fraction is not None and not 0 < self.fraction <= 1:
+            raise ValueError(f"Fracción de muestra fuera de rango: {self.fraction} (debe ser 0-100%)")
+        if self.limit is not None and self.limit <= 0:
+            raise ValueError(f"Límite de proveedores inválido: {self.limit}")
+    
+    def condition(self, q: QueryBuilder, key_column: str = "ct.CiaCod", driving: str = None) -> str:
+        """
+        Condiciones adicionales del WHERE para el subconjunto.
+        
+        Args:
+            q: QueryBuilder de la query
+            key_column: Columna con el CiaCod a filtrar
+            driving: FROM/WHERE del conjunto base del reporte (alias ct),
+                     necesario para el límite. Sin él el límite no se
+                     aplica aquí (queda el TOP de la query final).
+        """
+        if self.limit and driving:
+            # Los filtros por código se aplican dentro del conjunto base,
+            # antes de tomar los primeros N
+            limit = q.scalar("VENDOR_LIMIT", "INT", self.limit)
+            base = driving.strip() + "".join(
+                f"\n  AND {condition}" for condition in self._code_conditions(q, "ct.CiaCod")
+            )
+            conditions = [
+                f"{key_column} IN (\n"
+                f"    SELECT DISTINCT TOP ({limit}) ct.CiaCod\n"
+                f"{textwrap.indent(base, '    ')}\n"
+                f"    ORDER BY ct.CiaCod\n"
+                f"  )"
+            ]
+        else:
+            conditions = self._code_conditions(q, key_column)
+        return "".join(f"\n  AND {condition}" for condition in conditions)
+    
+    def _code_conditions(self, q: QueryBuilder, key_column: str) -> List[str]:
+        conditions = []
+        if self.vendors is not None:
+            conditions.append(f"{key_column} IN {q.codes('VENDOR_FILTER', self.vendors)}")
+        if self.tax_ids is not None:
+            tax_ids = q.codes("VENDOR_TAX_IDS", self.tax_ids)
+            conditions.append(
+                f"{key_column} IN (SELECT tx.CiaCod FROM CiaTab tx WITH (NOLOCK) "
+                f"WHERE tx.CiaIdeNum IN {tax_ids})"
+            )
+        if self.fraction is not None:
+            buckets = q.scalar("SAMPLE_BUCKETS", "INT", max(1, round(self.fraction * SAMPLE_BUCKETS)))
+            conditions.append(f"{hash_bucket_sql(key_column)} < {buckets}")
+        return conditions
+    
+    def describe(self) -> str:
+        """Descripción corta para los mensajes de avance."""
+        parts = []
+        if self.vendors is not None:
+            parts.append(f"{len(self.vendors):,} proveedores indicados")
+        if self.tax_ids is not None:
+            parts.append(f"{len(self.tax_ids):,} NIT indicados")
+        if self.fraction is not None:
+            parts.append(f"muestra {self.fraction:.2%}")
+        if self.limit:
+            parts.append(f"primeros {self.limit:,} proveedores")
+        return ", ".join(parts)
+
+
+# ============================================
+# MUESTRA POR HASH
+# ============================================
+def hash_bucket_sql(column: str) -> str:
+    """
+    Bucket 0..SAMPLE_BUCKETS-1 del código: primeros 4 bytes del MD5 como
+    entero sin signo. No depende de la collation del servidor.
+    """
+    return (
+        f"CAST(CAST(HASHBYTES('MD5', CAST({column} AS VARCHAR(50))) AS BINARY(4)) AS BIGINT)"
+        f" % {SAMPLE_BUCKETS}"
+    )
+
+
+def parse_fraction(text: str) -> float:
+    """
+    Fracción de muestra: '1%' -> 0.01, '0.5%' -> 0.005. Sin '%' se
+    interpreta como fracción (0.01) si es <= 1.
+    
+    Raises:
+        ValueError: Si el texto no es un porcentaje válido
+    """
+    value = str(text).strip()
+    try:
+        if value.endswith("%"):
+            fraction = float(value[:-1]) / 100
+        else:
+            fraction = float(value)
+    except ValueError:
+        raise ValueError(f"Muestra inválida: '{text}' (ej: 1%, 0.5%)") from None
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Muestra fuera de rango: '{text}' (debe ser 0-100%)")
+    return fraction
+
+
+def read_vendor_codes(values: Iterable[str]) -> List[str]:
+    """
+    Códigos de proveedor desde argumentos del CLI. Cada valor puede ser un
+    código, una lista separada por comas o la ruta de un archivo con un
+    código por línea (o separados por coma; se ignoran líneas vacías y
+    comentarios #).
+    
+    Raises:
+        ValueError: Si no queda ningún código
+    """
+    codes = []
+    for value in values:
+        path = Path(value)
+        if path.is_file():
+            lines = path.read_text(encoding="utf-8").splitlines()
+            items = [item for line in lines for item in line.split("#", 1)[0].split(",")]
+        else:
+            items = value.split(",")
+        codes.extend(item.strip() for item in items if item.strip())
+    if not codes:
+        raise ValueError("No se indicó ningún código de proveedor")
+    return list(dict.fromkeys(codes))
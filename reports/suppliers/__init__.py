@@ -1,3 +1,14 @@
 # Suppliers reports module
-from .header import SupplierHeaderReport
-from .site import SupplierSiteReport
+import importlib
+
+# Clases exportadas: {clase: submódulo}, importadas al usarse
+_LAZY = {
+    "SupplierHeaderReport": ".header",
+    "SupplierSiteReport": ".site",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
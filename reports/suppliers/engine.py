@@ -0,0 +1,350 @@
+"""
+Motor de agregación de DocCab en pandas
+========================================
+Calcula las métricas de transacciones de proveedores a partir de una
+única lectura de DocCab, usando group-bys vectorizados en lugar de los
+OUTER APPLY / EXISTS correlacionados del query SQL.
+
+Las reglas replican exactamente las de los queries de supplier header y
+supplier site:
+- Ventanas móviles 1Y/2Y equivalentes a DATEADD(YEAR, -n, GETDATE())
+- Montos en CHF calculados en aritmética decimal exacta
+- Etiqueta TRX_SOURCE_TAG y filtros de prioridad (PRIORIDAD 1/2/3)
+
+Las métricas se agregan por locación una vez por corrida (ver
+reports/suppliers/locations.py) y se vuelven a agregar por proveedor.
+"""
+from dataclasses import dataclass
+from decimal import Decimal, localcontext
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.insert(0, '../..')
+from config.settings import CHF_RATE, DOC_AMOUNT_SCALE, DOC_TYPES
+
+
+# Llave de agregación a nivel de proveedor
+VENDOR_KEYS: List[str] = ["OriCod", "CiaCod"]
+
+# Llave de una locación de proveedor
+LOCATION_KEYS: List[str] = ["OriCod", "CiaCod", "LocCod"]
+
+# Tipos de documento que hay que leer de DocCab para cubrir todas las métricas
+REQUIRED_DOC_TYPES: tuple = tuple(sorted(set(
+    DOC_TYPES.all_transactional
+    + DOC_TYPES.invoice_debit
+    + DOC_TYPES.credit_notes
+    + DOC_TYPES.purchase_orders
+    + DOC_TYPES.agreements
+    + DOC_TYPES.excluded
+    + DOC_TYPES.recent_activity
+)))
+
+# Métricas de montos (en unidades enteras) que se convierten a CHF al final
+AMOUNT_METRICS = {
+    "TRX_1Y_AMOUNT_CHF": "TRX_1Y_UNITS",
+    "TRX_2Y_AMOUNT_CHF": "TRX_2Y_UNITS",
+    "TRX_OP_BAL_CHF": "TRX_OP_BAL_UNITS",
+}
+
+# Métricas que el SQL envuelve en COALESCE(..., 0)
+COUNT_METRICS: List[str] = [
+    "TRX_1Y_COUNT", "TRX_2Y_COUNT", "TRX_OP_COUNT",
+    "PO_1Y_OP_COUNT", "PO_2Y_OP_COUNT", "PO_OP_COUNT", "PO_Agreement_COUNT",
+    "DOC_COUNT_2Y",
+]
+
+# Banderas de existencia (EXISTS en el SQL)
+FLAG_METRICS: List[str] = [
+    "HAS_TRX", "HAS_INV_1Y", "HAS_INV_2Y", "HAS_INV_OP_OLD", "HAS_PO_2Y",
+    "HAS_RECENT_2Y", "HAS_EXCLUDED",
+]
+
+# Agregación de cada métrica. Sirve tanto sobre DocCab como para volver a
+# agregar métricas ya agregadas (ej: de locación a proveedor): suma de
+# sumas, mínimo de mínimos, máximo de máximos y OR de banderas
+METRIC_AGGREGATIONS: Dict[str, str] = {
+    **{column: "sum" for column in AMOUNT_METRICS.values()},
+    **{column: "sum" for column in COUNT_METRICS},
+    **{column: "max" for column in FLAG_METRICS},
+    "MIN_TRX_DATE": "min",
+    "MAX_TRX_DATE": "max",
+    "MIN_PO_DATE": "min",
+    "MAX_PO_DATE": "max",
+}
+
+
+@dataclass(frozen=True)
+class DateBounds:
+    """Límites de las ventanas móviles de 1 y 2 años."""
+    one_year: pd.Timestamp
+    two_years: pd.Timestamp
+
+    @classmethod
+    def from_reference(cls, now) -> "DateBounds":
+        """
+        Calcula los límites a partir de la fecha de referencia.
+        DateOffset replica DATEADD(YEAR, ...) incluso para el 29 de febrero.
+        """
+        now = pd.Timestamp(now)
+        return cls(
+            one_year=now - pd.DateOffset(years=1),
+            two_years=now - pd.DateOffset(years=2),
+        )
+
+
+def normalize_keys(df: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """
+    Llaves comparables como en SQL Server: sin espacios finales (los ignora
+    al comparar columnas CHAR) ni mayúsculas (collation CI del ERP), igual
+    que dimensions.normalize_codes. Las columnas de llave son internas; las
+    del reporte conservan el valor original.
+    """
+    df = df.copy()
+    for key in keys:
+        df[key] = df[key].astype(str).str.rstrip().str.casefold()
+    return df
+
+
+def to_units(values: pd.Series, scale: int = DOC_AMOUNT_SCALE) -> np.ndarray:
+    """
+    Convierte montos decimales a enteros escalados (ej: centavos).
+
+    Raises:
+        ValueError: Si algún monto tiene más decimales que scale. Redondearlo
+                    haría que las sumas difieran de las del SQL, que opera
+                    sobre el DECIMAL exacto.
+    """
+    scaled = values.fillna(0).to_numpy(dtype="float64") * (10 ** scale)
+    units = np.rint(scaled)
+
+    # Tolerancia del error de representación en float64 de cada monto
+    tolerance = 1e-6 + np.abs(scaled) * (4 * np.finfo(np.float64).eps)
+    residual = np.abs(scaled - units) > tolerance
+    if residual.any():
+        example = values.to_numpy()[residual.argmax()]
+        raise ValueError(
+            f"{values.name} tiene montos con más de {scale} decimales (ej: {example}). "
+            f"Ajuste DOC_AMOUNT_SCALE en config/settings.py a la escala de la columna."
+        )
+    return units.astype(np.int64)
+
+
+def units_to_chf(units: pd.Series, scale: int = DOC_AMOUNT_SCALE) -> pd.Series:
+    """
+    Convierte sumas en unidades enteras a CHF.
+
+    SUM(x * @CHF_RATE) en SQL Server es exacto en DECIMAL, por lo que se
+    calcula rate * SUM(x) en Decimal y solo al final se pasa a float, igual
+    que hace el driver con el resultado del query.
+    """
+    rate = Decimal(repr(CHF_RATE)).quantize(Decimal("1e-9"))
+    with localcontext() as ctx:
+        ctx.prec = 60
+        values = [
+            float(Decimal(int(u)).scaleb(-scale) * rate)
+            for u in units.to_numpy()
+        ]
+    return pd.Series(values, index=units.index, dtype="float64")
+
+
+def compute_valid_locations(
+    locations: pd.DataFrame,
+    location_metrics: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Equivalente al CTE VALID_LOCS: locaciones activas más locaciones
+    inactivas con documentos transaccionales con saldo.
+
+    Args:
+        locations: LocTab con columnas OriCod, CiaCod, LocCod, LocEst
+        location_metrics: aggregate_doc_metrics() por LOCATION_KEYS
+
+    Returns:
+        DataFrame con las llaves de las locaciones válidas
+    """
+    loc_est = locations["LocEst"].astype(str).str.strip()
+    active = locations.loc[loc_est == "1", LOCATION_KEYS]
+
+    open_locations = location_metrics.loc[location_metrics["TRX_OP_COUNT"] > 0, LOCATION_KEYS]
+    inactive = locations.loc[loc_est == "0", LOCATION_KEYS].merge(
+        open_locations, on=LOCATION_KEYS, how="inner"
+    )
+
+    return pd.concat([active, inactive], ignore_index=True).drop_duplicates()
+
+
+def restrict_to_locations(docs: pd.DataFrame, locations: pd.DataFrame) -> pd.DataFrame:
+    """Filtra los documentos a las locaciones indicadas (dc.LocCod IN VALID_LOCS)."""
+    return docs.merge(locations[LOCATION_KEYS], on=LOCATION_KEYS, how="inner")
+
+
+def aggregate_doc_metrics(
+    docs: pd.DataFrame,
+    bounds: DateBounds,
+    keys: Sequence[str] = VENDOR_KEYS
+) -> pd.DataFrame:
+    """
+    Calcula todas las métricas de DocCab en una sola pasada.
+
+    Args:
+        docs: DocCab filtrado (DocEst <> '0' y locaciones válidas) con
+              columnas de llave, DocTipCod, DocFecCre, DocMto y DocSld
+        bounds: Límites de las ventanas de 1 y 2 años
+        keys: Columnas de agrupación
+
+    Returns:
+        DataFrame con una fila por llave. Los montos se dejan en unidades
+        enteras (*_UNITS) para poder sumarlos sin pérdida de precisión.
+    """
+    keys = list(keys)
+    doc_type = docs["DocTipCod"].astype(str).str.rstrip()
+    date = pd.to_datetime(docs["DocFecCre"])
+    mto = to_units(docs["DocMto"])
+    sld = to_units(docs["DocSld"])
+
+    in_1y = (date >= bounds.one_year).to_numpy()
+    in_2y = (date >= bounds.two_years).to_numpy()
+    in_prev_year = in_2y & ~in_1y
+    has_balance = sld > 0
+
+    is_trx = doc_type.isin(DOC_TYPES.all_transactional).to_numpy()
+    is_invoice = doc_type.isin(DOC_TYPES.invoice_debit).to_numpy()
+    is_credit = doc_type.isin(DOC_TYPES.credit_notes).to_numpy()
+    is_bal_pos = doc_type.isin(DOC_TYPES.balance_positive).to_numpy()
+    is_bal_neg = doc_type.isin(DOC_TYPES.balance_negative).to_numpy()
+    is_po = doc_type.isin(DOC_TYPES.purchase_orders).to_numpy()
+    is_agreement = doc_type.isin(DOC_TYPES.agreements).to_numpy()
+    is_excluded = doc_type.isin(DOC_TYPES.excluded).to_numpy()
+    is_recent_type = doc_type.isin(DOC_TYPES.recent_activity).to_numpy()
+
+    signed_mto = np.where(is_invoice, mto, np.where(is_credit, -mto, 0))
+    signed_sld = np.where(is_bal_pos, sld, np.where(is_bal_neg, -sld, 0))
+    open_po = is_po & has_balance
+    trx_date = date.where(is_trx)
+    po_date = date.where(open_po)
+
+    frame = docs[keys].copy()
+    frame["TRX_1Y_UNITS"] = np.where(is_trx & in_1y, signed_mto, 0)
+    frame["TRX_2Y_UNITS"] = np.where(is_trx & in_prev_year, signed_mto, 0)
+    frame["TRX_OP_BAL_UNITS"] = np.where(is_trx & has_balance, signed_sld, 0)
+    frame["TRX_1Y_COUNT"] = is_trx & in_1y
+    frame["TRX_2Y_COUNT"] = is_trx & in_prev_year
+    frame["TRX_OP_COUNT"] = is_trx & has_balance
+    frame["MIN_TRX_DATE"] = trx_date
+    frame["MAX_TRX_DATE"] = trx_date
+    frame["PO_1Y_OP_COUNT"] = open_po & in_1y
+    frame["PO_2Y_OP_COUNT"] = open_po & in_2y
+    frame["PO_OP_COUNT"] = open_po
+    frame["MIN_PO_DATE"] = po_date
+    frame["MAX_PO_DATE"] = po_date
+    frame["PO_Agreement_COUNT"] = is_agreement & has_balance
+    frame["DOC_COUNT_2Y"] = is_invoice & in_2y
+    frame["HAS_TRX"] = is_trx
+    frame["HAS_INV_1Y"] = is_invoice & in_1y
+    frame["HAS_INV_2Y"] = is_invoice & in_2y
+    frame["HAS_INV_OP_OLD"] = is_invoice & has_balance & (date < bounds.two_years).to_numpy()
+    frame["HAS_PO_2Y"] = is_po & in_2y
+    frame["HAS_RECENT_2Y"] = is_recent_type & in_2y
+    frame["HAS_EXCLUDED"] = is_excluded
+
+    return rollup_metrics(frame, keys)
+
+
+def rollup_metrics(metrics: pd.DataFrame, keys: Sequence[str] = VENDOR_KEYS) -> pd.DataFrame:
+    """
+    Agrega métricas por keys con METRIC_AGGREGATIONS (ej: las de cada
+    locación a nivel de proveedor). Como los montos están en unidades
+    enteras, el resultado es idéntico a agregar los documentos directamente.
+    """
+    keys = list(keys)
+    rolled = metrics.groupby(keys, sort=False, observed=True).agg(METRIC_AGGREGATIONS)
+    return rolled.reset_index()
+
+
+def finalize_metrics(metrics: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deriva las columnas de salida a partir de las métricas agregadas:
+    montos en CHF, años, TRX_SOURCE_TAG y OPEN_BALANCE.
+    """
+    metrics = metrics.copy()
+    for column, units in AMOUNT_METRICS.items():
+        metrics[column] = units_to_chf(metrics[units])
+
+    for column in COUNT_METRICS:
+        metrics[column] = metrics[column].astype(np.int64)
+    for column in FLAG_METRICS:
+        metrics[column] = metrics[column].astype(bool)
+
+    metrics["MIN_TRX_YEAR"] = metrics["MIN_TRX_DATE"].dt.year
+    metrics["MAX_TRX_YEAR"] = metrics["MAX_TRX_DATE"].dt.year
+
+    metrics["TRX_SOURCE_TAG"] = np.select(
+        [
+            metrics["HAS_INV_OP_OLD"],
+            metrics["HAS_INV_1Y"],
+            metrics["HAS_INV_2Y"],
+            metrics["HAS_PO_2Y"],
+        ],
+        ["INV_OP", "INV_1Y", "INV_2Y", "POH_OP"],
+        default="NO_TRX_AT_ALL"
+    )
+    return metrics
+
+
+def attach_metrics(
+    frame: pd.DataFrame,
+    metrics: pd.DataFrame,
+    keys: Sequence[str] = VENDOR_KEYS
+) -> pd.DataFrame:
+    """
+    Une las métricas a las filas del reporte (LEFT JOIN) aplicando los
+    mismos defaults que el SQL para llaves sin documentos.
+    """
+    df = frame.merge(metrics, on=list(keys), how="left")
+
+    for column in AMOUNT_METRICS:
+        df[column] = df[column].fillna(0.0)
+    for column in list(AMOUNT_METRICS.values()) + COUNT_METRICS:
+        df[column] = df[column].fillna(0).astype(np.int64)
+    for column in FLAG_METRICS:
+        df[column] = df[column].fillna(False).astype(bool)
+    df["TRX_SOURCE_TAG"] = df["TRX_SOURCE_TAG"].fillna("NO_TRX_AT_ALL")
+
+    # YEAR() llega como entero; con NULLs el driver lo entrega como float
+    for column in ("MIN_TRX_YEAR", "MAX_TRX_YEAR"):
+        has_nulls = df[column].isna().any()
+        df[column] = df[column].astype("float64" if has_nulls else np.int64)
+
+    return df
+
+
+def priority_mask(metrics: pd.DataFrame) -> pd.Series:
+    """
+    Filtro de prioridad del supplier header:
+    - PRIORIDAD 1: saldo abierto > 0
+    - PRIORIDAD 2: órdenes de compra en los últimos 2 años
+    - PRIORIDAD 3: más de una factura 2Y y actividad reciente
+    Excluye proveedores con documentos intercompany.
+    """
+    open_balance = metrics["HAS_TRX"] & (metrics["TRX_OP_BAL_UNITS"] > 0)
+    recent = (metrics["DOC_COUNT_2Y"] > 1) & metrics["HAS_RECENT_2Y"]
+    return (open_balance | metrics["HAS_PO_2Y"] | recent) & ~metrics["HAS_EXCLUDED"]
+
+
+def site_priority_mask(sites: pd.DataFrame) -> pd.Series:
+    """
+    Filtro del supplier site, por locación:
+    - Locación activa, o no activa con saldo abierto > 0
+    - PRIORIDAD 1/2/3 como en priority_mask, con el saldo y las banderas de
+      la locación; DOC_COUNT_2Y y HAS_EXCLUDED son los del proveedor
+      completo (VENDOR_DOC_COUNT_2Y, VENDOR_HAS_EXCLUDED), como en el SQL
+    """
+    open_balance = sites["TRX_OP_BAL_UNITS"] > 0
+    loc_est = sites["LocEst"].astype(str).str.strip()
+    located = (loc_est == "1") | (sites["LocEst"].notna() & open_balance)
+    recent = (sites["VENDOR_DOC_COUNT_2Y"] > 1) & sites["HAS_RECENT_2Y"]
+    return located & (open_balance | sites["HAS_PO_2Y"] | recent) & ~sites["VENDOR_HAS_EXCLUDED"]
@@ -3,10 +3,177 @@ Reporte Supplier Header
 ========================
 Extrae datos a nivel de proveedor (cabecera).
 """
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+import pandas as pd
+
 import sys
 sys.path.insert(0, '../..')
 from reports.base import BaseReport
+from reports.columns import AMOUNT_FORMAT, ColumnLayout, constant, same_as, source
+from reports.contacts import CONTACTS_TABLE, contact_column, contacts_join, contacts_stage
+from reports.dimensions import dimension_join
+from reports.query import QueryBuilder, SqlQuery
+from reports.suppliers import engine
+from reports.suppliers.locations import documents_query, location_metrics, locations_query
 from config.settings import CHF_RATE, DOC_TYPES, VALID_ORIGIN_CODES, EXCLUDED_VENDOR_CODES
+from utils.database import DatabaseConnection
+
+
+# Columnas del template en orden. La query trae solo las expresiones
+# únicas; constantes y copias se completan al exportar (reports/columns.py)
+LAYOUT = ColumnLayout([
+    source("VENDOR_NAME (M)", "ct.CiaDes"),
+    source("VENDOR_NUM (M)", "ct.CiaIdeNum"),
+    source("VENDOR_ID (M)", "ct.CiaCod"),
+    source("VENDOR_NAME_ALT (M)", "ct.CiaSig"),
+    source("SIC", "cp.CiaParVal"),
+    constant("EMPLOYEE_ID"),
+    constant("VENDOR_TYPE_LOOKUP_CODE (M)"),
+    constant("CEO_TITLE"),
+    source("CEO_NAME", "CONCAT(ctt.CttNom, ctt.CttApePat)"),
+    constant("PRINCIPAL_TITLE"),
+    constant("PRINCIPAL_NAME"),
+    same_as("TAX_REGISTRATION_NUM (M)", "VENDOR_NUM (M)"),
+    same_as("TAXPAYER_ID (M)", "VENDOR_NUM (M)"),
+    source("REMITTANCE_EMAIL", contact_column("EMAIL")),
+    source("DEFAULT_REP_COUNTRY_CODE", "ot.PaiCod"),
+    same_as("DEFAULT_REP_REG_NUMBER", "VENDOR_NUM (M)"),
+    source("DEFAULT_REP_TAX_REG_TYPE", "rt.CiaParVal"),
+    constant("PARENT_PARTY_ID"),
+    constant("PARENT_VENDOR_ID"),
+    same_as("PARTY_ALIAS", "VENDOR_NAME_ALT (M)"),
+    source("URL", contact_column("URL")),
+    same_as("PARTY_ID (M)", "VENDOR_ID (M)"),
+    same_as("REGISTRY_ID (M)", "VENDOR_NUM (M)"),
+    same_as("PARTY_NAME (M)", "VENDOR_NAME (M)"),
+    source("PARTY_TYPE (M)", "it.IdeTipDes"),
+    constant("TAX_NAME"),
+    source("COUNTRY (M)", "pt.PaiDes"),
+    source("ADDRESS1 (M)", "lt.LocDir"),
+    constant("ADDRESS2"),
+    constant("ADDRESS3"),
+    constant("ADDRESS4"),
+    source("CITY (M)", "dt.DstDes"),
+    source("POSTAL_CODE (M)", "dt.DstPstCod"),
+    source("STATE", "dpt.DptDes"),
+    source("PROVINCE", "pvt.PvnDes"),
+    source("TRX_1Y_AMOUNT_CHF (M)", "COALESCE(m.TRX_1Y_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TRX_2Y_AMOUNT_CHF (M)", "COALESCE(m.TRX_2Y_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TRX_OP_BAL_CHF (M)", "COALESCE(m.TRX_OP_BAL_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TRX_1Y_COUNT (M)", "COALESCE(m.TRX_1Y_COUNT, 0)", dtype="int32"),
+    source("TRX_2Y_COUNT (M)", "COALESCE(m.TRX_2Y_COUNT, 0)", dtype="int32"),
+    source("TRX_OP_COUNT (M)", "COALESCE(m.TRX_OP_COUNT, 0)", dtype="int32"),
+    source("MIN_TRX_DATE (M)", "m.MIN_TRX_DATE"),
+    source("MAX_TRX_DATE (M)", "m.MAX_TRX_DATE"),
+    source("MIN_TRX_YEAR (M)", "m.MIN_TRX_YEAR", dtype="int16"),
+    source("MAX_TRX_YEAR (M)", "m.MAX_TRX_YEAR", dtype="int16"),
+    source("VENDOR_CREATION_DATE (M)", "ct.CiaFehCre"),
+    source("SUPPLIER_TRX_SOURCE_LIST (M)", "src.TRX_SOURCE_TAG"),
+    source("PO_1Y_OP_COUNT (M)", "COALESCE(po.PO_1Y_OP_COUNT, 0)", dtype="int32"),
+    source("PO_2Y_OP_COUNT (M)", "COALESCE(po.PO_2Y_OP_COUNT, 0)", dtype="int32"),
+    source("PO_OP_COUNT (M)", "COALESCE(po.PO_OP_COUNT, 0)", dtype="int32"),
+    source("MIN_PO_DATE (M)", "po.MIN_PO_DATE"),
+    source("MAX_PO_DATE (M)", "po.MAX_PO_DATE"),
+    source("PO_Agreement_COUNT (M)", "COALESCE(po.PO_Agreement_COUNT, 0)", dtype="int32"),
+])
+
+# Tablas de descripción (ver reports/dimensions.py). Con la caché de
+# dimensiones activa la query trae las llaves en lugar de estos joins
+DIMENSION_JOINS = (
+    dimension_join(
+        "pt", "PaiTab",
+        keys={"PaiCod": "lt.PaiCod"},
+        columns={"COUNTRY (M)": "PaiDes"},
+        sql="LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod",
+    ),
+    dimension_join(
+        "dt", "DstTab",
+        keys={"DstCod": "lt.DstCod", "PaiCod": "lt.PaiCod", "DptCod": "lt.DptCod",
+              "PvnCod": "lt.PvnCod", "OriCod": "ot.OriCod"},
+        columns={"CITY (M)": "DstDes", "POSTAL_CODE (M)": "DstPstCod"},
+        requires=("pt",),
+        sql="""
+LEFT JOIN DstTab dt ON dt.DstCod = lt.DstCod
+   AND dt.PaiCod = pt.PaiCod
+   AND dt.DptCod = lt.DptCod
+   AND dt.PvnCod = lt.PvnCod
+   AND dt.OriCod = ot.OriCod""",
+    ),
+    dimension_join(
+        "dpt", "DptTab",
+        keys={"DptCod": "lt.DptCod", "OriCod": "ot.OriCod", "PaiCod": "lt.PaiCod"},
+        columns={"STATE": "DptDes"},
+        sql="""
+LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod
+   AND dpt.OriCod = ot.OriCod
+   AND dpt.PaiCod = lt.PaiCod
+   AND dpt.DptEst = '1'""",
+    ),
+    dimension_join(
+        "pvt", "PvnTab",
+        keys={"PvnCod": "lt.PvnCod", "OriCod": "ot.OriCod", "PaiCod": "lt.PaiCod", "DptCod": "lt.DptCod"},
+        columns={"PROVINCE": "PvnDes"},
+        requires=("dpt",),
+        sql="""
+LEFT JOIN PvnTab pvt ON pvt.PvnCod = lt.PvnCod
+   AND pvt.OriCod = ot.OriCod
+   AND pvt.PaiCod = lt.PaiCod
+   AND pvt.DptCod = dpt.DptCod""",
+    ),
+    dimension_join(
+        "it", "IdeTip",
+        keys={"IdeTipCod": "ct.IdeTipCod", "OriCod": "'011'"},
+        columns={"PARTY_TYPE (M)": "IdeTipDes"},
+        sql="""
+LEFT JOIN IdeTip it ON it.IdeTipCod = ct.IdeTipCod
+   AND it.OriCod = '011'""",
+    ),
+)
+
+# Columnas calculadas por el motor pandas: alias de salida -> métrica
+METRIC_COLUMNS: Dict[str, str] = {
+    "TRX_1Y_AMOUNT_CHF (M)": "TRX_1Y_AMOUNT_CHF",
+    "TRX_2Y_AMOUNT_CHF (M)": "TRX_2Y_AMOUNT_CHF",
+    "TRX_OP_BAL_CHF (M)": "TRX_OP_BAL_CHF",
+    "TRX_1Y_COUNT (M)": "TRX_1Y_COUNT",
+    "TRX_2Y_COUNT (M)": "TRX_2Y_COUNT",
+    "TRX_OP_COUNT (M)": "TRX_OP_COUNT",
+    "MIN_TRX_DATE (M)": "MIN_TRX_DATE",
+    "MAX_TRX_DATE (M)": "MAX_TRX_DATE",
+    "MIN_TRX_YEAR (M)": "MIN_TRX_YEAR",
+    "MAX_TRX_YEAR (M)": "MAX_TRX_YEAR",
+    "SUPPLIER_TRX_SOURCE_LIST (M)": "TRX_SOURCE_TAG",
+    "PO_1Y_OP_COUNT (M)": "PO_1Y_OP_COUNT",
+    "PO_2Y_OP_COUNT (M)": "PO_2Y_OP_COUNT",
+    "PO_OP_COUNT (M)": "PO_OP_COUNT",
+    "MIN_PO_DATE (M)": "MIN_PO_DATE",
+    "MAX_PO_DATE (M)": "MAX_PO_DATE",
+    "PO_Agreement_COUNT (M)": "PO_Agreement_COUNT",
+}
+
+
+def vendor_conditions(q: QueryBuilder) -> str:
+    """WHERE del conjunto base de proveedores (alias ct y b), común a ambos reportes."""
+    valid_origins = q.codes("VALID_ORIGINS", VALID_ORIGIN_CODES)
+    excluded_vendors = q.codes("EXCLUDED_VENDORS", EXCLUDED_VENDOR_CODES)
+    
+    return f"""WHERE ct.OriCod IN {valid_origins}
+  AND ct.CiaEst = '1'
+  AND b.IndGrp = '6'
+  AND b.IndCod = '2'
+  AND ct.CiaCod NOT IN {excluded_vendors}
+  AND ct.CiaIdeNum NOT LIKE 'F%'"""
+
+
+def driving_set(q: QueryBuilder) -> str:
+    """FROM/WHERE del conjunto base de proveedores (ver BaseReport.get_driving_set)."""
+    return f"""FROM CiaTab ct WITH (NOLOCK)
+LEFT JOIN Cid b ON b.OriCod = ct.OriCod
+   AND b.CiaCod = ct.CiaCod
+{vendor_conditions(q)}"""
 
 
 class SupplierHeaderReport(BaseReport):
@@ -18,105 +185,33 @@ class SupplierHeaderReport(BaseReport):
     - Dirección principal
     - Métricas de transacciones (montos CHF, conteos 1Y/2Y)
     - Métricas de órdenes de compra
+    
+    Motores:
+    - 'sql': todas las métricas se calculan en SQL Server (default)
+    - 'pandas': lee DocCab una sola vez y agrega con pandas/NumPy
     """
     
+    SUPPORTED_ENGINES = ("sql", "pandas")
+    INCREMENTAL_KEY = "VENDOR_ID (M)"
+    TEMP_TABLES = ("#VALID_LOCS", CONTACTS_TABLE)
+    DIMENSION_JOINS = DIMENSION_JOINS
+    
     def get_report_name(self) -> str:
         return "supplier_header"
     
     def get_sheet_name(self) -> str:
         return "Supplier Header"
     
-    def get_query(self) -> str:
-        """Query para supplier header - basado en queries/supplier-header.sql"""
-        
-        # Constantes para el query
-        chf_rate = CHF_RATE
-        invoice_debit = "','".join(DOC_TYPES.invoice_debit)
-        credit_notes = "','".join(DOC_TYPES.credit_notes)
-        balance_positive = "','".join(DOC_TYPES.balance_positive)
-        balance_negative = "','".join(DOC_TYPES.balance_negative)
-        purchase_orders = "','".join(DOC_TYPES.purchase_orders)
-        all_transactional = "','".join(DOC_TYPES.all_transactional)
-        excluded_docs = "','".join(DOC_TYPES.excluded)
-        valid_origins = "','".join(VALID_ORIGIN_CODES)
-        excluded_vendors = "','".join(EXCLUDED_VENDOR_CODES)
-        
-        return f"""
-DECLARE @CHF_RATE DECIMAL(18,9) = {chf_rate};
-;WITH VALID_LOCS AS (
-    SELECT lt.OriCod, lt.CiaCod, lt.LocCod
-    FROM LocTab lt
-    WHERE lt.LocEst = '1'
-    UNION
-    SELECT lt.OriCod, lt.CiaCod, lt.LocCod
-    FROM LocTab lt
-    WHERE lt.LocEst = '0'
-      AND EXISTS (
-          SELECT 1
-          FROM DocCab dc
-          WHERE dc.OriCod = lt.OriCod
-            AND dc.CiaCod = lt.CiaCod
-            AND dc.LocCod = lt.LocCod
-            AND dc.DocSld > 0
-            AND dc.DocTipCod IN ('{all_transactional}')
-            AND dc.DocEst <> '0'
-      )
-)
-SELECT
-    ct.CiaDes AS [VENDOR_NAME (M)],
-    ct.CiaIdeNum AS [VENDOR_NUM (M)],
-    ct.CiaCod AS [VENDOR_ID (M)],
-    ct.CiaSig AS [VENDOR_NAME_ALT (M)],
-    cp.CiaParVal AS [SIC],
-    '' AS [EMPLOYEE_ID],
-    '' AS [VENDOR_TYPE_LOOKUP_CODE (M)],
-    '' AS [CEO_TITLE],
-    CONCAT(ctt.CttNom, ctt.CttApePat) AS [CEO_NAME],
-    '' AS [PRINCIPAL_TITLE],
-    '' AS [PRINCIPAL_NAME],
-    ct.CiaIdeNum AS [TAX_REGISTRATION_NUM (M)],
-    ct.CiaIdeNum AS [TAXPAYER_ID (M)],
-    email.TelNum AS [REMITTANCE_EMAIL],
-    ot.PaiCod AS [DEFAULT_REP_COUNTRY_CODE],
-    ct.CiaIdeNum AS [DEFAULT_REP_REG_NUMBER],
-    rt.CiaParVal AS [DEFAULT_REP_TAX_REG_TYPE],
-    '' AS [PARENT_PARTY_ID],
-    '' AS [PARENT_VENDOR_ID],
-    ct.CiaSig AS [PARTY_ALIAS],
-    url.TelNum AS [URL],
-    ct.CiaCod AS [PARTY_ID (M)],
-    ct.CiaIdeNum AS [REGISTRY_ID (M)],
-    ct.CiaDes AS [PARTY_NAME (M)],
-    it.IdeTipDes AS [PARTY_TYPE (M)],
-    '' AS [TAX_NAME],
-    pt.PaiDes AS [COUNTRY (M)],
-    lt.LocDir AS [ADDRESS1 (M)],
-    '' AS [ADDRESS2],
-    '' AS [ADDRESS3],
-    '' AS [ADDRESS4],
-    dt.DstDes AS [CITY (M)],
-    dt.DstPstCod AS [POSTAL_CODE (M)],
-    dpt.DptDes AS [STATE],
-    pvt.PvnDes AS [PROVINCE],
-    COALESCE(m.TRX_1Y_AMOUNT_CHF, 0) AS [TRX_1Y_AMOUNT_CHF (M)],
-    COALESCE(m.TRX_2Y_AMOUNT_CHF, 0) AS [TRX_2Y_AMOUNT_CHF (M)],
-    COALESCE(m.TRX_OP_BAL_CHF, 0) AS [TRX_OP_BAL_CHF (M)],
-    COALESCE(m.TRX_1Y_COUNT, 0) AS [TRX_1Y_COUNT (M)],
-    COALESCE(m.TRX_2Y_COUNT, 0) AS [TRX_2Y_COUNT (M)],
-    COALESCE(m.TRX_OP_COUNT, 0) AS [TRX_OP_COUNT (M)],
-    m.MIN_TRX_DATE AS [MIN_TRX_DATE (M)],
-    m.MAX_TRX_DATE AS [MAX_TRX_DATE (M)],
-    m.MIN_TRX_YEAR AS [MIN_TRX_YEAR (M)],
-    m.MAX_TRX_YEAR AS [MAX_TRX_YEAR (M)],
-    ct.CiaFehCre AS [VENDOR_CREATION_DATE (M)],
-    src.TRX_SOURCE_TAG AS [SUPPLIER_TRX_SOURCE_LIST (M)],
-    COALESCE(po.PO_1Y_OP_COUNT, 0) AS [PO_1Y_OP_COUNT (M)],
-    COALESCE(po.PO_2Y_OP_COUNT, 0) AS [PO_2Y_OP_COUNT (M)],
-    COALESCE(po.PO_OP_COUNT, 0) AS [PO_OP_COUNT (M)],
-    po.MIN_PO_DATE AS [MIN_PO_DATE (M)],
-    po.MAX_PO_DATE AS [MAX_PO_DATE (M)],
-    COALESCE(po.PO_Agreement_COUNT, 0) AS [PO_Agreement_COUNT (M)]
-FROM CiaTab ct WITH (NOLOCK)
+    def get_layout(self) -> ColumnLayout:
+        return LAYOUT
+    
+    def get_column_widths(self) -> Dict[str, float]:
+        # Montos CHF: ancho fijo, no se estiman desde los datos
+        return {f"{metric} (M)": 18 for metric in engine.AMOUNT_METRICS}
+    
+    def _get_from_clause(self) -> str:
+        """FROM y joins de atributos del proveedor (comunes a ambos motores)."""
+        return f"""FROM CiaTab ct WITH (NOLOCK)
 LEFT JOIN Cid b ON b.OriCod = ct.OriCod
    AND b.CiaCod = ct.CiaCod
 LEFT JOIN IdeTip c WITH (NOLOCK) ON c.OriCod = ct.OriCod
@@ -134,76 +229,115 @@ CROSS APPLY (
 ) lt
 LEFT JOIN CiaPar rt ON rt.CiaCod = ct.CiaCod
    AND rt.OriCod = '011'
-   AND rt.ParCod = '140'
-LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod
-LEFT JOIN DstTab dt ON dt.DstCod = lt.DstCod
-   AND dt.PaiCod = pt.PaiCod
-   AND dt.DptCod = lt.DptCod
-   AND dt.PvnCod = lt.PvnCod
-   AND dt.OriCod = ot.OriCod
-LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod
-   AND dpt.OriCod = ot.OriCod
-   AND dpt.PaiCod = lt.PaiCod
-   AND dpt.DptEst = '1'
-LEFT JOIN PvnTab pvt ON pvt.PvnCod = lt.PvnCod
-   AND pvt.OriCod = ot.OriCod
-   AND pvt.PaiCod = lt.PaiCod
-   AND pvt.DptCod = dpt.DptCod
-LEFT JOIN IdeTip it ON it.IdeTipCod = ct.IdeTipCod
-   AND it.OriCod = '011'
+   AND rt.ParCod = '140'{self._dimension_joins()}
 LEFT JOIN CttTab ctt ON ctt.CiaCod = ct.CiaCod
    AND ctt.LocCod = lt.LocCod
    AND ctt.CrgDes = 'Director Ejecutivo'
-OUTER APPLY (
-    SELECT TOP (1) phone.TelNum
-    FROM TelTab phone
-    WHERE phone.CiaCod = ct.CiaCod
-      AND phone.OriCod = ot.OriCod
-      AND phone.TelEst = '1'
-      AND phone.LocCod = lt.LocCod
-      AND phone.TelTipCod = 1
-    ORDER BY phone.TelCod ASC
-) phone
-OUTER APPLY (
-    SELECT TOP (1) email.TelNum
-    FROM TelTab email
-    WHERE email.CiaCod = ct.CiaCod
-      AND email.OriCod = ot.OriCod
-      AND email.TelEst = '1'
-      AND email.LocCod = lt.LocCod
-      AND email.TelTipCod = 3
-    ORDER BY email.TelCod ASC
-) email
-OUTER APPLY (
-    SELECT TOP (1) url.TelNum
-    FROM TelTab url
-    WHERE url.CiaCod = ct.CiaCod
-      AND url.OriCod = ot.OriCod
-      AND url.TelEst = '1'
-      AND url.LocCod = lt.LocCod
-      AND url.TelTipCod = 4
-    ORDER BY url.TelCod ASC
-) url
+{contacts_join("ct.CiaCod", "ot.OriCod", "lt.LocCod")}
 LEFT JOIN CiaCtaTab cct
     ON cct.CiaCod = ct.CiaCod
-   AND cct.Oricod = ct.OriCod
+   AND cct.Oricod = ct.OriCod"""
+    
+    def _get_vendor_filter(self, q: QueryBuilder) -> str:
+        """WHERE con las condiciones base de proveedor."""
+        return f"{vendor_conditions(q)}{self._key_filter(q)}"
+    
+    def get_driving_set(self, q: QueryBuilder) -> str:
+        return driving_set(q)
+    
+    def get_setup_statements(self, as_of: datetime = None) -> List[SqlQuery]:
+        """
+        Etapas de la sesión. El motor pandas calcula VALID_LOCS en memoria
+        y solo necesita #CONTACTS (la usa la query de atributos).
+        """
+        statements = [self._contacts_stage()]
+        if self.engine != "pandas":
+            statements.insert(0, self._valid_locations_stage())
+        return statements
+    
+    def _valid_locations_stage(self) -> SqlQuery:
+        """
+        #VALID_LOCS: locaciones activas, o inactivas con saldo abierto.
+        Se materializa una vez con índice en lugar de evaluar la CTE en
+        cada OUTER APPLY / EXISTS de la query.
+        """
+        q = QueryBuilder()
+        all_transactional = q.codes("ALL_TRANSACTIONAL", DOC_TYPES.all_transactional)
+        valid_origins = q.codes("VALID_ORIGINS", VALID_ORIGIN_CODES)
+        key_filter = self._key_filter(q, "lt.CiaCod")
+        
+        return q.build(f"""
+IF OBJECT_ID('tempdb..#VALID_LOCS') IS NOT NULL DROP TABLE #VALID_LOCS;
+
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod
+INTO #VALID_LOCS
+FROM LocTab lt WITH (NOLOCK)
+WHERE lt.LocEst = '1'
+  AND lt.OriCod IN {valid_origins}{key_filter}
+UNION
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod
+FROM LocTab lt WITH (NOLOCK)
+WHERE lt.LocEst = '0'
+  AND lt.OriCod IN {valid_origins}{key_filter}
+  AND EXISTS (
+      SELECT 1
+      FROM DocCab dc WITH (NOLOCK)
+      WHERE dc.OriCod = lt.OriCod
+        AND dc.CiaCod = lt.CiaCod
+        AND dc.LocCod = lt.LocCod
+        AND dc.DocSld > 0
+        AND dc.DocTipCod IN {all_transactional}
+        AND dc.DocEst <> '0'
+  );
+
+CREATE CLUSTERED INDEX IX_VALID_LOCS ON #VALID_LOCS(OriCod, CiaCod, LocCod);
+""")
+    
+    def _contacts_stage(self) -> SqlQuery:
+        """#CONTACTS: email y URL de las locaciones de los proveedores candidatos."""
+        q = QueryBuilder()
+        return contacts_stage(q, self._get_vendor_keys_query(q), kinds=("EMAIL", "URL"))
+    
+    def get_query(self, as_of: datetime = None) -> SqlQuery:
+        """Query para supplier header - basado en queries/supplier-header.sql"""
+        
+        # Constantes para el query (parámetros, ver reports/query.py)
+        bounds = engine.DateBounds.from_reference(as_of or datetime.now())
+        q = QueryBuilder()
+        q.scalar("CHF_RATE", "DECIMAL(18,9)", Decimal(str(CHF_RATE)))
+        q.scalar("DATE_1Y", "DATETIME", bounds.one_year.to_pydatetime())
+        q.scalar("DATE_2Y", "DATETIME", bounds.two_years.to_pydatetime())
+        invoice_debit = q.codes("INVOICE_DEBIT", DOC_TYPES.invoice_debit)
+        credit_notes = q.codes("CREDIT_NOTES", DOC_TYPES.credit_notes)
+        balance_positive = q.codes("BALANCE_POSITIVE", DOC_TYPES.balance_positive)
+        balance_negative = q.codes("BALANCE_NEGATIVE", DOC_TYPES.balance_negative)
+        purchase_orders = q.codes("PURCHASE_ORDERS", DOC_TYPES.purchase_orders)
+        agreements = q.codes("AGREEMENTS", DOC_TYPES.agreements)
+        all_transactional = q.codes("ALL_TRANSACTIONAL", DOC_TYPES.all_transactional)
+        excluded_docs = q.codes("EXCLUDED_DOCS", DOC_TYPES.excluded)
+        recent_activity = q.codes("RECENT_ACTIVITY", DOC_TYPES.recent_activity)
+        
+        return q.build(f"""
+SELECT
+{self._select_list()}
+{self._get_from_clause()}
 OUTER APPLY (
     SELECT
         SUM(CASE
-                WHEN dc.DocFecCre >= DATEADD(YEAR, -1, GETDATE()) THEN
+                WHEN dc.DocFecCre >= @DATE_1Y THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{invoice_debit}') THEN  dc.DocMto * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{credit_notes}')      THEN -dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {credit_notes}      THEN -dc.DocMto * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
             END) AS TRX_1Y_AMOUNT_CHF,
         SUM(CASE
-                WHEN dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-                 AND dc.DocFecCre <  DATEADD(YEAR, -1, GETDATE()) THEN
+                WHEN dc.DocFecCre >= @DATE_2Y
+                 AND dc.DocFecCre <  @DATE_1Y THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{invoice_debit}') THEN  dc.DocMto * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{credit_notes}')      THEN -dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {credit_notes}      THEN -dc.DocMto * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
@@ -211,22 +345,22 @@ OUTER APPLY (
         SUM(CASE
                 WHEN dc.DocSld > 0 THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{balance_positive}') THEN  dc.DocSld * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{balance_negative}')      THEN -dc.DocSld * @CHF_RATE
+                        WHEN dc.DocTipCod IN {balance_positive} THEN  dc.DocSld * @CHF_RATE
+                        WHEN dc.DocTipCod IN {balance_negative}      THEN -dc.DocSld * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
             END) AS TRX_OP_BAL_CHF,
-        SUM(CASE WHEN dc.DocFecCre >= DATEADD(YEAR, -1, GETDATE()) THEN 1 ELSE 0 END) AS TRX_1Y_COUNT,
+        SUM(CASE WHEN dc.DocFecCre >= @DATE_1Y THEN 1 ELSE 0 END) AS TRX_1Y_COUNT,
         SUM(CASE
-                WHEN dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-                 AND dc.DocFecCre <  DATEADD(YEAR, -1, GETDATE()) THEN 1
+                WHEN dc.DocFecCre >= @DATE_2Y
+                 AND dc.DocFecCre <  @DATE_1Y THEN 1
                 ELSE 0
             END) AS TRX_2Y_COUNT,
         SUM(
         CASE
             WHEN dc.DocSld > 0
-            AND dc.DocTipCod IN ('{all_transactional}')
+            AND dc.DocTipCod IN {all_transactional}
             THEN 1 ELSE 0
         END
         ) AS TRX_OP_COUNT,
@@ -239,28 +373,28 @@ OUTER APPLY (
       AND dc.OriCod = ct.OriCod
       AND dc.LocCod IN (
         SELECT v.LocCod
-        FROM VALID_LOCS v
+        FROM #VALID_LOCS v
         WHERE v.OriCod = dc.OriCod
           AND v.CiaCod = dc.CiaCod
       )
-      AND dc.DocTipCod IN ('{all_transactional}')
+      AND dc.DocTipCod IN {all_transactional}
       AND dc.DocEst <> '0'
 ) m
 OUTER APPLY (
     SELECT
-        SUM(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 AND dc.DocFecCre >= DATEADD(YEAR, -1, GETDATE()) THEN 1 ELSE 0 END) AS PO_1Y_OP_COUNT,
-        SUM(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 AND dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE()) THEN 1 ELSE 0 END) AS PO_2Y_OP_COUNT,
-        SUM(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 THEN 1 ELSE 0 END) AS PO_OP_COUNT,
-        MIN(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MIN_PO_DATE,
-        MAX(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MAX_PO_DATE,
-        SUM(CASE WHEN dc.DocSld > 0 AND dc.DocTipCod IN ('CX') THEN 1 ELSE 0 END) AS PO_Agreement_COUNT
+        SUM(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 AND dc.DocFecCre >= @DATE_1Y THEN 1 ELSE 0 END) AS PO_1Y_OP_COUNT,
+        SUM(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 AND dc.DocFecCre >= @DATE_2Y THEN 1 ELSE 0 END) AS PO_2Y_OP_COUNT,
+        SUM(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 THEN 1 ELSE 0 END) AS PO_OP_COUNT,
+        MIN(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MIN_PO_DATE,
+        MAX(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MAX_PO_DATE,
+        SUM(CASE WHEN dc.DocSld > 0 AND dc.DocTipCod IN {agreements} THEN 1 ELSE 0 END) AS PO_Agreement_COUNT
     FROM DocCab dc WITH (NOLOCK)
     WHERE dc.CiaCod = ct.CiaCod
       AND dc.OriCod = ct.OriCod
       AND dc.DocEst <> '0'
       AND dc.LocCod IN (
         SELECT v.LocCod
-        FROM VALID_LOCS v
+        FROM #VALID_LOCS v
         WHERE v.OriCod = dc.OriCod
           AND v.CiaCod = dc.CiaCod
       )
@@ -272,12 +406,12 @@ OUTER APPLY (
             FROM DocCab d WITH (NOLOCK)
             WHERE d.CiaCod = ct.CiaCod
               AND d.OriCod = ct.OriCod
-              AND d.DocTipCod IN ('{invoice_debit}')
+              AND d.DocTipCod IN {invoice_debit}
               AND d.DocEst <> '0'
-              AND d.DocFecCre >= DATEADD(YEAR, -1, GETDATE())
+              AND d.DocFecCre >= @DATE_1Y
               AND d.LocCod IN (
                 SELECT v.LocCod
-                FROM VALID_LOCS v
+                FROM #VALID_LOCS v
                 WHERE v.OriCod = d.OriCod
                   AND v.CiaCod = d.CiaCod
               )
@@ -287,12 +421,12 @@ OUTER APPLY (
             FROM DocCab d WITH (NOLOCK)
             WHERE d.CiaCod = ct.CiaCod
               AND d.OriCod = ct.OriCod
-              AND d.DocTipCod IN ('{invoice_debit}')
+              AND d.DocTipCod IN {invoice_debit}
               AND d.DocEst <> '0'
-              AND d.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
+              AND d.DocFecCre >= @DATE_2Y
               AND d.LocCod IN (
                 SELECT v.LocCod
-                FROM VALID_LOCS v
+                FROM #VALID_LOCS v
                 WHERE v.OriCod = d.OriCod
                   AND v.CiaCod = d.CiaCod
               )
@@ -302,13 +436,13 @@ OUTER APPLY (
             FROM DocCab d WITH (NOLOCK)
             WHERE d.CiaCod = ct.CiaCod
               AND d.OriCod = ct.OriCod
-              AND d.DocTipCod IN ('{invoice_debit}')
+              AND d.DocTipCod IN {invoice_debit}
               AND d.DocEst <> '0'
               AND d.DocSld > 0
-              AND d.DocFecCre < DATEADD(YEAR, -2, GETDATE())
+              AND d.DocFecCre < @DATE_2Y
               AND d.LocCod IN (
                 SELECT v.LocCod
-                FROM VALID_LOCS v
+                FROM #VALID_LOCS v
                 WHERE v.OriCod = d.OriCod
                   AND v.CiaCod = d.CiaCod
               )
@@ -318,12 +452,12 @@ OUTER APPLY (
             FROM DocCab d WITH (NOLOCK)
             WHERE d.CiaCod = ct.CiaCod
               AND d.OriCod = ct.OriCod
-              AND d.DocTipCod IN ('{purchase_orders}')
+              AND d.DocTipCod IN {purchase_orders}
               AND d.DocEst <> '0'
-              AND d.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
+              AND d.DocFecCre >= @DATE_2Y
               AND d.LocCod IN (
                 SELECT v.LocCod
-                FROM VALID_LOCS v
+                FROM #VALID_LOCS v
                 WHERE v.OriCod = d.OriCod
                   AND v.CiaCod = d.CiaCod
               )
@@ -344,12 +478,12 @@ OUTER APPLY (
     FROM DocCab d WITH (NOLOCK)
     WHERE d.CiaCod = ct.CiaCod
       AND d.OriCod = ct.OriCod
-      AND d.DocTipCod IN ('{invoice_debit}')
+      AND d.DocTipCod IN {invoice_debit}
       AND d.DocEst <> '0'
-      AND d.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
+      AND d.DocFecCre >= @DATE_2Y
       AND d.LocCod IN (
         SELECT v.LocCod
-        FROM VALID_LOCS v
+        FROM #VALID_LOCS v
         WHERE v.OriCod = d.OriCod
           AND v.CiaCod = d.CiaCod
       )
@@ -359,8 +493,8 @@ OUTER APPLY (
         SUM(CASE
                 WHEN dc.DocSld > 0 THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{balance_positive}') THEN  dc.DocSld * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{balance_negative}')                     THEN -dc.DocSld * @CHF_RATE
+                        WHEN dc.DocTipCod IN {balance_positive} THEN  dc.DocSld * @CHF_RATE
+                        WHEN dc.DocTipCod IN {balance_negative}                     THEN -dc.DocSld * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
@@ -368,21 +502,16 @@ OUTER APPLY (
     FROM DocCab dc WITH (NOLOCK)
     WHERE dc.CiaCod = ct.CiaCod
       AND dc.OriCod = ct.OriCod
-      AND dc.DocTipCod IN ('{all_transactional}')
+      AND dc.DocTipCod IN {all_transactional}
       AND dc.DocEst <> '0'
       AND dc.LocCod IN (
         SELECT v.LocCod
-        FROM VALID_LOCS v
+        FROM #VALID_LOCS v
         WHERE v.OriCod = dc.OriCod
           AND v.CiaCod = dc.CiaCod
       )
 ) priority
-WHERE ct.OriCod IN ('{valid_origins}')
-  AND ct.CiaEst = '1'
-  AND b.IndGrp = '6'
-  AND b.IndCod = '2'
-  AND ct.CiaCod NOT IN ('{excluded_vendors}')
-  AND ct.CiaIdeNum NOT LIKE 'F%'
+{self._get_vendor_filter(q)}
   AND (
         /* PRIORIDAD 1 */
         priority.OPEN_BALANCE > 0
@@ -392,12 +521,12 @@ WHERE ct.OriCod IN ('{valid_origins}')
             FROM DocCab oc WITH (NOLOCK)
             WHERE oc.CiaCod = ct.CiaCod
               AND oc.OriCod = ct.OriCod
-              AND oc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-              AND oc.DocTipCod IN ('{purchase_orders}')
+              AND oc.DocFecCre >= @DATE_2Y
+              AND oc.DocTipCod IN {purchase_orders}
               AND oc.DocEst <> '0'
               AND oc.LocCod IN (
                 SELECT v.LocCod
-                FROM VALID_LOCS v
+                FROM #VALID_LOCS v
                 WHERE v.OriCod = oc.OriCod
                   AND v.CiaCod = oc.CiaCod
               )
@@ -410,12 +539,12 @@ WHERE ct.OriCod IN ('{valid_origins}')
                 FROM DocCab dc WITH (NOLOCK)
                 WHERE dc.CiaCod = ct.CiaCod
                   AND dc.OriCod = ct.OriCod
-                  AND dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-                  AND dc.DocTipCod IN ('AP', 'C2', 'FE', 'FP', 'NP', 'NA', 'DE', 'NO')
+                  AND dc.DocFecCre >= @DATE_2Y
+                  AND dc.DocTipCod IN {recent_activity}
                   AND dc.DocEst <> '0'
                   AND dc.LocCod IN (
                     SELECT v.LocCod
-                    FROM VALID_LOCS v
+                    FROM #VALID_LOCS v
                     WHERE v.OriCod = dc.OriCod
                       AND v.CiaCod = dc.CiaCod
                   )
@@ -428,13 +557,84 @@ WHERE ct.OriCod IN ('{valid_origins}')
         WHERE d.CiaCod = ct.CiaCod
             AND d.OriCod = ct.OriCod
             AND d.DocEst <> '0'
-            AND d.DocTipCod IN ('{excluded_docs}')
+            AND d.DocTipCod IN {excluded_docs}
             AND d.LocCod IN (
                 SELECT v.LocCod
-                FROM VALID_LOCS v
+                FROM #VALID_LOCS v
                 WHERE v.OriCod = d.OriCod
                   AND v.CiaCod = d.CiaCod
             )
     )
 ;
-"""
+""")
+    
+    # ============================================
+    # MOTOR PANDAS
+    # ============================================
+    def get_attributes_query(self) -> SqlQuery:
+        """Atributos de los proveedores candidatos, sin métricas de DocCab."""
+        q = QueryBuilder()
+        
+        return q.build(f"""
+SELECT
+    ct.OriCod AS [OriCod],
+    ct.CiaCod AS [CiaCod],
+{self._select_list(exclude=METRIC_COLUMNS)}
+{self._get_from_clause()}
+{self._get_vendor_filter(q)};
+""")
+    
+    def get_documents_query(self) -> SqlQuery:
+        """Lectura única de DocCab para los proveedores candidatos."""
+        q = QueryBuilder()
+        return documents_query(q, self._get_vendor_keys_query(q))
+    
+    def get_locations_query(self) -> SqlQuery:
+        """Locaciones de los proveedores candidatos (para VALID_LOCS)."""
+        q = QueryBuilder()
+        return locations_query(q, self._get_vendor_keys_query(q))
+    
+    def _get_vendor_keys_query(self, q: QueryBuilder) -> str:
+        """Llaves (OriCod, CiaCod) de los proveedores candidatos."""
+        return f"""SELECT DISTINCT ct.OriCod, ct.CiaCod
+FROM CiaTab ct WITH (NOLOCK)
+LEFT JOIN Cid b ON b.OriCod = ct.OriCod
+   AND b.CiaCod = ct.CiaCod
+{self._get_vendor_filter(q)}"""
+    
+    def fetch(self, db: DatabaseConnection, limit: int = None) -> pd.DataFrame:
+        """Obtiene los datos con el motor seleccionado."""
+        if self.engine == "pandas":
+            return self._fetch_pandas(db, limit=limit)
+        return super().fetch(db, limit=limit)
+    
+    def _fetch_pandas(self, db: DatabaseConnection, limit: int = None) -> pd.DataFrame:
+        """
+        Calcula el reporte desde las métricas por locación (leídas de DocCab
+        una sola vez por corrida, ver reports/suppliers/locations.py),
+        agregadas por proveedor sobre VALID_LOCS.
+        Produce las mismas filas y valores que get_query().
+        """
+        # Con límite se leen solo los primeros N proveedores del conjunto base
+        with self._limited(limit):
+            dataset = location_metrics(
+                db, self.get_documents_query(), self.get_locations_query(), self._as_of
+            )
+        
+        # La query de atributos une #CONTACTS, preparada en la misma sesión
+        tables = self._load_dimensions(db)
+        with self._staged(db, dataset.as_of, limit), self._limited(limit):
+            vendors = self._run(db, self.get_attributes_query())
+        vendors = self._resolve_dimensions(vendors, tables)
+        vendors = engine.normalize_keys(vendors, engine.VENDOR_KEYS)
+        
+        metrics = engine.finalize_metrics(dataset.vendor_metrics())
+        df = engine.attach_metrics(vendors, metrics, engine.VENDOR_KEYS)
+        df = df[engine.priority_mask(df)]
+        
+        df = df.rename(columns={metric: alias for alias, metric in METRIC_COLUMNS.items()})
+        df = df[LAYOUT.fetched_names].reset_index(drop=True)
+        
+        if limit:
+            df = df.head(limit)
+        return df
@@ -0,0 +1,198 @@
+"""
+Métricas de DocCab por locación de proveedor
+=============================================
+Dataset intermedio del motor pandas, compartido por supplier_header y
+supplier_site: DocCab se lee y se agrega una sola vez a nivel de
+(OriCod, CiaCod, LocCod), con las sumas en unidades enteras, los conteos,
+las fechas mínimas/máximas y las banderas HAS_* (engine.aggregate_doc_metrics).
+
+- supplier_site usa las filas por locación directamente, más el total del
+  proveedor para DOC_COUNT_2Y y HAS_EXCLUDED (el SQL los evalúa sobre
+  todas sus locaciones)
+- supplier_header las vuelve a agregar por proveedor sobre VALID_LOCS
+  (engine.rollup_metrics): el resultado es el mismo que agregar DocCab
+
+Dentro de shared_run() (main.py --report all --engine pandas) el dataset
+queda en memoria hasta el final de la corrida: el segundo reporte con el
+mismo conjunto de proveedores lo reutiliza junto con su fecha de
+referencia, así que ambos usan las mismas ventanas 1Y/2Y. Con el motor
+'sql' (default) cada reporte calcula sus métricas en SQL Server y no hay
+nada que compartir; fuera de shared_run() se calcula en cada ejecución.
+
+Uso:
+    with shared_run():
+        SupplierHeaderReport(engine="pandas").execute()
+        SupplierSiteReport(engine="pandas").execute()  # no relee DocCab
+"""
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, '../..')
+from reports.query import QueryBuilder, SqlQuery
+from reports.suppliers import engine
+from utils import metrics
+from utils.database import DatabaseConnection
+
+
+@dataclass
+class LocationMetrics:
+    """Métricas por locación (sin finalizar) y locaciones de los proveedores."""
+    as_of: pd.Timestamp
+    locations: pd.DataFrame  # LocTab: OriCod, CiaCod, LocCod, LocEst
+    metrics: pd.DataFrame  # Una fila por locación con documentos
+    
+    def valid_locations(self) -> pd.DataFrame:
+        """
+        VALID_LOCS: locaciones activas, o inactivas con documentos
+        transaccionales con saldo (TRX_OP_COUNT > 0 en la locación).
+        """
+        return engine.compute_valid_locations(self.locations, self.metrics)
+    
+    def vendor_metrics(self, valid_only: bool = True) -> pd.DataFrame:
+        """
+        Métricas por proveedor (sin finalizar), agregando sus locaciones.
+        
+        Args:
+            valid_only: Si considerar solo VALID_LOCS (criterio del header)
+        """
+        location_metrics = self.metrics
+        if valid_only:
+            location_metrics = engine.restrict_to_locations(location_metrics, self.valid_locations())
+        return engine.rollup_metrics(location_metrics, engine.VENDOR_KEYS)
+
+
+# ============================================
+# QUERIES
+# ============================================
+def documents_query(q: QueryBuilder, vendors: str) -> SqlQuery:
+    """
+    Lectura única de DocCab para los proveedores indicados.
+    
+    Args:
+        q: QueryBuilder de la query (con los parámetros usados en vendors)
+        vendors: SELECT de las llaves (OriCod, CiaCod) de los proveedores
+    """
+    doc_types = q.codes("DOC_TYPES", engine.REQUIRED_DOC_TYPES)
+    
+    return q.build(f"""
+SELECT
+    dc.OriCod, dc.CiaCod, dc.LocCod,
+    dc.DocTipCod, dc.DocFecCre, dc.DocMto, dc.DocSld
+FROM DocCab dc WITH (NOLOCK)
+INNER JOIN (
+{vendors}
+) v ON v.OriCod = dc.OriCod
+   AND v.CiaCod = dc.CiaCod
+WHERE dc.DocEst <> '0'
+  AND dc.DocTipCod IN {doc_types};
+""")
+
+
+def locations_query(q: QueryBuilder, vendors: str) -> SqlQuery:
+    """Locaciones de los proveedores indicados (para VALID_LOCS y LocEst)."""
+    return q.build(f"""
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod, lt.LocEst
+FROM LocTab lt WITH (NOLOCK)
+INNER JOIN (
+{vendors}
+) v ON v.OriCod = lt.OriCod
+   AND v.CiaCod = lt.CiaCod;
+""")
+
+
+# ============================================
+# DATASET DE LA CORRIDA
+# ============================================
+class _Slot:
+    """Dataset de un conjunto de proveedores; el lock serializa su cálculo."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dataset: Optional[LocationMetrics] = None
+
+
+_LOCK = threading.Lock()
+# Datasets de la corrida en curso por firma de las queries (None: sin corrida)
+_SHARED: Optional[Dict[str, _Slot]] = None
+
+
+@contextmanager
+def shared_run() -> Iterator[None]:
+    """
+    Comparte los datasets entre los reportes ejecutados dentro del bloque
+    (también desde varios threads). Se liberan al salir.
+    """
+    global _SHARED
+    with _LOCK:
+        outer = _SHARED is None
+        if outer:
+            _SHARED = {}
+    try:
+        yield
+    finally:
+        if outer:
+            with _LOCK:
+                _SHARED = None
+
+
+def location_metrics(
+    db: DatabaseConnection,
+    documents: SqlQuery,
+    locations: SqlQuery,
+    as_of: datetime = None
+) -> LocationMetrics:
+    """
+    Dataset por locación de los proveedores de las queries: el de la
+    corrida si ya se calculó, o leído y agregado ahora.
+    
+    Args:
+        db: Conexión activa
+        documents, locations: Queries de documents_query() y locations_query()
+        as_of: Fecha de referencia fija del reporte. Por defecto la del
+               dataset de la corrida, o GETDATE() del servidor.
+    """
+    key = f"{documents.signature()}\n{locations.signature()}"
+    with _LOCK:
+        slot = None if _SHARED is None else _SHARED.setdefault(key, _Slot())
+    if slot is None:
+        return _load(db, documents, locations, as_of)
+    
+    # Un segundo reporte concurrente espera el cálculo del primero
+    with slot.lock:
+        dataset = slot.dataset
+        if dataset is not None and (as_of is None or pd.Timestamp(as_of) == dataset.as_of):
+            print(f"  Métricas por locación de la corrida: {len(dataset.metrics):,} locaciones "
+                  f"(referencia {dataset.as_of:%Y-%m-%d %H:%M:%S})")
+            return dataset
+        dataset = _load(db, documents, locations, as_of)
+        if slot.dataset is None:
+            slot.dataset = dataset
+        return dataset
+
+
+def _load(
+    db: DatabaseConnection,
+    documents: SqlQuery,
+    locations: SqlQuery,
+    as_of: datetime = None
+) -> LocationMetrics:
+    """Lee DocCab y LocTab y agrega las métricas por locación."""
+    # GETDATE() del servidor para que las ventanas coincidan con el SQL
+    as_of = pd.Timestamp(as_of if as_of is not None else db.server_time())
+    docs = db.execute_query(documents.text, params=documents.params or None)
+    locs = db.execute_query(locations.text, params=locations.params or None)
+    print(f"  DocCab leído: {len(docs):,} documentos")
+    
+    with metrics.stage("location_metrics"):
+        docs = engine.normalize_keys(docs, engine.LOCATION_KEYS)
+        locs = engine.normalize_keys(locs, engine.LOCATION_KEYS)
+        aggregated = engine.aggregate_doc_metrics(
+            docs, engine.DateBounds.from_reference(as_of), engine.LOCATION_KEYS
+        )
+    return LocationMetrics(as_of=as_of, locations=locs, metrics=aggregated)
@@ -4,9 +4,140 @@ Reporte Supplier Site
 Extrae datos a nivel de sitio/ubicación del proveedor.
 """
 import sys
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List
+
+import pandas as pd
 sys.path.insert(0, '../..')
 from reports.base import BaseReport
-from config.settings import CHF_RATE, DOC_TYPES, VALID_ORIGIN_CODES, EXCLUDED_VENDOR_CODES
+from reports.columns import AMOUNT_FORMAT, ColumnLayout, constant, same_as, source
+from reports.contacts import CONTACTS_TABLE, contact_column, contacts_join, contacts_stage
+from reports.dimensions import dimension_join
+from reports.query import QueryBuilder, SqlQuery
+from reports.suppliers import engine
+from reports.suppliers.engine import DateBounds
+from reports.suppliers.header import METRIC_COLUMNS, driving_set, vendor_conditions
+from reports.suppliers.locations import documents_query, location_metrics, locations_query
+from config.settings import CHF_RATE, DOC_TYPES
+from utils.database import DatabaseConnection
+
+
+# Columnas del template en orden. La query trae solo las expresiones
+# únicas; constantes y copias se completan al exportar (reports/columns.py)
+LAYOUT = ColumnLayout([
+    source("ORG_NAME (M)", "CASE WHEN ot.oricod = '011' then 'F490101' ELSE ot.oricod END"),
+    constant("ORGANIZATION_ID (M)"),
+    constant("BUSINESS_GROUP_ID (M)"),
+    source("VENDOR_NAME (M)", "ct.CiaDes"),
+    source("VENDOR_NUM (M)", "ct.CiaIdeNum"),
+    source("VENDOR_SITE_CODE (M)", "ind.IndDes"),
+    source("VENDOR_CREATION_DATE (M)", "ct.CiaFehCre"),
+    constant("VENDOR_SITE_CREATION_DATE (M)"),
+    constant("ADDRESS_STYLE (M)"),
+    constant("LANGUAGE"),
+    source("PROVINCE", "pvt.PvnDes"),
+    source("COUNTRY (M)", "pt.PaiDes"),
+    constant("AREA_CODE"),
+    source("PHONE", contact_column("PHONE")),
+    source("EMAIL_ADDRESS", contact_column("EMAIL")),
+    constant("CUSTOMER_NUM"),
+    constant("VENDOR_SITE_CODE_ALT"),
+    source("ADDRESS_LINE1 (M)", "lt.LocDir"),
+    constant("ADDRESS_LINE2"),
+    constant("ADDRESS_LINE3"),
+    constant("ADDRESS_LINES_ALT"),
+    source("CITY", "dt.DstDes"),
+    source("STATE", "dpt.DptDes"),
+    source("ZIP", "dt.DstPstCod"),
+    constant("ADDRESS_LINE4"),
+    constant("VAT_REGISTRATION_NUM"),
+    constant("VAT_CODE"),
+    source("DEFAULT_REP_COUNTRY_CODE", "ot.PaiCod"),
+    same_as("DEFAULT_REP_REG_NUMBER", "VENDOR_NUM (M)"),
+    constant("DEFAULT_REP_TAX_REG_TYPE"),
+    constant("PARTY_SITE_ID (M)"),
+    constant("PARTY_ID (M)"),
+    source("VENDOR_ID (M)", "ct.CiaCod"),
+    source("VENDOR_SITE_ID (M)", "CONCAT(RTRIM(lt.CiaCod), lt.LocCod)"),
+    source("LOCATION_ID (M)", "lt.LocCod"),
+    same_as("VENDOR_SITE_ID_2 (M)", "VENDOR_SITE_ID (M)"),
+    constant("ADDRESS_NAME (M)"),
+    constant("ADDRESSEE"),
+    source("TRX_1Y_AMOUNT_CHF (M)", "COALESCE(m.TRX_1Y_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TRX_2Y_AMOUNT_CHF (M)", "COALESCE(m.TRX_2Y_AMOUNT_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TRX_OP_BAL_CHF (M)", "COALESCE(m.TRX_OP_BAL_CHF, 0)", excel_format=AMOUNT_FORMAT),
+    source("TRX_1Y_COUNT (M)", "COALESCE(m.TRX_1Y_COUNT, 0)", dtype="int32"),
+    source("TRX_2Y_COUNT (M)", "COALESCE(m.TRX_2Y_COUNT, 0)", dtype="int32"),
+    source("TRX_OP_COUNT (M)", "COALESCE(m.TRX_OP_COUNT, 0)", dtype="int32"),
+    source("MIN_TRX_DATE (M)", "m.MIN_TRX_DATE"),
+    source("MAX_TRX_DATE (M)", "m.MAX_TRX_DATE"),
+    source("MIN_TRX_YEAR (M)", "m.MIN_TRX_YEAR", dtype="int16"),
+    source("MAX_TRX_YEAR (M)", "m.MAX_TRX_YEAR", dtype="int16"),
+    source("SUPPLIER_TRX_SOURCE_LIST (M)", "src.TRX_SOURCE_TAG"),
+    source("PO_2Y_OP_COUNT (M)", "COALESCE(po.PO_2Y_OP_COUNT, 0)", dtype="int32"),
+    source("PO_1Y_OP_COUNT (M)", "COALESCE(po.PO_1Y_OP_COUNT, 0)", dtype="int32"),
+    source("PO_OP_COUNT (M)", "COALESCE(po.PO_OP_COUNT, 0)", dtype="int32"),
+    source("MIN_PO_DATE (M)", "po.MIN_PO_DATE"),
+    source("MAX_PO_DATE (M)", "po.MAX_PO_DATE"),
+    source("PO_Agreement_COUNT (M)", "COALESCE(po.PO_Agreement_COUNT, 0)", dtype="int32"),
+    source("PO_Usage", "CASE WHEN lid.IndCod = 7 THEN 'Purchasing, Payment' WHEN lid.IndCod = 3 THEN 'Payment' ELSE NULL END"),
+])
+
+
+# Tablas de descripción (ver reports/dimensions.py). Con la caché de
+# dimensiones activa la query trae las llaves en lugar de estos joins
+DIMENSION_JOINS = (
+    dimension_join(
+        "ind", "IndTip",
+        keys={"IndGrp": "lid.IndGrp", "IndCod": "lid.IndCod", "OriCod": "lt.OriCod"},
+        columns={"VENDOR_SITE_CODE (M)": "IndDes"},
+        sql="""
+LEFT JOIN IndTip ind WITH (NOLOCK) ON ind.IndGrp = lid.IndGrp
+   AND ind.IndCod = lid.IndCod
+   AND ind.OriCod = lt.OriCod
+   AND ind.IndGrp = 9""",
+    ),
+    dimension_join(
+        "pt", "PaiTab",
+        keys={"PaiCod": "lt.PaiCod"},
+        columns={"COUNTRY (M)": "PaiDes"},
+        sql="LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod",
+    ),
+    dimension_join(
+        "dt", "DstTab",
+        keys={"DstCod": "lt.DstCod", "PaiCod": "lt.PaiCod", "DptCod": "lt.DptCod",
+              "PvnCod": "lt.PvnCod", "OriCod": "lt.OriCod"},
+        columns={"CITY": "DstDes", "ZIP": "DstPstCod"},
+        sql="""
+LEFT JOIN DstTab dt ON dt.DstCod = lt.DstCod
+   AND dt.PaiCod = lt.PaiCod
+   AND dt.DptCod = lt.DptCod
+   AND dt.PvnCod = lt.PvnCod
+   AND dt.OriCod = lt.OriCod""",
+    ),
+    dimension_join(
+        "dpt", "DptTab",
+        keys={"DptCod": "lt.DptCod", "OriCod": "lt.OriCod", "PaiCod": "lt.PaiCod"},
+        columns={"STATE": "DptDes"},
+        sql="""
+LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod
+   AND dpt.OriCod = lt.OriCod
+   AND dpt.PaiCod = lt.PaiCod
+   AND dpt.DptEst = '1'""",
+    ),
+    dimension_join(
+        "pvt", "PvnTab",
+        keys={"PvnCod": "lt.PvnCod", "OriCod": "lt.OriCod", "PaiCod": "lt.PaiCod", "DptCod": "lt.DptCod"},
+        columns={"PROVINCE": "PvnDes"},
+        requires=("dpt",),
+        sql="""
+LEFT JOIN PvnTab pvt ON pvt.PvnCod = lt.PvnCod
+   AND pvt.OriCod = lt.OriCod
+   AND pvt.PaiCod = lt.PaiCod
+   AND pvt.DptCod = dpt.DptCod""",
+    ),
+)
 
 
 class SupplierSiteReport(BaseReport):
@@ -18,176 +149,111 @@ class SupplierSiteReport(BaseReport):
     - Información de contacto por sitio
     - Métricas de transacciones por ubicación
     - Uso de PO (Purchasing/Payment)
+    
+    Motores:
+    - 'sql': todas las métricas se calculan en SQL Server (default)
+    - 'pandas': usa las métricas por locación de reports/suppliers/locations.py,
+      compartidas con supplier_header en la misma corrida
     """
     
+    SUPPORTED_ENGINES = ("sql", "pandas")
+    # El resultado va ordenado por ct.CiaCod: admite refresco incremental
+    # (el re-orden estable conserva el orden de las locaciones de cada
+    # proveedor) y ejecución particionada
+    INCREMENTAL_KEY = "VENDOR_ID (M)"
+    PARTITION_KEY = "VENDOR_ID (M)"
+    TEMP_TABLES = (CONTACTS_TABLE,)
+    DIMENSION_JOINS = DIMENSION_JOINS
+    
     def get_report_name(self) -> str:
         return "supplier_site"
     
     def get_sheet_name(self) -> str:
         return "Supplier Site"
     
-    def get_query(self) -> str:
-        """Query para supplier site - basado en queries/supplier-site.sql"""
-        
-        # Constantes para el query
-        chf_rate = CHF_RATE
-        invoice_debit = "','".join(DOC_TYPES.invoice_debit)
-        credit_notes = "','".join(DOC_TYPES.credit_notes)
-        balance_positive = "','".join(DOC_TYPES.balance_positive)
-        balance_negative = "','".join(DOC_TYPES.balance_negative)
-        purchase_orders = "','".join(DOC_TYPES.purchase_orders)
-        all_transactional = "','".join(DOC_TYPES.all_transactional)
-        excluded_docs = "','".join(DOC_TYPES.excluded)
-        valid_origins = "','".join(VALID_ORIGIN_CODES)
-        excluded_vendors = "','".join(EXCLUDED_VENDOR_CODES)
-        
-        return f"""
-DECLARE @CHF_RATE DECIMAL(18,9) = {chf_rate};
-SELECT
-    CASE
-        WHEN ot.oricod = '011' then 'F490101'
-        ELSE ot.oricod
-    END [ORG_NAME (M)],
-    '' AS [ORGANIZATION_ID (M)],
-    '' AS [BUSINESS_GROUP_ID (M)],
-    ct.CiaDes AS [VENDOR_NAME (M)],
-    ct.CiaIdeNum AS [VENDOR_NUM (M)],
-    ind.IndDes AS [VENDOR_SITE_CODE (M)],
-    ct.CiaFehCre AS [VENDOR_CREATION_DATE (M)],
-    '' AS [VENDOR_SITE_CREATION_DATE (M)],
-    '' AS [ADDRESS_STYLE (M)],
-    '' AS [LANGUAGE],
-    pvt.PvnDes AS [PROVINCE],
-    pt.PaiDes AS [COUNTRY (M)],
-    '' AS [AREA_CODE],
-    phone.TelNum AS [PHONE],
-    email.TelNum AS [EMAIL_ADDRESS],
-    '' AS [CUSTOMER_NUM],
-    '' AS [VENDOR_SITE_CODE_ALT],
-    lt.LocDir AS [ADDRESS_LINE1 (M)],
-    '' AS [ADDRESS_LINE2],
-    '' AS [ADDRESS_LINE3],
-    '' AS [ADDRESS_LINES_ALT],
-    dt.DstDes AS [CITY],
-    dpt.DptDes AS [STATE],
-    dt.DstPstCod AS [ZIP],
-    '' AS [ADDRESS_LINE4],
-    '' AS [VAT_REGISTRATION_NUM],
-    '' AS [VAT_CODE],
-    ot.PaiCod AS [DEFAULT_REP_COUNTRY_CODE],
-    ct.CiaIdeNum AS [DEFAULT_REP_REG_NUMBER],
-    '' AS [DEFAULT_REP_TAX_REG_TYPE],
-    '' AS [PARTY_SITE_ID (M)],
-    '' AS [PARTY_ID (M)],
-    ct.CiaCod AS [VENDOR_ID (M)],
-    CONCAT(RTRIM(lt.CiaCod), lt.LocCod) AS [VENDOR_SITE_ID (M)],
-    lt.LocCod AS [LOCATION_ID (M)],
-    CONCAT(RTRIM(lt.CiaCod), lt.LocCod) AS [VENDOR_SITE_ID_2 (M)],
-    '' AS [ADDRESS_NAME (M)],
-    '' AS [ADDRESSEE],
-    COALESCE(m.TRX_1Y_AMOUNT_CHF, 0) AS [TRX_1Y_AMOUNT_CHF (M)],
-    COALESCE(m.TRX_2Y_AMOUNT_CHF, 0) AS [TRX_2Y_AMOUNT_CHF (M)],
-    COALESCE(m.TRX_OP_BAL_CHF, 0) AS [TRX_OP_BAL_CHF (M)],
-    COALESCE(m.TRX_1Y_COUNT, 0) AS [TRX_1Y_COUNT (M)],
-    COALESCE(m.TRX_2Y_COUNT, 0) AS [TRX_2Y_COUNT (M)],
-    COALESCE(m.TRX_OP_COUNT, 0) AS [TRX_OP_COUNT (M)],
-    m.MIN_TRX_DATE AS [MIN_TRX_DATE (M)],
-    m.MAX_TRX_DATE AS [MAX_TRX_DATE (M)],
-    m.MIN_TRX_YEAR AS [MIN_TRX_YEAR (M)],
-    m.MAX_TRX_YEAR AS [MAX_TRX_YEAR (M)],
-    src.TRX_SOURCE_TAG AS [SUPPLIER_TRX_SOURCE_LIST (M)],
-    COALESCE(po.PO_2Y_OP_COUNT, 0) AS [PO_2Y_OP_COUNT (M)],
-    COALESCE(po.PO_1Y_OP_COUNT, 0) AS [PO_1Y_OP_COUNT (M)],
-    COALESCE(po.PO_OP_COUNT, 0) AS [PO_OP_COUNT (M)],
-    po.MIN_PO_DATE AS [MIN_PO_DATE (M)],
-    po.MAX_PO_DATE AS [MAX_PO_DATE (M)],
-    COALESCE(po.PO_Agreement_COUNT, 0) AS [PO_Agreement_COUNT (M)],
-    CASE
-        WHEN lid.IndCod = 7 THEN 'Purchasing, Payment'
-        WHEN lid.IndCod = 3 THEN 'Payment'
-        ELSE NULL
-    END AS [PO_Usage]
-FROM CiaTab ct WITH (NOLOCK)
+    def get_layout(self) -> ColumnLayout:
+        return LAYOUT
+    
+    def get_column_widths(self) -> Dict[str, float]:
+        # Montos CHF: ancho fijo, no se estiman desde los datos
+        return {
+            "TRX_1Y_AMOUNT_CHF (M)": 18,
+            "TRX_2Y_AMOUNT_CHF (M)": 18,
+            "TRX_OP_BAL_CHF (M)": 18,
+        }
+    
+    def get_driving_set(self, q: QueryBuilder) -> str:
+        return driving_set(q)
+    
+    def get_setup_statements(self, as_of: datetime = None) -> List[SqlQuery]:
+        """#CONTACTS: teléfono y email de las locaciones de los proveedores del reporte."""
+        q = QueryBuilder()
+        return [contacts_stage(q, self._get_vendor_keys_query(q), kinds=("PHONE", "EMAIL"))]
+    
+    def _get_vendor_keys_query(self, q: QueryBuilder) -> str:
+        """Llaves (OriCod, CiaCod) de los proveedores del reporte."""
+        return f"SELECT DISTINCT ct.OriCod, ct.CiaCod\n{driving_set(q)}{self._key_filter(q)}"
+    
+    def _get_from_clause(self) -> str:
+        """FROM y joins de atributos del sitio (comunes a ambos motores)."""
+        return f"""FROM CiaTab ct WITH (NOLOCK)
 INNER JOIN LocTab lt ON lt.CiaCod = ct.CiaCod
    AND lt.OriCod = ct.OriCod
 LEFT JOIN LID lid WITH (NOLOCK) ON lid.CiaCod = lt.CiaCod
    AND lid.LocCod = lt.LocCod
-   AND lid.OriCod = lt.OriCod
-LEFT JOIN IndTip ind WITH (NOLOCK) ON ind.IndGrp = lid.IndGrp
-   AND ind.IndCod = lid.IndCod
-   AND ind.OriCod = lt.OriCod
-   AND ind.IndGrp = 9
+   AND lid.OriCod = lt.OriCod{self._dimension_joins("ind")}
 LEFT JOIN Cid b ON b.OriCod = ct.OriCod
    AND b.CiaCod = ct.CiaCod
 LEFT JOIN IdeTip c WITH (NOLOCK) ON c.OriCod = ct.OriCod
    AND c.IdeTipCod = ct.IdeTipCod
 LEFT JOIN OriTab ot ON ot.OriCod = lt.OriCod
 LEFT JOIN CiaPar cp ON cp.CiaCod = lt.CiaCod
-   AND cp.ParCod = '7941'
-LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod
-LEFT JOIN DstTab dt ON dt.DstCod = lt.DstCod
-   AND dt.PaiCod = lt.PaiCod
-   AND dt.DptCod = lt.DptCod
-   AND dt.PvnCod = lt.PvnCod
-   AND dt.OriCod = lt.OriCod
-LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod
-   AND dpt.OriCod = lt.OriCod
-   AND dpt.PaiCod = lt.PaiCod
-   AND dpt.DptEst = '1'
-LEFT JOIN PvnTab pvt ON pvt.PvnCod = lt.PvnCod
-   AND pvt.OriCod = lt.OriCod
-   AND pvt.PaiCod = lt.PaiCod
-   AND pvt.DptCod = dpt.DptCod
-OUTER APPLY (
-    SELECT TOP (1) phone.TelNum
-    FROM TelTab phone
-    WHERE phone.CiaCod = lt.CiaCod
-      AND phone.OriCod = ot.OriCod
-      AND phone.TelEst = '1'
-      AND phone.LocCod = lt.LocCod
-      AND phone.TelTipCod = 1
-    ORDER BY phone.TelCod ASC
-) phone
-OUTER APPLY (
-    SELECT TOP (1) email.TelNum
-    FROM TelTab email
-    WHERE email.CiaCod = lt.CiaCod
-      AND email.OriCod = ot.OriCod
-      AND email.TelEst = '1'
-      AND email.LocCod = lt.LocCod
-      AND email.TelTipCod = 3
-    ORDER BY email.TelCod ASC
-) email
-OUTER APPLY (
-    SELECT TOP (1) url.TelNum
-    FROM TelTab url
-    WHERE url.CiaCod = lt.CiaCod
-      AND url.OriCod = ot.OriCod
-      AND url.TelEst = '1'
-      AND url.LocCod = lt.LocCod
-      AND url.TelTipCod = 4
-    ORDER BY url.TelCod ASC
-) url
+   AND cp.ParCod = '7941'{self._dimension_joins("pt", "dt", "dpt", "pvt")}
+{contacts_join("lt.CiaCod", "ot.OriCod", "lt.LocCod")}
 LEFT JOIN CiaCtaTab cct
     ON cct.CiaCod = ct.CiaCod
-   AND cct.Oricod = ct.OriCod
+   AND cct.Oricod = ct.OriCod"""
+    
+    def get_query(self, as_of: datetime = None) -> SqlQuery:
+        """Query para supplier site - basado en queries/supplier-site.sql"""
+        
+        # Constantes para el query (parámetros, ver reports/query.py)
+        bounds = DateBounds.from_reference(as_of or datetime.now())
+        q = QueryBuilder()
+        q.scalar("CHF_RATE", "DECIMAL(18,9)", Decimal(str(CHF_RATE)))
+        q.scalar("DATE_1Y", "DATETIME", bounds.one_year.to_pydatetime())
+        q.scalar("DATE_2Y", "DATETIME", bounds.two_years.to_pydatetime())
+        invoice_debit = q.codes("INVOICE_DEBIT", DOC_TYPES.invoice_debit)
+        credit_notes = q.codes("CREDIT_NOTES", DOC_TYPES.credit_notes)
+        balance_positive = q.codes("BALANCE_POSITIVE", DOC_TYPES.balance_positive)
+        balance_negative = q.codes("BALANCE_NEGATIVE", DOC_TYPES.balance_negative)
+        purchase_orders = q.codes("PURCHASE_ORDERS", DOC_TYPES.purchase_orders)
+        agreements = q.codes("AGREEMENTS", DOC_TYPES.agreements)
+        recent_activity = q.codes("RECENT_ACTIVITY", DOC_TYPES.recent_activity)
+        all_transactional = q.codes("ALL_TRANSACTIONAL", DOC_TYPES.all_transactional)
+        excluded_docs = q.codes("EXCLUDED_DOCS", DOC_TYPES.excluded)
+        
+        return q.build(f"""
+SELECT
+{self._select_list()}
+{self._get_from_clause()}
 OUTER APPLY (
     SELECT
         SUM(CASE
-                WHEN dc.DocFecCre >= DATEADD(YEAR, -1, GETDATE()) THEN
+                WHEN dc.DocFecCre >= @DATE_1Y THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{invoice_debit}') THEN  dc.DocMto * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{credit_notes}')      THEN -dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {credit_notes}      THEN -dc.DocMto * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
             END) AS TRX_1Y_AMOUNT_CHF,
         SUM(CASE
-                WHEN dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-                 AND dc.DocFecCre <  DATEADD(YEAR, -1, GETDATE()) THEN
+                WHEN dc.DocFecCre >= @DATE_2Y
+                 AND dc.DocFecCre <  @DATE_1Y THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{invoice_debit}') THEN  dc.DocMto * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{credit_notes}')      THEN -dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {invoice_debit} THEN  dc.DocMto * @CHF_RATE
+                        WHEN dc.DocTipCod IN {credit_notes}      THEN -dc.DocMto * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
@@ -195,22 +261,22 @@ OUTER APPLY (
         SUM(CASE
                 WHEN dc.DocSld > 0 THEN
                     CASE
-                        WHEN dc.DocTipCod IN ('{balance_positive}') THEN  dc.DocSld * @CHF_RATE
-                        WHEN dc.DocTipCod IN ('{balance_negative}')                     THEN -dc.DocSld * @CHF_RATE
+                        WHEN dc.DocTipCod IN {balance_positive} THEN  dc.DocSld * @CHF_RATE
+                        WHEN dc.DocTipCod IN {balance_negative}                     THEN -dc.DocSld * @CHF_RATE
                         ELSE 0
                     END
                 ELSE 0
             END) AS TRX_OP_BAL_CHF,
-        SUM(CASE WHEN dc.DocFecCre >= DATEADD(YEAR, -1, GETDATE()) THEN 1 ELSE 0 END) AS TRX_1Y_COUNT,
+        SUM(CASE WHEN dc.DocFecCre >= @DATE_1Y THEN 1 ELSE 0 END) AS TRX_1Y_COUNT,
         SUM(CASE
-                WHEN dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-                 AND dc.DocFecCre <  DATEADD(YEAR, -1, GETDATE()) THEN 1
+                WHEN dc.DocFecCre >= @DATE_2Y
+                 AND dc.DocFecCre <  @DATE_1Y THEN 1
                 ELSE 0
             END) AS TRX_2Y_COUNT,
         SUM(
         CASE
             WHEN dc.DocSld > 0
-            AND dc.DocTipCod IN ('{all_transactional}')
+            AND dc.DocTipCod IN {all_transactional}
             THEN 1 ELSE 0
         END
         ) AS TRX_OP_COUNT,
@@ -222,17 +288,17 @@ OUTER APPLY (
     WHERE dc.CiaCod = lt.CiaCod
       AND dc.OriCod = lt.OriCod
       AND dc.LocCod = lt.LocCod
-      AND dc.DocTipCod IN ('{all_transactional}')
+      AND dc.DocTipCod IN {all_transactional}
       AND dc.DocEst <> '0'
 ) m
 OUTER APPLY (
     SELECT
-        SUM(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 AND dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE()) THEN 1 ELSE 0 END) AS PO_2Y_OP_COUNT,
-        SUM(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 AND dc.DocFecCre >= DATEADD(YEAR, -1, GETDATE()) THEN 1 ELSE 0 END) AS PO_1Y_OP_COUNT,
-        SUM(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 THEN 1 ELSE 0 END) AS PO_OP_COUNT,
-        MIN(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MIN_PO_DATE,
-        MAX(CASE WHEN dc.DocTipCod IN ('{purchase_orders}') AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MAX_PO_DATE,
-        SUM(CASE WHEN dc.DocSld > 0 AND dc.DocTipCod IN ('CX') THEN 1 ELSE 0 END) AS PO_Agreement_COUNT
+        SUM(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 AND dc.DocFecCre >= @DATE_2Y THEN 1 ELSE 0 END) AS PO_2Y_OP_COUNT,
+        SUM(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 AND dc.DocFecCre >= @DATE_1Y THEN 1 ELSE 0 END) AS PO_1Y_OP_COUNT,
+        SUM(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 THEN 1 ELSE 0 END) AS PO_OP_COUNT,
+        MIN(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MIN_PO_DATE,
+        MAX(CASE WHEN dc.DocTipCod IN {purchase_orders} AND dc.DocSld > 0 THEN dc.DocFecCre END) AS MAX_PO_DATE,
+        SUM(CASE WHEN dc.DocSld > 0 AND dc.DocTipCod IN {agreements} THEN 1 ELSE 0 END) AS PO_Agreement_COUNT
     FROM DocCab dc WITH (NOLOCK)
     WHERE dc.CiaCod = lt.CiaCod
       AND dc.OriCod = lt.OriCod
@@ -241,10 +307,10 @@ OUTER APPLY (
 ) po
 OUTER APPLY (
     SELECT
-        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN ('{invoice_debit}') AND d.DocEst <> '0' AND d.DocFecCre >= DATEADD(YEAR, -1, GETDATE())) THEN 1 ELSE 0 END AS HAS_INV_1Y,
-        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN ('{invoice_debit}') AND d.DocEst <> '0' AND d.DocFecCre >= DATEADD(YEAR, -2, GETDATE())) THEN 1 ELSE 0 END AS HAS_INV_2Y,
-        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN ('{invoice_debit}') AND d.DocEst <> '0' AND d.DocSld > 0 AND d.DocFecCre < DATEADD(YEAR, -2, GETDATE())) THEN 1 ELSE 0 END AS HAS_INV_OP_OLD,
-        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN ('{purchase_orders}') AND d.DocEst <> '0' AND d.DocFecCre >= DATEADD(YEAR, -2, GETDATE())) THEN 1 ELSE 0 END AS HAS_PO_2Y
+        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN {invoice_debit} AND d.DocEst <> '0' AND d.DocFecCre >= @DATE_1Y) THEN 1 ELSE 0 END AS HAS_INV_1Y,
+        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN {invoice_debit} AND d.DocEst <> '0' AND d.DocFecCre >= @DATE_2Y) THEN 1 ELSE 0 END AS HAS_INV_2Y,
+        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN {invoice_debit} AND d.DocEst <> '0' AND d.DocSld > 0 AND d.DocFecCre < @DATE_2Y) THEN 1 ELSE 0 END AS HAS_INV_OP_OLD,
+        CASE WHEN EXISTS (SELECT 1 FROM DocCab d WITH (NOLOCK) WHERE d.CiaCod = lt.CiaCod AND d.OriCod = lt.OriCod AND d.LocCod = lt.LocCod AND d.DocTipCod IN {purchase_orders} AND d.DocEst <> '0' AND d.DocFecCre >= @DATE_2Y) THEN 1 ELSE 0 END AS HAS_PO_2Y
 ) f
 OUTER APPLY (
     SELECT
@@ -261,17 +327,17 @@ OUTER APPLY (
     FROM DocCab d WITH (NOLOCK)
     WHERE d.CiaCod = ct.CiaCod
       AND d.OriCod = ct.OriCod
-      AND d.DocTipCod IN ('{invoice_debit}')
+      AND d.DocTipCod IN {invoice_debit}
       AND d.DocEst <> '0'
-      AND d.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
+      AND d.DocFecCre >= @DATE_2Y
 ) trans
 OUTER APPLY (
     SELECT
         COALESCE(SUM(CASE
             WHEN dc.DocSld > 0 THEN
                 CASE
-                    WHEN dc.DocTipCod IN ('{balance_positive}') THEN  dc.DocSld * @CHF_RATE
-                    WHEN dc.DocTipCod IN ('{balance_negative}')                     THEN -dc.DocSld * @CHF_RATE
+                    WHEN dc.DocTipCod IN {balance_positive} THEN  dc.DocSld * @CHF_RATE
+                    WHEN dc.DocTipCod IN {balance_negative}                     THEN -dc.DocSld * @CHF_RATE
                     ELSE 0
                 END
             ELSE 0
@@ -280,15 +346,10 @@ OUTER APPLY (
     WHERE dc.CiaCod = lt.CiaCod
       AND dc.OriCod = lt.OriCod
       AND dc.LocCod = lt.LocCod
-      AND dc.DocTipCod IN ('{all_transactional}')
+      AND dc.DocTipCod IN {all_transactional}
       AND dc.DocEst <> '0'
 ) priority
-WHERE ct.OriCod IN ('{valid_origins}')
-  AND ct.CiaEst = '1'
-  AND b.IndGrp = '6'
-  AND b.IndCod = '2'
-  AND ct.CiaCod NOT IN ('{excluded_vendors}')
-  AND ct.CiaIdeNum NOT LIKE 'F%'
+{vendor_conditions(q)}{self._key_filter(q)}
   AND (
       lt.LocEst = '1'
       OR (lt.LocEst <> '1' AND priority.OPEN_BALANCE > 0)
@@ -303,8 +364,8 @@ WHERE ct.OriCod IN ('{valid_origins}')
             WHERE oc.CiaCod = lt.CiaCod
               AND oc.OriCod = lt.OriCod
               AND oc.LocCod = lt.LocCod
-              AND oc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-              AND oc.DocTipCod IN ('{purchase_orders}')
+              AND oc.DocFecCre >= @DATE_2Y
+              AND oc.DocTipCod IN {purchase_orders}
               AND oc.DocEst <> '0'
         )
         /* PRIORIDAD 3 (aquí sí exige transacciones + documento 2y) */
@@ -316,8 +377,8 @@ WHERE ct.OriCod IN ('{valid_origins}')
                 WHERE dc.CiaCod = lt.CiaCod
                     AND dc.OriCod = lt.OriCod
                     AND dc.LocCod = lt.LocCod
-                    AND dc.DocFecCre >= DATEADD(YEAR, -2, GETDATE())
-                    AND dc.DocTipCod IN ('AP','C2','FE','FP','NP','NA','DE', 'NO')
+                    AND dc.DocFecCre >= @DATE_2Y
+                    AND dc.DocTipCod IN {recent_activity}
                     AND dc.DocEst <> '0'
             )
         )
@@ -328,7 +389,81 @@ WHERE ct.OriCod IN ('{valid_origins}')
         WHERE d.CiaCod = ct.CiaCod
             AND d.OriCod = ct.OriCod
             AND d.DocEst <> '0'
-            AND d.DocTipCod IN ('{excluded_docs}')
+            AND d.DocTipCod IN {excluded_docs}
     )
 ORDER BY ct.CiaCod ASC;
-"""
+""")
+    
+    # ============================================
+    # MOTOR PANDAS
+    # ============================================
+    def get_attributes_query(self) -> SqlQuery:
+        """Atributos de los sitios de los proveedores, sin métricas de DocCab."""
+        q = QueryBuilder()
+        
+        return q.build(f"""
+SELECT
+    ct.OriCod AS [OriCod],
+    ct.CiaCod AS [CiaCod],
+    lt.LocCod AS [LocCod],
+    lt.LocEst AS [LocEst],
+{self._select_list(exclude=METRIC_COLUMNS)}
+{self._get_from_clause()}
+{vendor_conditions(q)}{self._key_filter(q)};
+""")
+    
+    def get_documents_query(self) -> SqlQuery:
+        """Lectura única de DocCab para los proveedores del reporte."""
+        q = QueryBuilder()
+        return documents_query(q, self._get_vendor_keys_query(q))
+    
+    def get_locations_query(self) -> SqlQuery:
+        """Locaciones de los proveedores del reporte."""
+        q = QueryBuilder()
+        return locations_query(q, self._get_vendor_keys_query(q))
+    
+    def fetch(self, db: DatabaseConnection, limit: int = None) -> pd.DataFrame:
+        """Obtiene los datos con el motor seleccionado."""
+        if self.engine == "pandas":
+            return self._fetch_pandas(db, limit=limit)
+        return super().fetch(db, limit=limit)
+    
+    def _fetch_pandas(self, db: DatabaseConnection, limit: int = None) -> pd.DataFrame:
+        """
+        Calcula el reporte desde las métricas por locación (leídas de DocCab
+        una sola vez por corrida, ver reports/suppliers/locations.py).
+        Produce las mismas filas y valores que get_query().
+        """
+        # Con límite se leen solo los primeros N proveedores del conjunto base
+        with self._limited(limit):
+            dataset = location_metrics(
+                db, self.get_documents_query(), self.get_locations_query(), self._as_of
+            )
+        
+        # La query de atributos une #CONTACTS, preparada en la misma sesión
+        tables = self._load_dimensions(db)
+        with self._staged(db, dataset.as_of, limit), self._limited(limit):
+            sites = self._run(db, self.get_attributes_query())
+        sites = self._resolve_dimensions(sites, tables)
+        sites = engine.normalize_keys(sites, engine.LOCATION_KEYS)
+        
+        metrics = engine.finalize_metrics(dataset.metrics)
+        df = engine.attach_metrics(sites, metrics, engine.LOCATION_KEYS)
+        
+        # DOC_COUNT_2Y y HAS_EXCLUDED: el SQL los evalúa sobre todo el proveedor
+        vendors = dataset.vendor_metrics(valid_only=False)[
+            engine.VENDOR_KEYS + ["DOC_COUNT_2Y", "HAS_EXCLUDED"]
+        ].rename(columns={"DOC_COUNT_2Y": "VENDOR_DOC_COUNT_2Y", "HAS_EXCLUDED": "VENDOR_HAS_EXCLUDED"})
+        df = df.merge(vendors, on=engine.VENDOR_KEYS, how="left")
+        df["VENDOR_DOC_COUNT_2Y"] = df["VENDOR_DOC_COUNT_2Y"].fillna(0)
+        df["VENDOR_HAS_EXCLUDED"] = df["VENDOR_HAS_EXCLUDED"].fillna(False).astype(bool)
+        df = df[engine.site_priority_mask(df)]
+        
+        # ORDER BY ct.CiaCod
+        df = df.sort_values("CiaCod", kind="stable")
+        df = df.rename(columns={metric: alias for alias, metric in METRIC_COLUMNS.items()})
+        df = df[LAYOUT.fetched_names].reset_index(drop=True)
+        
+        if limit:
+            df = df.head(limit)
+        return df
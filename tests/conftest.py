@@ -0,0 +1,42 @@
+"""
+Fixtures compartidas de los tests
+==================================
+Los tests corren contra el ERP sintético de benchmarks/erp.py cargado en
+SQLite, en una versión reducida (cientos de proveedores) para que la BD se
+genere en menos de un segundo.
+"""
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks import erp
+
+
+# Distribución reducida del ERP de los tests
+SMALL_ERP = {
+    "VENDORS_PER_SCALE": 400,
+    "HEAVY_VENDORS_PER_SCALE": 2,
+    "HEAVY_VENDOR_DOCS": 3_000,
+    "HEAVY_VENDOR_LOCATIONS": 8,
+    "MID_TIER_MEDIAN_DOCS": 60,
+}
+
+
+@pytest.fixture(scope="session")
+def erp_path(tmp_path_factory) -> Path:
+    """Archivo SQLite con el ERP sintético reducido (uno por sesión)."""
+    directory = tmp_path_factory.mktemp("erp")
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in SMALL_ERP.items():
+            patch.setattr(erp, name, value)
+        return erp.build_database(scale=1, seed=42, backend="sqlite", directory=str(directory))
+
+
+@pytest.fixture
+def erp_connection(erp_path):
+    """Conexión sqlite3 al ERP sintético."""
+    connection = erp.connect(erp_path)
+    yield connection
+    connection.close()
@@ -0,0 +1,46 @@
+"""
+Llave de caché de los reportes
+===============================
+El día de la llave es el del servidor (server_time), que es el que usan
+las ventanas de las queries, no el del cliente.
+"""
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+# pyodbc (importado por reports.base) requiere el driver manager ODBC
+pytest.importorskip("pyodbc")
+
+from benchmarks.bench_reports import LocalDatabase, LocalSupplierHeader
+from config.settings import DB_CONFIG
+from utils.cache import get_cache
+
+
+class _ServerDatabase(LocalDatabase):
+    """LocalDatabase con la fecha del servidor y la BD indicadas."""
+
+    def __init__(self, connection, now: pd.Timestamp, database: str = "erp"):
+        super().__init__(connection)
+        self.now = pd.Timestamp(now)
+        self.config = replace(DB_CONFIG, database=database)
+
+    def server_time(self) -> pd.Timestamp:
+        return self.now
+
+
+def _key(connection, now: pd.Timestamp, database: str = "erp") -> str:
+    report = LocalSupplierHeader(_ServerDatabase(connection, now, database), cache="use")
+    return report._cache_key()
+
+
+def test_cache_key_uses_server_day(erp_connection):
+    text = LocalSupplierHeader(cache="use").get_cache_text()
+    # Servidor ya en el día siguiente (zona horaria distinta del cliente)
+    server_day = pd.Timestamp.now().normalize() + pd.Timedelta(days=1, hours=0.5)
+    config = replace(DB_CONFIG, database="erp")
+
+    assert _key(erp_connection, server_day) == get_cache().make_key(text, config, server_day.date())
+    assert _key(erp_connection, server_day) == _key(erp_connection, server_day + pd.Timedelta(hours=20))
+    assert _key(erp_connection, server_day) != _key(erp_connection, server_day + pd.Timedelta(days=1))
+    assert _key(erp_connection, server_day) != _key(erp_connection, server_day, database="erp_b")
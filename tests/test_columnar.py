@@ -0,0 +1,72 @@
+"""
+Lector columnar frente a pd.read_sql
+=====================================
+El lector columnar (utils/columnar.py) es opt-in y debe entregar los
+mismos valores y dtypes que read_sql, sobre un cursor con los tipos de
+pyodbc (Decimal, datetime, int con NULL, texto corto) y sobre SQLite.
+"""
+import datetime
+import decimal
+import sqlite3
+import warnings
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_fetch import RecordConnection
+from utils.columnar import DATETIME_DTYPE, fetch_columnar
+
+
+ROWS = [
+    ("A1", "CO", decimal.Decimal("123456789012.123456789"), datetime.datetime(2024, 3, 1), 3, True),
+    ("A2", None, None, None, None, False),
+    ("A3", "EC", decimal.Decimal("-0.5"), datetime.datetime(2025, 7, 15, 8, 30), 7, True),
+]
+DESCRIPTION = [
+    ("VENDOR_ID", str, 20, 20, 20, 0, True),
+    ("COUNTRY", str, 3, 3, 3, 0, True),
+    ("AMOUNT", decimal.Decimal, 38, 38, 38, 11, True),
+    ("MIN_PO_DATE", datetime.datetime, 23, 23, 23, 3, True),
+    ("PO_COUNT", int, 10, 10, 10, 0, True),
+    ("ACTIVE", bool, 1, 1, 1, 0, False),
+]
+
+
+def _read_sql(query, connection) -> pd.DataFrame:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        return pd.read_sql(query, connection)
+
+
+def test_matches_read_sql_on_pyodbc_types():
+    connection = RecordConnection(ROWS, DESCRIPTION)
+    expected = _read_sql("SELECT", connection)
+    # Lotes de 2 filas: el NULL de PO_COUNT llega en el primer lote
+    result = fetch_columnar(connection.cursor().execute(), batch_size=2)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result["MIN_PO_DATE"].dtype == DATETIME_DTYPE
+    assert result["PO_COUNT"].dtype == "float64"
+    assert result["AMOUNT"].iloc[0] == pytest.approx(123456789012.12346)
+
+
+def test_matches_read_sql_on_sqlite():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (code TEXT, amount REAL, count INTEGER)")
+    connection.executemany("INSERT INTO t VALUES (?, ?, ?)", [(None, None, None), ("X", 1.5, 2), ("Y", 2.5, 3)])
+
+    result = fetch_columnar(connection.execute("SELECT * FROM t"), batch_size=1)
+    pd.testing.assert_frame_equal(result, _read_sql("SELECT * FROM t", connection))
+    assert result["count"].dtype == "float64"
+    connection.close()
+
+
+def test_execute_query_does_not_warn(monkeypatch):
+    pytest.importorskip("pyodbc")
+    from utils.database import DatabaseConnection
+
+    db = DatabaseConnection(connection=RecordConnection(ROWS, DESCRIPTION))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        expected = db.execute_query("SELECT")
+    pd.testing.assert_frame_equal(db.execute_query("SELECT", backend="columnar"), expected)
@@ -0,0 +1,174 @@
+"""
+Daemon de reportes sobre el ERP sintético
+==========================================
+El daemon ejecuta supplier_header (motor pandas, lecturas locales de
+benchmarks/bench_reports.py) contra el ERP sintético en SQLite, a través
+de su API HTTP.
+"""
+import http.client
+import json
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# pyodbc (importado por reports.base) requiere el driver manager ODBC
+pytest.importorskip("pyodbc")
+
+import daemon as daemon_module
+from benchmarks import erp
+from benchmarks.bench_reports import LocalDatabase
+from config.settings import DAEMON_CONFIG
+from reports import base
+from reports.registry import REPORTS, ReportSpec
+
+
+REPORT = "bench_supplier_header"
+
+
+@pytest.fixture
+def gate():
+    """Evento que deja avanzar a los reportes (abierto por defecto)."""
+    event = threading.Event()
+    event.set()
+    return event
+
+
+@pytest.fixture
+def local_reports(monkeypatch, erp_path, gate):
+    """Registra el reporte local y conecta los reportes al ERP sintético."""
+    monkeypatch.setitem(REPORTS, REPORT, ReportSpec(
+        REPORT, "benchmarks.bench_reports", "LocalSupplierHeader", "supplier_header local"
+    ))
+    paths = {"erp": erp_path}
+
+    @contextmanager
+    def open_connection():
+        gate.wait(timeout=10)
+        connection = erp.connect(paths["erp"])
+        try:
+            yield LocalDatabase(connection)
+        finally:
+            connection.close()
+
+    monkeypatch.setattr(base, "open_connection", open_connection)
+    return paths
+
+
+@pytest.fixture
+def server(tmp_path, local_reports):
+    config = replace(
+        DAEMON_CONFIG, workers=1, max_queued=1, preload=False, warm_connections=0,
+        output_dir=str(tmp_path / "exports")
+    )
+    daemon = daemon_module.ReportDaemon(config).start()
+    server = daemon_module.create_server(daemon, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    daemon.shutdown(wait=True)
+
+
+def _request(server, method, path, body=None, headers=None):
+    host, port = server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        payload = json.dumps(body) if isinstance(body, dict) else body
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        connection.request(method, path, payload, headers)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        connection.close()
+
+
+def _job(**options):
+    return dict({"report": REPORT, "engine": "pandas", "cache": "off", "format": "parquet"}, **options)
+
+
+def test_submit_and_wait(server):
+    status, job = _request(server, "POST", "/jobs", _job(wait=True))
+    assert status == 200, job
+    assert job["status"] == "ok"
+    output = Path(job["output_path"])
+    assert output.parent == Path(server.daemon.config.output_dir).resolve()
+    assert len(pd.read_parquet(output)) > 0
+
+    status, polled = _request(server, "GET", f"/jobs/{job['job']}")
+    assert status == 200 and polled["status"] == "ok"
+
+
+def test_full_queue_returns_503(server, gate):
+    gate.clear()
+    try:
+        assert _request(server, "POST", "/jobs", _job())[0] == 202
+        assert _request(server, "POST", "/jobs", _job())[0] == 202
+        status, body = _request(server, "POST", "/jobs", _job())
+        assert status == 503, body
+    finally:
+        gate.set()
+
+
+def test_failed_report_returns_error(server, local_reports, tmp_path):
+    # BD sin tablas: la lectura de DocCab falla dentro del trabajo
+    empty = tmp_path / "empty.sqlite"
+    sqlite3.connect(empty).close()
+    local_reports["erp"] = str(empty)
+
+    status, job = _request(server, "POST", "/jobs", _job(wait=True))
+    assert status == 500
+    assert job["status"] == "error"
+    assert "no such table" in job["error"]
+
+
+def test_rejects_browser_and_non_json_requests(server):
+    status, _ = _request(server, "POST", "/jobs", _job(), {"Origin": "https://example.com"})
+    assert status == 403
+    status, _ = _request(server, "GET", "/health", headers={"Origin": "null"})
+    assert status == 403
+    status, _ = _request(server, "POST", "/jobs", json.dumps(_job()),
+                         {"Content-Type": "application/x-www-form-urlencoded"})
+    assert status == 415
+
+
+@pytest.mark.parametrize("field, value", [
+    ("output_path", "../outside.parquet"),
+    ("output_path", "/tmp/outside.parquet"),
+    ("output_dir", "/"),
+])
+def test_rejects_outputs_outside_output_dir(server, field, value):
+    status, body = _request(server, "POST", "/jobs", _job(**{field: value}))
+    assert status == 400, body
+    assert field in body["error"]
+
+
+def test_unix_socket_of_running_daemon_is_kept(tmp_path, local_reports):
+    path = str(tmp_path / "daemon.sock")
+    config = replace(DAEMON_CONFIG, preload=False, warm_connections=0, output_dir=str(tmp_path))
+    daemon = daemon_module.ReportDaemon(config)
+    server = daemon_module.create_server(daemon, socket_path=path)
+    try:
+        with pytest.raises(OSError):
+            daemon_module.create_server(daemon, socket_path=path)
+        # El socket del daemon en ejecución sigue aceptando conexiones
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.connect(path)
+        probe.close()
+    finally:
+        server.server_close()
+        daemon.shutdown(wait=True)
+    assert not Path(path).exists()
+
+    # Un socket huérfano (sin proceso) sí se reemplaza
+    orphan = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    orphan.bind(path)
+    orphan.close()
+    server = daemon_module.create_server(daemon, socket_path=path)
+    server.server_close()
@@ -0,0 +1,90 @@
+"""
+Resolución de descripciones con la caché de dimensiones
+========================================================
+"""
+from dataclasses import replace
+
+import pandas as pd
+
+from config.settings import DB_CONFIG
+from reports.dimensions import (
+    DIMENSIONS, DimensionCache, _LoadedDimension, dimension_join, key_column, resolve_dimensions
+)
+
+
+COUNTRY = dimension_join(
+    "pt", "PaiTab",
+    keys={"PaiCod": "lt.PaiCod"},
+    columns={"COUNTRY (M)": "PaiDes"},
+    sql="LEFT JOIN PaiTab pt ON pt.PaiCod = lt.PaiCod",
+)
+STATE = dimension_join(
+    "dpt", "DptTab",
+    keys={"DptCod": "lt.DptCod", "OriCod": "'011'", "PaiCod": "lt.PaiCod"},
+    columns={"STATE": "DptDes"},
+    requires=("pt",),
+    sql="LEFT JOIN DptTab dpt ON dpt.DptCod = lt.DptCod AND dpt.OriCod = '011' AND dpt.PaiCod = pt.PaiCod",
+)
+
+COUNTRIES = pd.DataFrame({"PaiCod": ["CO ", "ec", "PE"], "PaiDes": ["COLOMBIA", "ECUADOR", "PERU"]})
+STATES = pd.DataFrame({
+    "OriCod": ["011", "011", "011"],
+    "PaiCod": ["CO", "EC", "XX"],
+    "DptCod": ["01", "01", "01"],
+    "DptDes": ["ANTIOQUIA", "AZUAY", "HUERFANO"],
+})
+
+
+def _tables():
+    return {
+        "PaiTab": _LoadedDimension(DIMENSIONS["PaiTab"], COUNTRIES),
+        "DptTab": _LoadedDimension(DIMENSIONS["DptTab"], STATES),
+    }
+
+
+def test_keys_compare_like_sql_server():
+    df = pd.DataFrame({
+        "ID": [1, 2, 3, 4, 5],
+        key_column("lt.PaiCod"): ["co", "EC  ", None, "ZZ", "XX"],
+        key_column("lt.DptCod"): ["01", "01", "01", "01", "01"],
+    })
+    result = resolve_dimensions(df, [COUNTRY, STATE], _tables())
+
+    assert list(result.columns) == ["ID", "COUNTRY (M)", "STATE"]
+    assert result["COUNTRY (M)"].tolist()[:2] == ["COLOMBIA", "ECUADOR"]
+    assert result["COUNTRY (M)"].isna().tolist() == [False, False, True, True, True]
+    # STATE requiere que pt encuentre fila: XX tiene departamento pero no país
+    assert result["STATE"].tolist()[:2] == ["ANTIOQUIA", "AZUAY"]
+    assert result["STATE"].isna().tolist() == [False, False, True, True, True]
+
+
+class _Database:
+    """BD de una sola dimensión (PaiTab) con conteo y checksum fijos."""
+
+    def __init__(self, database: str, countries: pd.DataFrame):
+        self.config = replace(DB_CONFIG, database=database)
+        self.countries = countries
+        self.loads = 0
+
+    def execute_query(self, query: str, params=None) -> pd.DataFrame:
+        if "CHECKSUM_AGG" in query:
+            return pd.DataFrame({"TableName": ["PaiTab"], "TableRows": [3], "TableChecksum": [7]})
+        self.loads += 1
+        return self.countries
+
+
+def test_manifest_is_keyed_on_connection_database(tmp_path):
+    first = _Database("erp_a", COUNTRIES)
+    second = _Database("erp_b", COUNTRIES.assign(PaiDes=["COLOMBIA B", "ECUADOR B", "PERU B"]))
+    df = pd.DataFrame({key_column("lt.PaiCod"): ["CO"]})
+
+    cache = DimensionCache(directory=str(tmp_path), check_seconds=0)
+    assert cache.resolve(first, df, [COUNTRY])["COUNTRY (M)"].tolist() == ["COLOMBIA"]
+    # Mismo conteo y checksum en otra BD: no se reutiliza la dimensión de la primera
+    assert cache.resolve(second, df, [COUNTRY])["COUNTRY (M)"].tolist() == ["COLOMBIA B"]
+
+    # Otro proceso: la segunda BD usa el archivo en disco y la primera se recarga
+    assert DimensionCache(directory=str(tmp_path)).resolve(second, df, [COUNTRY])["COUNTRY (M)"].tolist() == ["COLOMBIA B"]
+    assert second.loads == 1
+    assert DimensionCache(directory=str(tmp_path)).resolve(first, df, [COUNTRY])["COUNTRY (M)"].tolist() == ["COLOMBIA"]
+    assert first.loads == 2
@@ -0,0 +1,37 @@
+"""
+Enteros declarados y por sufijo con nulos
+==========================================
+Con nulos se usa el entero con máscara del mismo ancho y signo.
+"""
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import DTYPE_CONFIG
+from utils.dtypes import DtypeOptimizer, masked_integer
+
+
+@pytest.mark.parametrize("dtype, expected", [
+    ("int8", "Int8"), ("int32", "Int32"), ("int64", "Int64"),
+    ("uint8", "UInt8"), ("uint16", "UInt16"), ("uint32", "UInt32"),
+])
+def test_masked_integer(dtype, expected):
+    assert masked_integer(dtype) == expected
+
+
+def test_declared_unsigned_with_nulls():
+    df = pd.DataFrame({"PO_COUNT (M)": [1.0, np.nan, 3.0], "OTHER": [1, 2, 3]})
+    result = DtypeOptimizer(declared={"PO_COUNT (M)": "uint32", "OTHER": "uint32"}).optimize(df)
+    assert result["PO_COUNT (M)"].dtype == "UInt32"
+    assert result["PO_COUNT (M)"].isna().tolist() == [False, True, False]
+    assert result["OTHER"].dtype == "uint32"
+
+
+def test_suffix_target_with_nulls():
+    config = replace(DTYPE_CONFIG, integer_suffixes=(("_COUNT", "uint16"), ("_YEAR", "int16")))
+    df = pd.DataFrame({"TRX_COUNT (M)": [1.0, np.nan], "MIN_YEAR (M)": [2024.0, np.nan]})
+    result = DtypeOptimizer(config=config).optimize(df)
+    assert result["TRX_COUNT (M)"].dtype == "UInt16"
+    assert result["MIN_YEAR (M)"].dtype == "Int16"
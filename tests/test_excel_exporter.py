@@ -0,0 +1,59 @@
+"""
+Schema de los exportadores Arrow/Parquet y de la caché
+=======================================================
+Una columna toda nula en el primer chunk (ej: MIN_PO_DATE de proveedores
+sin órdenes) debe tomar el tipo del primer chunk que trae valores.
+"""
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from utils.cache import ResultCache
+from utils.excel_exporter import ArrowChunkSchema, ArrowExporter, ParquetExporter
+
+
+def _chunks():
+    dates = pd.to_datetime(["2024-03-01", None, "2025-07-15"])
+    return [
+        pd.DataFrame({"VENDOR_ID": ["A1", "A2"], "MIN_PO_DATE": [None, None], "EMPTY": [None, None]}),
+        pd.DataFrame({"VENDOR_ID": ["B1", "B2", "B3"], "MIN_PO_DATE": dates, "EMPTY": [None] * 3}),
+    ]
+
+
+def _check(df: pd.DataFrame) -> None:
+    assert df["VENDOR_ID"].tolist() == ["A1", "A2", "B1", "B2", "B3"]
+    assert pd.api.types.is_datetime64_any_dtype(df["MIN_PO_DATE"])
+    assert df["MIN_PO_DATE"].isna().tolist() == [True, True, False, True, False]
+    assert df["MIN_PO_DATE"].iloc[4] == pd.Timestamp("2025-07-15")
+    assert df["EMPTY"].isna().all()
+
+
+@pytest.mark.parametrize("exporter, read", [
+    (ParquetExporter, pd.read_parquet),
+    (ArrowExporter, pd.read_feather),
+])
+def test_null_first_chunk_takes_type_from_later_chunk(tmp_path, exporter, read):
+    path = exporter(str(tmp_path / "out")).export_chunks(iter(_chunks()))
+    _check(read(path))
+
+
+def test_cache_writer_null_first_chunk(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    with cache.writer("key") as writer:
+        for chunk in _chunks():
+            writer.write(chunk)
+    assert writer.rows == 5
+    _check(cache.get("key"))
+
+
+def test_untyped_columns_fall_back_to_string():
+    schemas = ArrowChunkSchema(hold_rows=2)
+    first = pd.DataFrame({"ID": [1, 2], "DATE": [None, None]})
+    assert schemas.add(first) == [first]
+    assert schemas.schema.field("DATE").type == pa.large_string()
+
+    late = pd.DataFrame({"ID": [3], "DATE": pd.to_datetime(["2025-01-02"])})
+    assert schemas.add(late) == [late]
+    table = pa.Table.from_pandas(schemas.conform(late), schema=schemas.schema, preserve_index=False)
+    assert table.column("DATE").to_pylist() == ["2025-01-02 00:00:00"]
@@ -0,0 +1,138 @@
+"""
+Reserva de conexiones del pool para la ejecución particionada
+==============================================================
+Las conexiones del pool son sqlite3 en memoria (mismo protocolo DB-API
+que usa el pool: cursor, rollback, close).
+"""
+import sqlite3
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+
+# pyodbc (importado por utils.database) requiere el driver manager ODBC
+pytest.importorskip("pyodbc")
+
+from config.settings import POOL_CONFIG
+from utils import database
+from utils.database import ConnectionPool, DatabaseConnection
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ConnectionPool(pool_config=replace(POOL_CONFIG, size=4, checkout_timeout=0.5))
+    monkeypatch.setattr(pool, "_connect", lambda: sqlite3.connect(":memory:", check_same_thread=False))
+    yield pool
+    pool.close()
+
+
+def test_acquire_many_takes_free_connections_without_waiting(pool):
+    held = pool.acquire()
+    first = pool.acquire_many(2)
+    assert len(first) == 2
+
+    # Solo queda una libre: se entrega esa, sin esperar a las demás
+    second = pool.acquire_many(3)
+    assert len(second) == 1
+    assert pool.acquire_many(3) == []
+
+    for connection in [held] + first + second:
+        pool.release(connection)
+    assert len(pool.acquire_many(8)) == 4
+    assert pool.stats()["waits"] == 0
+
+
+def test_concurrent_partitioned_runs_do_not_deadlock(pool):
+    """Cada reporte tiene su conexión (db) y reserva 3 para sus particiones."""
+    barrier = threading.Barrier(2)
+    reserved = {}
+
+    def run(name):
+        with DatabaseConnection(pool=pool):
+            barrier.wait()
+            connections = pool.acquire_many(3)
+            reserved[name] = len(connections)
+            barrier.wait()
+            for connection in connections:
+                pool.release(connection)
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert sum(reserved.values()) == 2
+    assert pool.stats()["in_use"] == 0
+
+
+def test_reserved_connections_return_to_pool(pool, monkeypatch):
+    monkeypatch.setattr(database, "get_pool", lambda: pool)
+    connections = database.reserve_connections(3)
+    assert len(connections) == 3
+
+    with connections[0] as db:
+        assert db.execute_query("SELECT 1 AS X")["X"].tolist() == [1]
+    assert pool.stats()["in_use"] == 2
+    for connection in connections:
+        connection.close()
+        connection.close()
+    assert pool.stats()["in_use"] == 0
+
+
+class _SlowConnection:
+    """Conexión medio caída: validación y rollback esperan a `gate`."""
+
+    def __init__(self, gate: threading.Event):
+        self.gate = gate
+        self.inner = sqlite3.connect(":memory:", check_same_thread=False)
+
+    def cursor(self):
+        self.gate.wait(10)
+        return self.inner.cursor()
+
+    def rollback(self):
+        self.gate.wait(10)
+        self.inner.rollback()
+
+    def close(self):
+        self.inner.close()
+
+
+def _fast(pool):
+    """Toma y devuelve las 3 conexiones restantes; retorna los segundos que tardó."""
+    start = time.monotonic()
+    connections = pool.acquire_many(3)
+    assert len(connections) == 3
+    for connection in connections:
+        pool.release(connection)
+    pool.release(pool.acquire())
+    return time.monotonic() - start
+
+
+@pytest.mark.parametrize("stage", ["rollback", "validation"])
+def test_slow_connection_does_not_block_the_pool(pool, monkeypatch, stage):
+    gate = threading.Event()
+    connect = pool._connect
+    monkeypatch.setattr(pool, "_connect", lambda: _SlowConnection(gate))
+    slow = pool.acquire()
+    monkeypatch.setattr(pool, "_connect", connect)
+
+    if stage == "rollback":
+        blocked = threading.Thread(target=pool.release, args=(slow,))
+    else:
+        gate.set()
+        pool.release(slow)
+        gate.clear()
+        blocked = threading.Thread(target=pool.acquire)
+    blocked.start()
+    try:
+        time.sleep(0.1)
+        # La conexión lenta sigue ocupando su cupo; las otras 3 no la esperan
+        assert _fast(pool) < 1
+    finally:
+        gate.set()
+        blocked.join(timeout=10)
+    assert not blocked.is_alive()
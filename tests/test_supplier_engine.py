@@ -0,0 +1,198 @@
+"""
+Paridad del motor pandas de supplier_header con el SQL
+=======================================================
+Compara el reporte con engine='pandas' (lecturas locales de
+benchmarks/bench_reports.py) contra una agregación de referencia escrita
+en SQL sobre el mismo ERP sintético, con las reglas de
+queries/supplier-header.sql: VALID_LOCS, montos 1Y/2Y, saldo abierto y
+filtros de prioridad.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+# pyodbc (importado por reports.base) requiere el driver manager ODBC
+pytest.importorskip("pyodbc")
+
+from benchmarks import erp
+from benchmarks.bench_reports import LocalDatabase, LocalSupplierHeader
+from config.settings import CHF_RATE, DOC_TYPES
+from reports.query import SqlQuery
+from reports.suppliers import engine
+from reports.suppliers.locations import location_metrics
+
+
+BOUNDS = engine.DateBounds.from_reference(erp.REFERENCE_DATE)
+DATE_1Y = f"'{BOUNDS.one_year:%Y-%m-%d %H:%M:%S}'"
+DATE_2Y = f"'{BOUNDS.two_years:%Y-%m-%d %H:%M:%S}'"
+
+
+def _codes(values) -> str:
+    return "(" + ", ".join(f"'{value}'" for value in values) + ")"
+
+
+TRX = _codes(DOC_TYPES.all_transactional)
+INVOICE = _codes(DOC_TYPES.invoice_debit)
+CREDIT = _codes(DOC_TYPES.credit_notes)
+BALANCE_POSITIVE = _codes(DOC_TYPES.balance_positive)
+BALANCE_NEGATIVE = _codes(DOC_TYPES.balance_negative)
+PURCHASE_ORDERS = _codes(DOC_TYPES.purchase_orders)
+RECENT = _codes(DOC_TYPES.recent_activity)
+EXCLUDED = _codes(DOC_TYPES.excluded)
+
+VALID_LOCS = f"""
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod FROM LocTab lt WHERE lt.LocEst = '1'
+UNION
+SELECT lt.OriCod, lt.CiaCod, lt.LocCod FROM LocTab lt
+WHERE lt.LocEst = '0'
+  AND EXISTS (
+      SELECT 1 FROM DocCab dc
+      WHERE dc.OriCod = lt.OriCod AND dc.CiaCod = lt.CiaCod AND dc.LocCod = lt.LocCod
+        AND dc.DocSld > 0 AND dc.DocTipCod IN {TRX} AND dc.DocEst <> '0'
+  )"""
+
+
+def reference_header(connection) -> pd.DataFrame:
+    """supplier_header calculado en SQL (SQLite), una fila por proveedor."""
+    where = LocalSupplierHeader()._vendor_filter()
+    query = f"""
+WITH vendors AS (
+    SELECT DISTINCT ct.OriCod, ct.CiaCod
+    FROM CiaTab ct
+    LEFT JOIN Cid b ON b.OriCod = ct.OriCod AND b.CiaCod = ct.CiaCod
+    {where.text}
+      -- CROSS APPLY de la locación activa principal
+      AND EXISTS (
+          SELECT 1 FROM LocTab l
+          WHERE l.OriCod = ct.OriCod AND l.CiaCod = ct.CiaCod AND l.LocEst = '1'
+      )
+),
+valid_locs AS ({VALID_LOCS}
+),
+docs AS (
+    SELECT dc.*
+    FROM DocCab dc
+    INNER JOIN valid_locs v ON v.OriCod = dc.OriCod AND v.CiaCod = dc.CiaCod AND v.LocCod = dc.LocCod
+    WHERE dc.DocEst <> '0'
+)
+SELECT
+    v.CiaCod,
+    SUM(CASE WHEN d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_1Y} THEN
+        CASE WHEN d.DocTipCod IN {INVOICE} THEN d.DocMto WHEN d.DocTipCod IN {CREDIT} THEN -d.DocMto ELSE 0 END
+    END) AS TRX_1Y,
+    SUM(CASE WHEN d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_2Y} AND d.DocFecCre < {DATE_1Y} THEN
+        CASE WHEN d.DocTipCod IN {INVOICE} THEN d.DocMto WHEN d.DocTipCod IN {CREDIT} THEN -d.DocMto ELSE 0 END
+    END) AS TRX_2Y,
+    SUM(CASE WHEN d.DocTipCod IN {TRX} AND d.DocSld > 0 THEN
+        CASE WHEN d.DocTipCod IN {BALANCE_POSITIVE} THEN d.DocSld WHEN d.DocTipCod IN {BALANCE_NEGATIVE} THEN -d.DocSld ELSE 0 END
+    END) AS OPEN_BALANCE,
+    SUM(d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_1Y}) AS TRX_1Y_COUNT,
+    SUM(d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_2Y} AND d.DocFecCre < {DATE_1Y}) AS TRX_2Y_COUNT,
+    SUM(d.DocTipCod IN {TRX} AND d.DocSld > 0) AS TRX_OP_COUNT,
+    SUM(d.DocTipCod IN {INVOICE} AND d.DocFecCre >= {DATE_2Y}) AS DOC_COUNT_2Y,
+    MAX(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocFecCre >= {DATE_2Y}) AS HAS_PO_2Y,
+    MAX(d.DocTipCod IN {RECENT} AND d.DocFecCre >= {DATE_2Y}) AS HAS_RECENT_2Y,
+    MAX(d.DocTipCod IN {EXCLUDED}) AS HAS_EXCLUDED,
+    CASE
+        WHEN MAX(d.DocTipCod IN {INVOICE} AND d.DocSld > 0 AND d.DocFecCre < {DATE_2Y}) THEN 'INV_OP'
+        WHEN MAX(d.DocTipCod IN {INVOICE} AND d.DocFecCre >= {DATE_1Y}) THEN 'INV_1Y'
+        WHEN MAX(d.DocTipCod IN {INVOICE} AND d.DocFecCre >= {DATE_2Y}) THEN 'INV_2Y'
+        WHEN MAX(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocFecCre >= {DATE_2Y}) THEN 'POH_OP'
+        ELSE 'NO_TRX_AT_ALL'
+    END AS TRX_SOURCE_TAG
+FROM vendors v
+LEFT JOIN docs d ON d.OriCod = v.OriCod AND d.CiaCod = v.CiaCod
+GROUP BY v.OriCod, v.CiaCod
+HAVING (
+        OPEN_BALANCE > 0
+        OR HAS_PO_2Y = 1
+        OR (DOC_COUNT_2Y > 1 AND HAS_RECENT_2Y = 1)
+    )
+   AND COALESCE(HAS_EXCLUDED, 0) = 0
+ORDER BY v.CiaCod
+"""
+    df = pd.read_sql(query, connection, params=where.params)
+    for column in ("TRX_1Y", "TRX_2Y", "OPEN_BALANCE"):
+        df[column] = df[column].fillna(0.0) * CHF_RATE
+    return df
+
+
+@pytest.fixture
+def pandas_header(erp_connection) -> pd.DataFrame:
+    """supplier_header con engine='pandas' sobre el ERP sintético."""
+    report = LocalSupplierHeader(engine="pandas", cache="off")
+    df = report.fetch(LocalDatabase(erp_connection))
+    return df.sort_values("VENDOR_ID (M)", ignore_index=True)
+
+
+def test_priority_filters_select_same_vendors(erp_connection, pandas_header):
+    expected = reference_header(erp_connection)
+    assert len(expected) > 0
+    assert pandas_header["VENDOR_ID (M)"].tolist() == expected["CiaCod"].tolist()
+
+
+def test_amounts_and_counts_match_reference(erp_connection, pandas_header):
+    expected = reference_header(erp_connection)
+    pairs = {
+        "TRX_1Y_AMOUNT_CHF (M)": "TRX_1Y",
+        "TRX_2Y_AMOUNT_CHF (M)": "TRX_2Y",
+        "TRX_OP_BAL_CHF (M)": "OPEN_BALANCE",
+    }
+    for column, reference in pairs.items():
+        np.testing.assert_allclose(
+            pandas_header[column].to_numpy(), expected[reference].to_numpy(),
+            rtol=1e-9, atol=1e-6, err_msg=column
+        )
+    for column in ("TRX_1Y_COUNT", "TRX_2Y_COUNT", "TRX_OP_COUNT"):
+        assert pandas_header[f"{column} (M)"].tolist() == expected[column].tolist(), column
+    assert pandas_header["SUPPLIER_TRX_SOURCE_LIST (M)"].tolist() == expected["TRX_SOURCE_TAG"].tolist()
+
+
+def test_valid_locations_match_reference(erp_connection):
+    report = LocalSupplierHeader(engine="pandas", cache="off")
+    dataset = location_metrics(
+        LocalDatabase(erp_connection), report.get_documents_query(), report.get_locations_query()
+    )
+
+    expected = engine.normalize_keys(pd.read_sql(VALID_LOCS, erp_connection), engine.LOCATION_KEYS)
+    vendors = dataset.locations[engine.VENDOR_KEYS].drop_duplicates()
+    expected = expected.merge(vendors, on=engine.VENDOR_KEYS)
+
+    def keys(df):
+        return sorted(map(tuple, df[engine.LOCATION_KEYS].to_numpy().tolist()))
+
+    assert keys(dataset.valid_locations()) == keys(expected)
+
+
+class _KeysDatabase:
+    """DocCab y LocTab con llaves que solo difieren en mayúsculas y espacios."""
+
+    def execute_query(self, query: str, params=None) -> pd.DataFrame:
+        if query == "docs":
+            return pd.DataFrame({
+                "OriCod": ["011", "011"], "CiaCod": ["ab1", "AB1 "], "LocCod": ["l2", "L1"],
+                "DocTipCod": [DOC_TYPES.invoice_debit[0]] * 2,
+                "DocFecCre": [erp.REFERENCE_DATE - pd.Timedelta(days=30)] * 2,
+                "DocMto": [100.0, 50.0], "DocSld": [10.0, 0.0],
+            })
+        return pd.DataFrame({
+            "OriCod": ["011", "011"], "CiaCod": ["AB1", "Ab1"], "LocCod": ["L1", "L2 "], "LocEst": ["1", "0"],
+        })
+
+
+def test_keys_compare_like_sql_server():
+    dataset = location_metrics(_KeysDatabase(), SqlQuery("docs"), SqlQuery("locs"), erp.REFERENCE_DATE)
+
+    # La locación inactiva 'L2' tiene saldo en DocCab con la llave 'l2': es válida
+    assert len(dataset.valid_locations()) == 2
+    vendors = dataset.vendor_metrics()
+    assert len(vendors) == 1
+    assert vendors["TRX_1Y_COUNT"].tolist() == [2]
+
+
+def test_to_units_rejects_amounts_beyond_scale():
+    assert engine.to_units(pd.Series([123456789012.34, -5.1, None])).tolist() == [
+        12345678901234, -510, 0
+    ]
+    with pytest.raises(ValueError, match="DOC_AMOUNT_SCALE"):
+        engine.to_units(pd.Series([1.005, 2.0], name="DocMto"))
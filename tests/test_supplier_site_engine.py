@@ -0,0 +1,180 @@
+"""
+Paridad del motor pandas de supplier_site con el SQL
+=====================================================
+Compara el reporte con engine='pandas' (lecturas locales de
+benchmarks/bench_reports.py) contra una referencia escrita en SQL sobre el
+mismo ERP sintético, con las reglas de queries/supplier-site.sql: métricas
+por locación, DOC_COUNT_2Y y exclusión a nivel de proveedor y filtros de
+prioridad por sitio. Además verifica que dentro de shared_run()
+supplier_site reutiliza la lectura de DocCab de supplier_header.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+# pyodbc (importado por reports.base) requiere el driver manager ODBC
+pytest.importorskip("pyodbc")
+
+from benchmarks.bench_reports import LocalDatabase, LocalSupplierHeader, LocalSupplierSite
+from config.settings import CHF_RATE, DOC_TYPES
+from reports.suppliers.locations import shared_run
+from tests.test_supplier_engine import (
+    BALANCE_NEGATIVE, BALANCE_POSITIVE, CREDIT, DATE_1Y, DATE_2Y, EXCLUDED, INVOICE,
+    PURCHASE_ORDERS, RECENT, TRX, _codes
+)
+
+
+AGREEMENTS = _codes(DOC_TYPES.agreements)
+
+# Saldo abierto en la moneda del documento (se multiplica por CHF_RATE al final)
+OPEN_BALANCE = f"""CASE WHEN d.DocSld > 0 THEN
+        CASE WHEN d.DocTipCod IN {BALANCE_POSITIVE} THEN d.DocSld
+             WHEN d.DocTipCod IN {BALANCE_NEGATIVE} THEN -d.DocSld ELSE 0 END
+    ELSE 0 END"""
+
+
+def reference_site(connection) -> pd.DataFrame:
+    """supplier_site calculado en SQL (SQLite), una fila por sitio."""
+    where = LocalSupplierSite()._vendor_filter()
+    query = f"""
+WITH sites AS (
+    SELECT ct.OriCod, ct.CiaCod, lt.LocCod, lt.LocEst
+    FROM CiaTab ct
+    LEFT JOIN Cid b ON b.OriCod = ct.OriCod AND b.CiaCod = ct.CiaCod
+    INNER JOIN LocTab lt ON lt.OriCod = ct.OriCod AND lt.CiaCod = ct.CiaCod
+    {where.text}
+),
+docs AS (
+    SELECT d.* FROM DocCab d WHERE d.DocEst <> '0'
+),
+vendor_docs AS (
+    SELECT d.OriCod, d.CiaCod,
+        SUM(d.DocTipCod IN {INVOICE} AND d.DocFecCre >= {DATE_2Y}) AS DOC_COUNT_2Y,
+        MAX(d.DocTipCod IN {EXCLUDED}) AS HAS_EXCLUDED
+    FROM docs d
+    GROUP BY d.OriCod, d.CiaCod
+),
+site_docs AS (
+    SELECT s.OriCod, s.CiaCod, s.LocCod, s.LocEst,
+        SUM(CASE WHEN d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_1Y} THEN
+            CASE WHEN d.DocTipCod IN {INVOICE} THEN d.DocMto WHEN d.DocTipCod IN {CREDIT} THEN -d.DocMto ELSE 0 END
+        END) AS TRX_1Y,
+        SUM(CASE WHEN d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_2Y} AND d.DocFecCre < {DATE_1Y} THEN
+            CASE WHEN d.DocTipCod IN {INVOICE} THEN d.DocMto WHEN d.DocTipCod IN {CREDIT} THEN -d.DocMto ELSE 0 END
+        END) AS TRX_2Y,
+        SUM(CASE WHEN d.DocTipCod IN {TRX} THEN {OPEN_BALANCE} END) AS OPEN_BALANCE,
+        COALESCE(SUM(d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_1Y}), 0) AS TRX_1Y_COUNT,
+        COALESCE(SUM(d.DocTipCod IN {TRX} AND d.DocFecCre >= {DATE_2Y} AND d.DocFecCre < {DATE_1Y}), 0) AS TRX_2Y_COUNT,
+        COALESCE(SUM(d.DocTipCod IN {TRX} AND d.DocSld > 0), 0) AS TRX_OP_COUNT,
+        COALESCE(SUM(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocSld > 0 AND d.DocFecCre >= {DATE_2Y}), 0) AS PO_2Y_OP_COUNT,
+        COALESCE(SUM(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocSld > 0 AND d.DocFecCre >= {DATE_1Y}), 0) AS PO_1Y_OP_COUNT,
+        COALESCE(SUM(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocSld > 0), 0) AS PO_OP_COUNT,
+        COALESCE(SUM(d.DocTipCod IN {AGREEMENTS} AND d.DocSld > 0), 0) AS PO_AGREEMENT_COUNT,
+        MAX(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocFecCre >= {DATE_2Y}) AS HAS_PO_2Y,
+        MAX(d.DocTipCod IN {RECENT} AND d.DocFecCre >= {DATE_2Y}) AS HAS_RECENT_2Y,
+        CASE
+            WHEN MAX(d.DocTipCod IN {INVOICE} AND d.DocSld > 0 AND d.DocFecCre < {DATE_2Y}) THEN 'INV_OP'
+            WHEN MAX(d.DocTipCod IN {INVOICE} AND d.DocFecCre >= {DATE_1Y}) THEN 'INV_1Y'
+            WHEN MAX(d.DocTipCod IN {INVOICE} AND d.DocFecCre >= {DATE_2Y}) THEN 'INV_2Y'
+            WHEN MAX(d.DocTipCod IN {PURCHASE_ORDERS} AND d.DocFecCre >= {DATE_2Y}) THEN 'POH_OP'
+            ELSE 'NO_TRX_AT_ALL'
+        END AS TRX_SOURCE_TAG
+    FROM sites s
+    LEFT JOIN docs d ON d.OriCod = s.OriCod AND d.CiaCod = s.CiaCod AND d.LocCod = s.LocCod
+    GROUP BY s.OriCod, s.CiaCod, s.LocCod, s.LocEst
+)
+SELECT sd.*
+FROM site_docs sd
+LEFT JOIN vendor_docs vd ON vd.OriCod = sd.OriCod AND vd.CiaCod = sd.CiaCod
+WHERE (sd.LocEst = '1' OR COALESCE(sd.OPEN_BALANCE, 0) > 0)
+  AND (
+        COALESCE(sd.OPEN_BALANCE, 0) > 0
+        OR sd.HAS_PO_2Y = 1
+        OR (COALESCE(vd.DOC_COUNT_2Y, 0) > 1 AND sd.HAS_RECENT_2Y = 1)
+    )
+  AND COALESCE(vd.HAS_EXCLUDED, 0) = 0
+ORDER BY sd.CiaCod, sd.LocCod
+"""
+    df = pd.read_sql(query, connection, params=where.params)
+    for column in ("TRX_1Y", "TRX_2Y", "OPEN_BALANCE"):
+        df[column] = df[column].fillna(0.0) * CHF_RATE
+    return df
+
+
+class _RecordingDatabase(LocalDatabase):
+    """LocalDatabase que guarda las queries ejecutadas."""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.queries = []
+
+    def execute_query(self, query: str, params: tuple = None) -> pd.DataFrame:
+        self.queries.append(query)
+        return super().execute_query(query, params)
+
+    def document_reads(self) -> int:
+        return sum("FROM DocCab" in query for query in self.queries)
+
+
+def _fetch(report, db) -> pd.DataFrame:
+    df = report.fetch(db)
+    keys = [column for column in ("VENDOR_ID (M)", "LOCATION_ID (M)") if column in df.columns]
+    return df.sort_values(keys, ignore_index=True)
+
+
+@pytest.fixture
+def pandas_site(erp_connection) -> pd.DataFrame:
+    """supplier_site con engine='pandas' sobre el ERP sintético."""
+    return _fetch(LocalSupplierSite(engine="pandas", cache="off"), LocalDatabase(erp_connection))
+
+
+def test_priority_filters_select_same_sites(erp_connection, pandas_site):
+    expected = reference_site(erp_connection)
+    assert len(expected) > 0
+    assert pandas_site["VENDOR_ID (M)"].tolist() == expected["CiaCod"].tolist()
+    assert pandas_site["LOCATION_ID (M)"].tolist() == expected["LocCod"].tolist()
+
+
+def test_site_metrics_match_reference(erp_connection, pandas_site):
+    expected = reference_site(erp_connection)
+    pairs = {
+        "TRX_1Y_AMOUNT_CHF (M)": "TRX_1Y",
+        "TRX_2Y_AMOUNT_CHF (M)": "TRX_2Y",
+        "TRX_OP_BAL_CHF (M)": "OPEN_BALANCE",
+    }
+    for column, reference in pairs.items():
+        np.testing.assert_allclose(
+            pandas_site[column].to_numpy(), expected[reference].to_numpy(),
+            rtol=1e-9, atol=1e-6, err_msg=column
+        )
+    counts = {
+        "TRX_1Y_COUNT (M)": "TRX_1Y_COUNT",
+        "TRX_2Y_COUNT (M)": "TRX_2Y_COUNT",
+        "TRX_OP_COUNT (M)": "TRX_OP_COUNT",
+        "PO_2Y_OP_COUNT (M)": "PO_2Y_OP_COUNT",
+        "PO_1Y_OP_COUNT (M)": "PO_1Y_OP_COUNT",
+        "PO_OP_COUNT (M)": "PO_OP_COUNT",
+        "PO_Agreement_COUNT (M)": "PO_AGREEMENT_COUNT",
+    }
+    for column, reference in counts.items():
+        assert pandas_site[column].tolist() == expected[reference].tolist(), column
+    assert pandas_site["SUPPLIER_TRX_SOURCE_LIST (M)"].tolist() == expected["TRX_SOURCE_TAG"].tolist()
+
+
+def test_shared_run_reads_documents_once(erp_connection, pandas_site):
+    header = _fetch(LocalSupplierHeader(engine="pandas", cache="off"), LocalDatabase(erp_connection))
+
+    db = _RecordingDatabase(erp_connection)
+    with shared_run():
+        shared_header = _fetch(LocalSupplierHeader(engine="pandas", cache="off"), db)
+        assert db.document_reads() == 1
+        shared_site = _fetch(LocalSupplierSite(engine="pandas", cache="off"), db)
+    assert db.document_reads() == 1
+
+    # Mismo resultado que cada reporte por separado
+    pd.testing.assert_frame_equal(shared_header, header)
+    pd.testing.assert_frame_equal(shared_site, pandas_site)
+
+    # Fuera de shared_run() cada reporte vuelve a leer DocCab
+    _fetch(LocalSupplierSite(engine="pandas", cache="off"), db)
+    assert db.document_reads() == 2
@@ -1,3 +1,15 @@
 # Utils module
-from .database import DatabaseConnection
-from .excel_exporter import ExcelExporter
+import importlib
+
+# Clases exportadas: {clase: submódulo}, importadas al usarse (database
+# carga pyodbc y pandas, excel_exporter además xlsxwriter)
+_LAZY = {
+    "DatabaseConnection": ".database",
+    "ExcelExporter": ".excel_exporter",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
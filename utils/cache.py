@@ -0,0 +1,260 @@
+"""
+Caché en disco de resultados de queries
+========================================
+Guarda el resultado de cada reporte en formato Arrow IPC (columnar) para
+no re-ejecutar la query contra producción en corridas repetidas.
+
+La llave combina el texto de la query, el servidor/base de datos y el día
+calendario del servidor (las queries usan GETDATE(), así que un resultado
+de ayer no sirve hoy; los reportes pasan la fecha de server_time()). Las entradas vencen tras ttl_hours y el tamaño total se
+acota desalojando las de uso menos reciente (LRU).
+
+Uso:
+    cache = get_cache()
+    key = cache.make_key(query)
+    df = cache.get(key)
+    if df is None:
+        df = db.execute_query(query)
+        cache.put(key, df)
+"""
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import CACHE_CONFIG, DB_CONFIG
+
+
+class ResultCache:
+    """
+    Caché de DataFrames en disco con TTL y desalojo LRU por tamaño.
+    
+    Cada entrada es un archivo <llave>.arrow. La fecha de modificación
+    marca cuándo se escribió (TTL) y la de acceso cuándo se leyó por
+    última vez (LRU); get() la actualiza explícitamente para no depender
+    de las opciones de montaje del disco.
+    """
+    
+    EXTENSION = ".arrow"
+    
+    def __init__(
+        self,
+        directory: str = None,
+        ttl_hours: float = None,
+        max_size_mb: float = None
+    ):
+        """
+        Args:
+            directory: Carpeta de la caché. Usa CACHE_CONFIG.directory por defecto.
+            ttl_hours: Horas de validez de una entrada
+            max_size_mb: Tamaño máximo total de la caché
+        """
+        self.directory = Path(directory or CACHE_CONFIG.directory)
+        self.ttl_seconds = (ttl_hours or CACHE_CONFIG.ttl_hours) * 3600
+        self.max_bytes = (max_size_mb or CACHE_CONFIG.max_size_mb) * 2 ** 20
+        self._lock = threading.Lock()
+    
+    def make_key(self, text: str, config=None, as_of: date = None) -> str:
+        """
+        Llave de caché para una query.
+        
+        Args:
+            text: Query renderizada (o texto que identifique el resultado)
+            config: DatabaseConfig. Usa DB_CONFIG por defecto.
+            as_of: Día del resultado según el servidor (GETDATE()). Por
+                   defecto hoy en el cliente.
+        
+        Returns:
+            Hash hexadecimal de la llave
+        """
+        config = config or DB_CONFIG
+        as_of = as_of or date.today()
+        raw = "\n".join([config.server, config.database, as_of.isoformat(), text])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """
+        Retorna el DataFrame cacheado, o None si no existe o venció.
+        """
+        path = self._path(key)
+        try:
+            written = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        
+        if time.time() - written > self.ttl_seconds:
+            self._remove(path)
+            return None
+        
+        try:
+            df = pd.read_feather(path)
+        except Exception as e:
+            print(f"[WARN] Entrada de caché ilegible, se descarta: {e}")
+            self._remove(path)
+            return None
+        
+        # Marcar acceso para LRU (se conserva la fecha de escritura)
+        os.utime(path, (time.time(), written))
+        return df
+    
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Guarda un DataFrame. Los errores de escritura solo se reportan."""
+        with self.writer(key) as writer:
+            writer.write(df)
+    
+    @contextmanager
+    def writer(self, key: str) -> Iterator["_CacheWriter"]:
+        """
+        Escritor incremental para resultados que llegan por chunks.
+        La entrada solo se publica si todos los chunks se escribieron;
+        si el bloque termina con excepción se descarta.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        writer = _CacheWriter(self._path(key))
+        try:
+            yield writer
+        except BaseException:
+            writer.abort()
+            raise
+        else:
+            if writer.commit():
+                self.evict()
+    
+    def evict(self) -> None:
+        """Elimina entradas vencidas y, si se supera el tamaño, las menos usadas."""
+        with self._lock:
+            now = time.time()
+            entries = []
+            for path in self.directory.glob(f"*{self.EXTENSION}"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.ttl_seconds:
+                    self._remove(path)
+                else:
+                    entries.append((stat.st_atime, stat.st_size, path))
+            
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+    
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        for path in self.directory.glob(f"*{self.EXTENSION}"):
+            self._remove(path)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Número de entradas y tamaño total de la caché."""
+        paths = list(self.directory.glob(f"*{self.EXTENSION}"))
+        size = sum(path.stat().st_size for path in paths if path.exists())
+        return {
+            "directory": str(self.directory),
+            "entries": len(paths),
+            "size_mb": round(size / 2 ** 20, 1),
+            "max_size_mb": round(self.max_bytes / 2 ** 20, 1),
+        }
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.EXTENSION}"
+    
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class _CacheWriter:
+    """
+    Escribe chunks a un archivo temporal Arrow IPC y lo publica con un
+    rename atómico al confirmar.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.rows = 0
+        self._tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._writer = None
+        self._schemas = None
+        self._failed = False
+    
+    def write(self, df: pd.DataFrame) -> None:
+        """Agrega un chunk. Si falla la conversión, la entrada se descarta."""
+        if self._failed:
+            return
+        try:
+            from utils.excel_exporter import ArrowChunkSchema
+            
+            if self._schemas is None:
+                self._schemas = ArrowChunkSchema()
+            self._write_tables(self._schemas.add(df))
+        except Exception as e:
+            self._fail(e)
+    
+    def commit(self) -> bool:
+        """Cierra el archivo y lo publica. Retorna True si quedó guardado."""
+        if self._failed or self._schemas is None:
+            return False
+        try:
+            self._write_tables(self._schemas.finish())
+        except Exception as e:
+            self._fail(e)
+            return False
+        self._writer.close()
+        self._writer = None
+        os.replace(self._tmp_path, self.path)
+        return True
+    
+    def _write_tables(self, chunks) -> None:
+        import pyarrow as pa
+        
+        for df in chunks:
+            schema = self._schemas.schema
+            if self._writer is None:
+                self._writer = pa.ipc.new_file(str(self._tmp_path), schema)
+            table = pa.Table.from_pandas(self._schemas.conform(df), schema=schema, preserve_index=False)
+            self._writer.write_table(table)
+            self.rows += len(df)
+    
+    def _fail(self, error: Exception) -> None:
+        print(f"[WARN] No se pudo escribir en caché: {error}")
+        self._failed = True
+        self.abort()
+    
+    def abort(self) -> None:
+        """Descarta lo escrito."""
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._writer = None
+        try:
+            self._tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# Caché global (se crea al primer uso)
+_CACHE: Optional[ResultCache] = None
+
+
+def get_cache() -> ResultCache:
+    """Retorna la caché global configurada con CACHE_CONFIG."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ResultCache()
+    return _CACHE
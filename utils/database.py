@@ -1,16 +1,24 @@
 """
 Módulo de conexión a base de datos SQL Server
 ==============================================
-Context manager para conexiones y utilidades de query.
+Context manager para conexiones, pool de conexiones y utilidades de query.
 """
+import os
+import threading
+import time
+import atexit
+import warnings
 import pyodbc
 import pandas as pd
-from typing import Optional, Iterator, List
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Iterator, List, Dict, Any
 from contextlib import contextmanager
 
 import sys
 sys.path.insert(0, '..')
-from config.settings import DB_CONFIG, EXPORT_CONFIG
+from config.settings import DB_CONFIG, EXPORT_CONFIG, POOL_CONFIG, FETCH_CONFIG
+from utils.columnar import fetch_columnar
 
 
 class DatabaseConnection:
@@ -20,17 +28,31 @@ class DatabaseConnection:
     Uso:
         with DatabaseConnection() as db:
             df = db.execute_query("SELECT * FROM tabla")
+        
+        # Tomando la conexión del pool (se devuelve al salir)
+        with DatabaseConnection(pool=get_pool()) as db:
+            df = db.execute_query("SELECT * FROM tabla")
     """
     
-    def __init__(self, config=None):
+    def __init__(
+        self,
+        config=None,
+        pool: "ConnectionPool" = None,
+        connection: pyodbc.Connection = None
+    ):
         """
         Inicializa el manejador de conexión.
         
         Args:
             config: DatabaseConfig opcional. Usa DB_CONFIG por defecto.
+                    Se ignora si se indica un pool.
+            pool: ConnectionPool opcional. Si se indica, connect() toma una
+                  conexión del pool y close() la devuelve.
+            connection: Conexión ya tomada del pool (ver reserve_connections)
         """
-        self.config = config or DB_CONFIG
-        self._connection: Optional[pyodbc.Connection] = None
+        self.pool = pool
+        self.config = pool.config if pool else (config or DB_CONFIG)
+        self._connection: Optional[pyodbc.Connection] = connection
     
     def __enter__(self):
         """Abre la conexión al entrar en el context manager."""
@@ -39,11 +61,20 @@ class DatabaseConnection:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Cierra la conexión al salir del context manager."""
-        self.close()
+        # Una conexión que falló con error de driver no vuelve al pool
+        broken = exc_type is not None and issubclass(exc_type, pyodbc.Error)
+        self.close(broken=broken)
         return False  # No suprimimos excepciones
     
     def connect(self) -> None:
-        """Establece la conexión a la base de datos."""
+        """Establece la conexión a la base de datos (o la toma del pool)."""
+        if self._connection is not None:
+            # Reservada de antemano (reserve_connections)
+            return
+        if self.pool is not None:
+            self._connection = self.pool.acquire()
+            return
+        
         try:
             conn_str = self.config.get_connection_string()
             self._connection = pyodbc.connect(conn_str)
@@ -52,9 +83,17 @@ class DatabaseConnection:
             print(f"[ERROR] Error de conexión: {e}")
             raise
     
-    def close(self) -> None:
-        """Cierra la conexión si está abierta."""
-        if self._connection:
+    def close(self, broken: bool = False) -> None:
+        """
+        Cierra la conexión si está abierta, o la devuelve al pool.
+        
+        Args:
+            broken: Si la conexión quedó inutilizable (el pool la descarta)
+        """
+        if self._connection and self.pool is not None:
+            self.pool.release(self._connection, broken=broken)
+            self._connection = None
+        elif self._connection:
             self._connection.close()
             self._connection = None
             print("[OK] Conexión cerrada")
@@ -64,13 +103,21 @@ class DatabaseConnection:
         """Verifica si hay una conexión activa."""
         return self._connection is not None
     
-    def execute_query(self, query: str, params: tuple = None) -> pd.DataFrame:
+    def execute_query(
+        self,
+        query: str,
+        params: tuple = None,
+        backend: str = None
+    ) -> pd.DataFrame:
         """
         Ejecuta una consulta y retorna un DataFrame.
         
         Args:
             query: Consulta SQL a ejecutar
             params: Parámetros opcionales para la consulta
+            backend: 'read_sql' (pd.read_sql) o 'columnar' (lector tipado
+                     por columnas, mismos dtypes; ver utils/columnar.py).
+                     Usa FETCH_CONFIG.backend por defecto.
             
         Returns:
             DataFrame con los resultados
@@ -78,20 +125,48 @@ class DatabaseConnection:
         if not self._connection:
             raise RuntimeError("No hay conexión activa. Use 'with DatabaseConnection() as db:'")
         
-        return pd.read_sql(query, self._connection, params=params)
+        backend = backend or FETCH_CONFIG.backend
+        if backend == "columnar":
+            return self._execute_columnar(query, params)
+        if backend != "read_sql":
+            raise ValueError(f"Backend '{backend}' no soportado. Opciones: read_sql, columnar")
+        
+        with warnings.catch_warnings():
+            # pandas advierte con conexiones DB-API que no son SQLAlchemy ni
+            # sqlite3; pyodbc funciona con read_sql sin problemas
+            warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy", category=UserWarning)
+            return pd.read_sql(query, self._connection, params=params)
+    
+    def _execute_columnar(self, query: str, params: tuple = None) -> pd.DataFrame:
+        """Ejecuta la consulta y lee el resultado con fetch_columnar()."""
+        cursor = self._connection.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            return fetch_columnar(cursor)
+        finally:
+            cursor.close()
     
     def execute_query_chunks(
         self, 
         query: str, 
-        chunk_size: int = None
+        chunk_size: int = None,
+        params: tuple = None
     ) -> Iterator[pd.DataFrame]:
         """
         Ejecuta una consulta y retorna un iterador de DataFrames en chunks.
         Útil para datasets muy grandes para no cargar todo en memoria.
         
+        Lee directamente del cursor con fetchmany(), por lo que solo hay
+        un chunk en memoria a la vez. Los resultados intermedios sin
+        columnas (DECLARE, SET, conteos de filas) se descartan.
+        
         Args:
             query: Consulta SQL a ejecutar
             chunk_size: Tamaño de cada chunk. Usa EXPORT_CONFIG.chunk_size por defecto.
+            params: Parámetros opcionales para la consulta
             
         Yields:
             DataFrames con chunk_size filas cada uno
@@ -101,7 +176,59 @@ class DatabaseConnection:
         
         chunk_size = chunk_size or EXPORT_CONFIG.chunk_size
         
-        return pd.read_sql(query, self._connection, chunksize=chunk_size)
+        cursor = self._connection.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            # Avanzar hasta el primer result set con columnas
+            while cursor.description is None:
+                if not cursor.nextset():
+                    return
+            
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(
+                    [tuple(row) for row in rows],
+                    columns=columns,
+                    coerce_float=True
+                )
+        finally:
+            cursor.close()
+    
+    def execute_statement(self, query: str, params: tuple = None) -> None:
+        """
+        Ejecuta sentencias sin resultado (SELECT INTO, CREATE INDEX, DROP)
+        en la sesión actual. Los conteos y result sets intermedios se
+        consumen, de modo que los errores de cualquier sentencia del batch
+        se propagan aquí.
+        
+        Args:
+            query: Sentencias SQL a ejecutar
+            params: Parámetros opcionales
+        """
+        if not self._connection:
+            raise RuntimeError("No hay conexión activa. Use 'with DatabaseConnection() as db:'")
+        
+        cursor = self._connection.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            while cursor.nextset():
+                pass
+        finally:
+            cursor.close()
+    
+    def server_time(self) -> pd.Timestamp:
+        """GETDATE() del servidor (referencia de las ventanas de fechas)."""
+        return pd.Timestamp(self.execute_query("SELECT GETDATE() AS [NOW]")["NOW"].iloc[0])
     
     def test_connection(self) -> bool:
         """
@@ -119,9 +246,429 @@ class DatabaseConnection:
             return False
 
 
+# ============================================
+# POOL DE CONEXIONES
+# ============================================
+
+@dataclass
+class _PooledConnection:
+    """Conexión del pool con sus marcas de tiempo."""
+    connection: pyodbc.Connection
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones pyodbc thread-safe.
+    
+    - Mantiene hasta `size` conexiones abiertas y reutiliza las libres.
+    - Valida cada conexión al entregarla (validation_query) y descarta
+      las que fallan.
+    - Cierra conexiones sin uso por más de idle_timeout y recicla las que
+      superan max_lifetime.
+    - Si no hay conexiones libres y el pool está lleno, espera hasta
+      checkout_timeout segundos.
+    - La validación, el rollback al devolver y los cierres (viajes de red)
+      se hacen fuera del lock: una conexión lenta o medio caída no frena
+      a los demás threads.
+    
+    Uso:
+        pool = ConnectionPool()
+        with DatabaseConnection(pool=pool) as db:
+            df = db.execute_query("SELECT 1")
+        print(pool.stats())
+    """
+    
+    def __init__(self, config=None, pool_config=None):
+        """
+        Args:
+            config: DatabaseConfig opcional. Usa DB_CONFIG por defecto.
+            pool_config: PoolConfig opcional. Usa POOL_CONFIG por defecto.
+        """
+        self.config = config or DB_CONFIG
+        self.pool_config = pool_config or POOL_CONFIG
+        
+        self._idle: deque = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._connecting = 0  # Conexiones abriéndose (cuentan para size)
+        self._in_transit = 0  # Validándose o devolviéndose fuera del lock (cuentan para size)
+        self._lock = threading.Condition()
+        self._closed = False
+        
+        self._stats: Dict[str, float] = {
+            "checkouts": 0,
+            "creates": 0,
+            "reuses": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "validation_failures": 0,
+            "expired": 0,
+        }
+    
+    def acquire(self) -> pyodbc.Connection:
+        """
+        Entrega una conexión validada del pool (o una nueva si hay cupo).
+        
+        Raises:
+            TimeoutError: Si no se libera ninguna conexión a tiempo
+        """
+        deadline = time.monotonic() + self.pool_config.checkout_timeout
+        waited = False
+        
+        while True:
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("El pool de conexiones está cerrado")
+                    
+                    expired = self._take_expired()
+                    
+                    # Reutilizar la conexión libre más reciente
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        self._in_transit += 1
+                        break
+                    
+                    if self._open_count() < self.pool_config.size:
+                        # Reservar el cupo y conectar fuera del lock
+                        pooled = None
+                        self._connecting += 1
+                        break
+                    
+                    # Pool lleno: esperar una devolución
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Sin conexiones libres tras {self.pool_config.checkout_timeout}s "
+                            f"(size={self.pool_config.size})"
+                        )
+                    if not waited:
+                        self._stats["waits"] += 1
+                        waited = True
+                    wait_start = time.monotonic()
+                    self._lock.wait(remaining)
+                    self._stats["wait_seconds"] += time.monotonic() - wait_start
+            
+            _close_all(expired)
+            if pooled is None:
+                break
+            
+            # La validación es un viaje de red: fuera del lock
+            if self._finish_validation(pooled, self._is_valid(pooled)):
+                return pooled.connection
+        
+        try:
+            pooled = _PooledConnection(self._connect())
+        except Exception:
+            with self._lock:
+                self._connecting -= 1
+                self._lock.notify()
+            raise
+        
+        with self._lock:
+            self._connecting -= 1
+            self._checkout(pooled)
+            self._stats["creates"] += 1
+        return pooled.connection
+    
+    def acquire_many(self, count: int) -> List[pyodbc.Connection]:
+        """
+        Toma hasta `count` conexiones de una vez, sin esperar: las libres
+        más las que quepan en el pool. Dos reportes que necesitan varias
+        conexiones a la vez no se quedan cada uno con una parte esperando
+        las del otro.
+        
+        Returns:
+            Conexiones entregadas (pueden ser menos que count, o ninguna)
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El pool de conexiones está cerrado")
+            
+            expired = self._take_expired()
+            idle = [self._idle.pop() for _ in range(min(count, len(self._idle)))]
+            self._in_transit += len(idle)
+            
+            # Reservar el cupo de las nuevas y conectar fuera del lock
+            new = max(0, min(count - len(idle), self.pool_config.size - self._open_count()))
+            self._connecting += new
+        
+        _close_all(expired)
+        connections = []
+        for pooled in idle:
+            if self._finish_validation(pooled, self._is_valid(pooled), replace=True):
+                connections.append(pooled.connection)
+            else:
+                # El cupo de la inválida pasó a una conexión nueva
+                new += 1
+        
+        for opened in range(new):
+            try:
+                pooled = _PooledConnection(self._connect())
+            except Exception:
+                with self._lock:
+                    self._connecting -= new - opened
+                    self._lock.notify_all()
+                for connection in connections:
+                    self.release(connection)
+                raise
+            with self._lock:
+                self._connecting -= 1
+                self._checkout(pooled)
+                self._stats["creates"] += 1
+            connections.append(pooled.connection)
+        return connections
+    
+    def _finish_validation(self, pooled: _PooledConnection, valid: bool, replace: bool = False) -> bool:
+        """
+        Entrega (válida) o cierra (inválida) una conexión libre validada
+        fuera del lock.
+        
+        Args:
+            replace: Si reservar el cupo de una inválida para abrir otra
+        """
+        with self._lock:
+            self._in_transit -= 1
+            if valid:
+                self._checkout(pooled)
+                self._stats["reuses"] += 1
+                return True
+            self._stats["validation_failures"] += 1
+            if replace:
+                self._connecting += 1
+            else:
+                self._lock.notify()
+        _close_quietly(pooled.connection)
+        return False
+    
+    def release(self, connection: pyodbc.Connection, broken: bool = False) -> None:
+        """
+        Devuelve una conexión al pool.
+        
+        Args:
+            connection: Conexión entregada por acquire()
+            broken: Si la conexión quedó inutilizable (se cierra)
+        """
+        with self._lock:
+            pooled = self._in_use.pop(id(connection), None)
+            if pooled is None:
+                # No pertenece al pool (o ya fue devuelta)
+                return
+            self._in_transit += 1
+        
+        if not broken:
+            try:
+                # Descartar transacciones abiertas antes de reutilizar (fuera del lock)
+                connection.rollback()
+            except pyodbc.Error:
+                broken = True
+        
+        now = time.monotonic()
+        expired = now - pooled.created_at > self.pool_config.max_lifetime
+        with self._lock:
+            self._in_transit -= 1
+            discard = broken or expired or self._closed
+            if discard:
+                if expired:
+                    self._stats["expired"] += 1
+            else:
+                pooled.last_used = now
+                self._idle.append(pooled)
+            self._lock.notify()
+        
+        if discard:
+            _close_quietly(connection)
+    
+    @contextmanager
+    def connection(self) -> Iterator[pyodbc.Connection]:
+        """Context manager que toma y devuelve una conexión."""
+        connection = self.acquire()
+        broken = False
+        try:
+            yield connection
+        except pyodbc.Error:
+            broken = True
+            raise
+        finally:
+            self.release(connection, broken=broken)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Estadísticas del pool para dimensionarlo.
+        
+        Returns:
+            Dict con size, open, idle, in_use, checkouts, creates, reuses,
+            waits, wait_seconds, validation_failures, expired y reuse_ratio
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self.pool_config.size
+            stats["open"] = self._open_count()
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = len(self._in_use)
+        
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        checkouts = stats["checkouts"]
+        stats["reuse_ratio"] = round(stats["reuses"] / checkouts, 3) if checkouts else 0.0
+        return stats
+    
+    def warm(self, count: int = None) -> int:
+        """
+        Abre (o valida) hasta `count` conexiones y las deja libres, para que
+        las siguientes consultas no paguen el login. Llamarlo periódicamente
+        renueva las que vencen por idle_timeout.
+        
+        Args:
+            count: Conexiones a mantener abiertas (default y máximo: size)
+        
+        Returns:
+            Conexiones abiertas en el pool al terminar
+        """
+        count = min(count or self.pool_config.size, self.pool_config.size)
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(self.acquire())
+        finally:
+            for connection in connections:
+                self.release(connection)
+        with self._lock:
+            return self._open_count()
+
+    def close(self) -> None:
+        """Cierra las conexiones libres. Las prestadas se cierran al devolverse."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._lock.notify_all()
+        _close_all(idle)
+    
+    def _connect(self) -> pyodbc.Connection:
+        """Abre una conexión nueva."""
+        try:
+            connection = pyodbc.connect(self.config.get_connection_string())
+            print("[OK] Conexión exitosa a SQL Server")
+            return connection
+        except pyodbc.Error as e:
+            print(f"[ERROR] Error de conexión: {e}")
+            raise
+    
+    def _checkout(self, pooled: _PooledConnection) -> None:
+        """Registra la conexión como prestada. Requiere el lock."""
+        self._in_use[id(pooled.connection)] = pooled
+        self._stats["checkouts"] += 1
+    
+    def _open_count(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._connecting + self._in_transit
+    
+    def _take_expired(self) -> List[_PooledConnection]:
+        """
+        Saca del pool las conexiones libres vencidas por inactividad o
+        antigüedad. Requiere el lock; se cierran después, fuera de él.
+        """
+        now = time.monotonic()
+        keep, expired = deque(), []
+        for pooled in self._idle:
+            if (now - pooled.last_used > self.pool_config.idle_timeout or
+                    now - pooled.created_at > self.pool_config.max_lifetime):
+                self._stats["expired"] += 1
+                expired.append(pooled)
+            else:
+                keep.append(pooled)
+        self._idle = keep
+        return expired
+    
+    def _is_valid(self, pooled: _PooledConnection) -> bool:
+        """Ejecuta la consulta de validación sobre una conexión libre."""
+        if not self.pool_config.validation_query:
+            return True
+        try:
+            cursor = pooled.connection.cursor()
+            try:
+                cursor.execute(self.pool_config.validation_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+
+def _close_quietly(connection: pyodbc.Connection) -> None:
+    """Cierra una conexión ignorando errores (puede estar ya caída)."""
+    try:
+        connection.close()
+    except pyodbc.Error:
+        pass
+
+
+def _close_all(pooled_connections: List[_PooledConnection]) -> None:
+    """Cierra conexiones sacadas del pool (fuera del lock)."""
+    for pooled in pooled_connections:
+        _close_quietly(pooled.connection)
+
+
+# Pool global del proceso (se crea al primer uso)
+_POOL: Optional[ConnectionPool] = None
+_POOL_PID: Optional[int] = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Retorna el pool global, creándolo al primer uso.
+    
+    Cada proceso tiene su propio pool: un proceso hijo (fork) no reutiliza
+    las conexiones heredadas del padre.
+    """
+    global _POOL, _POOL_PID
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            _POOL = ConnectionPool()
+            _POOL_PID = os.getpid()
+        return _POOL
+
+
+def close_pool() -> None:
+    """Cierra el pool global si existe en este proceso."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None and _POOL_PID == os.getpid():
+            _POOL.close()
+        _POOL = None
+
+
+atexit.register(close_pool)
+
+
+def open_connection() -> DatabaseConnection:
+    """
+    Retorna un DatabaseConnection sin abrir: del pool global si
+    POOL_CONFIG.enabled, o una conexión dedicada en caso contrario.
+    """
+    if POOL_CONFIG.enabled:
+        return DatabaseConnection(pool=get_pool())
+    return DatabaseConnection()
+
+
+def reserve_connections(count: int) -> List[DatabaseConnection]:
+    """
+    Conexiones para `count` consultas concurrentes de un mismo reporte.
+    Con pool se toman todas de una vez y sin esperar
+    (ConnectionPool.acquire_many), así que pueden ser menos que count;
+    sin pool son `count` conexiones dedicadas sin abrir. Cada una se
+    devuelve al cerrarla (o al salir de su with).
+    """
+    if POOL_CONFIG.enabled:
+        pool = get_pool()
+        return [DatabaseConnection(pool=pool, connection=c) for c in pool.acquire_many(count)]
+    return [DatabaseConnection() for _ in range(count)]
+
+
 def test_connection() -> bool:
     """Función de utilidad para probar la conexión rápidamente."""
-    db = DatabaseConnection()
+    db = open_connection()
     return db.test_connection()
 
 
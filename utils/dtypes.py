@@ -0,0 +1,212 @@
+"""
+Optimización de tipos de datos de los reportes
+===============================================
+Los resultados llegan con texto en columnas object (o str) muy repetitivo
+(país, ciudad, organización, etiquetas de origen), ~20 columnas que son
+siempre '' y conteos en int64/float64. Tras el fetch se convierten a:
+
+- Texto de baja cardinalidad -> categórico (cada valor se guarda una vez
+  más un código int8/int16 por fila). Las columnas constantes ('') quedan
+  como categóricos de una sola categoría.
+- Resto del texto -> string respaldado por Arrow (si pyarrow está instalado).
+- Columnas *_COUNT / *_YEAR -> int32 / int16 (Int32 / Int16 con nulos).
+- Columnas con dtype declarado en el layout del reporte (ver
+  reports/columns.py) -> ese dtype, sin aplicar las heurísticas.
+
+En streaming las columnas categóricas se deciden con el primer chunk y
+sus categorías solo crecen (nuevos valores al final), así que un valor
+conserva su código en todos los chunks. Parquet y Arrow IPC escriben
+cada chunk como delta del diccionario anterior.
+
+Uso:
+    optimizer = DtypeOptimizer()
+    df = optimizer.optimize(df)
+    print(optimizer.describe())
+"""
+import importlib.util
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import DTYPE_CONFIG
+from utils import metrics
+
+
+def arrow_string_dtype() -> Optional[pd.StringDtype]:
+    """
+    Dtype de string respaldado por Arrow (el 'str' de pandas 3, con NaN
+    como nulo), o None si pyarrow no está instalado.
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:  # pandas < 2.3
+        return pd.StringDtype("pyarrow")
+
+
+def is_text(series: pd.Series) -> bool:
+    """Si la columna es de texto (object con solo strings, o dtype string)."""
+    if isinstance(series.dtype, pd.StringDtype):
+        return True
+    return (
+        pd.api.types.is_object_dtype(series.dtype)
+        and pd.api.types.infer_dtype(series, skipna=True) == "string"
+    )
+
+
+def masked_integer(dtype: str) -> str:
+    """Entero con máscara equivalente a un entero NumPy (int32 -> Int32, uint8 -> UInt8)."""
+    numpy_dtype = np.dtype(dtype)
+    prefix = {"i": "Int", "u": "UInt"}[numpy_dtype.kind]
+    return f"{prefix}{numpy_dtype.itemsize * 8}"
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Memoria del DataFrame en bytes (incluye el contenido de los strings)."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+class DtypeOptimizer:
+    """
+    Convierte las columnas de un resultado (o de sus chunks sucesivos) a
+    tipos compactos y acumula la memoria antes/después.
+    """
+    
+    def __init__(self, config=None, declared: Dict[str, str] = None, heuristics: bool = True):
+        """
+        Args:
+            config: DtypeConfig (default: DTYPE_CONFIG)
+            declared: Dtypes declarados {columna: dtype}; tienen prioridad
+            heuristics: Si aplicar las conversiones automáticas al resto
+        """
+        self.config = config or DTYPE_CONFIG
+        self.declared = declared or {}
+        self.heuristics = heuristics
+        self.string_dtype = arrow_string_dtype()
+        
+        # {columna: categorías acumuladas}; None hasta el primer chunk con filas
+        self._categories: Optional[Dict[str, pd.Index]] = None
+        
+        self.memory_before = 0
+        self.memory_after = 0
+    
+    def optimize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Retorna df con tipos optimizados (no modifica el original)."""
+        if df.empty:
+            return df
+        
+        with metrics.stage("dtypes") as s:
+            before = frame_memory(df)
+            if self._categories is None:
+                self._categories = {
+                    column: pd.Index([], dtype=object)
+                    for column, series in df.items()
+                    if self.heuristics
+                    and column not in self.declared
+                    and self._is_low_cardinality(series)
+                }
+            
+            columns = {}
+            for column, series in df.items():
+                if column in self.declared:
+                    columns[column] = self._to_declared(series, self.declared[column])
+                elif not self.heuristics:
+                    columns[column] = series
+                elif column in self._categories:
+                    columns[column] = self._to_category(column, series)
+                elif is_text(series):
+                    columns[column] = self._to_string(series)
+                else:
+                    columns[column] = self._to_integer(column, series)
+            
+            result = pd.DataFrame(columns, index=df.index)
+            after = frame_memory(result)
+            
+            self.memory_before += before
+            self.memory_after += after
+            s.rows = len(df)
+            s.counters["memory_before_bytes"] = before
+            s.counters["memory_after_bytes"] = after
+        return result
+    
+    def describe(self) -> str:
+        """Resumen de la memoria ahorrada, para los mensajes de avance."""
+        before = self.memory_before / 2 ** 20
+        after = self.memory_after / 2 ** 20
+        saved = 1 - self.memory_after / self.memory_before if self.memory_before else 0
+        return f"Memoria: {before:,.1f} MB -> {after:,.1f} MB (-{saved:.0%})"
+    
+    def _is_low_cardinality(self, series: pd.Series) -> bool:
+        """Si una columna de texto conviene como categórica."""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return True
+        if not is_text(series):
+            return False
+        limit = min(self.config.category_max_unique, max(1, len(series) * self.config.category_max_ratio))
+        return series.nunique(dropna=True) <= limit
+    
+    def _to_category(self, column: str, series: pd.Series) -> pd.Series:
+        """Categórico con las categorías acumuladas, agregando las nuevas al final."""
+        known = self._categories[column]
+        values = pd.Index(series.dropna().unique())
+        new = values[known.get_indexer(values) < 0]
+        if len(new):
+            known = known.append(new.astype(object))
+            self._categories[column] = known
+        return pd.Series(
+            pd.Categorical(series, categories=known),
+            index=series.index,
+            name=column
+        )
+    
+    def _to_string(self, series: pd.Series) -> pd.Series:
+        """Texto de alta cardinalidad a string Arrow (si no lo es ya)."""
+        if self.string_dtype is None or series.dtype == self.string_dtype:
+            return series
+        return series.astype(self.string_dtype)
+    
+    def _to_declared(self, series: pd.Series, dtype: str) -> pd.Series:
+        """
+        Convierte al dtype declarado. Los enteros con nulos usan el entero
+        con máscara (int32 -> Int32).
+        """
+        if series.dtype == dtype:
+            return series
+        if dtype.startswith(("int", "uint")) and series.isna().any():
+            return series.astype(masked_integer(dtype))
+        return series.astype(dtype)
+    
+    def _to_integer(self, column: str, series: pd.Series) -> pd.Series:
+        """Reduce conteos y años al entero declarado si los valores caben."""
+        target = self._integer_target(column)
+        if target is None or not pd.api.types.is_numeric_dtype(series.dtype):
+            return series
+        if pd.api.types.is_bool_dtype(series.dtype):
+            return series
+        
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        present = values[~np.isnan(values)]
+        info = np.iinfo(target)
+        if present.size and (
+            (present != np.floor(present)).any()
+            or present.min() < info.min
+            or present.max() > info.max
+        ):
+            return series
+        
+        if present.size == values.size:
+            return series.astype(target)
+        # Con nulos: entero con máscara (Int32 / Int16)
+        return series.astype(masked_integer(target))
+    
+    def _integer_target(self, column: str) -> Optional[str]:
+        """Tipo entero para la columna según su sufijo, o None."""
+        name = str(column).upper().replace(" (M)", "").strip()
+        for suffix, target in self.config.integer_suffixes:
+            if name.endswith(suffix):
+                return target
+        return None
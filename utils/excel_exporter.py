@@ -2,15 +2,28 @@
 Módulo de exportación a Excel optimizado
 =========================================
 Utilidades para exportar DataFrames a Excel de forma eficiente.
+También incluye backends Parquet, Arrow IPC y CSV con la misma interfaz.
+
+Con un ColumnLayout (reports/columns.py) los exportadores reciben solo
+las columnas leídas y escriben el template completo: las constantes y
+copias se generan al escribir, sin materializarse en el DataFrame.
 """
+import numpy as np
 import pandas as pd
+from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Iterator, Optional, List, Dict, Any
+from typing import Iterator, Optional, List, Dict, Any, Callable, Tuple
 from datetime import datetime
 
 import sys
 sys.path.insert(0, '..')
 from config.settings import EXPORT_CONFIG
+from utils import metrics
+
+
+# Límites de formato de Excel
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_SHEET_NAME = 31
 
 
 class ExcelExporter:
@@ -18,17 +31,23 @@ class ExcelExporter:
     Exportador de DataFrames a Excel con optimizaciones.
     
     Características:
-    - Usa xlsxwriter para mejor rendimiento
+    - Usa xlsxwriter en modo constant_memory (filas se vuelcan a disco)
+    - Escritores por columna elegidos una vez según el dtype
     - Soporte para exportación por chunks
+    - Continuación en hojas nuevas al superar max_rows_per_sheet
     - Formateo automático de columnas
     - Auto-ajuste de anchos de columna
+    - Layout de columnas: constantes y copias sin materializar
     """
     
     def __init__(
         self, 
         output_path: str,
         sheet_name: str = "Data",
-        datetime_format: str = None
+        datetime_format: str = None,
+        column_widths: Dict[str, float] = None,
+        max_rows_per_sheet: int = None,
+        layout=None
     ):
         """
         Inicializa el exportador.
@@ -36,11 +55,27 @@ class ExcelExporter:
         Args:
             output_path: Ruta del archivo Excel a crear
             sheet_name: Nombre de la hoja
-            datetime_format: Formato para fechas
+            datetime_format: Formato para fechas (estilo strftime)
+            column_widths: Anchos fijos {columna: ancho} que no se estiman
+            max_rows_per_sheet: Filas de datos por hoja antes de continuar en
+                                una nueva. Usa EXPORT_CONFIG por defecto.
+            layout: ColumnLayout del template (ver reports/columns.py).
+                    Los DataFrames traen solo sus columnas leídas.
         """
         self.output_path = Path(output_path)
         self.sheet_name = sheet_name
         self.datetime_format = datetime_format or EXPORT_CONFIG.datetime_format
+        self.column_widths = column_widths or {}
+        self.layout = layout
+        self._number_formats = layout.excel_formats() if layout else {}
+        
+        # Filas de datos por hoja (la fila 1 es el header)
+        self.max_rows_per_sheet = min(
+            max_rows_per_sheet or EXPORT_CONFIG.max_rows_per_sheet,
+            EXCEL_MAX_ROWS - 1
+        )
+        
+        self._formats: Dict[str, Any] = {}
         
         # Crear directorio si no existe
         self.output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -48,26 +83,21 @@ class ExcelExporter:
     def export(self, df: pd.DataFrame, auto_width: bool = True) -> str:
         """
         Exporta un DataFrame a Excel.
+        Si supera max_rows_per_sheet continúa en hojas adicionales.
         
         Args:
             df: DataFrame a exportar
-            auto_width: Si ajustar automáticamente el ancho de columnas
+            auto_width: Si estimar el ancho de columnas. Con False solo se
+                        aplican los anchos fijos declarados.
             
         Returns:
             Ruta del archivo creado
         """
-        # Usar xlsxwriter para mejor rendimiento
-        with pd.ExcelWriter(
-            self.output_path, 
-            engine='xlsxwriter',
-            datetime_format=self.datetime_format
-        ) as writer:
-            df.to_excel(writer, sheet_name=self.sheet_name, index=False)
-            
-            if auto_width:
-                self._adjust_column_widths(writer, df)
+        with metrics.stage("export") as s:
+            total_rows, sheets = self._write_workbook(iter([df]), auto_width, verbose=False)
+            s.rows, s.bytes_written = total_rows, self.output_path.stat().st_size
         
-        print(f"[OK] Exportado: {self.output_path} ({len(df):,} filas)")
+        print(f"[OK] Exportado: {self.output_path} ({total_rows:,} filas{_sheets_note(sheets)})")
         return str(self.output_path)
     
     def export_chunks(
@@ -77,110 +107,920 @@ class ExcelExporter:
     ) -> str:
         """
         Exporta múltiples chunks de DataFrames a un solo Excel.
-        Optimizado para datasets muy grandes.
+        Optimizado para datasets muy grandes: cada fila se vuelca a disco
+        al escribir la siguiente, así que solo el chunk actual vive en memoria.
+        
+        Cuando una hoja llega a max_rows_per_sheet se continúa en
+        "<hoja> (2)", "<hoja> (3)", etc., repitiendo headers, anchos y formatos.
         
         Args:
             chunks: Iterador de DataFrames
-            auto_width: Si ajustar automáticamente el ancho de columnas
+            auto_width: Si estimar el ancho de columnas. Los anchos se miden
+                        sobre una muestra de cada chunk mientras se escribe.
             
         Returns:
             Ruta del archivo creado
         """
-        first_chunk = True
+        with metrics.stage("export") as s:
+            total_rows, sheets = self._write_workbook(chunks, auto_width, verbose=True)
+            s.rows, s.bytes_written = total_rows, self.output_path.stat().st_size
+        
+        print(f"[OK] Exportado: {self.output_path} ({total_rows:,} filas totales{_sheets_note(sheets)})")
+        return str(self.output_path)
+    
+    def _write_workbook(
+        self,
+        chunks: Iterator[pd.DataFrame],
+        auto_width: bool,
+        verbose: bool
+    ) -> Tuple[int, int]:
+        """
+        Escribe los chunks en el workbook, rotando de hoja al llenarse.
+        
+        Un chunk que no cabe en la hoja actual se parte (vistas con iloc,
+        sin copiar ni acumular filas) y el resto sigue en la hoja siguiente.
+        
+        Returns:
+            Tupla (filas escritas, hojas creadas)
+        """
         total_rows = 0
-        sample_df = None
-        
-        with pd.ExcelWriter(
-            self.output_path, 
-            engine='xlsxwriter',
-            datetime_format=self.datetime_format
-        ) as writer:
-            workbook = writer.book
-            worksheet = workbook.add_worksheet(self.sheet_name)
-            
+        sheet_rows = 0
+        widths = None
+        columns = None
+        
+        workbook, worksheet = self._open_workbook()
+        worksheets = [worksheet]
+        try:
             for chunk_num, df in enumerate(chunks):
-                if first_chunk:
+                if widths is None:
                     # Escribir headers
-                    for col_num, column in enumerate(df.columns):
-                        worksheet.write(0, col_num, column)
-                    sample_df = df.head(100)  # Para calcular anchos
-                    first_chunk = False
-                    start_row = 1
-                else:
-                    start_row = total_rows + 1
+                    columns = layout_columns(df, self.layout)
+                    self._write_header(workbook, worksheet, columns)
+                    widths = self._width_estimator(columns)
                 
-                # Escribir datos
-                for row_num, row in enumerate(df.itertuples(index=False)):
-                    for col_num, value in enumerate(row):
-                        worksheet.write(start_row + row_num, col_num, value)
+                if auto_width:
+                    with metrics.stage("column_widths"):
+                        widths.observe(df)
+                
+                # Escribir datos, partiendo el chunk si la hoja se llena
+                offset = 0
+                while offset < len(df):
+                    if sheet_rows >= self.max_rows_per_sheet:
+                        worksheet = self._add_worksheet(workbook, len(worksheets) + 1)
+                        worksheets.append(worksheet)
+                        self._write_header(workbook, worksheet, columns)
+                        sheet_rows = 0
+                    
+                    take = min(len(df) - offset, self.max_rows_per_sheet - sheet_rows)
+                    piece = df if take == len(df) else df.iloc[offset:offset + take]
+                    self._write_rows(workbook, worksheet, piece, columns, start_row=sheet_rows + 1)
+                    
+                    sheet_rows += take
+                    offset += take
                 
                 total_rows += len(df)
-                print(f"  Procesado chunk {chunk_num + 1}: {len(df):,} filas")
+                if verbose:
+                    print(f"  Procesado chunk {chunk_num + 1}: {len(df):,} filas")
             
-            # Ajustar anchos usando sample
-            if auto_width and sample_df is not None:
-                self._adjust_column_widths_worksheet(worksheet, sample_df)
+            # Aplicar anchos medidos durante el streaming a todas las hojas
+            if widths is not None:
+                with metrics.stage("column_widths"):
+                    for sheet in worksheets:
+                        widths.apply(sheet)
+        finally:
+            workbook.close()
         
-        print(f"[OK] Exportado: {self.output_path} ({total_rows:,} filas totales)")
+        return total_rows, len(worksheets)
+    
+    def _open_workbook(self):
+        """Crea el workbook en modo constant_memory y la hoja de datos."""
+        import xlsxwriter  # Solo se carga al exportar a Excel
+        
+        workbook = xlsxwriter.Workbook(
+            str(self.output_path),
+            {
+                "constant_memory": True,
+                "nan_inf_to_errors": True,
+            }
+        )
+        self._formats = {}
+        return workbook, self._add_worksheet(workbook, 1)
+    
+    def _add_worksheet(self, workbook, number: int):
+        """
+        Agrega la hoja número `number`: la primera usa sheet_name y las
+        siguientes "<sheet_name> (n)", recortando a 31 caracteres (límite Excel).
+        """
+        if number == 1:
+            return workbook.add_worksheet(self.sheet_name[:EXCEL_MAX_SHEET_NAME])
+        
+        suffix = f" ({number})"
+        base = self.sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)]
+        return workbook.add_worksheet(f"{base}{suffix}")
+    
+    def _write_header(self, workbook, worksheet, columns) -> None:
+        """Escribe la fila de encabezados con el mismo estilo que pandas."""
+        header_format = self._get_format(workbook, "header", {
+            "bold": True,
+            "border": 1,
+            "align": "center",
+            "valign": "top",
+        })
+        for col_num, column in enumerate(columns):
+            worksheet.write_string(0, col_num, str(column), header_format)
+    
+    def _write_rows(self, workbook, worksheet, df: pd.DataFrame, columns, start_row: int) -> None:
+        """
+        Escribe las filas de un DataFrame fila por fila.
+        
+        El escritor de cada columna se elige una sola vez según su tipo,
+        y los valores nulos o vacíos no se escriben (quedan en blanco).
+        """
+        writers = self._column_writers(workbook, worksheet, df, columns)
+        if not writers:
+            return
+        
+        for offset in range(len(df)):
+            row = start_row + offset
+            for col_num, write, values in writers:
+                value = values[offset]
+                if value is not None:
+                    write(row, col_num, value)
+    
+    def _column_writers(
+        self,
+        workbook,
+        worksheet,
+        df: pd.DataFrame,
+        columns
+    ) -> List[Tuple[int, Callable, list]]:
+        """
+        Prepara (columna, escritor, valores) para cada columna con datos.
+        Los valores se convierten a listas de Python con None en los nulos.
+        
+        Con layout, las copias reutilizan los valores de su origen y las
+        constantes vacías no se escriben.
+        """
+        constants = self.layout.constants if self.layout else {}
+        origins = self.layout.origins if self.layout else {}
+        
+        prepared: Dict[str, Optional[Tuple[str, list]]] = {}
+        writers = []
+        for col_num, column in enumerate(columns):
+            if column in df.columns:
+                source = column
+            elif column in constants:
+                value = constants[column]
+                if value is None or value == "":
+                    continue
+                series = pd.Series([value] * len(df))
+                prepared[column] = _column_values(series)
+                source = column
+            else:
+                source = origins[column]
+            
+            if source not in prepared:
+                prepared[source] = _column_values(df[source])
+            if prepared[source] is None:
+                continue
+            
+            kind, values = prepared[source]
+            write = self._writer(workbook, worksheet, kind, self._number_formats.get(column))
+            writers.append((col_num, write, values))
+        
+        return writers
+    
+    def _writer(self, workbook, worksheet, kind: str, num_format: str = None) -> Callable:
+        """
+        Función de escritura de celdas para un tipo de columna. num_format
+        (formato declarado en el layout) reemplaza el formato de fecha o
+        se aplica a los números.
+        """
+        if kind == "datetime":
+            num_format = num_format or excel_number_format(self.datetime_format)
+        if num_format:
+            cell_format = self._get_format(workbook, f"num_format:{num_format}", {
+                "num_format": num_format,
+            })
+        
+        if kind in ("datetime", "number"):
+            if num_format:
+                return lambda row, col, value: worksheet.write_number(row, col, value, cell_format)
+            return worksheet.write_number
+        if kind == "boolean":
+            return worksheet.write_boolean
+        if kind == "string":
+            return worksheet.write_string
+        return worksheet.write
+    
+    def _get_format(self, workbook, name: str, properties: Dict[str, Any]):
+        """Crea (una vez por workbook) y retorna un formato de celda."""
+        if name not in self._formats:
+            self._formats[name] = workbook.add_format(properties)
+        return self._formats[name]
+    
+    def _width_estimator(self, columns) -> "ColumnWidthEstimator":
+        """Crea el estimador de anchos para las columnas del export."""
+        return ColumnWidthEstimator(
+            columns,
+            fixed_widths=self.column_widths,
+            date_width=len(excel_number_format(self.datetime_format)),
+            layout=self.layout
+        )
+
+
+class ColumnWidthEstimator:
+    """
+    Estima el ancho de columnas a partir de muestras de los datos.
+    
+    En lugar de convertir todo el DataFrame a strings, toma una muestra
+    estratificada (filas equiespaciadas) de cada chunk y mide longitudes
+    de forma vectorizada. El máximo se acumula entre chunks, por lo que
+    el ancho final refleja todo el streaming.
+    
+    Uso:
+        widths = ColumnWidthEstimator(df.columns, fixed_widths={"ID": 12})
+        widths.observe(chunk)      # por cada chunk
+        widths.apply(worksheet)    # al final
+    """
+    
+    def __init__(
+        self,
+        columns,
+        fixed_widths: Dict[str, float] = None,
+        sample_rows: int = None,
+        max_width: int = None,
+        date_width: int = 10,
+        padding: int = 2,
+        layout=None
+    ):
+        """
+        Args:
+            columns: Columnas del export, en orden
+            fixed_widths: Anchos fijos {columna: ancho} que no se estiman
+            sample_rows: Filas a muestrear por chunk
+            max_width: Ancho máximo permitido
+            date_width: Ancho de las columnas de fecha
+            padding: Espacio adicional por columna
+            layout: ColumnLayout; las copias se miden por su origen y las
+                    constantes por su valor
+        """
+        self.columns = list(columns)
+        self.fixed_widths = fixed_widths or {}
+        self.sample_rows = sample_rows or EXPORT_CONFIG.width_sample_rows
+        self.max_width = max_width or EXPORT_CONFIG.max_column_width
+        self.date_width = date_width
+        self.padding = padding
+        
+        # Longitud máxima observada por columna (inicia con el header)
+        self._lengths: Dict[str, int] = {
+            column: len(str(column)) for column in self.columns
+        }
+        
+        # Copias del layout: {columna: columna leída de la que sale}
+        self._origins: Dict[str, str] = {}
+        if layout is not None:
+            for column, value in layout.constants.items():
+                if column in self._lengths and value is not None:
+                    self._lengths[column] = max(self._lengths[column], len(str(value)))
+            self._origins = {
+                column: origin for column, origin in layout.origins.items()
+                if column != origin
+            }
+    
+    def observe(self, df: pd.DataFrame) -> None:
+        """Actualiza las longitudes máximas con una muestra del chunk."""
+        sample = stratified_sample(df, self.sample_rows)
+        
+        for column in self.columns:
+            if column in self.fixed_widths or column not in sample.columns:
+                continue
+            length = self._measure(sample[column])
+            if length > self._lengths[column]:
+                self._lengths[column] = length
+    
+    def _measure(self, series: pd.Series) -> int:
+        """Longitud máxima de los valores de una columna (vectorizada)."""
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return self.date_width if series.notna().any() else 0
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = pd.Series(used_categories(series))
+        
+        lengths = series.astype("string").str.len()
+        length = lengths.max()
+        return 0 if pd.isna(length) else int(length)
+    
+    def widths(self) -> Dict[int, float]:
+        """Retorna {índice de columna: ancho} con padding y tope aplicados."""
+        result = {}
+        for idx, column in enumerate(self.columns):
+            if column in self.fixed_widths:
+                result[idx] = self.fixed_widths[column]
+                continue
+            length = self._lengths[column]
+            if column in self._origins:
+                length = max(length, self._lengths.get(self._origins[column], 0))
+            result[idx] = min(length + self.padding, self.max_width)
+        return result
+    
+    def apply(self, worksheet) -> None:
+        """Aplica los anchos a la hoja."""
+        for idx, width in self.widths().items():
+            worksheet.set_column(idx, idx, width)
+
+
+def _sheets_note(sheets: int) -> str:
+    """Sufijo para el mensaje de exportación cuando hubo varias hojas."""
+    return f", {sheets} hojas" if sheets > 1 else ""
+
+
+def stratified_sample(df: pd.DataFrame, n_rows: int) -> pd.DataFrame:
+    """
+    Toma n_rows filas equiespaciadas del DataFrame (incluye la primera y
+    la última). Si el DataFrame es menor, lo retorna completo.
+    """
+    if len(df) <= n_rows:
+        return df
+    positions = np.linspace(0, len(df) - 1, n_rows).astype(np.int64)
+    return df.iloc[positions]
+
+
+def layout_columns(df: pd.DataFrame, layout=None) -> List[str]:
+    """
+    Columnas que se escriben: las del layout en orden del template más
+    las de df fuera del layout (al final), o las de df si no hay layout.
+    """
+    if layout is None:
+        return list(df.columns)
+    return layout.names + [column for column in df.columns if column not in layout.names]
+
+
+def column_kind(series: pd.Series) -> str:
+    """
+    Clasifica una columna para elegir su escritor.
+    
+    Returns:
+        'number', 'datetime', 'boolean', 'string', 'blank' (todo nulo o
+        vacío) u 'object' (tipos mixtos, usa worksheet.write)
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Se clasifica por las categorías en uso, sin expandir las filas
+        return column_kind(pd.Series(used_categories(series)))
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "number" if series.notna().any() else "blank"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime" if series.notna().any() else "blank"
+    
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred == "empty":
+        return "blank"
+    if inferred == "string":
+        return "string" if (series.notna() & (series != "")).any() else "blank"
+    if inferred in ("integer", "floating", "mixed-integer-float", "decimal"):
+        return "number"
+    if inferred in ("datetime", "datetime64", "date"):
+        return "datetime"
+    if inferred == "boolean":
+        return "boolean"
+    return "object"
+
+
+def used_categories(series: pd.Series) -> pd.Index:
+    """Categorías que aparecen en una columna categórica."""
+    codes = series.cat.codes.to_numpy()
+    return series.cat.categories.take(np.unique(codes[codes >= 0]))
+
+
+def excel_number_format(datetime_format: str) -> str:
+    """Traduce un formato strftime (ej: '%Y-%m-%d') a formato de Excel."""
+    replacements = {
+        "%Y": "yyyy", "%y": "yy", "%m": "mm", "%d": "dd",
+        "%H": "hh", "%M": "mm", "%S": "ss",
+    }
+    result = datetime_format
+    for token, excel in replacements.items():
+        result = result.replace(token, excel)
+    return result
+
+
+def _column_values(series: pd.Series) -> Optional[Tuple[str, list]]:
+    """
+    (tipo, valores) de una columna para escribirla en Excel, o None si
+    está en blanco. Los valores son listas de Python con None en los nulos.
+    """
+    kind = column_kind(series)
+    if kind == "blank":
+        return None
+    if kind == "datetime":
+        return kind, _excel_serial_dates(series)
+    if kind == "number":
+        return kind, _nullable_list(series, dtype="float64")
+    if kind == "string":
+        return kind, _nullable_list(series, empty_as_null=True)
+    return kind, _nullable_list(series)
+
+
+def _nullable_list(
+    series: pd.Series,
+    dtype: str = None,
+    empty_as_null: bool = False
+) -> list:
+    """Convierte una columna a lista de Python con None en los nulos."""
+    mask = series.isna().to_numpy()
+    if empty_as_null:
+        mask = mask | (series == "").to_numpy(dtype=bool, na_value=False)
+    
+    if dtype and pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.to_numpy(dtype=dtype, na_value=np.nan).astype(object)
+    elif dtype:
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=dtype).astype(object)
+    else:
+        values = series.to_numpy(dtype=object)
+    
+    values[mask] = None
+    return values.tolist()
+
+
+def _excel_serial_dates(series: pd.Series) -> list:
+    """
+    Convierte fechas a número serial de Excel de forma vectorizada
+    (días desde 1899-12-30), con None en los nulos.
+    """
+    dates = pd.to_datetime(series, errors="coerce")
+    serial = (dates - _EXCEL_EPOCH) / pd.Timedelta(days=1)
+    values = serial.to_numpy(dtype="float64", na_value=np.nan).astype(object)
+    values[dates.isna().to_numpy()] = None
+    return values.tolist()
+
+
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+
+# ============================================
+# BACKENDS COLUMNARES Y CSV
+# ============================================
+
+class _ChunkFileExporter(ABC):
+    """
+    Base para exportadores no-Excel.
+    
+    Comparten la interfaz de ExcelExporter (export / export_chunks) para
+    que los reportes puedan cambiar de formato sin cambiar el flujo.
+    Las subclases implementan _open(), _write() y _close().
+    """
+    
+    format_label: str = ""
+    
+    def __init__(self, output_path: str, datetime_format: str = None, layout=None):
+        """
+        Args:
+            output_path: Ruta del archivo a crear
+            datetime_format: Formato para fechas (estilo strftime, solo CSV)
+            layout: ColumnLayout del template (ver reports/columns.py).
+                    Los DataFrames traen solo sus columnas leídas.
+        """
+        self.output_path = Path(output_path)
+        self.datetime_format = datetime_format or EXPORT_CONFIG.datetime_format
+        self.layout = layout
+        
+        # Crear directorio si no existe
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    def export(self, df: pd.DataFrame, auto_width: bool = True) -> str:
+        """
+        Exporta un DataFrame completo.
+        
+        Args:
+            df: DataFrame a exportar
+            auto_width: Sin efecto (solo aplica a Excel)
+            
+        Returns:
+            Ruta del archivo creado
+        """
+        with metrics.stage("export") as s:
+            total_rows = self._write_all(iter([df]), verbose=False)
+            s.rows, s.bytes_written = total_rows, self.output_path.stat().st_size
+        print(f"[OK] Exportado: {self.output_path} ({total_rows:,} filas)")
         return str(self.output_path)
     
-    def _adjust_column_widths(self, writer, df: pd.DataFrame) -> None:
-        """Ajusta el ancho de columnas basado en el contenido."""
-        worksheet = writer.sheets[self.sheet_name]
+    def export_chunks(
+        self,
+        chunks: Iterator[pd.DataFrame],
+        auto_width: bool = True
+    ) -> str:
+        """
+        Exporta chunks a medida que llegan; solo el chunk actual vive en memoria.
         
-        for idx, col in enumerate(df.columns):
-            # Calcular ancho máximo
-            max_len = max(
-                df[col].astype(str).map(len).max(),
-                len(str(col))
-            ) + 2  # Padding
+        Args:
+            chunks: Iterador de DataFrames
+            auto_width: Sin efecto (solo aplica a Excel)
             
-            # Limitar ancho máximo
-            max_len = min(max_len, 50)
+        Returns:
+            Ruta del archivo creado
+        """
+        with metrics.stage("export") as s:
+            total_rows = self._write_all(chunks, verbose=True)
+            s.rows, s.bytes_written = total_rows, self.output_path.stat().st_size
+        print(f"[OK] Exportado: {self.output_path} ({total_rows:,} filas totales)")
+        return str(self.output_path)
+    
+    def _write_all(self, chunks: Iterator[pd.DataFrame], verbose: bool) -> int:
+        """Escribe todos los chunks y retorna el total de filas."""
+        total_rows = 0
+        opened = False
+        try:
+            for chunk_num, df in enumerate(chunks):
+                if not opened:
+                    self._open(df)
+                    opened = True
+                
+                self._write(df)
+                
+                total_rows += len(df)
+                if verbose:
+                    print(f"  Procesado chunk {chunk_num + 1}: {len(df):,} filas")
             
-            worksheet.set_column(idx, idx, max_len)
+            if not opened:
+                # Sin datos: se crea el archivo vacío igualmente
+                self._open(pd.DataFrame())
+                opened = True
+        finally:
+            if opened:
+                self._close()
+        
+        return total_rows
+    
+    def _expand(self, df: pd.DataFrame) -> pd.DataFrame:
+        """DataFrame con todas las columnas del template (ver ColumnLayout.expand)."""
+        return self.layout.expand(df) if self.layout is not None else df
+    
+    @abstractmethod
+    def _open(self, first: pd.DataFrame) -> None:
+        """Crea el archivo a partir del primer chunk (vacío si no hay datos)."""
+        pass
+    
+    @abstractmethod
+    def _write(self, df: pd.DataFrame) -> None:
+        """Escribe un chunk."""
+        pass
     
-    def _adjust_column_widths_worksheet(self, worksheet, df: pd.DataFrame) -> None:
-        """Ajusta el ancho de columnas en un worksheet existente."""
-        for idx, col in enumerate(df.columns):
-            max_len = max(
-                df[col].astype(str).map(len).max(),
-                len(str(col))
-            ) + 2
-            max_len = min(max_len, 50)
-            worksheet.set_column(idx, idx, max_len)
+    @abstractmethod
+    def _close(self) -> None:
+        """Cierra el archivo; se llama aunque la escritura falle."""
+        pass
+
+
+class _ArrowFileExporter(_ChunkFileExporter):
+    """
+    Base para Parquet y Arrow IPC.
+    
+    El schema lo fija ArrowChunkSchema con los primeros chunks y se impone
+    a los siguientes, así el archivo es consistente aunque un chunk tenga
+    una columna toda nula o enteros con NULL (que pandas entrega como
+    float). El writer se crea al fijarse el schema.
+    
+    Con layout solo se convierten las columnas leídas: las copias
+    comparten el array Arrow de su origen y las constantes son
+    diccionarios de un valor con índices en cero.
+    """
+    
+    def __init__(self, output_path: str, datetime_format: str = None, layout=None):
+        super().__init__(output_path, datetime_format, layout)
+        self._pa = _import_pyarrow()
+        self._schemas: Optional[ArrowChunkSchema] = None
+        self._empty: Optional[pd.DataFrame] = None
+        self._writer = None
+    
+    def _to_table(self, df: pd.DataFrame):
+        schema = self._schemas.schema
+        if self.layout is None:
+            return self._pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        
+        fetched = self._pa.schema([schema.field(column) for column in df.columns])
+        table = self._pa.Table.from_pandas(df, schema=fetched, preserve_index=False)
+        arrays = []
+        for field in schema:
+            if field.name in fetched.names:
+                arrays.append(table.column(field.name))
+            elif field.name in self.layout.constants:
+                arrays.append(self._constant_array(field, self.layout.constants[field.name], len(df)))
+            else:
+                arrays.append(table.column(self.layout.origins[field.name]))
+        return self._pa.Table.from_arrays(arrays, schema=schema)
+    
+    def _constant_array(self, field, value, length: int):
+        """Columna constante con el tipo del schema."""
+        pa = self._pa
+        if value is None:
+            return pa.nulls(length, type=field.type)
+        if pa.types.is_dictionary(field.type):
+            return pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(length, dtype=np.int32)),
+                pa.array([value], type=field.type.value_type)
+            )
+        return pa.array([value] * length, type=field.type)
+    
+    def _open(self, first: pd.DataFrame) -> None:
+        self._schemas = ArrowChunkSchema()
+        self._empty = first.head(0)
+    
+    def _write(self, df: pd.DataFrame) -> None:
+        # Los tipos salen del chunk expandido (incluye las constantes)
+        sample = self._expand(df) if self._schemas.schema is None else None
+        for ready in self._schemas.add(df, sample):
+            self._write_table(ready)
+    
+    def _write_table(self, df: pd.DataFrame) -> None:
+        if self._writer is None:
+            self._writer = self._new_writer(self._schemas.schema)
+        self._writer.write_table(self._to_table(self._schemas.conform(df)))
+    
+    def _close(self) -> None:
+        held = self._schemas.finish()
+        if self._schemas.schema is None:
+            # Sin chunks: archivo vacío (con las columnas del template si se conocen)
+            sample = self._expand(self._empty) if len(self._empty.columns) else self._empty
+            self._schemas.add(self._empty, sample)
+            self._schemas.finish()
+        for ready in held:
+            self._write_table(ready)
+        if self._writer is None:
+            self._writer = self._new_writer(self._schemas.schema)
+        self._writer.close()
+    
+    @abstractmethod
+    def _new_writer(self, schema):
+        """Writer de pyarrow (con write_table y close) para el schema dado."""
+        pass
+
+
+class ParquetExporter(_ArrowFileExporter):
+    """Exporta a Parquet; cada chunk se escribe como un row group."""
+    
+    format_label = "Parquet"
+    
+    def _new_writer(self, schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(
+            str(self.output_path),
+            schema,
+            compression=EXPORT_CONFIG.parquet_compression
+        )
+
+
+class ArrowExporter(_ArrowFileExporter):
+    """Exporta a Arrow IPC (formato archivo, compatible con Feather v2)."""
+    
+    format_label = "Arrow IPC"
+    
+    def _new_writer(self, schema):
+        # Los diccionarios (columnas categóricas) crecen entre chunks: el
+        # formato archivo solo admite deltas, no reemplazos
+        options = self._pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        return self._pa.ipc.new_file(str(self.output_path), schema, options=options)
+
+
+class CsvExporter(_ChunkFileExporter):
+    """Exporta a CSV (UTF-8) agregando cada chunk al final del archivo."""
+    
+    format_label = "CSV"
+    
+    def __init__(self, output_path: str, datetime_format: str = None, layout=None):
+        super().__init__(output_path, datetime_format, layout)
+        self._file = None
+    
+    def _open(self, first: pd.DataFrame) -> None:
+        self._file = open(self.output_path, "w", encoding="utf-8", newline="")
+        self._expand(first.head(0)).to_csv(self._file, index=False)
+    
+    def _write(self, df: pd.DataFrame) -> None:
+        self._expand(df).to_csv(
+            self._file,
+            index=False,
+            header=False,
+            date_format=self.datetime_format
+        )
+    
+    def _close(self) -> None:
+        self._file.close()
+
+
+# Formatos de salida: {formato: (clase exportadora, extensión)}
+EXPORT_FORMATS: Dict[str, Tuple[type, str]] = {
+    "xlsx": (ExcelExporter, "xlsx"),
+    "parquet": (ParquetExporter, "parquet"),
+    "arrow": (ArrowExporter, "arrow"),
+    "csv": (CsvExporter, "csv"),
+}
+
+
+def create_exporter(
+    output_format: str,
+    output_path: str,
+    sheet_name: str = "Data",
+    column_widths: Dict[str, float] = None,
+    layout=None
+):
+    """
+    Crea el exportador para un formato de salida.
+    
+    Args:
+        output_format: Formato (ver EXPORT_FORMATS)
+        output_path: Ruta del archivo a crear
+        sheet_name: Nombre de la hoja (solo Excel)
+        column_widths: Anchos fijos de columnas (solo Excel)
+        layout: ColumnLayout del template (ver reports/columns.py)
+        
+    Returns:
+        Exportador con métodos export() y export_chunks()
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Formato '{output_format}' no soportado. "
+            f"Opciones: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    exporter_class, _ = EXPORT_FORMATS[output_format]
+    if exporter_class is ExcelExporter:
+        return ExcelExporter(output_path, sheet_name, column_widths=column_widths, layout=layout)
+    return exporter_class(output_path, layout=layout)
+
+
+class ArrowChunkSchema:
+    """
+    Schema Arrow común a los chunks de un archivo.
+    
+    Cada columna toma el tipo del primer chunk en que trae valores: si el
+    primero tiene columnas todas nulas (ej: MIN_PO_DATE sin órdenes), los
+    chunks se retienen hasta que llega uno con su tipo o se acumulan
+    EXPORT_CONFIG.schema_hold_rows filas. Las que sigan sin tipo se
+    declaran string y, si un chunk posterior trae valores, se escriben
+    como texto. Los diccionarios (categóricas) usan índices int32 porque
+    los chunks siguientes pueden traer más categorías que el primero.
+    
+    Uso:
+        schemas = ArrowChunkSchema()
+        for chunk in chunks:
+            for ready in schemas.add(chunk):
+                write(schemas.schema, schemas.conform(ready))
+        for ready in schemas.finish():
+            write(schemas.schema, schemas.conform(ready))
+    """
+    
+    def __init__(self, hold_rows: int = None):
+        """
+        Args:
+            hold_rows: Filas retenidas como máximo mientras haya columnas
+                       sin tipo. Usa EXPORT_CONFIG.schema_hold_rows.
+        """
+        self._pa = _import_pyarrow()
+        self.hold_rows = EXPORT_CONFIG.schema_hold_rows if hold_rows is None else hold_rows
+        self.schema = None
+        self._pending = None  # Schema con los tipos vistos hasta ahora
+        self._held: List[pd.DataFrame] = []
+        self._held_rows = 0
+        self._untyped: List[str] = []  # Declaradas string sin haber visto valores
+        self._warned: set = set()
+    
+    def add(self, df: pd.DataFrame, sample: pd.DataFrame = None) -> List[pd.DataFrame]:
+        """
+        Registra un chunk.
+        
+        Args:
+            df: Chunk a escribir
+            sample: DataFrame del que se toman los tipos (default: df), ej:
+                    el chunk expandido al layout
+        
+        Returns:
+            Chunks listos para escribir, en orden (vacía mientras se retienen)
+        """
+        if self.schema is not None:
+            return [df]
+        
+        pa = self._pa
+        schema = arrow_schema(df if sample is None else sample)
+        if self._pending is None:
+            self._pending = schema
+        else:
+            for idx, field in enumerate(self._pending):
+                position = schema.get_field_index(field.name)
+                if pa.types.is_null(field.type) and position >= 0:
+                    self._pending = self._pending.set(idx, schema.field(position))
+        
+        self._held.append(df)
+        self._held_rows += len(df)
+        untyped = any(pa.types.is_null(field.type) for field in self._pending)
+        if untyped and self._held_rows < self.hold_rows:
+            return []
+        return self.finish()
+    
+    def finish(self) -> List[pd.DataFrame]:
+        """Fija el schema (las columnas aún sin tipo como string) y retorna los chunks retenidos."""
+        if self.schema is None and self._pending is not None:
+            schema = self._pending
+            for idx, field in enumerate(schema):
+                if self._pa.types.is_null(field.type):
+                    schema = schema.set(idx, field.with_type(self._pa.large_string()))
+                    self._untyped.append(field.name)
+            self.schema = schema
+        
+        held, self._held, self._held_rows = self._held, [], 0
+        return held
+    
+    def conform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Pasa a texto los valores de las columnas declaradas string sin tipo."""
+        for name in self._untyped:
+            if name not in df.columns:
+                continue
+            values = df[name]
+            if not values.notna().any() or pd.api.types.is_string_dtype(values):
+                continue
+            if name not in self._warned:
+                self._warned.add(name)
+                print(f"[WARN] {name} no trajo valores en las primeras {self.hold_rows:,} filas; "
+                      f"se escribe como texto")
+            df = df.assign(**{name: values.astype(object).where(values.notna()).map(
+                lambda value: value if value is None or pd.isna(value) else str(value)
+            )})
+        return df
+
+
+def arrow_schema(df: pd.DataFrame):
+    """
+    Schema Arrow de un DataFrame, con los diccionarios (categóricas) con
+    índices int32. Las columnas sin ningún valor quedan con tipo null
+    (ver ArrowChunkSchema).
+    """
+    pa = _import_pyarrow()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for idx, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            widened = pa.dictionary(pa.int32(), field.type.value_type)
+            schema = schema.set(idx, field.with_type(widened))
+    return schema
+
+
+def _import_pyarrow():
+    """Importa pyarrow (dependencia opcional, solo para Parquet/Arrow)."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Los formatos parquet y arrow requieren pyarrow: pip install pyarrow"
+        ) from e
+    return pyarrow
 
 
 def export_dataframe(
     df: pd.DataFrame, 
     output_path: str, 
-    sheet_name: str = "Data"
+    sheet_name: str = "Data",
+    output_format: str = "xlsx",
+    column_widths: Dict[str, float] = None,
+    auto_width: bool = True,
+    layout=None
 ) -> str:
     """
     Función de utilidad para exportar un DataFrame rápidamente.
+    Al ser de nivel módulo puede ejecutarse en un ProcessPoolExecutor.
     
     Args:
         df: DataFrame a exportar
-        output_path: Ruta del archivo Excel
-        sheet_name: Nombre de la hoja
+        output_path: Ruta del archivo
+        sheet_name: Nombre de la hoja (solo Excel)
+        output_format: Formato de salida (ver EXPORT_FORMATS)
+        column_widths: Anchos fijos de columnas (solo Excel)
+        auto_width: Si estimar el ancho de columnas (solo Excel)
+        layout: ColumnLayout del template; df trae solo las columnas leídas
         
     Returns:
         Ruta del archivo creado
     """
-    exporter = ExcelExporter(output_path, sheet_name)
-    return exporter.export(df)
+    exporter = create_exporter(output_format, output_path, sheet_name, column_widths, layout)
+    return exporter.export(df, auto_width=auto_width)
 
 
-def generate_output_filename(report_name: str, extension: str = "xlsx") -> str:
+def generate_output_filename(
+    report_name: str,
+    extension: str = None,
+    output_format: str = "xlsx"
+) -> str:
     """
     Genera un nombre de archivo con timestamp.
     
     Args:
         report_name: Nombre base del reporte
-        extension: Extensión del archivo
+        extension: Extensión del archivo. Si no se indica, se usa la
+                   del formato de salida.
+        output_format: Formato de salida (ver EXPORT_FORMATS)
         
     Returns:
         Nombre de archivo con timestamp
     """
+    if extension is None:
+        extension = EXPORT_FORMATS[output_format][1]
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"{report_name}_{timestamp}.{extension}"
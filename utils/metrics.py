@@ -0,0 +1,329 @@
+"""
+Métricas por etapa de cada corrida de reporte
+==============================================
+Mide cada etapa de un reporte (fetch, transform, column_mapping, export,
+column_widths, caché) y emite un registro JSON por corrida a los hooks
+registrados (archivo JSON Lines con --metrics-file, o cualquier función).
+
+Por etapa se registra:
+- wall_seconds: tiempo exclusivo de la etapa. Las etapas anidadas se
+  descuentan de la que las contiene: en streaming el export consume el
+  iterador del fetch, y el tiempo de fetch no se cuenta como export.
+- cpu_seconds: CPU del proceso en ese tiempo (wall alto y CPU bajo indica
+  espera de BD o red).
+- rows, rows_per_sec, bytes_written (exportadores)
+- peak_rss_mb: pico de memoria del proceso al terminar la etapa
+- calls: veces que se ejecutó (una por chunk en streaming)
+- contadores propios de la etapa (ej: memory_before_bytes de "dtypes")
+
+Las etapas se registran en el recorder activo del thread actual; sin
+recorder activo stage() no hace nada, así que el código instrumentado
+funciona igual fuera de generate().
+
+Uso:
+    recorder = MetricsRecorder("supplier_header", options={...})
+    with recorder.activate():
+        with stage("fetch") as s:
+            df = fetch()
+            s.rows = len(df)
+    emit(recorder.finish(output_path=path))
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import sys
+sys.path.insert(0, '..')
+from config.settings import METRICS_CONFIG
+
+# Etapas más cortas que esto no informan filas/s (el cociente no es significativo)
+MIN_RATE_SECONDS = 0.001
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS bytes
+        return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, "peak_wset", info.rss) / 2 ** 20, 1)
+
+
+class _Frame:
+    """Etapa en ejecución: lo que el código instrumentado puede informar."""
+    
+    __slots__ = ("name", "rows", "bytes_written", "counters", "child_wall", "child_cpu")
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.bytes_written = 0
+        self.counters: Dict[str, float] = {}  # Se suman en el registro de la etapa
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+
+
+class MetricsRecorder:
+    """
+    Acumula las etapas de una corrida de reporte.
+    
+    No es thread-safe: cada corrida usa su propio recorder, activo solo en
+    el thread que la ejecuta.
+    """
+    
+    def __init__(self, report: str, options: Dict[str, Any] = None):
+        self.report = report
+        self.options = options or {}
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[_Frame] = []
+        self._started_at = datetime.now()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+    
+    @contextmanager
+    def activate(self) -> Iterator["MetricsRecorder"]:
+        """Hace de este el recorder de stage() en el thread actual."""
+        previous = getattr(_ACTIVE, "recorder", None)
+        _ACTIVE.recorder = self
+        try:
+            yield self
+        finally:
+            _ACTIVE.recorder = previous
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[_Frame]:
+        """Mide una etapa; se acumula si ya existe (chunks)."""
+        frame = _Frame(name)
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(frame)
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield frame
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            self._stack.pop()
+            if parent is not None:
+                parent.child_wall += wall
+                parent.child_cpu += cpu
+            self._add(frame, wall - frame.child_wall, cpu - frame.child_cpu)
+    
+    def _add(self, frame: _Frame, wall: float, cpu: float) -> None:
+        entry = self.stages.setdefault(frame.name, {
+            "wall_seconds": 0.0, "cpu_seconds": 0.0, "rows": 0,
+            "bytes_written": 0, "calls": 0, "peak_rss_mb": None,
+        })
+        entry["wall_seconds"] += wall
+        entry["cpu_seconds"] += cpu
+        entry["rows"] += frame.rows
+        entry["bytes_written"] += frame.bytes_written
+        entry["calls"] += 1
+        for name, value in frame.counters.items():
+            entry[name] = entry.get(name, 0) + value
+        entry["peak_rss_mb"] = peak_rss_mb()
+    
+    def merge(self, stages: Dict[str, Dict[str, Any]]) -> None:
+        """Suma etapas medidas en otro proceso (ver stage_snapshot)."""
+        for name, other in stages.items():
+            entry = self.stages.setdefault(name, {})
+            for field, value in other.items():
+                if field == "peak_rss_mb":
+                    entry[field] = value
+                else:
+                    entry[field] = entry.get(field, 0) + value
+    
+    def finish(
+        self,
+        status: str = "ok",
+        error: Exception = None,
+        output_path: str = None
+    ) -> Dict[str, Any]:
+        """
+        Cierra la corrida y arma el registro.
+        
+        Returns:
+            Dict serializable a JSON (un registro por corrida)
+        """
+        stages = {}
+        for name, entry in self.stages.items():
+            wall = entry["wall_seconds"]
+            stages[name] = dict(
+                entry,
+                wall_seconds=round(wall, 4),
+                cpu_seconds=round(entry["cpu_seconds"], 4),
+                rows_per_sec=round(entry["rows"] / wall, 1) if entry["rows"] and wall >= MIN_RATE_SECONDS else None,
+            )
+        
+        return {
+            "report": self.report,
+            "status": status,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "started_at": self._started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "wall_seconds": round(time.perf_counter() - self._start_wall, 4),
+            "cpu_seconds": round(time.process_time() - self._start_cpu, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "pid": os.getpid(),
+            "output_path": output_path,
+            "bytes_written": sum(entry["bytes_written"] for entry in self.stages.values()),
+            "options": self.options,
+            "stages": stages,
+        }
+
+
+# Recorder activo por thread
+_ACTIVE = threading.local()
+
+
+def current() -> Optional[MetricsRecorder]:
+    """Recorder activo en el thread actual, o None."""
+    return getattr(_ACTIVE, "recorder", None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[_Frame]:
+    """Mide una etapa en el recorder activo (no hace nada si no hay)."""
+    recorder = current()
+    if recorder is None:
+        yield _Frame(name)
+        return
+    with recorder.stage(name) as frame:
+        yield frame
+
+
+def timed_iter(name: str, chunks: Iterator) -> Iterator:
+    """
+    Entrega los chunks de un iterador midiendo solo el tiempo de obtener
+    cada uno (no el de quien los consume).
+    """
+    iterator = iter(chunks)
+    while True:
+        with stage(name) as frame:
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            frame.rows += len(chunk)
+        yield chunk
+
+
+def stage_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Copia de las etapas del recorder activo (para enviar entre procesos)."""
+    recorder = current()
+    return {name: dict(entry) for name, entry in recorder.stages.items()} if recorder else {}
+
+
+# ============================================
+# HOOKS
+# ============================================
+MetricsHook = Callable[[Dict[str, Any]], None]
+
+_HOOKS: List[MetricsHook] = []
+_HOOKS_LOCK = threading.Lock()
+
+
+def register_hook(hook: MetricsHook) -> None:
+    """Registra una función que recibe cada registro de métricas."""
+    with _HOOKS_LOCK:
+        if hook not in _HOOKS:
+            _HOOKS.append(hook)
+
+
+def unregister_hook(hook: MetricsHook) -> None:
+    with _HOOKS_LOCK:
+        if hook in _HOOKS:
+            _HOOKS.remove(hook)
+
+
+class JsonLinesHook:
+    """Agrega cada registro como una línea JSON a un archivo."""
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+    
+    def __call__(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, JsonLinesHook) and other.path == self.path
+    
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+
+def add_metrics_file(path: str) -> None:
+    """Registra el archivo JSON Lines de métricas (una vez por ruta)."""
+    register_hook(JsonLinesHook(path))
+
+
+def emit(record: Dict[str, Any]) -> None:
+    """
+    Entrega el registro a los hooks registrados y a METRICS_CONFIG.file
+    (salvo dentro de collect()). Un hook que falla no interrumpe el reporte.
+    """
+    collected = getattr(_ACTIVE, "collected", None)
+    if collected is not None:
+        collected.append(record)
+        return
+    if METRICS_CONFIG.file:
+        add_metrics_file(METRICS_CONFIG.file)
+    with _HOOKS_LOCK:
+        hooks = list(_HOOKS)
+    for hook in hooks:
+        try:
+            hook(record)
+        except Exception as e:
+            print(f"[WARN] Hook de métricas falló: {e}")
+
+
+@contextmanager
+def collect() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Retiene los registros emitidos en el thread actual en vez de
+    entregarlos a los hooks. Lo usan los procesos hijos para devolver sus
+    registros al proceso principal, que es el que tiene los hooks.
+    """
+    previous = getattr(_ACTIVE, "collected", None)
+    _ACTIVE.collected = records = []
+    try:
+        yield records
+    finally:
+        _ACTIVE.collected = previous
+
+
+def print_summary(record: Dict[str, Any]) -> None:
+    """Imprime las etapas de un registro, de la más lenta a la más rápida."""
+    print("Etapas:")
+    stages = sorted(record["stages"].items(), key=lambda item: -item[1]["wall_seconds"])
+    for name, entry in stages:
+        line = f"  {name:16} {entry['wall_seconds']:>8.2f}s  CPU {entry['cpu_seconds']:>7.2f}s"
+        if entry["rows_per_sec"]:
+            line += f"  {entry['rows_per_sec']:>12,.0f} filas/s"
+        if entry["bytes_written"]:
+            line += f"  {entry['bytes_written'] / 2 ** 20:,.1f} MB escritos"
+        print(line)
+    if record["peak_rss_mb"] is not None:
+        print(f"  Pico de memoria: {record['peak_rss_mb']:,.0f} MB")